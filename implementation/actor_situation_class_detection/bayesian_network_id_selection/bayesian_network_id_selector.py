@@ -13,11 +13,12 @@ from actor_situation_class_detection.bayesian_network_id_selection.bayesian_netw
 
 from actor_situation_class_detection.situation_class import SituationClass, TwoLaneFollowingSituationClass
 
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from data_model.vehicle import EgoVehicle, OtherVehicle
     from data_model.map import Map
+    from data_model.sensing_area import EgoSensingAreas
     from simulators.simulator_controller import SimulatorController
 
 class BayesianNetworkIdSelector(object):
@@ -26,13 +27,15 @@ class BayesianNetworkIdSelector(object):
                  hero_situation_class: SituationClass,
                  other_vehicles: List["OtherVehicle"],
                  map: "Map",
-                 simulator_controller: "SimulatorController"):
+                 simulator_controller: "SimulatorController",
+                 ego_sensing_areas: Optional["EgoSensingAreas"] = None):
         self.hero_vehicle: "EgoVehicle" = hero_vehicle
         self.hero_situation_class = hero_situation_class
         self.other_vehicles: List["OtherVehicle"] = other_vehicles
 
         self.map: "Map" = map
         self._simulator_controller = simulator_controller
+        self._ego_sensing_areas = ego_sensing_areas
 
     def get_vehicle_dependent_bn_ids(self) -> List["VehicleDependentBNId"]:
         """
@@ -57,7 +60,8 @@ class BayesianNetworkIdSelector(object):
                 self.hero_vehicle,
                 self.other_vehicles,
                 self.map,
-                self._simulator_controller)
+                self._simulator_controller,
+                self._ego_sensing_areas)
 
             vehicle_dependent_bn_ids.extend(
                 two_lane_foll_bn_id_selector.get_vehicle_dependent_bn_ids_for_two_lane_following_sit_class()
@@ -9,21 +9,23 @@ from actor_situation_class_detection.bayesian_network_id_selection.bayesian_netw
 from actor_situation_class_detection.bayesian_network_id_selection.vehicle_dependent_bn_id import VehicleDependentBNId
 from actor_situation_class_detection.situation_class import LaneIdentifier, TwoLaneFollowingSituationClass
 from data_model.vehicle import VehiclePointId
+from util.geometry import points_in_polygon
 
 from sinadra_configuration_parameters import DEBUG_MODE, ACCEPTABLE_DEVIATING_ANGLE_FOR_FRONT_VEHICLE, \
     ACCEPTABLE_DISTANCE_FROM_LANE_CENTER_FOR_FRONT_VEHICLE, DEBUG_COLOR_SENSING_AREA, \
     DEBUG_COLOR_SENSING_AREA_WITH_SENSED_OBJECT, DEBUG_COLOR_DEBUG_LINE_VEHICLE_REAR_END
 
-from typing import List, Dict, TYPE_CHECKING, Union
-from shapely.geometry import Point, Polygon, LineString
+from typing import List, Dict, Optional, TYPE_CHECKING, Union
+from shapely.geometry import Polygon, LineString
 
 import math
-import statistics
+import numpy as np
 from data_model.positions import Vector3D
 
 if TYPE_CHECKING:
     from data_model.vehicle import EgoVehicle, OtherVehicle
     from data_model.map import Map
+    from data_model.sensing_area import EgoSensingAreas
     from simulators.simulator_controller import SimulatorController
 
 
@@ -33,13 +35,16 @@ class TwoLaneFollowingBNIdSelector(object):
                  hero_vehicle: "EgoVehicle",
                  other_vehicles: List["OtherVehicle"],
                  map: "Map",
-                 simulator_controller: "SimulatorController"):
+                 simulator_controller: "SimulatorController",
+                 ego_sensing_areas: Optional["EgoSensingAreas"] = None):
 
         self._hero_situation_class = hero_situation_class
         self._hero_vehicle = hero_vehicle
         self._other_vehicles = other_vehicles
         self._map = map
         self._simulator_controller = simulator_controller
+        # Sensing areas of the last ticks that are updated incrementally (built from scratch if None)
+        self._ego_sensing_areas = ego_sensing_areas
 
     def get_vehicle_dependent_bn_ids_for_two_lane_following_sit_class(self) -> List["VehicleDependentBNId"]:
         """This method determines the bn ids for each vehicle within the sensing areas of the hero vehicle.
@@ -102,7 +107,9 @@ class TwoLaneFollowingBNIdSelector(object):
     def _get_front_vehicle_dependent_bn_ids(self, hero_lane_id: LaneIdentifier) -> List["VehicleDependentBNId"]:
         front_vehicle_dependent_bn_ids = []
 
-        front_sensing_area, debug_lines = self._hero_vehicle.get_front_sensing_area(self._map)
+        incremental_front_sensing_area = self._ego_sensing_areas.front if self._ego_sensing_areas else None
+        front_sensing_area, debug_lines = self._hero_vehicle.get_front_sensing_area(self._map,
+                                                                                    incremental_front_sensing_area)
 
         if front_sensing_area is None and debug_lines is None:
             return front_vehicle_dependent_bn_ids
@@ -132,8 +139,15 @@ class TwoLaneFollowingBNIdSelector(object):
         else:
             return side_vehicle_dependent_bn_ids
 
-        side_sensing_area, debug_lines = self._hero_vehicle.get_side_sensing_area(map=self._map,
-                                                                                  side_vehicle_point_id=side_vehicle_point_id)
+        incremental_side_sensing_area = None
+        if self._ego_sensing_areas is not None:
+            if side_vehicle_point_id == VehiclePointId.CENTER_MID_RIGHT:
+                incremental_side_sensing_area = self._ego_sensing_areas.right
+            else:
+                incremental_side_sensing_area = self._ego_sensing_areas.left
+        side_sensing_area, debug_lines = self._hero_vehicle.get_side_sensing_area(
+            map=self._map, side_vehicle_point_id=side_vehicle_point_id,
+            incremental_sensing_area=incremental_side_sensing_area)
 
         if side_sensing_area is None and debug_lines is None:
             return side_vehicle_dependent_bn_ids
@@ -156,21 +170,33 @@ class TwoLaneFollowingBNIdSelector(object):
                                                 ) -> Dict[int, List["VehiclePointId"]]:
 
         reference_points_by_vehicle_in_sensing_area = {}
-
-        for vehicle in self._other_vehicles:
-            sensed_reference_points = []
-            vehicle_in_sensing_area = False
-            for ref_point_id, ref_location in vehicle.vehicle_points.items():
-                reference_2d_point = Point(ref_location.x, ref_location.y)
-                reference_point_in_sensing_area = sensing_area.contains(reference_2d_point)
-                if reference_point_in_sensing_area:
-                    vehicle_in_sensing_area = True
-                    sensed_reference_points.append(ref_point_id)
-            if vehicle_in_sensing_area:
-                reference_points_by_vehicle_in_sensing_area[vehicle] = sensed_reference_points
+        reference_point_ids = list(VehiclePointId)
+        reference_points_in_sensing_area = self._get_reference_points_in_sensing_area(sensing_area,
+                                                                                      reference_point_ids)
+
+        for vehicle, vehicle_reference_points_in_sensing_area in zip(self._other_vehicles,
+                                                                     reference_points_in_sensing_area):
+            if vehicle_reference_points_in_sensing_area.any():
+                reference_points_by_vehicle_in_sensing_area[vehicle] = [
+                    ref_point_id for ref_point_id, in_sensing_area
+                    in zip(reference_point_ids, vehicle_reference_points_in_sensing_area) if in_sensing_area
+                ]
 
         return reference_points_by_vehicle_in_sensing_area
 
+    def _get_reference_points_in_sensing_area(self, sensing_area: Polygon,
+                                              reference_point_ids: List["VehiclePointId"]) -> np.ndarray:
+        # The reference points of all other vehicles are classified in one vectorized call.
+        # Returns a boolean matrix (other vehicles x reference points), missing reference points are never contained.
+        reference_points = np.full((len(self._other_vehicles), len(reference_point_ids), 2), np.nan)
+        for vehicle_index, vehicle in enumerate(self._other_vehicles):
+            for point_index, ref_point_id in enumerate(reference_point_ids):
+                ref_location = vehicle.vehicle_points.get(ref_point_id)
+                if ref_location is not None:
+                    reference_points[vehicle_index, point_index] = ref_location.x, ref_location.y
+
+        return points_in_polygon(sensing_area, reference_points)
+
     def _check_if_other_vehicle_follows_lane(self,
                                              expected_lane_id: LaneIdentifier,
                                              other_vehicle: Union["OtherVehicle", "EgoVehicle"]
@@ -189,10 +215,18 @@ class TwoLaneFollowingBNIdSelector(object):
         # if self._hero_situation_class.get_actor_lane(wrapped_other_vehicle) != expected_lane_id:
         #     return False
 
+        # The lane centers closest to the center point, the front mid point and the rear mid point of the other vehicle
+        # are looked up in one vectorized call. Points on overlapping lanes (junctions) are resolved with the ad map
+        # matching (as get_waypoint), the nearest centerline may belong to a crossing lane there.
         other_vehicle_center_point = other_vehicle.get_location()
-        nearest_way_point_to_center_point = self._map.get_waypoint(other_vehicle_center_point)
-        nearest_way_point_to_center_point_orientation = nearest_way_point_to_center_point.get_orientation()
-        nearest_way_point_to_center_point_location = nearest_way_point_to_center_point.get_location()
+        other_vehicle_front_center_point = other_vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER]
+        other_vehicle_rear_center_point = other_vehicle.vehicle_points[VehiclePointId.REAR_MID_CENTER]
+        lane_center_matches = self._map.get_lane_center_matches(np.array([
+            [other_vehicle_center_point.x, other_vehicle_center_point.y],
+            [other_vehicle_front_center_point.x, other_vehicle_front_center_point.y],
+            [other_vehicle_rear_center_point.x, other_vehicle_rear_center_point.y]
+        ]), resolve_overlapping_lanes=True)
+        nearest_way_point_to_center_point_heading = math.degrees(lane_center_matches.headings[0])
 
         # if self._hero_situation_class.get_lane_id_by_location(
         #         nearest_way_point_to_front_mid_point_location) != expected_lane_id:
@@ -207,7 +241,7 @@ class TwoLaneFollowingBNIdSelector(object):
         #
         #########################
 
-        angle_between_vectors = ((nearest_way_point_to_center_point_orientation.heading % 360)
+        angle_between_vectors = ((nearest_way_point_to_center_point_heading % 360)
                                  - (other_vehicle.get_orientation().heading % 360))
         angle_between_vectors = math.fabs(angle_between_vectors)
 
@@ -224,30 +258,7 @@ class TwoLaneFollowingBNIdSelector(object):
         #
         #########################
 
-        other_vehicle_rear_center_point = other_vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER]
-        nearest_way_point_to_rear_center_point = self._map.get_waypoint(other_vehicle_rear_center_point)
-        nearest_way_point_to_rear_center_point_location = nearest_way_point_to_rear_center_point.get_location()
-
-        other_vehicle_front_center_point = other_vehicle.vehicle_points[VehiclePointId.REAR_MID_CENTER]
-        nearest_way_point_to_front_center_point = self._map.get_waypoint(other_vehicle_front_center_point)
-        nearest_way_point_to_front_center_point_location = nearest_way_point_to_front_center_point.get_location()
-
-        distance_between_center_point_and_lane_center = math.hypot(
-            nearest_way_point_to_center_point_location.x - other_vehicle_center_point.x,
-            nearest_way_point_to_center_point_location.y - other_vehicle_center_point.y
-        )
-        distance_between_front_center_point_and_lane_center = math.hypot(
-            nearest_way_point_to_front_center_point_location.x - other_vehicle_front_center_point.x,
-            nearest_way_point_to_front_center_point_location.y - other_vehicle_front_center_point.y
-        )
-        distance_between_rear_center_point_and_lane_center = math.hypot(
-            nearest_way_point_to_rear_center_point_location.x - other_vehicle_rear_center_point.x,
-            nearest_way_point_to_rear_center_point_location.y - other_vehicle_rear_center_point.y
-        )
-
-        distance_vehicle_to_lane_center = statistics.median([distance_between_front_center_point_and_lane_center,
-                                                             distance_between_center_point_and_lane_center,
-                                                             distance_between_rear_center_point_and_lane_center])
+        distance_vehicle_to_lane_center = float(np.median(lane_center_matches.distances))
 
         other_vehicle_is_near_lane_center = (
                 distance_vehicle_to_lane_center < ACCEPTABLE_DISTANCE_FROM_LANE_CENTER_FOR_FRONT_VEHICLE
@@ -92,6 +92,11 @@ class SituationClass(ABC):
         self.possible_next_situation_classes_by_road_segment_end: Dict["RoadSegmentEnd", "SituationClass"] = {}
         self.previous_situation_classes_by_road_segment_end: Dict["RoadSegmentEnd", "SituationClass"] = {}
 
+    @property
+    def area(self) -> Polygon:
+        """Polygon of the area this situation class is defined for."""
+        return self._area
+
     @abstractmethod
     def update_actor_association(self, actor: Union["EgoVehicle", "OtherVehicle"]):
         """Associates the passed wrapped actor to this situation class. The association has to be implemented in the
@@ -0,0 +1,136 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from sinadra_configuration_parameters import SITUATION_CLASS_INDEX_CELL_SIZE
+from util.geometry import points_in_polygon
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
+
+
+class SituationClassIndex:
+    """Uniform grid over the bounding boxes of the situation class areas of a town. A batch of points is only tested
+    against the areas registered in the grid cells of the points, one vectorized test per area.
+
+    Attributes
+    ----------
+    exclusive_areas : np.ndarray
+        Boolean array that is True for the areas that do not overlap any other area. A point inside an exclusive area
+        is not inside any other area.
+    """
+
+    def __init__(self, areas: List["Polygon"], cell_size: float = SITUATION_CLASS_INDEX_CELL_SIZE) -> None:
+        """Builds the grid over the given areas.
+
+        Parameters
+        ----------
+        areas : List[Polygon]
+            Situation class areas, the area index is the position in this list.
+        cell_size : float
+            Edge length of the grid cells in meter [m]. (The default value is SITUATION_CLASS_INDEX_CELL_SIZE.)
+        """
+        self._areas = areas
+        self._cell_size = cell_size
+
+        bounds = np.array([area.bounds for area in areas], dtype=float).reshape(-1, 4)
+        cell_bounds = np.floor(bounds / cell_size).astype(np.int64)
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for area_index, (min_x, min_y, max_x, max_y) in enumerate(cell_bounds):
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    cells.setdefault((cell_x, cell_y), []).append(area_index)
+        self._area_indices_by_cell = cells
+
+        # Only the areas with overlapping bounding boxes can share interior points
+        overlapping_bounds = ((bounds[:, None, 0] < bounds[None, :, 2]) & (bounds[None, :, 0] < bounds[:, None, 2])
+                              & (bounds[:, None, 1] < bounds[None, :, 3]) & (bounds[None, :, 1] < bounds[:, None, 3]))
+        np.fill_diagonal(overlapping_bounds, False)
+        self.exclusive_areas = np.ones(len(areas), dtype=bool)
+        for area_index, other_area_index in zip(*np.nonzero(overlapping_bounds)):
+            if areas[area_index].intersection(areas[other_area_index]).area > 0.0:
+                self.exclusive_areas[area_index] = False
+
+    def __len__(self) -> int:
+        return len(self._areas)
+
+    def contains(self, area_index: int, points: np.ndarray) -> np.ndarray:
+        """Returns for each point whether it lies in the interior of the area with the given index.
+
+        Parameters
+        ----------
+        area_index : int
+            Index of the area
+        points : np.ndarray
+            Points (x, y), shape (number of points, 2)
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array that is True for the points inside the area
+        """
+        return points_in_polygon(self._areas[area_index], np.asarray(points, dtype=float).reshape(-1, 2))
+
+    def query(self, points: np.ndarray) -> np.ndarray:
+        """Returns for each point the areas whose interior contains the point (same as Polygon.contains for each
+        point and area).
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Points (x, y), shape (number of points, 2). NaN points are not contained in any area.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array of shape (number of points, number of areas)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        contained = np.zeros((len(points), len(self._areas)), dtype=bool)
+
+        point_indices = np.flatnonzero(np.all(np.isfinite(points), axis=1))
+        if len(point_indices) == 0 or len(self._areas) == 0:
+            return contained
+
+        # Group the points by grid cell and collect the candidate points of each area
+        point_cells = np.floor(points[point_indices] / self._cell_size).astype(np.int64)
+        cells, cell_numbers = np.unique(point_cells, axis=0, return_inverse=True)
+        cell_numbers = cell_numbers.reshape(-1)
+        order = np.argsort(cell_numbers, kind="stable")
+        points_by_cell = np.split(point_indices[order], np.cumsum(np.bincount(cell_numbers))[:-1])
+
+        candidate_points_by_area: Dict[int, List[np.ndarray]] = {}
+        for (cell_x, cell_y), cell_point_indices in zip(cells, points_by_cell):
+            for area_index in self._area_indices_by_cell.get((int(cell_x), int(cell_y)), ()):
+                candidate_points_by_area.setdefault(area_index, []).append(cell_point_indices)
+
+        for area_index, candidate_point_indices in candidate_points_by_area.items():
+            candidate_point_indices = np.concatenate(candidate_point_indices)
+            contained[candidate_point_indices, area_index] = self.contains(area_index,
+                                                                           points[candidate_point_indices])
+        return contained
+
+    def get_unique_area_indices(self, points: np.ndarray) -> np.ndarray:
+        """Returns for each point the index of the only area that contains the point.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Points (x, y), shape (number of points, 2)
+
+        Returns
+        -------
+        np.ndarray
+            Area index of each point, -1 if the point is in no area or in more than one area
+        """
+        contained = self.query(points)
+        if contained.shape[1] == 0:
+            return np.full(len(contained), -1, dtype=int)
+        return np.where(np.count_nonzero(contained, axis=1) == 1, np.argmax(contained, axis=1), -1)
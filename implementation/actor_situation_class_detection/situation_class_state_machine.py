@@ -6,16 +6,17 @@
 #
 #################### END LICENSE BLOCK #################################
 
-from typing import List, Union, Optional, TYPE_CHECKING
+from typing import Dict, List, Union, Optional, TYPE_CHECKING
 
 import numpy as np
 
 from actor_situation_class_detection.situation_class import SituationClass
+from actor_situation_class_detection.situation_class_index import SituationClassIndex
+from data_model.actor_snapshot import ActorSnapshot
 from data_model.vehicle import EgoVehicle, VehiclePointId
 
 if TYPE_CHECKING:
     from data_model.vehicle import OtherVehicle
-    from data_model.positions import Location, Orientation
 
 
 class SituationClassStateMachine(object):
@@ -27,6 +28,14 @@ class SituationClassStateMachine(object):
         self.situation_classes = situation_classes
         self.ego_situation_class = None
 
+        self._situation_class_index = SituationClassIndex([situation_class.area
+                                                           for situation_class in situation_classes])
+        self._situation_class_indices: Dict[SituationClass, int] = {
+            situation_class: situation_class_index
+            for situation_class_index, situation_class in enumerate(situation_classes)}
+        # Situation class index of each vehicle (by vehicle id) in the last classification
+        self._previous_situation_class_indices: Dict[int, int] = {}
+
     def clear_actor_associations_from_situation_classes(self):
         """Method to remove all actors from situation class objects."""
         for situation_class in self.situation_classes:
@@ -46,15 +55,69 @@ class SituationClassStateMachine(object):
             All vehicles as EgoVehicle or OtherVehicle objects
         """
 
-        for vehicle in vehicles:
-            actor_transform = vehicle.position.world_position
-            actor_front_mid_location = vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER]
-            actor_orientation = actor_transform.orientation
-            situation_class_of_actor = self._get_active_situation_class(actor_front_mid_location, actor_orientation)
-
+        for vehicle, situation_class_of_actor in zip(vehicles, self.classify(vehicles)):
             if situation_class_of_actor is not None:
                 situation_class_of_actor.update_actor_association(vehicle)
 
+    def classify(self, vehicles: List[Union["OtherVehicle", EgoVehicle]]) -> List[Optional[SituationClass]]:
+        """Determines the situation class of each vehicle in one batched query. The center point of the vehicle's
+        front bumper must be within exactly one situation class, otherwise the point one meter ahead in the vehicle's
+        forward direction is checked instead. A vehicle is first checked against its situation class of the last
+        classification and the possible next situation classes of it (only situation classes that do not overlap any
+        other situation class), the remaining vehicles are looked up in the spatial index over all situation classes.
+
+        Parameters
+        ----------
+        vehicles : List[Union[EgoVehicle, OtherVehicle]]
+            All vehicles as EgoVehicle or OtherVehicle objects
+
+        Returns
+        -------
+        List[Optional[SituationClass]]
+            Situation class of each vehicle or None if no unique situation class could be determined
+        """
+        front_mid_locations = ActorSnapshot.get_vehicle_reference_points(vehicles,
+                                                                         VehiclePointId.FRONT_MID_CENTER)[:, 0:2]
+        situation_class_indices = np.full(len(vehicles), -1, dtype=int)
+        unresolved = np.ones(len(vehicles), dtype=bool)
+
+        # Situation class of the last classification and its possible next situation classes
+        previous_situation_class_indices = np.array([self._previous_situation_class_indices.get(vehicle.id, -1)
+                                                     for vehicle in vehicles], dtype=int)
+        for previous_situation_class_index in np.unique(previous_situation_class_indices):
+            if previous_situation_class_index < 0:
+                continue
+            vehicle_indices = np.flatnonzero(previous_situation_class_indices == previous_situation_class_index)
+            for candidate_index in self._get_candidate_situation_class_indices(previous_situation_class_index):
+                vehicle_indices = vehicle_indices[unresolved[vehicle_indices]]
+                if len(vehicle_indices) == 0:
+                    break
+                inside = self._situation_class_index.contains(candidate_index, front_mid_locations[vehicle_indices])
+                situation_class_indices[vehicle_indices[inside]] = candidate_index
+                unresolved[vehicle_indices[inside]] = False
+
+        # if current location is either in
+        #   none situation class or in
+        #   more than one situation class
+        #   -> try a second time with point in future location
+        vehicle_indices = np.flatnonzero(unresolved)
+        if len(vehicle_indices):
+            situation_class_indices[vehicle_indices] = self._situation_class_index.get_unique_area_indices(
+                front_mid_locations[vehicle_indices])
+            vehicle_indices = vehicle_indices[situation_class_indices[vehicle_indices] < 0]
+        if len(vehicle_indices):
+            next_locations = front_mid_locations[vehicle_indices] + ActorSnapshot.get_vehicle_forward_vectors(
+                [vehicles[vehicle_index] for vehicle_index in vehicle_indices])
+            situation_class_indices[vehicle_indices] = self._situation_class_index.get_unique_area_indices(
+                next_locations)
+
+        self._previous_situation_class_indices = {
+            vehicle.id: int(situation_class_index)
+            for vehicle, situation_class_index in zip(vehicles, situation_class_indices) if situation_class_index >= 0}
+
+        return [self.situation_classes[situation_class_index] if situation_class_index >= 0 else None
+                for situation_class_index in situation_class_indices]
+
     def get_hero_situation_class(self) -> Optional[SituationClass]:
         """Retrieves the situation class the hero vehicle is currently in.
 
@@ -70,29 +133,20 @@ class SituationClassStateMachine(object):
                 return situation_class
         return None
 
-    def _get_active_situation_class(self, actor_location: "Location", actor_orientation: "Orientation"):
-        actor_forward_vector = actor_orientation.get_forward_vector()
-        possible_situation_classes = self._get_possible_situation_classes(actor_location)
-
-        if len(possible_situation_classes) == 1:
-            return possible_situation_classes[0]
-
-        # if current location is either in
-        #   none situation class or in
-        #   more than one situation class
-        #   -> try a second time with point in future location
-        possible_situation_classes.clear()
-        next_location = np.add(actor_forward_vector, actor_location)
-        possible_situation_classes = self._get_possible_situation_classes(next_location)
-
-        if len(possible_situation_classes) == 1:
-            return possible_situation_classes[0]
-
-        return None
-
-    def _get_possible_situation_classes(self, actor_location: "Location"):
-        possible_situation_classes = []
-        for situation_class in self.situation_classes:
-            if situation_class.contains_location(actor_location):
-                possible_situation_classes.append(situation_class)
-        return possible_situation_classes
+    def _get_candidate_situation_class_indices(self, situation_class_index: int) -> List[int]:
+        # The situation class and its possible next situation classes that do not overlap any other situation class,
+        # a location inside one of them is not inside any other situation class
+        situation_class = self.situation_classes[situation_class_index]
+        candidates = [situation_class]
+        for next_situation_classes in situation_class.possible_next_situation_classes_by_road_segment_end.values():
+            if isinstance(next_situation_classes, SituationClass):
+                next_situation_classes = [next_situation_classes]
+            candidates.extend(next_situation_classes)
+
+        candidate_indices = []
+        for candidate in candidates:
+            candidate_index = self._situation_class_indices.get(candidate)
+            if candidate_index is not None and candidate_index not in candidate_indices and \
+                    self._situation_class_index.exclusive_areas[candidate_index]:
+                candidate_indices.append(candidate_index)
+        return candidate_indices
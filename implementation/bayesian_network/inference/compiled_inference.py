@@ -0,0 +1,219 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+from string import ascii_letters
+from typing import Dict, FrozenSet, List, Tuple, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from pgmpy.models import BayesianModel
+
+
+class ZeroProbabilityEvidenceException(Exception):
+    pass
+
+
+class _QueryPlan:
+    """Static variable elimination plan for one set of evidence variables and one query variable.
+
+    Attributes
+    ----------
+    factor_indices : List[int]
+        Indices of the CPT factors that are relevant for the query (barren nodes are pruned).
+    evidence_axes : List[List[Tuple[int, str]]]
+        For each relevant factor the axes (and their variables) that are fixed by the evidence.
+    subscripts : str
+        Einsum subscripts that multiply the evidence-reduced factors and sum out all hidden variables.
+    contraction_path : List
+        Precomputed contraction (= elimination) order for the einsum subscripts.
+    """
+
+    def __init__(self, factor_indices: List[int], evidence_axes: List[List[Tuple[int, str]]], subscripts: str,
+                 contraction_path: List) -> None:
+        self.factor_indices = factor_indices
+        self.evidence_axes = evidence_axes
+        self.subscripts = subscripts
+        self.contraction_path = contraction_path
+
+
+class CompiledBayesianNetwork:
+    """Bayesian network compiled once into NumPy CPT arrays. Queries are answered by variable elimination with a fixed
+    elimination order that is computed once for each combination of evidence variables and query variable and cached
+    afterwards, thus, a query only consists of array indexing and one einsum contraction per query variable.
+    The posteriors equal the ones of pgmpy's VariableElimination (up to floating point precision).
+    """
+
+    def __init__(self, bn_instance: "BayesianModel") -> None:
+        """Extracts the CPTs of the given pgmpy model as NumPy arrays.
+
+        Parameters
+        ----------
+        bn_instance : BayesianModel
+            Pgmpy Bayesian model that shall be compiled.
+        """
+        self._variables: List[str] = list(bn_instance.nodes)
+        if len(self._variables) > len(ascii_letters):
+            raise ValueError(f"Compiled inference supports at most {len(ascii_letters)} nodes, the network has "
+                             f"{len(self._variables)} nodes")
+
+        self._subscript_for_variable: Dict[str, str] = dict(zip(self._variables, ascii_letters))
+        self._parents: Dict[str, List[str]] = {node_id: list(bn_instance.get_parents(node_id))
+                                               for node_id in self._variables}
+        self._state_names: Dict[str, List[str]] = {}
+        self._state_index: Dict[str, Dict[str, int]] = {}
+        self._factor_arrays: List[np.ndarray] = []
+        self._factor_variables: List[List[str]] = []
+        self._factor_index_for_variable: Dict[str, int] = {}
+
+        for node_id in self._variables:
+            cpd = bn_instance.get_cpds(node_id)
+            cpd_variables = list(cpd.variables)
+            cardinality = [len(cpd.state_names[variable]) for variable in cpd_variables]
+            self._factor_index_for_variable[node_id] = len(self._factor_arrays)
+            self._factor_arrays.append(np.asarray(cpd.values, dtype=float).reshape(cardinality))
+            self._factor_variables.append(cpd_variables)
+            self._state_names[node_id] = list(cpd.state_names[node_id])
+            self._state_index[node_id] = {state: index for index, state in enumerate(cpd.state_names[node_id])}
+
+        self._plans: Dict[Tuple[FrozenSet[str], str], _QueryPlan] = {}
+
+    def get_state_names(self, node_id: str) -> List[str]:
+        """Returns the state names of the given node in the order of the posterior values.
+
+        Parameters
+        ----------
+        node_id : str
+            Identifier of the node.
+
+        Returns
+        -------
+        List[str]
+            State names of the node.
+        """
+        return self._state_names[node_id]
+
+    def query(self, variables: List[str], evidence: Dict[str, str]) -> List[np.ndarray]:
+        """Computes the posterior distribution of each given variable given the evidence.
+
+        Parameters
+        ----------
+        variables : List[str]
+            Nodes for which the posteriors shall be computed. Must not be part of the evidence.
+        evidence : Dict[str, str]
+            Evidence query with the node ID as key and the observed state name as value.
+
+        Returns
+        -------
+        List[np.ndarray]
+            Normalized posterior of each given variable (in the order of the variables), the order of the values is the
+            order of the node's state names.
+
+        Raises
+        ------
+        ZeroProbabilityEvidenceException
+            If the evidence has zero probability, i.e. the posteriors are undefined.
+        """
+        evidence_variables = frozenset(evidence.keys())
+        evidence_state_indices = {node_id: self._state_index[node_id][state] for node_id, state in evidence.items()}
+        posteriors = []
+
+        for variable in variables:
+            plan = self._plans.get((evidence_variables, variable))
+            if plan is None:
+                plan = self._compile_plan(evidence_variables, variable)
+                self._plans[(evidence_variables, variable)] = plan
+
+            operands = []
+            for factor_index, evidence_axes in zip(plan.factor_indices, plan.evidence_axes):
+                factor_array = self._factor_arrays[factor_index]
+                if evidence_axes:
+                    index = [slice(None)] * factor_array.ndim
+                    for axis, evidence_variable in evidence_axes:
+                        index[axis] = evidence_state_indices[evidence_variable]
+                    factor_array = factor_array[tuple(index)]
+                operands.append(factor_array)
+
+            unnormalized_posterior = np.einsum(plan.subscripts, *operands, optimize=plan.contraction_path)
+            normalization = unnormalized_posterior.sum()
+            if normalization == 0.0:
+                raise ZeroProbabilityEvidenceException(f"The evidence {evidence} has zero probability, the posterior "
+                                                       f"of {variable} is undefined")
+            posteriors.append(unnormalized_posterior / normalization)
+
+        return posteriors
+
+    def _compile_plan(self, evidence_variables: FrozenSet[str], variable: str) -> _QueryPlan:
+        """Builds the static elimination plan for the given evidence variables and query variable. Only the CPTs of
+        the query variable, the evidence variables and their ancestors are relevant, all other nodes are barren and sum
+        out to one.
+
+        Parameters
+        ----------
+        evidence_variables : FrozenSet[str]
+            Nodes that are observed.
+        variable : str
+            Node for which the posterior shall be computed.
+
+        Returns
+        -------
+        _QueryPlan
+            Elimination plan for the query.
+        """
+        relevant_variables = self._get_ancestors(set(evidence_variables) | {variable})
+        factor_indices = [self._factor_index_for_variable[node_id] for node_id in self._variables
+                          if node_id in relevant_variables]
+        factor_indices = self._get_connected_factor_indices(factor_indices, evidence_variables, variable)
+
+        evidence_axes = []
+        input_subscripts = []
+        operand_shapes = []
+        for factor_index in factor_indices:
+            factor_variables = self._factor_variables[factor_index]
+            factor_shape = self._factor_arrays[factor_index].shape
+            evidence_axes.append([(axis, factor_variable) for axis, factor_variable in enumerate(factor_variables)
+                                  if factor_variable in evidence_variables])
+            input_subscripts.append("".join(self._subscript_for_variable[factor_variable]
+                                            for factor_variable in factor_variables
+                                            if factor_variable not in evidence_variables))
+            operand_shapes.append(tuple(size for factor_variable, size in zip(factor_variables, factor_shape)
+                                        if factor_variable not in evidence_variables))
+
+        subscripts = ",".join(input_subscripts) + "->" + self._subscript_for_variable[variable]
+        dummy_operands = [np.empty(shape) for shape in operand_shapes]
+        contraction_path = np.einsum_path(subscripts, *dummy_operands, optimize="greedy")[0]
+
+        return _QueryPlan(factor_indices, evidence_axes, subscripts, contraction_path)
+
+    def _get_connected_factor_indices(self, factor_indices: List[int], evidence_variables: FrozenSet[str],
+                                      variable: str) -> List[int]:
+        # Like pgmpy's VariableElimination, only the factors that are connected to the query variable via hidden
+        # (not observed) variables contribute to its posterior. The other factors only scale the posterior, e.g. an
+        # impossible evidence combination in a part of the network that is separated from the query variable.
+        hidden_scopes = {factor_index: {factor_variable for factor_variable in self._factor_variables[factor_index]
+                                        if factor_variable not in evidence_variables}
+                         for factor_index in factor_indices}
+        connected_variables = {variable}
+        connected_factor_indices = set()
+        extended = True
+        while extended:
+            extended = False
+            for factor_index, hidden_scope in hidden_scopes.items():
+                if factor_index not in connected_factor_indices and hidden_scope & connected_variables:
+                    connected_factor_indices.add(factor_index)
+                    connected_variables |= hidden_scope
+                    extended = True
+        return [factor_index for factor_index in factor_indices if factor_index in connected_factor_indices]
+
+    def _get_ancestors(self, node_ids: set) -> set:
+        ancestors = set()
+        nodes_to_visit = list(node_ids)
+        while nodes_to_visit:
+            node_id = nodes_to_visit.pop()
+            if node_id not in ancestors:
+                ancestors.add(node_id)
+                nodes_to_visit.extend(self._parents[node_id])
+        return ancestors
@@ -6,23 +6,155 @@
 #
 #################### END LICENSE BLOCK #################################
 from bayesian_network.inference.interfaces import Outcome, Node, BayesianNetworkOutput
-from sinadra_configuration_parameters import NUM_INTERACTION_HOPS
+from bayesian_network.inference.model_registry import BayesianNetworkModelRegistry
+from bayesian_network.inference.compiled_inference import ZeroProbabilityEvidenceException
+from sinadra_configuration_parameters import NUM_INTERACTION_HOPS, BN_INFERENCE_BACKEND, \
+    BayesianNetworkInferenceBackend, BN_POSTERIOR_CACHE_SIZE
 from actor_situation_class_detection.bayesian_network_id_selection.bayesian_network_id import BayesianNetId
 from sys import float_info
+from util.lru_cache import LRUCache
 from pgmpy.inference.ExactInference import VariableElimination
-from typing import TYPE_CHECKING, List, Dict, Tuple
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Hashable, Iterator
+import numpy as np
 
 if TYPE_CHECKING:
     from bayesian_network.model_generation.config_template import BayesianNetworkConfig
     from bayesian_network.inference.interfaces import BayesianNetworkData
     from pgmpy.models import BayesianModel
-    from pgmpy.factors.discrete import DiscreteFactor
     from multiprocessing import Pool
     from data_model.positions import Location
 
+# Inference task that is sent to the worker processes: (Bayesian network ID, evidence query, nodes to infer).
+InferenceTask = Tuple[str, Dict[str, str], Tuple[str, ...]]
+
+
+def preload_bayesian_networks_in_worker() -> None:
+    """Loads all Bayesian networks into the model registry of the calling (worker) process. Used in the initializer of
+    the inference process pool, such that the per-tick inference tasks only have to carry the evidences.
+    """
+    BayesianNetworkModelRegistry.get_instance().load_all_networks()
+
+
+def infer_posteriors(inference_task: InferenceTask) -> List[np.ndarray]:
+    """Does the inference for the given task with the Bayesian network of the process-wide model registry. This
+    function is used as worker function in the multiprocessing of the Bayesian network inference.
+
+    Parameters
+    ----------
+    inference_task : InferenceTask
+        Bayesian network ID, evidence query (node ID to state name) and the IDs of the nodes to infer.
+
+    Returns
+    -------
+    List[np.ndarray]
+        Posterior probabilities of each node to infer (in the order of the given nodes), the order of the values is the
+        order of the node's state names in the Bayesian network model.
+
+    Raises
+    ------
+    ZeroProbabilityEvidenceException
+        If the evidence has zero probability (with both inference backends).
+    """
+    bn_id, evidence_query, variables_to_compute = inference_task
+
+    if not variables_to_compute:
+        return []
+
+    if BN_INFERENCE_BACKEND == BayesianNetworkInferenceBackend.COMPILED:
+        compiled_network = BayesianNetworkModelRegistry.get_instance().get_compiled_network(bn_id)
+        return compiled_network.query(list(variables_to_compute), evidence_query)
+
+    bn_instance = BayesianNetworkModelRegistry.get_instance().get_model(bn_id)
+    inference_algorithm = VariableElimination(bn_instance)
+    output_discrete_factors = inference_algorithm.query(variables=list(variables_to_compute), evidence=evidence_query,
+                                                        joint=False, show_progress=False)
+
+    posteriors = [output_discrete_factors[node_id].values for node_id in variables_to_compute]
+    # pgmpy normalizes by zero for evidence with zero probability (NaN posteriors)
+    if any(np.isnan(posterior).any() for posterior in posteriors):
+        raise ZeroProbabilityEvidenceException(f"The evidence {evidence_query} has zero probability in {bn_id}")
+    return posteriors
+
+
+def infer_indexed_posteriors(indexed_inference_task: Tuple[int, InferenceTask, int]) -> Tuple[int, List[np.ndarray]]:
+    """Does the inference for the given task (see infer_posteriors) and returns the posteriors together with the index
+    of the task, such that the results can be assigned when they arrive out of order. Networks that were reloaded or
+    invalidated in the client's registry since the last task are loaded again before the inference.
+
+    Parameters
+    ----------
+    indexed_inference_task : Tuple[int, InferenceTask, int]
+        Index of the task, the inference task and the generation of the client's model registry.
+
+    Returns
+    -------
+    Tuple[int, List[np.ndarray]]
+        Index of the task and the posterior probabilities of each node to infer.
+    """
+    index, inference_task, registry_generation = indexed_inference_task
+    BayesianNetworkModelRegistry.get_instance().synchronize_generation(registry_generation)
+    return index, infer_posteriors(inference_task)
+
 
 class BayesianNetworkInference:
-    """Performs the Bayesian network inference for all given Bayesian models and input features."""
+    """Performs the Bayesian network inference for all given Bayesian models and input features.
+    The evidences are hard (one-hot) and repeat from tick to tick, thus, the posteriors are memoized in an LRU cache
+    keyed on the Bayesian network ID, the evidence query and the nodes to infer. Cached posteriors of a Bayesian network
+    are dropped as soon as the network is reloaded in the model registry.
+    """
+
+    _instance: Optional["BayesianNetworkInference"] = None
+
+    def __init__(self, model_registry: Optional[BayesianNetworkModelRegistry] = None) -> None:
+        """Creates the posterior cache and ties its invalidation to the reloads of the model registry.
+
+        Parameters
+        ----------
+        model_registry : Optional[BayesianNetworkModelRegistry]
+            Registry holding the loaded Bayesian networks. (The default value is None, i.e. the process-wide registry
+            is used.)
+        """
+        model_registry = model_registry if model_registry else BayesianNetworkModelRegistry.get_instance()
+        self._model_registry = model_registry
+        self._posterior_cache = LRUCache(BN_POSTERIOR_CACHE_SIZE)
+        model_registry.add_reload_listener(self.invalidate_posterior_cache)
+
+    @classmethod
+    def get_instance(cls) -> "BayesianNetworkInference":
+        """Returns the inference of the process-wide model registry and creates it on first access, thus, callers
+        without an own long-lived inference object share one posterior cache.
+
+        Returns
+        -------
+        BayesianNetworkInference
+            Process-wide inference instance.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def invalidate_posterior_cache(self, bayesian_network_id: Optional[str] = None) -> None:
+        """Drops the cached posteriors of the given Bayesian network, or of all networks if no identifier is given.
+
+        Parameters
+        ----------
+        bayesian_network_id : Optional[str]
+            Name/identifier for the Bayesian network. (The default value is None.)
+        """
+        if bayesian_network_id:
+            self._posterior_cache.invalidate(lambda cache_key: cache_key[0] == bayesian_network_id)
+        else:
+            self._posterior_cache.invalidate()
+
+    def get_posterior_cache_statistics(self) -> Tuple[int, int, float]:
+        """Returns the statistics of the posterior cache since start.
+
+        Returns
+        -------
+        Tuple[int, int, float]
+            Number of cache hits, number of cache misses and the hit rate.
+        """
+        return self._posterior_cache.hits, self._posterior_cache.misses, self._posterior_cache.get_hit_rate()
 
     def bn_inferences_for_vehicles(self, bayesian_network_data: List["BayesianNetworkData"],
                                    multiprocessing_pool: "Pool") -> List[BayesianNetworkOutput]:
@@ -45,19 +177,70 @@ class BayesianNetworkInference:
             List of the data objects that hold alle relevant information about the vehicle after the Bayesian inference
             including the infered values of the defined output nodes.
         """
-        bn_outputs = []
+        indexed_bn_outputs = list(self.iterate_bn_inferences_for_vehicles(bayesian_network_data, multiprocessing_pool))
+        indexed_bn_outputs.sort(key=lambda indexed_bn_output: indexed_bn_output[0])
+        return [bn_output for _, bn_output in indexed_bn_outputs]
+
+    def iterate_bn_inferences_for_vehicles(self, bayesian_network_data: List["BayesianNetworkData"],
+                                           multiprocessing_pool: "Pool") -> Iterator[Tuple[int, BayesianNetworkOutput]]:
+        """Performs the Bayesian network inference like bn_inferences_for_vehicles, but yields the output of each
+        vehicle as soon as its posteriors are available: first the cached ones, then the ones of the worker processes
+        in the order of their completion. Thus, the processing of a vehicle's output can start while the inference of
+        the other vehicles is still running.
+
+        Parameters
+        ----------
+        bayesian_network_data : List[BayesianNetworkData]
+            List of the data objects, respectively vehicles, for which the Bayesian network inference shall be
+            performed.
+        multiprocessing_pool : multiprocessing.Pool
+            Processing pool that is used for the parallel Bayesian network inference.
+
+        Yields
+        ------
+        Tuple[int, BayesianNetworkOutput]
+            Index of the vehicle (in the order of the outputs of bn_inferences_for_vehicles) and its Bayesian network
+            output.
+        """
+        inference_objects = bayesian_network_data
 
         # filtering to the target number of front vehicles
         if NUM_INTERACTION_HOPS:
-            inference_objects = self._filter_number_of_front_vehicles(bayesian_network_data)
+            inference_objects = self._filter_number_of_front_vehicles(inference_objects)
 
         # filter only objects that have a BN to infer assigned to
         inference_objects = list(filter(lambda x: bool(x.bayesian_network_id), inference_objects))
 
-        if len(inference_objects) >= 1:
-            bn_outputs = multiprocessing_pool.map(self._worker_inference, inference_objects)
+        inference_tasks = []
+        prepared_outputs = []
+        missing_indices = []
+        for index, specific_bn_data in enumerate(inference_objects):
+            inference_task, output_nodes, all_nodes_with_outcomes = self._prepare_inference(specific_bn_data)
+            inference_tasks.append(inference_task)
+            prepared_outputs.append((specific_bn_data, output_nodes, all_nodes_with_outcomes))
+
+            node_posteriors = self._posterior_cache.get(self._get_posterior_cache_key(inference_task))
+            if node_posteriors is None:
+                missing_indices.append(index)
+            else:
+                yield index, self._build_infered_bn_output(specific_bn_data, output_nodes, inference_task,
+                                                           node_posteriors, all_nodes_with_outcomes)
+
+        # only the evidences of the cache misses are sent to the workers, the models are resident in each worker
+        # process (and reloaded there if the generation of the registry changed)
+        if missing_indices:
+            indexed_tasks = [(index, inference_tasks[index], self._model_registry.generation)
+                             for index in missing_indices]
+            for index, node_posteriors in multiprocessing_pool.imap_unordered(infer_indexed_posteriors, indexed_tasks):
+                self._posterior_cache.put(self._get_posterior_cache_key(inference_tasks[index]), node_posteriors)
+                specific_bn_data, output_nodes, all_nodes_with_outcomes = prepared_outputs[index]
+                yield index, self._build_infered_bn_output(specific_bn_data, output_nodes, inference_tasks[index],
+                                                           node_posteriors, all_nodes_with_outcomes)
 
-        return bn_outputs
+    @staticmethod
+    def _get_posterior_cache_key(inference_task: InferenceTask) -> Hashable:
+        bn_id, evidence_query, variables_to_compute = inference_task
+        return bn_id, frozenset(evidence_query.items()), variables_to_compute
 
     def _filter_number_of_front_vehicles(self, inference_objects: List["BayesianNetworkData"]
                                          ) -> List["BayesianNetworkData"]:
@@ -120,9 +303,10 @@ class BayesianNetworkInference:
         vehicles_to_check.sort(key=lambda data: reference_location.get_2d_distance(data.vehicle_location))
         return vehicles_to_check
 
-    def _worker_inference(self, specific_bn_data: "BayesianNetworkData") -> BayesianNetworkOutput:
-        """Does the inference for the given Bayesian network data. This method is used as worker method in the
-        multiprocessing of the Bayesian network inference.
+    def _prepare_inference(self, specific_bn_data: "BayesianNetworkData"
+                           ) -> Tuple[InferenceTask, List[str], Dict[str, List[Outcome]]]:
+        """Updates the Bayesian network configuration with the vehicle's risk sensor data and extracts the output nodes
+        and evidences. Builds the inference task that only contains the data required by the inference workers.
 
         Parameters
         ----------
@@ -131,33 +315,13 @@ class BayesianNetworkInference:
 
         Returns
         -------
-        BayesianNetworkOutput
-            Bayesian network output object for the given input data after inference.
-        """
-        bn_network_output = self._bn_inference(specific_bn_data)
-        bn_network_output = self._add_ids_to_output(bn_network_output, specific_bn_data)
-        bn_network_output.vehicle_situation_state_id = specific_bn_data.vehicle_situation_state_id
-
-        return bn_network_output
-
-    def _bn_inference(self, specific_bn_data: "BayesianNetworkData") -> BayesianNetworkOutput:
-        """Does the inference for the given Bayesian network data.
-
-        Parameters
-        ----------
-        specific_bn_data : BayesianNetworkData
-            Bayesian network data for which the Bayesian network shall be inferred.
-
-        Returns
-        -------
-        BayesianNetworkOutput
-            Bayesian network output object for the given input data after inference without the corresponding
-            vehicle ID and Bayesian network ID.
+        Tuple[InferenceTask, List[str], Dict[str, List[Outcome]]]
+            Inference task for the workers, IDs of the output nodes, and the outcomes of all nodes as defined by the
+            Bayesian network configuration.
         """
         bn_instance = specific_bn_data.bayesian_network_model
         bn_config_instance = specific_bn_data.bayesian_network_config
         risk_sensor_data = specific_bn_data.sinadra_risk_sensor_data
-        vehicle_id = specific_bn_data.vehicle_id
         bn_id = specific_bn_data.bayesian_network_id
 
         bn_config_instance.update_dra_data(risk_sensor_data)
@@ -166,10 +330,12 @@ class BayesianNetworkInference:
         all_nodes_with_outcomes = evidence_nodes
         evidence_nodes = self._filter_supported_evidence_nodes(evidence_nodes)
         evidence_query = self._create_evidence_query(evidence_nodes)
-        output_network = self._inference_query_and_build_infered_bn_output(bn_instance, output_nodes, evidence_query,
-                                                                           vehicle_id, bn_id, all_nodes_with_outcomes)
 
-        return output_network
+        # Required because PGMPY cannot output variables that are also evidences
+        variables_to_compute = tuple(node for node in output_nodes if node not in evidence_query)
+        inference_task = (bn_id, evidence_query, variables_to_compute)
+
+        return inference_task, output_nodes, all_nodes_with_outcomes
 
     @staticmethod
     def _extract_node_values_from_bn_config(bn_instance: "BayesianModel", bn_config_instance: "BayesianNetworkConfig"
@@ -241,74 +407,46 @@ class BayesianNetworkInference:
         return evidence_query
 
     @staticmethod
-    def _inference_query_and_build_infered_bn_output(bn_instance: "BayesianModel", output_nodes: List[str],
-                                                     evidence_query: Dict[str, str], vehicle_id: str, bn_id: str,
-                                                     all_nodes_with_outcomes: Dict[str, List[Outcome]]
-                                                     ) -> BayesianNetworkOutput:
-        infered_output_nodes = []
-        inference_algorithm = VariableElimination(bn_instance)
-
-        # Required because PGMPY cannot output variables that are also evidences
-        variables_to_compute = []
-        evidence_to_output = []
-        for node in output_nodes:
-            if node not in evidence_query.keys():
-                variables_to_compute.append(node)
-            else:
-                evidence_to_output.append(node)
-
-        output_discrete_factors = inference_algorithm.query(variables=variables_to_compute, evidence=evidence_query,
-                                                            joint=False, show_progress=False)
-
-        if output_nodes:
-            for node_id, discrete_factor in output_discrete_factors.items():
-                node_output = BayesianNetworkInference._extract_outcomes_and_build_node_output(discrete_factor, node_id)
-                infered_output_nodes.append(node_output)
-
-        for node in evidence_to_output:
-            outcomes = all_nodes_with_outcomes[node]
-            infered_output_nodes.append(Node(node, outcomes))
-
-        network_output = BayesianNetworkOutput(vehicle_id, bn_id, infered_output_nodes)
-
-        return network_output
-
-    @staticmethod
-    def _extract_outcomes_and_build_node_output(discrete_factor: "DiscreteFactor", node_id: str) -> Node:
-        title = node_id
-        outcomes = [list(discrete_factor.state_names.values())[0], list(discrete_factor.values)]
-        outcomes = list(zip(*outcomes))
-        outcomes_output = []
-
-        for outcome_name, outcome_value in outcomes:
-            name = outcome_name
-            value = outcome_value
-            outcome = Outcome(name, value)
-            outcomes_output.append(outcome)
-
-        node_output = Node(title, outcomes_output)
-
-        return node_output
-
-    @staticmethod
-    def _add_ids_to_output(bn_network_output: BayesianNetworkOutput, specific_bn_data: "BayesianNetworkData"
-                           ) -> BayesianNetworkOutput:
-        """Extracts the vehicle ID and the Bayesian network ID from the given Bayesian network input data and extends
-        the Bayesian network output by these IDs.
+    def _build_infered_bn_output(specific_bn_data: "BayesianNetworkData", output_nodes: List[str],
+                                 inference_task: InferenceTask, node_posteriors: List[np.ndarray],
+                                 all_nodes_with_outcomes: Dict[str, List[Outcome]]) -> BayesianNetworkOutput:
+        """Builds the Bayesian network output from the posteriors returned by the inference workers.
 
         Parameters
         ----------
-        bn_network_output : BayesianNetworkOutput
-            Bayesian network output in which the vehicle ID and Bayesian network ID is still missing.
         specific_bn_data : BayesianNetworkData
-            Given input Bayesian network data on which the Bayesian network output is based on.
+            Bayesian network data for which the Bayesian network was inferred.
+        output_nodes : List[str]
+            IDs of the output nodes of the Bayesian network.
+        inference_task : InferenceTask
+            Inference task that was sent to the workers.
+        node_posteriors : List[np.ndarray]
+            Posterior probabilities for the inferred nodes of the task.
+        all_nodes_with_outcomes : Dict[str, List[Outcome]]
+            Outcomes of all nodes as defined by the Bayesian network configuration. Used for output nodes that are
+            evidences at the same time.
 
         Returns
         -------
         BayesianNetworkOutput
-            Bayesian network output with the corresponding vehicle ID and Bayesian network ID.
+            Bayesian network output object for the given input data after inference.
         """
-        bn_network_output.vehicle_id = specific_bn_data.vehicle_id
-        bn_network_output.bayesian_network_id = specific_bn_data.bayesian_network_id
+        bn_instance = specific_bn_data.bayesian_network_model
+        _, evidence_query, variables_to_compute = inference_task
+        infered_output_nodes = []
+
+        for node_id, posterior in zip(variables_to_compute, node_posteriors):
+            state_names = bn_instance.get_cpds(node_id).state_names[node_id]
+            outcomes = [Outcome(name, value) for name, value in zip(state_names, posterior)]
+            infered_output_nodes.append(Node(node_id, outcomes))
+
+        for node in output_nodes:
+            if node in evidence_query:
+                outcomes = all_nodes_with_outcomes[node]
+                infered_output_nodes.append(Node(node, outcomes))
+
+        bn_network_output = BayesianNetworkOutput(specific_bn_data.vehicle_id, specific_bn_data.bayesian_network_id,
+                                                  infered_output_nodes)
+        bn_network_output.vehicle_situation_state_id = specific_bn_data.vehicle_situation_state_id
 
         return bn_network_output
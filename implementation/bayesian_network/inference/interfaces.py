@@ -6,7 +6,7 @@
 #
 #################### END LICENSE BLOCK #################################
 
-from typing import List, Optional, ClassVar, TYPE_CHECKING
+from typing import List, Optional, ClassVar, Union, TYPE_CHECKING
 from dataclasses import dataclass
 import math
 
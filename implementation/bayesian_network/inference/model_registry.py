@@ -0,0 +1,374 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+from pgmpy.readwrite.XMLBIF import XMLBIFReader
+from bayesian_network.inference.compiled_inference import CompiledBayesianNetwork
+from sinadra_configuration_parameters import VEHICLE_SITUATION_STATE_TO_BAYESIAN_NETWORK, BN_MODEL_HOT_RELOAD
+from typing import Type, Dict, List, Callable, Optional, Union, TYPE_CHECKING
+import importlib
+import inspect
+import weakref
+import sys
+import os
+
+if TYPE_CHECKING:
+    from pgmpy.models import BayesianModel
+    from bayesian_network.model_generation.config_template import BayesianNetworkConfig
+
+
+class BayesianNetworkValidationException(Exception):
+    pass
+
+
+class _RegisteredBayesianNetwork:
+    """Registry entry of a single loaded Bayesian network.
+
+    Attributes
+    ----------
+    model : BayesianModel
+        Shared pgmpy Bayesian model. Must be treated as read-only by all users of the registry.
+    config_class : Type[BayesianNetworkConfig]
+        Bayesian network configuration class that is instantiated for each vehicle.
+    network_file_mtime : float
+        Modification time of the .xmlbif file at the time of loading.
+    config_file_mtime : float
+        Modification time of the configuration script at the time of loading.
+    compiled_network : Optional[CompiledBayesianNetwork]
+        Compiled version of the model for the compiled inference backend. Created on first use.
+    """
+
+    def __init__(self, model: "BayesianModel", config_class: Type["BayesianNetworkConfig"], network_file_mtime: float,
+                 config_file_mtime: float) -> None:
+        self.model = model
+        self.config_class = config_class
+        self.network_file_mtime = network_file_mtime
+        self.config_file_mtime = config_file_mtime
+        self.compiled_network: Optional[CompiledBayesianNetwork] = None
+
+
+class BayesianNetworkModelRegistry:
+    """Process-wide registry that loads and validates each Bayesian network (pgmpy model and configuration class) once
+    and hands out the shared model instances afterwards. The models are read-only for all users: the inference does
+    not modify them, which is why they are neither copied per vehicle nor re-parsed per risk cycle.
+    A network is reloaded on explicit request or, if BN_MODEL_HOT_RELOAD is set, as soon as the modification time of
+    its .xmlbif file (or its configuration script) changes.
+    Each process has its own registry. Every reload or invalidation increases the generation of the registry, the
+    client passes its generation with each inference task and the registries of the worker processes drop their
+    networks as soon as they receive a newer generation (see synchronize_generation).
+
+    Attributes
+    ----------
+    file_directory_path : str
+        (Class attribute) Absolute path to the files location to easily locate the saved Bayesian network files in the
+        "../files/" directory. Extracted using Python's os package.
+    generation : int
+        Number of reloads and invalidations of the registry.
+    """
+
+    file_directory_path = os.path.dirname(os.path.abspath(__file__))
+    _instance: Optional["BayesianNetworkModelRegistry"] = None
+
+    def __init__(self) -> None:
+        """Initializes an empty registry. Networks are loaded by load_all_networks() or lazily on first access."""
+        self._networks: Dict[str, _RegisteredBayesianNetwork] = {}
+        # Bound methods are held by weak references, thus, a listener does not keep its object (e.g. the posterior
+        # cache of an inference object) alive
+        self._reload_listeners: List[Union[Callable[[Optional[str]], None], weakref.WeakMethod]] = []
+        self.generation = 0
+        # Latest generation received by synchronize_generation
+        self._synchronized_generation = 0
+
+        self._path_to_files = f"{BayesianNetworkModelRegistry.file_directory_path}/../files/"
+        self._package_to_files = "bayesian_network.files"
+        if self._path_to_files not in sys.path:
+            sys.path.append(self._path_to_files)
+
+        self._config_file_name = "bayesian_network_config"
+        self._bayesian_network_file_name = "bayesian_network.xmlbif"
+
+    @classmethod
+    def get_instance(cls) -> "BayesianNetworkModelRegistry":
+        """Returns the registry of the current process and creates it on first access.
+
+        Returns
+        -------
+        BayesianNetworkModelRegistry
+            Process-wide registry instance.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def load_all_networks(self) -> None:
+        """Loads and validates all Bayesian networks that are listed in VEHICLE_SITUATION_STATE_TO_BAYESIAN_NETWORK
+        and that are not loaded yet. Intended to be called once on startup.
+        """
+        for bayesian_network_id in VEHICLE_SITUATION_STATE_TO_BAYESIAN_NETWORK.values():
+            if bayesian_network_id and bayesian_network_id not in self._networks:
+                self._networks[bayesian_network_id] = self._load_network(bayesian_network_id)
+
+    def get_model(self, bayesian_network_id: str) -> "BayesianModel":
+        """Returns the shared pgmpy Bayesian model for the given Bayesian network identifier.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+
+        Returns
+        -------
+        BayesianModel
+            Shared (read-only) pgmpy Bayesian model.
+        """
+        return self._get_network(bayesian_network_id).model
+
+    def get_compiled_network(self, bayesian_network_id: str) -> CompiledBayesianNetwork:
+        """Returns the compiled version of the Bayesian network for the compiled inference backend. The network is
+        compiled on first access and recompiled after a reload.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+
+        Returns
+        -------
+        CompiledBayesianNetwork
+            Compiled Bayesian network.
+        """
+        network = self._get_network(bayesian_network_id)
+        if network.compiled_network is None:
+            network.compiled_network = CompiledBayesianNetwork(network.model)
+        return network.compiled_network
+
+    def get_config_class(self, bayesian_network_id: str) -> Type["BayesianNetworkConfig"]:
+        """Returns the Bayesian network configuration class for the given Bayesian network identifier.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+
+        Returns
+        -------
+        Type[BayesianNetworkConfig]
+            Bayesian network configuration class that can be instantiated for each vehicle.
+        """
+        return self._get_network(bayesian_network_id).config_class
+
+    def get_loaded_network_ids(self) -> List[str]:
+        """Returns the identifiers of all currently loaded Bayesian networks.
+
+        Returns
+        -------
+        List[str]
+            Identifiers of the loaded Bayesian networks.
+        """
+        return list(self._networks.keys())
+
+    def reload(self, bayesian_network_id: Optional[str] = None) -> None:
+        """Reloads the files of the given Bayesian network from disk, or of all loaded networks if no identifier is
+        given, and notifies the registered reload listeners.
+
+        Parameters
+        ----------
+        bayesian_network_id : Optional[str]
+            Name/identifier for the Bayesian network. (The default value is None, i.e. all networks are reloaded.)
+        """
+        network_ids = [bayesian_network_id] if bayesian_network_id else self.get_loaded_network_ids()
+        for network_id in network_ids:
+            self._networks[network_id] = self._load_network(network_id, reload_config_module=True)
+            self.generation += 1
+            self._notify_reload_listeners(network_id)
+
+    def invalidate(self, bayesian_network_id: Optional[str] = None) -> None:
+        """Drops the given Bayesian network, or all networks if no identifier is given, from the registry. The files
+        are loaded again on next access. The registered reload listeners are notified.
+
+        Parameters
+        ----------
+        bayesian_network_id : Optional[str]
+            Name/identifier for the Bayesian network. (The default value is None, i.e. all networks are dropped.)
+        """
+        if bayesian_network_id:
+            self._networks.pop(bayesian_network_id, None)
+        else:
+            self._networks.clear()
+        self.generation += 1
+        self._notify_reload_listeners(bayesian_network_id)
+
+    def synchronize_generation(self, generation: int) -> None:
+        """Drops all networks if the given generation (of the client's registry) is newer than the previously received
+        one, i.e. if networks were reloaded or invalidated in the client. The networks are loaded again on next access.
+        Used by the inference worker processes.
+
+        Parameters
+        ----------
+        generation : int
+            Generation of the registry that requested the inference.
+        """
+        if generation > self._synchronized_generation:
+            self._synchronized_generation = generation
+            self.invalidate()
+
+    def add_reload_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Registers a callback that is called with the Bayesian network identifier (None for all networks) whenever
+        a network is reloaded or invalidated, e.g. to drop results that were computed with the old model. Bound
+        methods are only referenced weakly, they are unregistered as soon as their object is garbage collected.
+
+        Parameters
+        ----------
+        listener : Callable[[Optional[str]], None]
+            Callback to register.
+        """
+        # Listeners of garbage collected objects are dropped, thus, short-lived inference objects do not pile up
+        self._reload_listeners = [registered_listener for registered_listener in self._reload_listeners
+                                  if not isinstance(registered_listener, weakref.WeakMethod)
+                                  or registered_listener() is not None]
+        self._reload_listeners.append(weakref.WeakMethod(listener) if inspect.ismethod(listener) else listener)
+
+    def _notify_reload_listeners(self, bayesian_network_id: Optional[str]) -> None:
+        listeners = []
+        for listener in self._reload_listeners:
+            callback = listener() if isinstance(listener, weakref.WeakMethod) else listener
+            if callback is not None:
+                listeners.append(listener)
+                callback(bayesian_network_id)
+        self._reload_listeners = listeners
+
+    def _get_network(self, bayesian_network_id: str) -> _RegisteredBayesianNetwork:
+        """Returns the registry entry for the given Bayesian network identifier. Loads the network on first access and
+        reloads it if hot reloading is enabled and its files were modified since loading.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+
+        Returns
+        -------
+        _RegisteredBayesianNetwork
+            Registry entry of the Bayesian network.
+        """
+        network = self._networks.get(bayesian_network_id)
+
+        if network is None:
+            network = self._load_network(bayesian_network_id)
+            self._networks[bayesian_network_id] = network
+        elif BN_MODEL_HOT_RELOAD and self._files_modified(bayesian_network_id, network):
+            print(f"Bayesian network files of {bayesian_network_id} changed on disk, reloading")
+            self.reload(bayesian_network_id)
+            network = self._networks[bayesian_network_id]
+
+        return network
+
+    def _files_modified(self, bayesian_network_id: str, network: _RegisteredBayesianNetwork) -> bool:
+        return (os.path.getmtime(self._get_network_file_path(bayesian_network_id)) != network.network_file_mtime
+                or os.path.getmtime(self._get_config_file_path(bayesian_network_id)) != network.config_file_mtime)
+
+    def _load_network(self, bayesian_network_id: str, reload_config_module: bool = False
+                      ) -> _RegisteredBayesianNetwork:
+        """Loads and validates the Bayesian network configuration class and the Bayesian network pgmpy model.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+        reload_config_module : bool
+            Flag whether an already imported configuration module shall be re-executed. (The default value is False.)
+
+        Returns
+        -------
+        _RegisteredBayesianNetwork
+            Registry entry of the loaded Bayesian network.
+        """
+        network_file_mtime = os.path.getmtime(self._get_network_file_path(bayesian_network_id))
+        config_file_mtime = os.path.getmtime(self._get_config_file_path(bayesian_network_id))
+        config_class = self._load_bn_config_class(bayesian_network_id, reload_config_module)
+        model = self._load_bn(bayesian_network_id)
+        self._validate(bayesian_network_id, model, config_class)
+
+        return _RegisteredBayesianNetwork(model, config_class, network_file_mtime, config_file_mtime)
+
+    def _load_bn_config_class(self, bayesian_network_id: str, reload_config_module: bool = False
+                              ) -> Type["BayesianNetworkConfig"]:
+        """Loads the Bayesian network configuration Python class.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+        reload_config_module : bool
+            Flag whether an already imported configuration module shall be re-executed. (The default value is False.)
+
+        Returns
+        -------
+        Type[BayesianNetworkConfig]
+            Type of the Bayesian network configuration for the given Bayesian network identifier that can be
+            instantiated later on.
+        """
+        bn_config_pkg = importlib.import_module(f"{self._package_to_files}.{bayesian_network_id}"
+                                                f".{self._config_file_name}")
+        if reload_config_module:
+            bn_config_pkg = importlib.reload(bn_config_pkg)
+        bn_config_class = bn_config_pkg.BayesianNetworkConfig  # type:ignore
+
+        return bn_config_class
+
+    def _load_bn(self, bayesian_network_id: str) -> "BayesianModel":
+        """Loads the .xmlbif file and generates the corresponding pgmpy Bayesian model object.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+
+        Returns
+        -------
+        BayesianModel
+            Instantiated pgmpy Bayesian model corresponding to the given Bayesian network identifier.
+        """
+        reader = XMLBIFReader(path=self._get_network_file_path(bayesian_network_id))
+        bayesian_network = reader.get_model()
+
+        return bayesian_network
+
+    @staticmethod
+    def _validate(bayesian_network_id: str, model: "BayesianModel",
+                  config_class: Type["BayesianNetworkConfig"]) -> None:
+        """Checks the loaded model for consistency (CPDs defined and normalized) and that the configuration class
+        provides a node method for every node of the model.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Name/identifier for the Bayesian network.
+        model : BayesianModel
+            Loaded pgmpy Bayesian model.
+        config_class : Type[BayesianNetworkConfig]
+            Loaded Bayesian network configuration class.
+
+        Raises
+        ------
+        BayesianNetworkValidationException
+            Raised in case that the model is inconsistent or does not match its configuration class.
+        """
+        try:
+            model.check_model()
+        except ValueError as e:
+            raise BayesianNetworkValidationException(f"Bayesian network \"{bayesian_network_id}\" is invalid: {e}")
+
+        missing_node_methods = [node_id for node_id in model.nodes if not hasattr(config_class, f"node_{node_id}")]
+        if missing_node_methods:
+            raise BayesianNetworkValidationException(f"Bayesian network config of \"{bayesian_network_id}\" misses "
+                                                     f"the node methods for: {', '.join(missing_node_methods)}")
+
+    def _get_network_file_path(self, bayesian_network_id: str) -> str:
+        return self._path_to_files + f"{bayesian_network_id}/{self._bayesian_network_file_name}"
+
+    def _get_config_file_path(self, bayesian_network_id: str) -> str:
+        return self._path_to_files + f"{bayesian_network_id}/{self._config_file_name}.py"
@@ -0,0 +1,373 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+# Version of the chunk layout. Increase it whenever the layout changes, chunks of other versions are rejected.
+CYCLE_DATA_STORE_VERSION = 1
+
+# Chunk files are named by the first and the last cycle they hold, thus, the chunks of a cycle range are found without
+# opening any file. (A chunk that is flushed before it is full is rewritten under a new name by the next flush.)
+_CHUNK_FILE_NAME_PATTERN = re.compile(r"^chunk_(\d+)_(\d+)\.npz$")
+
+# Components of a stored trajectory: x mean, x std, y mean and y std
+NUM_TRAJECTORY_COMPONENTS = 4
+
+
+@dataclass()
+class CycleData:
+    """Data class holding the trajectories and Bayesian network posteriors of consecutive risk computation cycles in
+    columnar arrays. (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    cycles : np.ndarray
+        Cycle counter of each row, shape (C,).
+    trajectory_keys : List[str]
+        Trajectory keys (vehicle and behavior, e.g. "Ego", "FrontIDM"), shape (K,).
+    trajectories : np.ndarray
+        Trajectory distribution (x mean, x std, y mean, y std) x T of each cycle and trajectory key, shape
+        (C, K, 4, T). NaN if the trajectory does not exist in the cycle.
+    trajectory_mask : np.ndarray
+        True if the trajectory exists in the cycle, shape (C, K).
+    posterior_columns : List[Tuple[str, str, str]]
+        Bayesian network id, node and state of each posterior column, shape (P,). The states of a node are adjacent
+        columns.
+    posteriors : np.ndarray
+        Posterior probability of each cycle and posterior column, shape (C, P). NaN if the node was not inferred in
+        the cycle.
+    """
+
+    cycles: np.ndarray
+    trajectory_keys: List[str]
+    trajectories: np.ndarray
+    trajectory_mask: np.ndarray
+    posterior_columns: List[Tuple[str, str, str]]
+    posteriors: np.ndarray
+
+    def get_cycle_index(self, cycle: int) -> int:
+        """Returns the row of the given cycle.
+
+        Raises
+        ------
+        KeyError
+            If the cycle is not part of the data
+        """
+        index = int(np.searchsorted(self.cycles, cycle))
+        if index == len(self.cycles) or self.cycles[index] != cycle:
+            raise KeyError(f"Cycle {cycle} is not part of the cycle data")
+        return index
+
+    def get_node_posteriors(self, bayesian_network_id: str, node: str) -> Tuple[List[str], np.ndarray]:
+        """Returns the posterior vectors of a node over all cycles.
+
+        Parameters
+        ----------
+        bayesian_network_id : str
+            Id of the Bayesian network
+        node : str
+            Title of the node
+
+        Returns
+        -------
+        Tuple[List[str], np.ndarray]
+            States of the node and their posterior probabilities, shape (C, number of states)
+        """
+        column_indices = [index for index, (column_bn_id, column_node, _) in enumerate(self.posterior_columns)
+                          if column_bn_id == bayesian_network_id and column_node == node]
+        return [self.posterior_columns[index][2] for index in column_indices], self.posteriors[:, column_indices]
+
+    def get_stored_trajectories(self, cycle: int) -> Dict[str, Tuple[List[float], List[float], List[float],
+                                                                      List[float]]]:
+        """Returns the trajectories of a cycle in the format of the client's stored trajectories (and of the former
+        trajectories pickle files).
+        """
+        index = self.get_cycle_index(cycle)
+        return {trajectory_key: tuple(component.tolist() for component in self.trajectories[index, key_index])
+                for key_index, trajectory_key in enumerate(self.trajectory_keys)
+                if self.trajectory_mask[index, key_index]}
+
+    def get_stored_bayesian_output(self, cycle: int) -> Dict[str, Dict[str, List[Tuple[str, float]]]]:
+        """Returns the Bayesian network outputs of a cycle in the format of the client's stored Bayesian output (and
+        of the former BN output pickle files).
+        """
+        index = self.get_cycle_index(cycle)
+        stored_bayesian_output: Dict[str, Dict[str, List[Tuple[str, float]]]] = {}
+        for (bayesian_network_id, node, state), posterior in zip(self.posterior_columns, self.posteriors[index]):
+            if not np.isnan(posterior):
+                stored_bayesian_output.setdefault(bayesian_network_id, {}).setdefault(node, []).append(
+                    (state, float(posterior)))
+        return stored_bayesian_output
+
+
+def _concatenate_cycle_data(cycle_data_parts: List[CycleData]) -> CycleData:
+    # Aligns the trajectory keys and posterior columns of the parts (in the order of their first occurrence)
+    trajectory_keys = list(dict.fromkeys(key for part in cycle_data_parts for key in part.trajectory_keys))
+    posterior_columns = list(dict.fromkeys(column for part in cycle_data_parts for column in part.posterior_columns))
+    trajectory_lengths = {part.trajectories.shape[3] for part in cycle_data_parts if part.trajectory_keys}
+    if len(trajectory_lengths) > 1:
+        raise ValueError(f"The cycle data has different trajectory lengths {sorted(trajectory_lengths)}")
+    num_positions = trajectory_lengths.pop() if trajectory_lengths else 0
+    num_cycles = sum(len(part.cycles) for part in cycle_data_parts)
+
+    trajectories = np.full((num_cycles, len(trajectory_keys), NUM_TRAJECTORY_COMPONENTS, num_positions), np.nan)
+    trajectory_mask = np.zeros((num_cycles, len(trajectory_keys)), dtype=bool)
+    posteriors = np.full((num_cycles, len(posterior_columns)), np.nan)
+    row = 0
+    for part in cycle_data_parts:
+        rows = slice(row, row + len(part.cycles))
+        # Chunks without any trajectory (e.g. no vehicle around) have no trajectory length, their rows remain empty
+        if part.trajectory_keys:
+            key_indices = [trajectory_keys.index(key) for key in part.trajectory_keys]
+            trajectories[rows, key_indices] = part.trajectories
+            trajectory_mask[rows, key_indices] = part.trajectory_mask
+        posteriors[rows, [posterior_columns.index(column) for column in part.posterior_columns]] = part.posteriors
+        row += len(part.cycles)
+
+    cycles = np.concatenate([part.cycles for part in cycle_data_parts]) if cycle_data_parts \
+        else np.zeros(0, dtype=np.int64)
+    return CycleData(cycles, trajectory_keys, trajectories, trajectory_mask, posterior_columns, posteriors)
+
+
+class CycleDataStoreWriter:
+    """Append-only store of the trajectories and Bayesian network outputs of the risk computation cycles of a run. The
+    cycles are buffered and written in chunks of columnar arrays (one uncompressed .npz file per chunk), thus, a run
+    produces a few files instead of several files per cycle. The buffered cycles of a chunk are also written if the
+    flush interval elapsed, thus, a run that is stopped without close() loses only the cycles of the last interval.
+    """
+
+    def __init__(self, path: str, chunk_size: int, flush_interval: Optional[float] = None) -> None:
+        """Creates the store directory. The chunks of a previous run in the directory are removed.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the store
+        chunk_size : int
+            Number of cycles per chunk file
+        flush_interval : Optional[float]
+            Maximum time in seconds until an appended cycle is written, the chunk file is rewritten with the buffered
+            cycles at this interval until the chunk is full. (The default value is None, i.e. the cycles are only
+            written if the chunk is full or in close().)
+        """
+        os.makedirs(path, exist_ok=True)
+        for file_name in os.listdir(path):
+            if _CHUNK_FILE_NAME_PATTERN.match(file_name):
+                os.remove(os.path.join(path, file_name))
+        self._path = path
+        self._chunk_size = chunk_size
+        self._flush_interval = flush_interval
+        self._last_flush_time = time.perf_counter()
+        self._cycles: List[int] = []
+        self._stored_trajectories: List[Dict] = []
+        self._stored_bayesian_outputs: List[Dict] = []
+        # File of the buffered cycles that were flushed before the chunk was full (replaced by the next flush)
+        self._chunk_path: Optional[str] = None
+        self._num_flushed_cycles = 0
+        self._last_cycle: Optional[int] = None
+        self.num_cycles = 0
+
+    def append(self, cycle: int, stored_trajectories: Dict[str, Tuple[List[float], List[float], List[float],
+                                                                      List[float]]],
+               stored_bayesian_output: Dict[str, Dict[str, List[Tuple[str, float]]]]) -> None:
+        """Appends the data of a cycle. A chunk is written as soon as it is full or the flush interval elapsed.
+
+        Parameters
+        ----------
+        cycle : int
+            Cycle counter, must be greater than the cycle counter of the previously appended cycle
+        stored_trajectories : Dict[str, Tuple[List[float], List[float], List[float], List[float]]]
+            Trajectory distribution (x mean, x std, y mean, y std) by trajectory key
+        stored_bayesian_output : Dict[str, Dict[str, List[Tuple[str, float]]]]
+            Node outcomes (state, probability) by node and Bayesian network id
+
+        Raises
+        ------
+        ValueError
+            If the cycle counter is not greater than the one of the previously appended cycle
+        """
+        if self._last_cycle is not None and cycle <= self._last_cycle:
+            raise ValueError(f"Cycle {cycle} is not appended in ascending cycle order")
+        self._last_cycle = cycle
+        self._cycles.append(cycle)
+        self._stored_trajectories.append(stored_trajectories)
+        self._stored_bayesian_outputs.append(stored_bayesian_output)
+        self.num_cycles += 1
+        if len(self._cycles) >= self._chunk_size:
+            self.flush()
+            self._start_chunk()
+        elif self._flush_interval is not None and \
+                time.perf_counter() - self._last_flush_time >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the buffered cycles of the current chunk as chunk file. The file is written to a temporary file
+        first and renamed afterwards, thus, a reader never reads a partially written chunk. If the chunk is not full,
+        its cycles remain buffered and the next flush replaces the file by a file with the additional cycles.
+        """
+        self._last_flush_time = time.perf_counter()
+        if len(self._cycles) == self._num_flushed_cycles:
+            return
+
+        trajectory_keys = list(dict.fromkeys(key for trajectories in self._stored_trajectories for key in trajectories))
+        posterior_columns = list(dict.fromkeys((bayesian_network_id, node, state)
+                                               for bayesian_output in self._stored_bayesian_outputs
+                                               for bayesian_network_id, nodes in bayesian_output.items()
+                                               for node, outcomes in nodes.items() for state, _ in outcomes))
+        num_positions = max((len(trajectory[0]) for trajectories in self._stored_trajectories
+                             for trajectory in trajectories.values()), default=0)
+
+        trajectories = np.full((len(self._cycles), len(trajectory_keys), NUM_TRAJECTORY_COMPONENTS, num_positions),
+                               np.nan)
+        trajectory_mask = np.zeros((len(self._cycles), len(trajectory_keys)), dtype=bool)
+        posteriors = np.full((len(self._cycles), len(posterior_columns)), np.nan)
+        key_indices = {key: index for index, key in enumerate(trajectory_keys)}
+        column_indices = {column: index for index, column in enumerate(posterior_columns)}
+        for row, (stored_trajectories, bayesian_output) in enumerate(zip(self._stored_trajectories,
+                                                                         self._stored_bayesian_outputs)):
+            for trajectory_key, trajectory in stored_trajectories.items():
+                trajectories[row, key_indices[trajectory_key]] = trajectory
+                trajectory_mask[row, key_indices[trajectory_key]] = True
+            for bayesian_network_id, nodes in bayesian_output.items():
+                for node, outcomes in nodes.items():
+                    for state, probability in outcomes:
+                        posteriors[row, column_indices[(bayesian_network_id, node, state)]] = probability
+
+        path = os.path.join(self._path, f"chunk_{self._cycles[0]:010d}_{self._cycles[-1]:010d}.npz")
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(file, version=np.array(CYCLE_DATA_STORE_VERSION), cycles=np.array(self._cycles, dtype=np.int64),
+                     trajectory_keys=np.array(trajectory_keys, dtype=str), trajectories=trajectories,
+                     trajectory_mask=trajectory_mask,
+                     posterior_columns=np.array(posterior_columns, dtype=str).reshape(len(posterior_columns), 3),
+                     posteriors=posteriors)
+        os.replace(temporary_path, path)
+        # The file of the previous flush of the chunk holds a subset of the cycles
+        if self._chunk_path is not None and self._chunk_path != path:
+            os.remove(self._chunk_path)
+        self._chunk_path = path
+        self._num_flushed_cycles = len(self._cycles)
+
+    def _start_chunk(self) -> None:
+        self._cycles = []
+        self._stored_trajectories = []
+        self._stored_bayesian_outputs = []
+        self._chunk_path = None
+        self._num_flushed_cycles = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._start_chunk()
+
+    def __enter__(self) -> "CycleDataStoreWriter":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+
+class CycleDataStoreReader:
+    """Reads cycle ranges of a store written by the CycleDataStoreWriter. Only the chunks that overlap the requested
+    cycles are loaded.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Indexes the chunk files of the store by their cycle ranges. If there are several files of a chunk (a
+        flushed chunk whose previous file was not removed yet), only the file with the most cycles is used.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the store
+        """
+        chunks_by_first_cycle: Dict[int, Tuple[int, int, str]] = {}
+        for file_name in os.listdir(path):
+            match = _CHUNK_FILE_NAME_PATTERN.match(file_name)
+            if match:
+                first_cycle, last_cycle = int(match.group(1)), int(match.group(2))
+                if first_cycle not in chunks_by_first_cycle or chunks_by_first_cycle[first_cycle][1] < last_cycle:
+                    chunks_by_first_cycle[first_cycle] = (first_cycle, last_cycle, os.path.join(path, file_name))
+        self._chunks: List[Tuple[int, int, str]] = sorted(chunks_by_first_cycle.values())
+
+    def get_cycle_range(self) -> Optional[Tuple[int, int]]:
+        """Returns the first and the last stored cycle or None if the store is empty."""
+        if not self._chunks:
+            return None
+        return self._chunks[0][0], self._chunks[-1][1]
+
+    def get_cycles(self) -> np.ndarray:
+        """Returns the counters of all stored cycles (only the cycle column of each chunk is read)."""
+        cycles = []
+        for _, _, chunk_path in self._chunks:
+            with np.load(chunk_path, allow_pickle=False) as chunk:
+                cycles.append(chunk["cycles"])
+        return np.concatenate(cycles) if cycles else np.zeros(0, dtype=np.int64)
+
+    def iterate_chunks(self, first_cycle: Optional[int] = None, last_cycle: Optional[int] = None
+                       ) -> Iterator[CycleData]:
+        """Yields the data of the given cycle range chunk by chunk, e.g. to scan a long run with bounded memory.
+
+        Parameters
+        ----------
+        first_cycle : Optional[int]
+            First cycle of the range. (The default value is None, i.e. the first stored cycle.)
+        last_cycle : Optional[int]
+            Last cycle of the range (inclusive). (The default value is None, i.e. the last stored cycle.)
+
+        Yields
+        ------
+        CycleData
+            Data of the cycles of a chunk that are part of the range
+        """
+        for chunk_first_cycle, chunk_last_cycle, chunk_path in self._chunks:
+            if (last_cycle is not None and chunk_first_cycle > last_cycle) or \
+                    (first_cycle is not None and chunk_last_cycle < first_cycle):
+                continue
+            cycle_data = self._load_chunk(chunk_path)
+            rows = np.ones(len(cycle_data.cycles), dtype=bool)
+            if first_cycle is not None:
+                rows &= cycle_data.cycles >= first_cycle
+            if last_cycle is not None:
+                rows &= cycle_data.cycles <= last_cycle
+            if not np.all(rows):
+                cycle_data = CycleData(cycle_data.cycles[rows], cycle_data.trajectory_keys,
+                                       cycle_data.trajectories[rows], cycle_data.trajectory_mask[rows],
+                                       cycle_data.posterior_columns, cycle_data.posteriors[rows])
+            yield cycle_data
+
+    def load_cycles(self, first_cycle: Optional[int] = None, last_cycle: Optional[int] = None) -> CycleData:
+        """Loads the data of the given cycle range.
+
+        Parameters
+        ----------
+        first_cycle : Optional[int]
+            First cycle of the range. (The default value is None, i.e. the first stored cycle.)
+        last_cycle : Optional[int]
+            Last cycle of the range (inclusive). (The default value is None, i.e. the last stored cycle.)
+
+        Returns
+        -------
+        CycleData
+            Data of the cycles of the range (the trajectory keys and posterior columns of all loaded chunks)
+        """
+        return _concatenate_cycle_data(list(self.iterate_chunks(first_cycle, last_cycle)))
+
+    @staticmethod
+    def _load_chunk(chunk_path: str) -> CycleData:
+        with np.load(chunk_path, allow_pickle=False) as chunk:
+            version = int(chunk["version"])
+            if version != CYCLE_DATA_STORE_VERSION:
+                raise ValueError(f"{chunk_path} has chunk version {version}, expected version "
+                                 f"{CYCLE_DATA_STORE_VERSION}")
+            posterior_columns = [tuple(column) for column in chunk["posterior_columns"].tolist()]
+            return CycleData(chunk["cycles"], chunk["trajectory_keys"].tolist(), chunk["trajectories"],
+                             chunk["trajectory_mask"], posterior_columns, chunk["posteriors"])
@@ -0,0 +1,361 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import math
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence, Type, TypeVar
+import numpy as np
+
+from data_model.entity import BoundingBox, Dimension
+from data_model.positions import Location, Orientation, Position, Vector3D, WorldPosition, array_to_locations, \
+    get_rotation_matrices
+from data_model.vehicle import KinematicStatus, SurroundingVehicles, Vehicle, VehicleControl, VehicleLightState, \
+    VehiclePointId
+
+VehicleType = TypeVar("VehicleType", bound=Vehicle)
+
+# Bits of the vehicle light state (same layout as carla.VehicleLightState). The NONE flag is 0, thus, it is never set
+# and "all" is set as soon as any light is on (same as the conversion of the CARLA light state).
+LIGHT_STATE_BITS: Dict[str, int] = {
+    "position": 0x1,
+    "lowbeam": 0x2,
+    "highbeam": 0x4,
+    "right_blinker": 0x10,
+    "left_blinker": 0x20,
+    "reverse": 0x40,
+    "fog": 0x80,
+    "interior": 0x100,
+    "special_1": 0x200,
+    "special_2": 0x400,
+    "all": 0xFFFFFFFF,
+    "NONE": 0x0
+}
+
+# Columns of ActorSnapshot.controls
+VEHICLE_CONTROL_COLUMNS = ("throttle", "steer", "brake", "hand_brake", "reverse", "gear")
+
+# Reference points in the local coordinate system of the bounding box as (longitudinal, lateral) factors of the half
+# length and half width (at the height of the bounding box center), in the order of VehiclePointId
+_LOCAL_REFERENCE_POINT_FACTORS = np.array([
+    [1.0, 1.0],  # FRONT_MID_LEFT
+    [1.0, 0.0],  # FRONT_MID_CENTER
+    [1.0, -1.0],  # FRONT_MID_RIGHT
+    [-1.0, 1.0],  # REAR_MID_LEFT
+    [-1.0, 0.0],  # REAR_MID_CENTER
+    [-1.0, -1.0],  # REAR_MID_RIGHT
+    [0.0, 1.0],  # CENTER_MID_LEFT
+    [0.0, -1.0]  # CENTER_MID_RIGHT
+])
+
+# Fields of the vehicle views that are created from the snapshot on first access
+_SNAPSHOT_VEHICLE_FIELDS = ("length", "kinematics", "position", "bounding_box", "light_state", "vehicle_control",
+                            "vehicle_points", "surrounding_vehicles")
+
+# Vehicle view class of each vehicle class
+_VEHICLE_VIEW_TYPES: Dict[type, type] = {}
+
+
+def get_reference_points(locations: np.ndarray, orientations: np.ndarray, bounding_box_centers: np.ndarray,
+                         dimensions: np.ndarray) -> np.ndarray:
+    """Returns the 8 reference points (middle points of the bounding box sides, see VehiclePointId) of all actors in
+    world coordinates (same points as Vehicle.get_middle_points_dict).
+
+    Parameters
+    ----------
+    locations : np.ndarray
+        World locations (x, y, z) of the actors, shape (number of actors, 3)
+    orientations : np.ndarray
+        Heading, pitch and roll of the actors in degrees, shape (number of actors, 3)
+    bounding_box_centers : np.ndarray
+        Bounding box centers (x, y, z) in the local coordinate system of the actors, shape (number of actors, 3)
+    dimensions : np.ndarray
+        Length, width and height of the bounding boxes, shape (number of actors, 3)
+
+    Returns
+    -------
+    np.ndarray
+        Reference points (x, y, z) in the order of VehiclePointId, shape (number of actors, 8, 3)
+    """
+    bounding_box_centers = np.asarray(bounding_box_centers, dtype=float).reshape(-1, 3)
+    half_dimensions = np.asarray(dimensions, dtype=float).reshape(-1, 3)[:, 0:2] / 2
+
+    local_points = np.repeat(bounding_box_centers[:, None, :], len(_LOCAL_REFERENCE_POINT_FACTORS), axis=1)
+    local_points[..., 0:2] += _LOCAL_REFERENCE_POINT_FACTORS[None, :, :] * half_dimensions[:, None, :]
+
+    world_points = np.einsum("aij,apj->api", get_rotation_matrices(orientations), local_points)
+    return world_points + np.asarray(locations, dtype=float).reshape(-1, 1, 3)
+
+
+@dataclass()
+class ActorSnapshot:
+    """Columnar snapshot of all actors of one tick. All arrays have the number of actors as first dimension, the
+    index of an actor is its row. The snapshot is filled in bulk per tick and the stages that work on all actors
+    (situation class lookup, transformations, trajectory seeds) read the arrays directly. The Vehicle objects of the
+    data model are lazy views on a row of the snapshot (see get_vehicle).
+    (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    ids : np.ndarray
+        Actor ids.
+    role_names : List[str]
+        Role names of the actors.
+    locations : np.ndarray
+        World locations (x, y, z), shape (number of actors, 3).
+    orientations : np.ndarray
+        Heading, pitch and roll in degrees, shape (number of actors, 3).
+    velocities : np.ndarray
+        Velocity vectors (x, y, z) in m/s, shape (number of actors, 3).
+    accelerations : np.ndarray
+        Acceleration vectors (x, y, z) in m/s², shape (number of actors, 3).
+    bounding_box_centers : np.ndarray
+        Bounding box centers (x, y, z) in the local coordinate system of the actors, shape (number of actors, 3).
+    dimensions : np.ndarray
+        Length, width and height of the bounding boxes, shape (number of actors, 3).
+    light_states : np.ndarray
+        Light state bits (see LIGHT_STATE_BITS).
+    controls : np.ndarray
+        Vehicle controls in the order of VEHICLE_CONTROL_COLUMNS, shape (number of actors, 6).
+    reference_points : np.ndarray
+        Reference points (x, y, z) in world coordinates in the order of VehiclePointId, shape (number of actors, 8, 3).
+        Computed from the other arrays if not given.
+    """
+
+    ids: np.ndarray
+    role_names: List[str]
+    locations: np.ndarray
+    orientations: np.ndarray
+    velocities: np.ndarray
+    accelerations: np.ndarray
+    bounding_box_centers: np.ndarray
+    dimensions: np.ndarray
+    light_states: np.ndarray
+    controls: np.ndarray
+    reference_points: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        if self.reference_points is None:
+            self.reference_points = get_reference_points(self.locations, self.orientations, self.bounding_box_centers,
+                                                         self.dimensions)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_speeds(self) -> np.ndarray:
+        """Returns the speed of each actor in m/s."""
+        return np.sqrt(np.sum(self.velocities ** 2, axis=1))
+
+    def get_forward_vectors(self) -> np.ndarray:
+        """Returns the forward vector (x, y) with length 1 of each actor (same as Orientation.get_forward_vector)."""
+        headings = np.radians(self.orientations[:, 0])
+        return np.stack([np.cos(headings), np.sin(headings)], axis=1)
+
+    def get_reference_points(self, vehicle_point_id: VehiclePointId) -> np.ndarray:
+        """Returns the given reference point of each actor.
+
+        Parameters
+        ----------
+        vehicle_point_id : VehiclePointId
+            Reference point
+
+        Returns
+        -------
+        np.ndarray
+            Reference point (x, y, z) of each actor, shape (number of actors, 3)
+        """
+        return self.reference_points[:, vehicle_point_id.value - 1]
+
+    def get_vehicle(self, index: int, vehicle_type: Type[VehicleType]) -> VehicleType:
+        """Returns a vehicle of the data model that is a lazy view on the given row of the snapshot. The fields of
+        the vehicle (position, kinematics, bounding box, ...) are created from the snapshot on first access.
+
+        Parameters
+        ----------
+        index : int
+            Row of the actor in the snapshot
+        vehicle_type : Type[Vehicle]
+            Vehicle class of the view (e.g. EgoVehicle or OtherVehicle)
+
+        Returns
+        -------
+        Vehicle
+            Vehicle object (of a subclass of the given vehicle class)
+        """
+        view_type = _get_vehicle_view_type(vehicle_type)
+        vehicle = view_type.__new__(view_type)
+        vehicle._snapshot = self
+        vehicle._snapshot_index = index
+        vehicle.id = int(self.ids[index])
+        vehicle.role_name = self.role_names[index]
+        return vehicle
+
+    def get_vehicle_field(self, index: int, field_name: str) -> Any:
+        """Creates the value of a field of a vehicle view from the given row of the snapshot.
+
+        Parameters
+        ----------
+        index : int
+            Row of the actor in the snapshot
+        field_name : str
+            Name of the field (one of the fields that are part of the snapshot)
+
+        Returns
+        -------
+        Any
+            Value of the field
+
+        Raises
+        ------
+        AttributeError
+            If the field is not part of the snapshot
+        """
+        if field_name == "length":
+            return float(self.dimensions[index, 0])
+        if field_name == "kinematics":
+            return self.__create_kinematics(index)
+        if field_name == "position":
+            location = Location(*(float(value) for value in self.locations[index]))
+            heading, pitch, roll = (float(value) for value in self.orientations[index])
+            return Position(world_position=WorldPosition(location, Orientation(heading, pitch, roll)))
+        if field_name == "bounding_box":
+            return BoundingBox(Location(*(float(value) for value in self.bounding_box_centers[index])),
+                               Dimension(*(float(value) for value in self.dimensions[index])))
+        if field_name == "light_state":
+            light_state = int(self.light_states[index])
+            return VehicleLightState(**{name: bool(light_state & bit) for name, bit in LIGHT_STATE_BITS.items()})
+        if field_name == "vehicle_control":
+            throttle, steer, brake, hand_brake, reverse, gear = self.controls[index]
+            return VehicleControl(float(throttle), float(steer), float(brake), bool(hand_brake), bool(reverse),
+                                  int(gear))
+        if field_name == "vehicle_points":
+            # The reference points are stored in the order of VehiclePointId
+            return dict(zip(VehiclePointId, array_to_locations(self.reference_points[index])))
+        if field_name == "surrounding_vehicles":
+            return SurroundingVehicles()
+        raise AttributeError(field_name)
+
+    def __create_kinematics(self, index: int) -> KinematicStatus:
+        velocity = Vector3D(*(float(value) for value in self.velocities[index]))
+        acceleration_vector = Vector3D(*(float(value) for value in self.accelerations[index]))
+        return KinematicStatus(acceleration=math.sqrt(acceleration_vector.x ** 2 + acceleration_vector.y ** 2 +
+                                                      acceleration_vector.z ** 2),
+                               acceleration_vector=acceleration_vector,
+                               speed=math.sqrt(velocity.x ** 2 + velocity.y ** 2 + velocity.z ** 2),
+                               velocity=velocity)
+
+    @staticmethod
+    def get_vehicle_reference_points(vehicles: Sequence[Vehicle], vehicle_point_id: VehiclePointId) -> np.ndarray:
+        """Returns the given reference point of each vehicle. The points of vehicle views on one snapshot are read
+        from the snapshot in one lookup, the points of other vehicles from their vehicle points.
+
+        Parameters
+        ----------
+        vehicles : Sequence[Vehicle]
+            Vehicles (views on a snapshot or regular vehicle objects)
+        vehicle_point_id : VehiclePointId
+            Reference point
+
+        Returns
+        -------
+        np.ndarray
+            Reference point (x, y, z) of each vehicle, shape (number of vehicles, 3)
+        """
+        snapshot = ActorSnapshot.get_common_snapshot(vehicles)
+        if snapshot is not None:
+            indices = [vehicle._snapshot_index for vehicle in vehicles]
+            return snapshot.get_reference_points(vehicle_point_id)[indices]
+
+        return np.array([[vehicle.vehicle_points[vehicle_point_id].x, vehicle.vehicle_points[vehicle_point_id].y,
+                          vehicle.vehicle_points[vehicle_point_id].z] for vehicle in vehicles],
+                        dtype=float).reshape(-1, 3)
+
+    @staticmethod
+    def get_vehicle_forward_vectors(vehicles: Sequence[Vehicle]) -> np.ndarray:
+        """Returns the forward vector (x, y) with length 1 of each vehicle. The vectors of vehicle views on one
+        snapshot are computed from the snapshot in one call, the vectors of other vehicles from their orientation.
+
+        Parameters
+        ----------
+        vehicles : Sequence[Vehicle]
+            Vehicles (views on a snapshot or regular vehicle objects)
+
+        Returns
+        -------
+        np.ndarray
+            Forward vector (x, y) of each vehicle, shape (number of vehicles, 2)
+        """
+        snapshot = ActorSnapshot.get_common_snapshot(vehicles)
+        if snapshot is not None:
+            indices = [vehicle._snapshot_index for vehicle in vehicles]
+            return snapshot.get_forward_vectors()[indices]
+
+        forward_vectors = [vehicle.position.world_position.orientation.get_forward_vector() for vehicle in vehicles]
+        return np.array([[forward_vector.x, forward_vector.y] for forward_vector in forward_vectors],
+                        dtype=float).reshape(-1, 2)
+
+    @staticmethod
+    def get_common_snapshot(vehicles: Sequence[Vehicle]) -> Optional["ActorSnapshot"]:
+        """Returns the snapshot all given vehicles are views on.
+
+        Parameters
+        ----------
+        vehicles : Sequence[Vehicle]
+            Vehicles (views on a snapshot or regular vehicle objects)
+
+        Returns
+        -------
+        Optional[ActorSnapshot]
+            Snapshot of the vehicles or None if any vehicle is no view on it (or there are no vehicles)
+        """
+        snapshot = None
+        for vehicle in vehicles:
+            vehicle_snapshot = getattr(vehicle, "_snapshot", None)
+            if vehicle_snapshot is None or (snapshot is not None and vehicle_snapshot is not snapshot):
+                return None
+            snapshot = vehicle_snapshot
+        return snapshot
+
+
+def _get_vehicle_view_type(vehicle_type: type) -> type:
+    # Subclass of the vehicle class whose snapshot fields are properties that create the field value from the snapshot
+    # on first access (an assigned value replaces the snapshot value)
+    view_type = _VEHICLE_VIEW_TYPES.get(vehicle_type)
+    if view_type is not None:
+        return view_type
+
+    def create_lazy_field(field_name: str) -> property:
+        def get_field(vehicle: Vehicle) -> Any:
+            try:
+                return vehicle.__dict__[field_name]
+            except KeyError:
+                value = vehicle._snapshot.get_vehicle_field(vehicle._snapshot_index, field_name)
+                vehicle.__dict__[field_name] = value
+                return value
+
+        def set_field(vehicle: Vehicle, value: Any) -> None:
+            vehicle.__dict__[field_name] = value
+
+        return property(get_field, set_field)
+
+    def reduce_ex(vehicle: Vehicle, protocol: int) -> Any:
+        # A view is pickled as a regular vehicle object with all fields created (without the snapshot)
+        return _create_vehicle, (vehicle_type, {vehicle_field.name: getattr(vehicle, vehicle_field.name)
+                                                for vehicle_field in fields(vehicle)})
+
+    attributes = {field_name: create_lazy_field(field_name) for field_name in _SNAPSHOT_VEHICLE_FIELDS}
+    attributes["__reduce_ex__"] = reduce_ex
+    attributes["__doc__"] = f"{vehicle_type.__name__} that is a lazy view on a row of an ActorSnapshot."
+    view_type = type(f"{vehicle_type.__name__}View", (vehicle_type,), attributes)
+    _VEHICLE_VIEW_TYPES[vehicle_type] = view_type
+    return view_type
+
+
+def _create_vehicle(vehicle_type: Type[VehicleType], field_values: Dict[str, Any]) -> VehicleType:
+    # Creates a regular vehicle object with the given field values (unpickling of vehicle views)
+    vehicle = vehicle_type.__new__(vehicle_type)
+    vehicle.__dict__.update(field_values)
+    return vehicle
@@ -0,0 +1,150 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import hashlib
+import os
+import zipfile
+from dataclasses import dataclass, fields
+from typing import Optional
+import numpy as np
+
+# Version of the compiled map file layout. Increase it whenever the content or the derivation of the compiled map
+# changes, thus, compiled maps of older versions are derived again.
+COMPILED_MAP_VERSION = 1
+
+
+@dataclass()
+class CompiledMap:
+    """Data class holding everything that is derived from the ad map at load time: the lane topology (in driving
+    direction) and the sampled lane centerlines. All lane relations are lane indices into lane_ids (-1 if there is no
+    such lane). The compiled map is stored in a versioned .npz file keyed by the hash of the OpenDrive file.
+    (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    lane_ids : np.ndarray
+        ad map lane id of each lane.
+    lane_lengths : np.ndarray
+        Length of each lane in meter [m].
+    negative_lane_directions : np.ndarray
+        True for the lanes that are driven against their lane orientation (ad.map.lane.LaneDirection.NEGATIVE).
+    successor_lane_indices : np.ndarray
+        Following lane of each lane in driving direction.
+    predecessor_lane_indices : np.ndarray
+        Predecessor lane of each lane in driving direction.
+    left_lane_indices : np.ndarray
+        Lane to the left of each lane in driving direction.
+    right_lane_indices : np.ndarray
+        Lane to the right of each lane in driving direction.
+    centerline_points : np.ndarray
+        Centerline samples (x, y) of all lanes, shape (number of samples, 2). The samples of a lane are consecutive.
+    centerline_lane_indices : np.ndarray
+        Lane index of each centerline sample.
+    centerline_parametric_offsets : np.ndarray
+        Parametric offset [0; 1] of each centerline sample on its lane.
+    centerline_headings : np.ndarray
+        ENU heading of the lane at each centerline sample in radians (in driving direction).
+    centerline_lane_widths : np.ndarray
+        Width of the lane at each centerline sample in meter [m].
+    """
+
+    lane_ids: np.ndarray
+    lane_lengths: np.ndarray
+    negative_lane_directions: np.ndarray
+    successor_lane_indices: np.ndarray
+    predecessor_lane_indices: np.ndarray
+    left_lane_indices: np.ndarray
+    right_lane_indices: np.ndarray
+    centerline_points: np.ndarray
+    centerline_lane_indices: np.ndarray
+    centerline_parametric_offsets: np.ndarray
+    centerline_headings: np.ndarray
+    centerline_lane_widths: np.ndarray
+
+    def save(self, path: str, key: str) -> None:
+        """Stores the compiled map in a .npz file. The file is written to a temporary file first and renamed
+        afterwards, thus, concurrent processes never read a partially written file.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz file
+        key : str
+            Key of the compiled map (see get_compiled_map_key), a later load only accepts the file with the same key
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        arrays = {field.name: getattr(self, field.name) for field in fields(self)}
+        with open(temporary_path, "wb") as file:
+            np.savez(file, key=np.array(key), **arrays)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path: str, key: str) -> Optional["CompiledMap"]:
+        """Loads the compiled map from a .npz file.
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz file
+        key : str
+            Expected key of the compiled map (see get_compiled_map_key)
+
+        Returns
+        -------
+        Optional[CompiledMap]
+            Compiled map or None if the file does not exist, can not be read or was compiled with another key
+        """
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as compiled_map_file:
+                if str(compiled_map_file["key"]) != key:
+                    return None
+                return CompiledMap(**{field.name: compiled_map_file[field.name] for field in fields(CompiledMap)})
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+
+def get_file_hash(path: str) -> str:
+    """Returns the SHA-256 hash of the content of the given file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file (e.g. the OpenDrive file of a map)
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 hash
+    """
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_compiled_map_key(source_hash: str, sample_distance: float) -> str:
+    """Returns the key of a compiled map. A compiled map is only valid for the same OpenDrive file, the same centerline
+    sample distance and the same COMPILED_MAP_VERSION.
+
+    Parameters
+    ----------
+    source_hash : str
+        Hash of the OpenDrive file (see get_file_hash)
+    sample_distance : float
+        Maximal distance between two centerline samples of a lane in meter [m]
+
+    Returns
+    -------
+    str
+        Key of the compiled map
+    """
+    return f"{COMPILED_MAP_VERSION}:{source_hash}:{sample_distance!r}"
@@ -6,8 +6,7 @@
 #
 #################### END LICENSE BLOCK #################################
 
-import math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Optional, List
 from enum import Enum
 from data_model.positions import Position, Location, WorldPosition, Orientation
@@ -48,8 +47,8 @@ class BoundingBox:
     dimension: Dimension
         Width, length and height of the bounding box
     """
-    center: Location = Location()
-    dimension: Dimension = Dimension()
+    center: Location = field(default_factory=Location)
+    dimension: Dimension = field(default_factory=Dimension)
 
     def get_middle_points(self, world_position: WorldPosition) -> List[Location]:
         """
@@ -82,49 +81,34 @@ class BoundingBox:
         """
 
         """
-        vector_between_points = end - start
-        half_vector_between_points = vector_between_points * 0.5
-        middle_point = half_vector_between_points + start
-        return middle_point
+        # Same operations as (end - start) * 0.5 + start without the intermediate vectors
+        return Location((end.x - start.x) * 0.5 + start.x, (end.y - start.y) * 0.5 + start.y,
+                        (end.z - start.z) * 0.5 + start.z)
 
     @staticmethod
-    def __rotate_vector(location: Location, orientation: Orientation) -> Location:
-        """Rotates a given location vector using the orientation
+    def __transform_vector(location: Location, rotation_matrix: List[List[float]], translation: Location) -> Location:
+        """Rotates a given location vector using the rotation matrix of the orientation and translates it afterwards
 
         Parameters
         ----------
         location : Location
             location of the point to rotate
-        orientation : Orientation
-            rotation vector used to rotate the location
+        rotation_matrix : List[List[float]]
+            rotation matrix of the orientation (see Orientation.get_rotation_matrix)
+        translation : Location
+            translation that is added to the rotated location
 
         Returns
         -------
         Location
-            Rotated location of the given location
+            Rotated and translated location of the given location
         """
-        ch: float = math.cos(math.radians(orientation.heading))
-        sh: float = math.sin(math.radians(orientation.heading))
-        cr: float = math.cos(math.radians(orientation.roll))
-        sr: float = math.sin(math.radians(orientation.roll))
-        cp: float = math.cos(math.radians(orientation.pitch))
-        sp: float = math.sin(math.radians(orientation.pitch))
+        (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = rotation_matrix
+        new_loc_x: float = location.x * r00 + location.y * r01 + location.z * r02
+        new_loc_y: float = location.x * r10 + location.y * r11 + location.z * r12
+        new_lox_z: float = location.x * r20 + location.y * r21 + location.z * r22
 
-        new_loc_x: float = location.x * (cp * ch) + \
-                           location.y * (ch * sp * sr - sh * cr) + \
-                           location.z * (-ch * sp * cr - sh * sr)
-
-        new_loc_y: float = location.x * (cp * sh) + \
-                           location.y * (sh * sp * sr + ch * cr) + \
-                           location.z * (-sh * sp * cr + ch * sr)
-
-        new_lox_z: float = location.x * sp + \
-                           location.y * (-cp * sr) + \
-                           location.z * (cp * cr)
-
-        new_loc = Location(new_loc_x, new_loc_y, new_lox_z)
-
-        return new_loc
+        return Location(new_loc_x + translation.x, new_loc_y + translation.y, new_lox_z + translation.z)
 
     def get_world_vertices(self, world_position: WorldPosition) -> List[Location]:
         """Returns the vertices of the bounding box using world coordinates
@@ -139,12 +123,9 @@ class BoundingBox:
             List of Location objects representing a vertice using world coordinates
         """
         local_vertices: List[Location] = self.get_local_vertices()
-        world_vertices: List[Location] = []
-        for vertex in local_vertices:
-            vertex = self.__rotate_vector(vertex, world_position.orientation)  # rotate vecotr
-            world_vertex = vertex +  world_position.location  # translate vector
-            world_vertices.append(world_vertex)
-        return world_vertices
+        # The rotation matrix is the same for all vertices
+        rotation_matrix = world_position.orientation.get_rotation_matrix()
+        return [self.__transform_vector(vertex, rotation_matrix, world_position.location) for vertex in local_vertices]
 
 
     def get_local_vertices(self) -> List[Location]:
@@ -195,8 +176,8 @@ class EntityObject:
     """
     name: str = ""
     mass: Optional[float] = None
-    position: Position = Position()
-    bounding_box: BoundingBox = BoundingBox()
+    position: Position = field(default_factory=Position)
+    bounding_box: BoundingBox = field(default_factory=BoundingBox)
 
     def get_location(self) -> Location:
         """Returns the location of the entity in world coordinates.
@@ -0,0 +1,214 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+@dataclass()
+class LaneCenterlineMatch:
+    """Data class describing the nearest lane centerline points of a batch of query points. All attributes are arrays
+    with the number of query points as first dimension.
+    (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    lane_indices : np.ndarray
+        Index of the matched lane (in the lane order of the index).
+    parametric_offsets : np.ndarray
+        Parametric offset [0; 1] of the lane center point on the matched lane (in lane orientation).
+    center_points : np.ndarray
+        Lane center points (x, y) closest to the query points, shape (number of points, 2).
+    headings : np.ndarray
+        ENU heading of the matched lane at the lane center points in radians (in driving direction).
+    lane_widths : np.ndarray
+        Width of the matched lane at the lane center points in meter [m].
+    distances : np.ndarray
+        Distance between the query points and the lane center points in meter [m].
+    """
+
+    lane_indices: np.ndarray
+    parametric_offsets: np.ndarray
+    center_points: np.ndarray
+    headings: np.ndarray
+    lane_widths: np.ndarray
+    distances: np.ndarray
+
+
+class LaneCenterlineIndex:
+    """KD-tree over the sampled centerlines of all lanes of a static road network. A query point is matched to its
+    nearest centerline sample and projected onto the adjacent centerline segments of the same lane, thus, the lane
+    center point does not depend on the sampling distance (up to the curvature between two samples).
+    """
+
+    def __init__(self, points: np.ndarray, lane_indices: np.ndarray, parametric_offsets: np.ndarray,
+                 headings: np.ndarray, lane_widths: np.ndarray) -> None:
+        """Builds the KD-tree over the given centerline samples.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Centerline samples (x, y), shape (number of samples, 2). The samples of a lane must be consecutive and
+            ordered by their parametric offset.
+        lane_indices : np.ndarray
+            Lane index of each sample.
+        parametric_offsets : np.ndarray
+            Parametric offset [0; 1] of each sample on its lane.
+        headings : np.ndarray
+            ENU heading of the lane at each sample in radians (in driving direction).
+        lane_widths : np.ndarray
+            Width of the lane at each sample in meter [m].
+        """
+        self._points = np.asarray(points, dtype=float)
+        self._lane_indices = np.asarray(lane_indices, dtype=int)
+        self._parametric_offsets = np.asarray(parametric_offsets, dtype=float)
+        self._headings = np.asarray(headings, dtype=float)
+        self._lane_widths = np.asarray(lane_widths, dtype=float)
+        self._kd_tree = cKDTree(self._points)
+
+        # Samples that start a centerline segment to the next sample of the same lane
+        self._has_next_sample = np.zeros(len(self._points), dtype=bool)
+        self._has_next_sample[:-1] = self._lane_indices[:-1] == self._lane_indices[1:]
+
+        # A point inside a lane area is at most half a lane width plus half a segment length away from a sample
+        segment_lengths = np.linalg.norm(self._points[1:] - self._points[:-1], axis=1)[self._has_next_sample[:-1]]
+        self._containment_search_radius = (np.max(self._lane_widths, initial=0.0) +
+                                           np.max(segment_lengths, initial=0.0)) / 2
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def query(self, points: np.ndarray) -> LaneCenterlineMatch:
+        """Matches each query point to the closest lane center point.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Query points (x, y), shape (number of points, 2).
+
+        Returns
+        -------
+        LaneCenterlineMatch
+            Lane, parametric offset, lane center point, heading, width and distance to the lane center of each point.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        _, nearest_samples = self._kd_tree.query(points)
+
+        # Candidate segments: the one starting and the one ending at the nearest sample (if on the same lane)
+        segment_starts = np.stack([nearest_samples, nearest_samples - 1], axis=1)
+        segment_starts = np.clip(segment_starts, 0, len(self._points) - 1)
+        valid_segments = self._has_next_sample[segment_starts]
+        valid_segments[:, 1] &= nearest_samples > 0
+        segment_ends = np.minimum(segment_starts + 1, len(self._points) - 1)
+
+        start_points = self._points[segment_starts]
+        segment_vectors = self._points[segment_ends] - start_points
+        segment_lengths_squared = np.einsum("ijk,ijk->ij", segment_vectors, segment_vectors)
+        segment_lengths_squared[segment_lengths_squared == 0.0] = 1.0
+        ratios = np.einsum("ijk,ijk->ij", points[:, None, :] - start_points, segment_vectors) / segment_lengths_squared
+        ratios = np.clip(ratios, 0.0, 1.0)
+        projected_points = start_points + ratios[..., None] * segment_vectors
+        projection_distances = np.linalg.norm(points[:, None, :] - projected_points, axis=-1)
+        projection_distances[~valid_segments] = np.inf
+
+        best_segments = np.argmin(projection_distances, axis=1)
+        rows = np.arange(len(points))
+        starts = segment_starts[rows, best_segments]
+        ends = segment_ends[rows, best_segments]
+        ratios = ratios[rows, best_segments]
+        distances = projection_distances[rows, best_segments]
+
+        # Isolated samples (lanes with a single sample) have no valid segment, they are matched directly
+        isolated = ~np.isfinite(distances)
+        ratios[isolated] = 0.0
+        ends[isolated] = starts[isolated]
+
+        heading_differences = np.angle(np.exp(1j * (self._headings[ends] - self._headings[starts])))
+        headings = np.angle(np.exp(1j * (self._headings[starts] + ratios * heading_differences)))
+        center_points = self._points[starts] + ratios[:, None] * (self._points[ends] - self._points[starts])
+
+        return LaneCenterlineMatch(
+            lane_indices=self._lane_indices[starts],
+            parametric_offsets=self._interpolate(self._parametric_offsets, starts, ends, ratios),
+            center_points=center_points,
+            headings=headings,
+            lane_widths=self._interpolate(self._lane_widths, starts, ends, ratios),
+            distances=np.linalg.norm(points - center_points, axis=1)
+        )
+
+    def get_containing_lane_indices(self, point: np.ndarray) -> np.ndarray:
+        """Returns the lanes whose area (centerline +/- half the lane width) contains the given point. Several lanes
+        contain the same point where lanes overlap, e.g. in junctions, the nearest centerline is not necessarily the
+        lane that the ad map matching selects at these points.
+
+        Parameters
+        ----------
+        point : np.ndarray
+            Query point (x, y).
+
+        Returns
+        -------
+        np.ndarray
+            Sorted indices of the lanes that contain the point (empty if the point is not on any lane).
+        """
+        _, lane_indices = self._get_containing_lanes(np.asarray(point, dtype=float).reshape(1, 2))
+        return lane_indices
+
+    def count_containing_lanes(self, points: np.ndarray) -> np.ndarray:
+        """Returns the number of lanes whose area contains each of the given points in one vectorized lookup (see
+        get_containing_lane_indices).
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Query points (x, y), shape (number of points, 2).
+
+        Returns
+        -------
+        np.ndarray
+            Number of lanes that contain each point (more than one on overlapping lanes).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        point_indices, _ = self._get_containing_lanes(points)
+        return np.bincount(point_indices, minlength=len(points))
+
+    def _get_containing_lanes(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Unique (point index, lane index) pairs of the lanes containing the points, sorted by point and lane
+        candidate_samples = self._kd_tree.query_ball_point(points, self._containment_search_radius)
+        num_candidates = [len(samples) for samples in candidate_samples]
+        if sum(num_candidates) == 0:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+        point_indices = np.repeat(np.arange(len(points)), num_candidates)
+        samples = np.concatenate([np.asarray(samples, dtype=int) for samples in candidate_samples])
+
+        # Both segments adjacent to a candidate sample (if they connect two samples of the same lane)
+        point_indices = np.concatenate([point_indices, point_indices[samples > 0]])
+        segment_starts = np.concatenate([samples, samples[samples > 0] - 1])
+        valid_segments = self._has_next_sample[segment_starts]
+        point_indices = point_indices[valid_segments]
+        segment_starts = segment_starts[valid_segments]
+        segment_ends = segment_starts + 1
+
+        start_points = self._points[segment_starts]
+        segment_vectors = self._points[segment_ends] - start_points
+        segment_lengths_squared = np.einsum("ij,ij->i", segment_vectors, segment_vectors)
+        segment_lengths_squared[segment_lengths_squared == 0.0] = 1.0
+        relative_points = points[point_indices] - start_points
+        ratios = np.clip(np.einsum("ij,ij->i", relative_points, segment_vectors) / segment_lengths_squared, 0.0, 1.0)
+        distances = np.linalg.norm(relative_points - ratios[:, None] * segment_vectors, axis=1)
+        lane_widths = self._interpolate(self._lane_widths, segment_starts, segment_ends, ratios)
+
+        contained = distances <= lane_widths / 2
+        point_lane_pairs = np.unique(np.stack([point_indices[contained],
+                                               self._lane_indices[segment_starts[contained]]], axis=1), axis=0)
+        return point_lane_pairs[:, 0], point_lane_pairs[:, 1]
+
+    @staticmethod
+    def _interpolate(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, ratios: np.ndarray) -> np.ndarray:
+        return values[starts] + ratios * (values[ends] - values[starts])
@@ -9,9 +9,15 @@
 import ad_map_access as ad
 import math
 import os
-from typing import TYPE_CHECKING, Optional
-from dataclasses import dataclass
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Hashable, Optional, Tuple
+from dataclasses import dataclass, field
+from data_model.compiled_map import CompiledMap, get_compiled_map_key, get_file_hash
+from data_model.lane_centerline_index import LaneCenterlineIndex, LaneCenterlineMatch
 from data_model.positions import Position, Location
+from sinadra_configuration_parameters import MAP_MATCHING_CACHE_SIZE, MAP_MATCHING_CACHE_RESOLUTION, \
+    MAP_LANE_CENTERLINE_SAMPLE_DISTANCE, MAP_CACHE_ENABLED, MAP_CACHE_DIRECTORY
+from util.lru_cache import LRUCache
 
 if TYPE_CHECKING:
     from data_model.positions import Orientation
@@ -29,7 +35,7 @@ class Waypoint:
     lane_width : float
         Width of the lane at the waypoints position
     """
-    position: Position = Position()
+    position: Position = field(default_factory=Position)
     lane_width: float = 0
 
     def get_location(self) -> Optional[Location]:
@@ -53,15 +59,51 @@ class Waypoint:
         return self.position.world_position.orientation
 
 
+@dataclass()
+class MapMatchedLanePoint:
+    """Data class describing the result of a map matching that is kept in the map matching cache of the Map
+
+    Attributes
+    ----------
+    lane : ad.map.lane.Lane
+        Lane of the best map matched position
+    parametric_offset : float
+        Parametric offset [0; 1] of the map matched position on the lane (in lane orientation)
+    lane_length : float
+        Length of the lane in meter [m]
+    lane_width : float
+        Width of the lane at the map matched position in meter [m]
+    heading : float
+        ENU heading of the lane at the map matched position in radians
+    """
+    lane: ad.map.lane.Lane
+    parametric_offset: float
+    lane_length: float
+    lane_width: float
+    heading: float
+
+
 class Map(object):
     """Map class that holds a representation of the ad map and provides severel functions to work with the map.
     Takes the map name of the current town to create an ad representation.
 
     Attributes;
+    map_name : str
+        Name of the map (i.e. Town03)
     map : ad.map
         ad map object of the current map
     map_matching : ad.map.match.AdMapMatching
         Object that handles all map matching actions
+
+    The road network is static, thus, the centerlines of all lanes are sampled once at load time into a KD-tree
+    (LaneCenterlineIndex) that answers the map matching queries without ad map matching. (The ad map matching is only
+    used for points that are not on any lane.) The map matching results are kept in an LRU cache keyed on the query
+    point (rounded to MAP_MATCHING_CACHE_RESOLUTION) and the search radius, as the same locations are matched several
+    times per tick.
+
+    The lane topology (successor, predecessor, left and right lanes) and the centerline samples are derived once per
+    OpenDrive file and kept in a compiled map file in MAP_CACHE_DIRECTORY (keyed by the hash of the OpenDrive file),
+    later runs load it instead of deriving it from the ad map again.
     """
     def __init__(self, map_name):
         """Constructor for the Map class. Loads the ad map from an OpenDrive File
@@ -72,14 +114,78 @@ class Map(object):
             Name of the map (i.e. Town03) without .xodr
         """
         # start = os.getcwd()
+        self.map_name = map_name
         wd = os.path.dirname(os.path.realpath(__file__))
-        f = open(f"{wd}/map_config_file.txt", "w")
-        f.write("[ADMap]\n")
-        f.write(f"map=/maps/{map_name}.xodr\n")
-        f.write("openDriveOverlapMargin=0.2")
-        f.close()
+        xodr_path = f"/maps/{map_name}.xodr"
+        map_config = f"[ADMap]\nmap={xodr_path}\nopenDriveOverlapMargin=0.2"
+        self.__write_map_config_file(f"{wd}/map_config_file.txt", map_config)
         self.map = ad.map.access.init(f"{wd}/map_config_file.txt")
         self.map_matching = ad.map.match.AdMapMatching()
+        self._map_matching_cache = LRUCache(MAP_MATCHING_CACHE_SIZE)
+
+        # ad map lane objects by lane index (of the compiled map), fetched from the ad map on first use
+        self._lanes: Dict[int, ad.map.lane.Lane] = {}
+        compiled_map = self.__get_compiled_map(map_name, xodr_path, MAP_LANE_CENTERLINE_SAMPLE_DISTANCE)
+        self._compiled_map = compiled_map
+        self._lane_indices_by_id: Dict[int, int] = {int(lane_id): lane_index
+                                                    for lane_index, lane_id in enumerate(compiled_map.lane_ids)}
+        self._lane_centerline_index = LaneCenterlineIndex(compiled_map.centerline_points,
+                                                          compiled_map.centerline_lane_indices,
+                                                          compiled_map.centerline_parametric_offsets,
+                                                          compiled_map.centerline_headings,
+                                                          compiled_map.centerline_lane_widths)
+
+    def get_lane_center_matches(self, points: np.ndarray,
+                                resolve_overlapping_lanes: bool = False) -> LaneCenterlineMatch:
+        """Returns the closest lane center points of the given points in one vectorized lookup.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Query points (x, y), shape (number of points, 2)
+        resolve_overlapping_lanes : bool
+            Resolve the points on several overlapping lanes (e.g. in junctions) with the ad map matching like
+            get_waypoint instead of taking the lane with the nearest centerline. (The default value is False.)
+
+        Returns
+        -------
+        LaneCenterlineMatch
+            Lane, parametric offset, lane center point, heading (in radians), width and distance to the lane center of
+            each point
+        """
+        lane_center_matches = self._lane_centerline_index.query(points)
+        if not resolve_overlapping_lanes:
+            return lane_center_matches
+
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        for point_index in np.flatnonzero(self._lane_centerline_index.count_containing_lanes(points) > 1):
+            x, y = points[point_index]
+            map_matched_lane_point = self.__get_map_matched_lane_point(Location(x=x, y=y, z=0.0))
+            center_point = ad.map.point.toENU(ad.map.lane.getParametricPoint(
+                map_matched_lane_point.lane, map_matched_lane_point.parametric_offset, 0.5))
+            lane_center_matches.lane_indices[point_index] = \
+                self._lane_indices_by_id.get(int(map_matched_lane_point.lane.id), -1)
+            lane_center_matches.parametric_offsets[point_index] = map_matched_lane_point.parametric_offset
+            lane_center_matches.center_points[point_index] = float(center_point.x), float(center_point.y)
+            lane_center_matches.headings[point_index] = map_matched_lane_point.heading
+            lane_center_matches.lane_widths[point_index] = map_matched_lane_point.lane_width
+            lane_center_matches.distances[point_index] = math.hypot(x - float(center_point.x),
+                                                                    y - float(center_point.y))
+        return lane_center_matches
+
+    def invalidate_map_matching_cache(self) -> None:
+        """Drops all cached map matching results (e.g. at the start of a tick or after the map was changed)."""
+        self._map_matching_cache.invalidate()
+
+    def get_map_matching_cache_statistics(self) -> Tuple[int, int, float]:
+        """Returns the statistics of the map matching cache since start.
+
+        Returns
+        -------
+        Tuple[int, int, float]
+            Number of cache hits, number of cache misses and hit rate.
+        """
+        return self._map_matching_cache.hits, self._map_matching_cache.misses, self._map_matching_cache.get_hit_rate()
 
     def get_distance_to_lane_end(self, location: Location) -> float:
         """Returns the distance between the given location to the end of the lane in driving direction.
@@ -95,10 +201,9 @@ class Map(object):
             distance between the given location and the end of the lane"""
 
         lane = self.__get_lane(location)
-        map_matching_result = self.__get_map_matched_position_from_enu_point(location.to_ENU())
-        offset = float(map_matching_result.lanePoint.paraPoint.parametricOffset)
-        length: ad.physics.Distance = map_matching_result.lanePoint.laneLength
-        one_meter_as_longitudinal_offset = 1 / float(length)
+        map_matched_lane_point = self.__get_map_matched_lane_point(location)
+        offset = map_matched_lane_point.parametric_offset
+        one_meter_as_longitudinal_offset = 1 / map_matched_lane_point.lane_length
 
         if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
             distance = (1 - offset) * float(one_meter_as_longitudinal_offset)
@@ -122,14 +227,12 @@ class Map(object):
             location in the middel of the lane, closest to the given location"""
 
         waypoint = Waypoint()
-        enu_point = location.to_ENU()
-        map_matching_result = self.__get_map_matched_position_from_enu_point(enu_point)
+        map_matched_lane_point = self.__get_map_matched_lane_point(location)
 
-        offset = float(map_matching_result.lanePoint.paraPoint.parametricOffset)
-        lane = ad.map.lane.getLane(map_matching_result.lanePoint.paraPoint.laneId)
-        heading = float(ad.map.lane.getLaneENUHeading(map_matching_result))
-        heading = math.degrees(heading)
-        lane_width = float(map_matching_result.lanePoint.laneWidth)
+        offset = map_matched_lane_point.parametric_offset
+        lane = map_matched_lane_point.lane
+        heading = math.degrees(map_matched_lane_point.heading)
+        lane_width = map_matched_lane_point.lane_width
 
         ecef_point = ad.map.lane.getParametricPoint(lane, offset, 0.5)
         enu_point = ad.map.point.toENU(ecef_point)
@@ -154,8 +257,7 @@ class Map(object):
             location in the middle of the right lane
         """
         enu_point = location.to_ENU()
-        map_matched_position = self.__get_map_matched_position_from_enu_point(enu_point)
-        heading = ad.map.lane.getLaneENUHeading(map_matched_position)
+        heading = self.__get_map_matched_lane_point(location).heading
 
         current_lane = self.__get_lane(location)
         right_lane = self.__get_lane_right(location)
@@ -183,8 +285,7 @@ class Map(object):
             location in the middle of the left lane
         """
         enu_point = location.to_ENU()
-        map_matched_position = self.__get_map_matched_position_from_enu_point(enu_point)
-        heading = ad.map.lane.getLaneENUHeading(map_matched_position)
+        heading = self.__get_map_matched_lane_point(location).heading
 
         current_lane = self.__get_lane(location)
         left_lane = self.__get_lane_left(location)
@@ -213,16 +314,7 @@ class Map(object):
             lane to the right of the given lane
         """
         lane: ad.map.lane.Lane = self.__get_lane(location)
-        if lane.direction == ad.map.lane.LaneDirection.NEGATIVE:
-            # Contact lanes of the ad map are based on the lane orientation.
-            # lane orientation != lane driving direction
-            right_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.LEFT)
-        else:
-            right_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.RIGHT)
-
-        right_lane = ad.map.lane.getLane(right_lanes[0].toLane)
-
-        return right_lane
+        return self.__get_contact_lane(lane, self._compiled_map.right_lane_indices)
 
     def __get_lane_left(self, location: Location) -> ad.map.lane.Lane:
         """Returns the lane to the left of the lane of the given location.
@@ -238,16 +330,7 @@ class Map(object):
             lane to the left of the given lane
         """
         lane: ad.map.lane.Lane = self.__get_lane(location)
-        if lane.direction == ad.map.lane.LaneDirection.NEGATIVE:
-            # Contact lanes of the ad map are based on the lane orientation.
-            # lane orientation != lane driving direction
-            left_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.RIGHT)
-        else:
-            left_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.LEFT)
-
-        left_lane = ad.map.lane.getLane(left_lanes[0].toLane)
-
-        return left_lane
+        return self.__get_contact_lane(lane, self._compiled_map.left_lane_indices)
 
     def __get_lane(self, location: Location) -> ad.map.lane.Lane:
         """ Returns the lane that contains the given location
@@ -262,18 +345,9 @@ class Map(object):
         ad.map.lane.Lane
             lane containing the given position
         """
-        enu_point = ad.map.point.ENUPoint()
-        enu_point.x = ad.map.point.ENUCoordinate(location.x)
-        enu_point.y = ad.map.point.ENUCoordinate(location.y)
-        enu_point.z = ad.map.point.ENUCoordinate(0)
+        return self.__get_map_matched_lane_point(location, 0.5).lane
 
-        map_matching_result = self.map_matching.getMapMatchedPositions(enu_point, ad.physics.Distance(0.5),
-                                                                       ad.physics.Probability(0.05))
-        lane = ad.map.lane.getLane(map_matching_result[0].lanePoint.paraPoint.laneId)
-
-        return lane
-
-    def get_next_point_on_lane(self, start_point: Location, distance: float) -> Location:
+    def get_next_point_on_lane(self, start_point: Location, distance: float) -> Optional[Location]:
         """Returns the point with a certain distance [m] to the given position.
         If the given distance is longer then the remaining lane_length, it continues on the following lane.
         The distance is calculated along the lane.
@@ -288,66 +362,101 @@ class Map(object):
 
         Returns
         -------
-        positions.Location
-            position of the new point
+        Optional[positions.Location]
+            position of the new point (None if the lanes end before the given distance)
         """
-        lane = self.__get_lane(start_point)
-        start_point_enu = ad.map.point.ENUPoint()
-        start_point_enu.x = ad.map.point.ENUCoordinate(start_point.x)
-        start_point_enu.y = ad.map.point.ENUCoordinate(start_point.y)
-        start_point_enu.z = ad.map.point.ENUCoordinate(0)
-
-        map_matching_result = self.map_matching.getMapMatchedPositions(start_point_enu, ad.physics.Distance(0.5),
-                                                                       ad.physics.Probability(0.05))
-
-        lane_point: ad.map.match.LanePoint = map_matching_result[0].lanePoint.paraPoint
-        length: ad.physics.Distance = map_matching_result[0].lanePoint.laneLength
-        one_meter_as_longitudinal_offset = 1 / float(length)
-        if distance >= 0:
-            distance_as_offset = one_meter_as_longitudinal_offset * distance
-            if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
-                if (1 - float(lane_point.parametricOffset)) < distance_as_offset:
-                    # Lane is too short, go to the following lane
-                    remaining_distance = distance - ((1 - float(lane_point.parametricOffset)) * float(length))
-                    successor = self.__get_successor_lane(lane)
-                    next_point_enu = self.__get_next_point_in_lane(successor, remaining_distance)
+        next_point = self.sample_lane_polyline(start_point, np.array([distance]))[0]
+        if np.isnan(next_point[0]):
+            return None
 
-                else:
-                    next_point_enu = self.__get_point_on_lane_from_parametric_offset(
-                        lane, float(lane_point.parametricOffset) + distance_as_offset
-                    )
-            else:
-                if float(lane_point.parametricOffset) < distance_as_offset:
-                    # Lane is too short, go to the following lane
-                    remaining_distance = distance - (float(lane_point.parametricOffset) * float(length))
-                    successor = self.__get_successor_lane(lane)
-                    next_point_enu = self.__get_next_point_in_lane(successor, remaining_distance)
+        return Location(float(next_point[0]), float(next_point[1]), float(next_point[2]))
 
-                else:
-                    next_point_enu = self.__get_point_on_lane_from_parametric_offset(
-                        lane, float(lane_point.parametricOffset) - distance_as_offset
-                    )
+    def sample_lane_polyline(self, start_point: Location, distances: np.ndarray) -> np.ndarray:
+        """Returns the points in the middle of the lane with the given distances [m] to the given position along the
+        lane (in driving direction). Positive distances continue on the following lanes, negative distances on the
+        predecessor lanes. The start point is map matched only once and the lanes are walked incrementally, thus, the
+        points of a sensing area cost one map matching in total.
+
+        Parameters
+        ----------
+        start_point : positions.Location
+            starting position of the walk along the lane
+        distances : np.ndarray
+            distances of the points to the start point along the lane in meter [m] (in any order)
+
+        Returns
+        -------
+        np.ndarray
+            points (x, y, z) in the order of the given distances, shape (number of distances, 3). Points beyond a lane
+            without a following (or predecessor) lane are NaN.
+        """
+        distances = np.asarray(distances, dtype=float).reshape(-1)
+        points = np.full((len(distances), 3), np.nan)
+
+        map_matched_lane_point = self.__get_map_matched_lane_point(start_point, 0.5)
+        lane = map_matched_lane_point.lane
+        lane_length = map_matched_lane_point.lane_length
+        if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
+            distance_from_lane_start = map_matched_lane_point.parametric_offset * lane_length
         else:
-            distance_as_offset = one_meter_as_longitudinal_offset * distance * -1
-            if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
-                if float(lane_point.parametricOffset) < distance_as_offset:
-                    # Lane is too short, go the predecessor lane
-                    remaining_distance = distance + (float(lane_point.parametricOffset)) * float(length)
-                    predecessor = self.__get_predecessor_lane(lane)
-                    next_point_enu = self.__get_next_point_in_lane(predecessor, remaining_distance)
+            distance_from_lane_start = (1 - map_matched_lane_point.parametric_offset) * lane_length
+
+        forward_indices = np.flatnonzero(distances >= 0)
+        forward_indices = forward_indices[np.argsort(distances[forward_indices], kind="stable")]
+        self.__walk_lanes(lane, lane_length, -distance_from_lane_start, distances, forward_indices, points, True)
+
+        backward_indices = np.flatnonzero(distances < 0)
+        backward_indices = backward_indices[np.argsort(-distances[backward_indices], kind="stable")]
+        self.__walk_lanes(lane, lane_length, -distance_from_lane_start, distances, backward_indices, points, False)
+
+        return points
+
+    def __walk_lanes(self, lane: ad.map.lane.Lane, lane_length: float, lane_start: float, distances: np.ndarray,
+                     indices: np.ndarray, points: np.ndarray, forward: bool) -> None:
+        """Walks from the given lane along the following (or predecessor) lanes and stores the lane center points with
+        the given distances in the points array.
+
+        Parameters
+        ----------
+        lane : ad.map.lane.Lane
+            lane of the start point
+        lane_length : float
+            length of the given lane in meter [m]
+        lane_start : float
+            distance [m] of the start of the given lane (in driving direction) relative to the start point
+        distances : np.ndarray
+            distances of all points to the start point along the lane in meter [m]
+        indices : np.ndarray
+            indices of the points that shall be computed, ordered by increasing absolute distance
+        points : np.ndarray
+            array of all points (x, y, z) in which the computed points are stored
+        forward : bool
+            True for following lanes (positive distances), False for predecessor lanes (negative distances)
+        """
+        for index in indices:
+            distance = distances[index]
+            try:
+                if forward:
+                    while distance - lane_start > lane_length:
+                        lane_start += lane_length
+                        lane = self.__get_successor_lane(lane)
+                        lane_length = float(lane.length)
                 else:
-                    next_point_enu = self.__get_point_on_lane_from_parametric_offset(lane, distance_as_offset * -1)
+                    while distance < lane_start:
+                        lane = self.__get_predecessor_lane(lane)
+                        lane_length = float(lane.length)
+                        lane_start -= lane_length
+            except IndexError:
+                # The lane has no following (or predecessor) lane, the remaining points do not exist
+                return
+
+            distance_in_lane = (distance - lane_start) / lane_length if lane_length > 0 else 0.0
+            if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
+                parametric_offset = distance_in_lane
             else:
-                if (1 - float(lane_point.parametricOffset)) < distance_as_offset:
-                    # Lane is too short
-                    remaining_distance = distance + (1 - float(lane_point.parametricOffset)) * float(length)
-                    predecessor = self.__get_predecessor_lane(lane)
-                    next_point_enu = self.__get_next_point_in_lane(predecessor, remaining_distance)
-                else:
-                    next_point_enu = self.__get_point_on_lane_from_parametric_offset(lane, distance_as_offset * -1)
-        next_point = Location(next_point_enu.x, next_point_enu.y, next_point_enu.z)
-
-        return next_point
+                parametric_offset = 1 - distance_in_lane
+            enu_point = ad.map.point.toENU(ad.map.lane.getParametricPoint(lane, parametric_offset, 0.5))
+            points[index] = float(enu_point.x), float(enu_point.y), float(enu_point.z)
 
     def __get_successor_lane(self, lane: ad.map.lane.Lane) -> ad.map.lane.Lane:
         """Returns the following lane in driving direction to the given one.
@@ -362,14 +471,7 @@ class Map(object):
         ad.map.lane.Lane
             Following lane  of the given lane
         """
-        if lane.direction == ad.map.lane.LaneDirection.POSITIVE:
-            successor_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.SUCCESSOR)
-            successor_lane = ad.map.lane.getLane(successor_lanes[0].toLane)
-        else:
-            successor_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.PREDECESSOR)
-            successor_lane = ad.map.lane.getLane(successor_lanes[0].toLane)
-
-        return successor_lane
+        return self.__get_contact_lane(lane, self._compiled_map.successor_lane_indices)
 
     def __get_predecessor_lane(self, lane: ad.map.lane.Lane) -> ad.map.lane.Lane:
         """Returns the predecessor lane in driving direction to the given one.
@@ -384,23 +486,55 @@ class Map(object):
                 ad.map.lane.Lane
                     Predecessor lane  of the given lane
                 """
-        if lane.direction == ad.map.lane.LaneDirection.NEGATIVE:
-            predecessor_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.SUCCESSOR)
-            predecessor_lane = ad.map.lane.getLane(predecessor_lanes[0].toLane)
-        else:
-            predecessor_lanes = ad.map.lane.getContactLanes(lane, ad.map.lane.ContactLocation.PREDECESSOR)
-            predecessor_lane = ad.map.lane.getLane(predecessor_lanes[0].toLane)
+        return self.__get_contact_lane(lane, self._compiled_map.predecessor_lane_indices)
 
-        return predecessor_lane
+    def __get_contact_lane(self, lane: ad.map.lane.Lane, contact_lane_indices: np.ndarray) -> ad.map.lane.Lane:
+        """Returns the contact lane of the given lane from the compiled lane topology.
 
-    def __get_map_matched_position_from_enu_point(self, enu_point: ad.map.point.ENUPoint, distance: float = 1,
-                                                  probability: float = 0.05) -> ad.map.match.MapMatchedPosition:
-        """Returns the map matched position of the given enu point
+        Parameters
+        ----------
+        lane : ad.map.lane.Lane
+            Lane that the contact lane is searched for
+        contact_lane_indices : np.ndarray
+            Contact lane index of each lane (one of the lane relations of the compiled map)
+
+        Returns
+        -------
+        ad.map.lane.Lane
+            Contact lane of the given lane
+
+        Raises
+        ------
+        IndexError
+            If the given lane has no such contact lane
+        """
+        lane_index = self._lane_indices_by_id.get(int(lane.id), -1)
+        contact_lane_index = int(contact_lane_indices[lane_index]) if lane_index >= 0 else -1
+        if contact_lane_index < 0:
+            raise IndexError(f"Lane {int(lane.id)} has no contact lane")
+
+        return self.__get_lane_by_index(contact_lane_index)
+
+    def __get_lane_by_index(self, lane_index: int) -> ad.map.lane.Lane:
+        """Returns the ad map lane object of the lane with the given index in the compiled map."""
+        lane = self._lanes.get(lane_index)
+        if lane is None:
+            lane = ad.map.lane.getLane(ad.map.lane.LaneId(int(self._compiled_map.lane_ids[lane_index])))
+            self._lanes[lane_index] = lane
+        return lane
+
+    def __get_map_matched_lane_point(self, location: Location, distance: float = 1,
+                                     probability: float = 0.05) -> MapMatchedLanePoint:
+        """Returns the best map matched lane point of the given location. The location is rounded to
+        MAP_MATCHING_CACHE_RESOLUTION, thus, all locations in the same grid cell share one (cached) map matching result.
+        The lane is determined with the lane centerline index, the ad map matching is only used for locations that are
+        not on any lane or that are on several overlapping lanes (e.g. in junctions), as the ad map matching may select
+        another lane than the one with the nearest centerline there.
 
         Parameters
         ----------
-        enu_point : ad.map.point.ENUPoint
-            position of interest as enu point
+        location : Location
+            position of interest
         distance : float
             search radius around the given point to select a lane as result
         probability : float
@@ -408,80 +542,190 @@ class Map(object):
 
         Returns
         -------
-        ad.map.match.MapMatchedPosition
-            MapMatchedPosition object of the given enu point
+        MapMatchedLanePoint
+            Lane, parametric offset, lane length, lane width and heading of the best map matched position
         """
+        cache_key = self.__get_map_matching_cache_key(location, distance, probability)
+        map_matched_lane_point = self._map_matching_cache.get(cache_key)
+        if map_matched_lane_point is not None:
+            return map_matched_lane_point
+
+        x = cache_key[0] * MAP_MATCHING_CACHE_RESOLUTION
+        y = cache_key[1] * MAP_MATCHING_CACHE_RESOLUTION
+        lane_center_match = self._lane_centerline_index.query(np.array([[x, y]]))
+        if lane_center_match.distances[0] <= lane_center_match.lane_widths[0] / 2 + distance and \
+                len(self._lane_centerline_index.get_containing_lane_indices(np.array([x, y]))) <= 1:
+            lane_index = int(lane_center_match.lane_indices[0])
+            map_matched_lane_point = MapMatchedLanePoint(
+                lane=self.__get_lane_by_index(lane_index),
+                parametric_offset=float(lane_center_match.parametric_offsets[0]),
+                lane_length=float(self._compiled_map.lane_lengths[lane_index]),
+                lane_width=float(lane_center_match.lane_widths[0]),
+                heading=float(lane_center_match.headings[0])
+            )
+            self._map_matching_cache.put(cache_key, map_matched_lane_point)
+            return map_matched_lane_point
+
+        # The point is not on any lane or on overlapping lanes, the ad map matching searches the lanes within the
+        # search radius
+        enu_point = ad.map.point.ENUPoint()
+        enu_point.x = ad.map.point.ENUCoordinate(x)
+        enu_point.y = ad.map.point.ENUCoordinate(y)
+        enu_point.z = ad.map.point.ENUCoordinate(0)
 
         ad_distance = ad.physics.Distance(distance)
         ad_probability = ad.physics.Probability(probability)
-        map_matched_positions = self.map_matching.getMapMatchedPositions(enu_point, ad_distance, ad_probability)
-        return  map_matched_positions[0]
+        map_matched_position = self.map_matching.getMapMatchedPositions(enu_point, ad_distance, ad_probability)[0]
 
-    def __get_next_point_in_lane(self, lane: ad.map.lane.Lane, distance: float) -> ad.map.point.ENUPoint:
-        """Returns the point on the given that has the specified distance in [m] from the starting point (in driving
-        direction) of the lane. If the given distance is longer than the lane distance, it will continue its search in
-        the following lane.
-        If a negative distance value is given, it will go backwards compared to the driving direction.
+        map_matched_lane_point = MapMatchedLanePoint(
+            lane=ad.map.lane.getLane(map_matched_position.lanePoint.paraPoint.laneId),
+            parametric_offset=float(map_matched_position.lanePoint.paraPoint.parametricOffset),
+            lane_length=float(map_matched_position.lanePoint.laneLength),
+            lane_width=float(map_matched_position.lanePoint.laneWidth),
+            heading=float(ad.map.lane.getLaneENUHeading(map_matched_position))
+        )
+        self._map_matching_cache.put(cache_key, map_matched_lane_point)
 
-         Parameters
-         ----------
-        lane : ad.map.lane.Lane
-            current lane
-        distance : float
-            distance of the new point in meter [m] from the starting point of the lane
+        return map_matched_lane_point
+
+    def __get_compiled_map(self, map_name: str, xodr_path: str, sample_distance: float) -> CompiledMap:
+        """Loads the compiled map of the given OpenDrive file from the map cache or derives it from the ad map (and
+        stores it in the map cache).
+
+        Parameters
+        ----------
+        map_name : str
+            Name of the map (i.e. Town03) without .xodr
+        xodr_path : str
+            Path of the OpenDrive file the ad map was loaded from
+        sample_distance : float
+            maximal distance between two centerline samples of a lane in meter [m]
 
         Returns
         -------
-        ad.map.point.ENUPoint
-            position of the point with the specified distance
+        CompiledMap
+            Lane topology and centerline samples of the map
         """
-        one_meter_as_longitudinal_offset = 1 / float(lane.length)
-        distance_as_offset = one_meter_as_longitudinal_offset * distance
-        next_point: ad.map.point.ENUPoint = None
-        if distance >= 0:
-            if distance > lane.length:
-                # lane is too short
-                successor = self.__get_successor_lane(lane)
-                remaining_distance = distance - float(lane.length)
-                next_point = self.__get_next_point_in_lane(successor, remaining_distance)
-            else:
-                next_point = self.__get_point_on_lane_from_parametric_offset(lane, distance_as_offset)
-        else:
-            if distance > lane.length:
-                # lane is too short
-                predecessor = self.__get_predecessor_lane(lane)
-                remaining_distance = distance + float(lane.length)
-                next_point = self.__get_next_point_in_lane(lane, remaining_distance)
-            else:
-                next_point = self.__get_point_on_lane_from_parametric_offset(lane, distance_as_offset)
+        if not MAP_CACHE_ENABLED or not os.path.isfile(xodr_path):
+            return self.__compile_map(sample_distance)
+
+        xodr_hash = get_file_hash(xodr_path)
+        compiled_map_key = get_compiled_map_key(xodr_hash, sample_distance)
+        compiled_map_path = os.path.join(os.path.expanduser(MAP_CACHE_DIRECTORY), f"{map_name}_{xodr_hash[:16]}.npz")
+        compiled_map = CompiledMap.load(compiled_map_path, compiled_map_key)
+        if compiled_map is not None:
+            print(f"Loaded compiled map {map_name} from {compiled_map_path}")
+            return compiled_map
 
-        return next_point
+        compiled_map = self.__compile_map(sample_distance)
+        try:
+            compiled_map.save(compiled_map_path, compiled_map_key)
+            print(f"Stored compiled map {map_name} in {compiled_map_path}")
+        except OSError as error:
+            print(f"Could not store compiled map {map_name} in {compiled_map_path}: {error}")
 
-    def __get_point_on_lane_from_parametric_offset(self, lane: ad.map.lane.Lane,
-                                                   longitudinal_distance: float) -> ad.map.point.ENUPoint:
-        """Returns the point of the lane with a given longitudinal offset. The offset has the range from [0 - 1]
-        and specifies the length of the lane. 0 refers to the start point the lane. The start point is determined using
-        the lanes orientation.
-        Caution: The orientation can differ from the driving direction
+        return compiled_map
+
+    def __compile_map(self, sample_distance: float) -> CompiledMap:
+        """Derives the lane topology (in driving direction) and samples the centerlines of all lanes of the ad map.
 
         Parameters
         ----------
-        lane : ad.map.lane.Lane
-            current lane
-
-        longitudinal_distance : float
-            parametric position inside the lane [-1; 1]. Negative value indicates that it takes the lanes EndPosition
-            as starting point
+        sample_distance : float
+            maximal distance between two centerline samples of a lane in meter [m]
 
         Returns
         -------
-        ad.map.point.ENUPoint
-            world position of the point with longitudinal_distance of the given lane
+        CompiledMap
+            Lane topology and centerline samples of the map
         """
-        if longitudinal_distance < 0:
-            offset = 1 - longitudinal_distance
-        else:
-            offset = longitudinal_distance
-        ecef_point = ad.map.lane.getParametricPoint(lane, offset, 0.5)
-        enu_point = ad.map.point.toENU(ecef_point)
-        return enu_point
+        lanes = [ad.map.lane.getLane(lane_id) for lane_id in ad.map.lane.getLanes()]
+        lane_indices_by_id = {int(lane.id): lane_index for lane_index, lane in enumerate(lanes)}
+
+        def get_contact_lane_index(lane: ad.map.lane.Lane, contact_location: ad.map.lane.ContactLocation) -> int:
+            contact_lanes = ad.map.lane.getContactLanes(lane, contact_location)
+            if len(contact_lanes) == 0:
+                return -1
+            return lane_indices_by_id.get(int(contact_lanes[0].toLane), -1)
+
+        negative_lane_directions = np.zeros(len(lanes), dtype=bool)
+        contact_lane_indices = np.full((len(lanes), 4), -1, dtype=np.int64)
+        points = []
+        lane_indices = []
+        parametric_offsets = []
+        headings = []
+        lane_widths = []
+
+        for lane_index, lane in enumerate(lanes):
+            # Contact lanes of the ad map are based on the lane orientation.
+            # lane orientation != lane driving direction
+            negative_lane_directions[lane_index] = lane.direction == ad.map.lane.LaneDirection.NEGATIVE
+            if negative_lane_directions[lane_index]:
+                contact_locations = (ad.map.lane.ContactLocation.PREDECESSOR, ad.map.lane.ContactLocation.SUCCESSOR,
+                                     ad.map.lane.ContactLocation.RIGHT, ad.map.lane.ContactLocation.LEFT)
+            else:
+                contact_locations = (ad.map.lane.ContactLocation.SUCCESSOR, ad.map.lane.ContactLocation.PREDECESSOR,
+                                     ad.map.lane.ContactLocation.LEFT, ad.map.lane.ContactLocation.RIGHT)
+            contact_lane_indices[lane_index] = [get_contact_lane_index(lane, contact_location)
+                                                for contact_location in contact_locations]
+
+            num_samples = max(2, int(math.ceil(float(lane.length) / sample_distance)) + 1)
+            lane_offsets = np.linspace(0.0, 1.0, num_samples)
+
+            lane_points = np.empty((num_samples, 2))
+            for i, offset in enumerate(lane_offsets):
+                enu_point = ad.map.point.toENU(ad.map.lane.getParametricPoint(lane, offset, 0.5))
+                lane_points[i] = float(enu_point.x), float(enu_point.y)
+                lane_widths.append(float(ad.map.lane.getWidth(lane, offset)))
+
+            # Heading along the lane orientation, lanes with negative direction are driven against their orientation
+            lane_directions = np.gradient(lane_points, axis=0)
+            lane_headings = np.arctan2(lane_directions[:, 1], lane_directions[:, 0])
+            if negative_lane_directions[lane_index]:
+                lane_headings = np.angle(np.exp(1j * (lane_headings + math.pi)))
+
+            points.append(lane_points)
+            lane_indices.append(np.full(num_samples, lane_index))
+            parametric_offsets.append(lane_offsets)
+            headings.append(lane_headings)
+
+        self._lanes.update(enumerate(lanes))
+
+        return CompiledMap(
+            lane_ids=np.array([int(lane.id) for lane in lanes], dtype=np.int64),
+            lane_lengths=np.array([float(lane.length) for lane in lanes]),
+            negative_lane_directions=negative_lane_directions,
+            successor_lane_indices=contact_lane_indices[:, 0],
+            predecessor_lane_indices=contact_lane_indices[:, 1],
+            left_lane_indices=contact_lane_indices[:, 2],
+            right_lane_indices=contact_lane_indices[:, 3],
+            centerline_points=np.concatenate(points).reshape(-1, 2),
+            centerline_lane_indices=np.concatenate(lane_indices).astype(np.int64),
+            centerline_parametric_offsets=np.concatenate(parametric_offsets),
+            centerline_headings=np.concatenate(headings),
+            centerline_lane_widths=np.array(lane_widths)
+        )
+
+    @staticmethod
+    def __write_map_config_file(path: str, map_config: str) -> None:
+        """Writes the ad map configuration file, the file is only rewritten if its content changed.
+
+        Parameters
+        ----------
+        path : str
+            Path of the ad map configuration file
+        map_config : str
+            Content of the ad map configuration file
+        """
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                if f.read() == map_config:
+                    return
+
+        with open(path, "w") as f:
+            f.write(map_config)
+
+    @staticmethod
+    def __get_map_matching_cache_key(location: Location, distance: float, probability: float) -> Hashable:
+        return (round(float(location.x) / MAP_MATCHING_CACHE_RESOLUTION),
+                round(float(location.y) / MAP_MATCHING_CACHE_RESOLUTION), distance, probability)
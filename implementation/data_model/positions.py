@@ -6,11 +6,14 @@
 #
 #################### END LICENSE BLOCK #################################
 
-from typing import Optional, Union, Tuple, List
-from dataclasses import dataclass
+from typing import Any, Optional, Union, Tuple, List, Sequence, Type, TYPE_CHECKING
+from dataclasses import dataclass, field
 from enum import Enum
-import ad_map_access as ad
 import math
+import numpy as np
+
+if TYPE_CHECKING:
+    import ad_map_access as ad
 
 
 class ReferenceContext(Enum):
@@ -18,11 +21,47 @@ class ReferenceContext(Enum):
     RELATIVE = 2
 
 
-@dataclass()
-class Vector3D:
-    x: float = 0
-    y: float = 0
-    z: float = 0
+class _SlottedRecord:
+    """Base class of the slotted geometry primitives. The primitives are created thousands of times per tick, thus,
+    they only hold their attributes in slots (no instance dictionary). Equality and representation are the same as of
+    the former dataclasses, the attributes are listed in _fields.
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def _astuple(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is self.__class__:
+            return self._astuple() == other._astuple()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        attributes = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({attributes})"
+
+
+class Vector3D(_SlottedRecord):
+    """Three dimensional vector. The binary operators return new objects, the augmented assignments (+=, -=, *=)
+    change the vector in place.
+
+    Attributes
+    ----------
+    x : float
+        x component
+    y : float
+        y component
+    z : float
+        z component
+    """
+    __slots__ = ("x", "y", "z")
+    _fields = ("x", "y", "z")
+
+    def __init__(self, x: float = 0, y: float = 0, z: float = 0) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
 
     def invert(self) -> "Vector3D":
         """Returns the inverted Vector
@@ -31,56 +70,69 @@ class Vector3D:
         -------
         Vector3D
             Inverted Vector"""
-        vec = Vector3D
-        vec.x = -self.x
-        vec.y = -self.y
-        vec.z = -self.z
-        return vec
+        return Vector3D(-self.x, -self.y, -self.z)
+
+    def to_array(self) -> np.ndarray:
+        """Returns the vector as array [x, y, z]."""
+        return np.array([self.x, self.y, self.z], dtype=float)
 
     def __add__(self, other_location: Union["Location", "Vector3D"]) -> "Vector3D":
-        new_loc_x = self.x + other_location.x
-        new_loc_y = self.y + other_location.y
-        new_loc_z = self.z + other_location.z
-        return Location(new_loc_x, new_loc_y, new_loc_z)
+        return Location(self.x + other_location.x, self.y + other_location.y, self.z + other_location.z)
 
     def __sub__(self, other_location: Union["Location", "Vector3D"]) -> "Vector3D":
-        new_loc_x = self.x - other_location.x
-        new_loc_y = self.y - other_location.y
-        new_loc_z = self.z - other_location.z
-        return Location(new_loc_x, new_loc_y, new_loc_z)
+        return Location(self.x - other_location.x, self.y - other_location.y, self.z - other_location.z)
 
     def __mul__(self, other: Union["Location", "Vector3D", float]) -> "Vector3D":
+        vector = type(self)(self.x, self.y, self.z)
+        vector *= other
+        return vector
+
+    def __iadd__(self, other_location: Union["Location", "Vector3D"]) -> "Vector3D":
+        self.x += other_location.x
+        self.y += other_location.y
+        self.z += other_location.z
+        return self
+
+    def __isub__(self, other_location: Union["Location", "Vector3D"]) -> "Vector3D":
+        self.x -= other_location.x
+        self.y -= other_location.y
+        self.z -= other_location.z
+        return self
+
+    def __imul__(self, other: Union["Location", "Vector3D", float]) -> "Vector3D":
         if isinstance(other, float):
             self.x *= other
             self.y *= other
             self.z *= other
-        elif isinstance(other, (Location, Vector3D)):
+        elif isinstance(other, Vector3D):
             self.x *= other.x
             self.y *= other.y
             self.z *= other.z
         return self
 
     def __iter__(self):
-        return iter([self.x, self.y, self.z])
+        return iter((self.x, self.y, self.z))
 
 
-@dataclass()
 class Location(Vector3D):
+    __slots__ = ()
 
-    def to_ENU(self) -> ad.map.point.ENUPoint:
+    def to_ENU(self) -> "ad.map.point.ENUPoint":
         """Returns an ENU Point of the Location
 
         Returns
         -------
         ad.map.point.ENUPoint
             ENU Point of the Location"""
+        # Imported on demand, thus, the data model can be used without the ad map (e.g. in a replay without map)
+        import ad_map_access as ad
         enu_point = ad.map.point.ENUPoint()
         enu_point.x = ad.map.point.ENUCoordinate(self.x)
         enu_point.y = ad.map.point.ENUCoordinate(self.y)
         enu_point.z = ad.map.point.ENUCoordinate(0)
         return enu_point
 
-    def ENU_to_location(self, enu_point: ad.map.point.ENUPoint) -> "Location":
+    def ENU_to_location(self, enu_point: "ad.map.point.ENUPoint") -> "Location":
 
         """Returns the Location object of the given enu point
 
@@ -140,15 +192,10 @@ class Location(Vector3D):
                 -------
                 Location
                     Inverted Location"""
-        loc = Location()
-        loc.x = -self.x
-        loc.y = -self.y
-        loc.z = -self.z
-        return loc
+        return Location(-self.x, -self.y, -self.z)
 
 
-@dataclass
-class Orientation:
+class Orientation(_SlottedRecord):
     """Describes the Orientation of its Entity, either in the local or the global coordinate system
 
     Attributes
@@ -163,10 +210,15 @@ class Orientation:
         Describes if the Orientaion is given in global (Absolut) or local (relative) space.
         Currently not set
     """
-    heading: float = 0
-    pitch: float = 0
-    roll: float = 0
-    type: Optional[ReferenceContext] = None
+    __slots__ = ("heading", "pitch", "roll", "type")
+    _fields = ("heading", "pitch", "roll", "type")
+
+    def __init__(self, heading: float = 0, pitch: float = 0, roll: float = 0,
+                 type: Optional[ReferenceContext] = None) -> None:
+        self.heading = heading
+        self.pitch = pitch
+        self.roll = roll
+        self.type = type
 
     def get_forward_vector(self) -> Vector3D:
         """Returns a vector directing in forward direction of the vehicle.
@@ -183,9 +235,30 @@ class Orientation:
 
         return vector
 
+    def get_rotation_matrix(self) -> List[List[float]]:
+        """Returns the 3x3 matrix that rotates local vectors of the entity into world coordinates (same rotation as
+        BoundingBox.get_world_vertices and get_rotation_matrices).
 
-@dataclass
-class WorldPosition:
+        Returns
+        -------
+        List[List[float]]
+            3x3 rotation matrix
+        """
+        ch: float = math.cos(math.radians(self.heading))
+        sh: float = math.sin(math.radians(self.heading))
+        cr: float = math.cos(math.radians(self.roll))
+        sr: float = math.sin(math.radians(self.roll))
+        cp: float = math.cos(math.radians(self.pitch))
+        sp: float = math.sin(math.radians(self.pitch))
+
+        return [
+            [cp * ch, ch * sp * sr - sh * cr, -ch * sp * cr - sh * sr],
+            [cp * sh, sh * sp * sr + ch * cr, -sh * sp * cr + ch * sr],
+            [sp, -cp * sr, cp * cr]
+        ]
+
+
+class WorldPosition(_SlottedRecord):
     """Data class containg an entities transform in world coordinates.
 
     Attributes
@@ -195,8 +268,12 @@ class WorldPosition:
     orientation : Orientation
         orientation of the entity in world coordinates (heading, pitch, roll)
     """
-    location: Optional[Location] = Location()
-    orientation: Optional[Orientation] = Orientation()
+    __slots__ = ("location", "orientation")
+    _fields = ("location", "orientation")
+
+    def __init__(self, location: Optional[Location] = None, orientation: Optional[Orientation] = None) -> None:
+        self.location = Location() if location is None else location
+        self.orientation = Orientation() if orientation is None else orientation
 
     def get_forward_vector(self) -> Vector3D:
         """Returns a vector directing in forward direction of the vehicle.
@@ -207,7 +284,24 @@ class WorldPosition:
             vector in forward direction with length 1
         """
 
-        return Orientation.get_forward_vector()
+        return self.orientation.get_forward_vector()
+
+    def transform_points(self, points: np.ndarray) -> np.ndarray:
+        """Transforms local points of the entity into world coordinates in one call (same transformation as
+        BoundingBox.get_world_vertices).
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Points (x, y, z) in the local coordinate system of the entity, shape (number of points, 3)
+
+        Returns
+        -------
+        np.ndarray
+            Points (x, y, z) in world coordinates, shape (number of points, 3)
+        """
+        rotation_matrix = np.array(self.orientation.get_rotation_matrix(), dtype=float)
+        return np.asarray(points, dtype=float).reshape(-1, 3) @ rotation_matrix.T + self.location.to_array()
 
     def get_inverse_matrix(self) -> List[List[float]]:
         """Returns the inverse 4x4 transformation matrix of the entity
@@ -220,7 +314,6 @@ class WorldPosition:
         ch, sh = self.__create_cos_sin(self.orientation.heading)
         cr, sr = self.__create_cos_sin(self.orientation.roll)
         cp, sp = self.__create_cos_sin(self.orientation.pitch)
-        a = Vector3D(0, 0, 0)
         loc = self.__inverse_transform_point()
 
         # loc.z value is different than from carla
@@ -261,7 +354,7 @@ class WorldPosition:
         Location
             Inverse of the Location
         """
-        inv_loc = Location.invert(self.location) # translate the point
+        inv_loc = self.location.invert()  # translate the point
         ch, sh = self.__create_cos_sin(self.orientation.heading)
         cr, sr = self.__create_cos_sin(self.orientation.roll)
         cp, sp = self.__create_cos_sin(self.orientation.pitch)
@@ -283,13 +376,72 @@ class WorldPosition:
         return ca, sa
 
 
+def get_rotation_matrices(orientations: np.ndarray) -> np.ndarray:
+    """Returns the rotation matrices of the given orientations (same rotation as Orientation.get_rotation_matrix).
+
+    Parameters
+    ----------
+    orientations : np.ndarray
+        Heading, pitch and roll in degrees, shape (number of orientations, 3)
+
+    Returns
+    -------
+    np.ndarray
+        Rotation matrices, shape (number of orientations, 3, 3)
+    """
+    heading, pitch, roll = np.radians(np.asarray(orientations, dtype=float).reshape(-1, 3)).T
+    ch, sh = np.cos(heading), np.sin(heading)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cr, sr = np.cos(roll), np.sin(roll)
+
+    return np.stack([
+        np.stack([cp * ch, ch * sp * sr - sh * cr, -ch * sp * cr - sh * sr], axis=-1),
+        np.stack([cp * sh, sh * sp * sr + ch * cr, -sh * sp * cr + ch * sr], axis=-1),
+        np.stack([sp, -cp * sr, cp * cr], axis=-1)
+    ], axis=1)
+
+
+def locations_to_array(vectors: Sequence[Vector3D]) -> np.ndarray:
+    """Returns the coordinates of the given vectors (or locations) as one array.
+
+    Parameters
+    ----------
+    vectors : Sequence[Vector3D]
+        Vectors or locations
+
+    Returns
+    -------
+    np.ndarray
+        Coordinates (x, y, z), shape (number of vectors, 3)
+    """
+    return np.array([(vector.x, vector.y, vector.z) for vector in vectors], dtype=float).reshape(-1, 3)
+
+
+def array_to_locations(points: np.ndarray, location_type: Type[Vector3D] = Location) -> List[Vector3D]:
+    """Returns a location object for each row of the given array.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        Coordinates (x, y, z), shape (number of points, 3)
+    location_type : Type[Vector3D]
+        Class of the created objects (The default value is Location.)
+
+    Returns
+    -------
+    List[Vector3D]
+        Location of each point
+    """
+    return [location_type(x, y, z) for x, y, z in np.asarray(points, dtype=float).reshape(-1, 3).tolist()]
+
+
 @dataclass
 class RelativeWorldPosition:
     # TODO add EntityRef
     dx: float = 0
     dy: float = 0
     dz: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass
@@ -310,7 +462,7 @@ class LanePosition:
     """
     laneId: str = -1
     offset: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
     roadId: str = -1
     s: float = 0
 
@@ -322,12 +474,12 @@ class RelativeLanePosition:
     ds: float = 0
     dsLane: float = 0
     offset: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass()
 class RoadPosition:
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
     roadId: str = -1
     s: float = 0
     t: float = 0
@@ -338,13 +490,13 @@ class RelativeRoadPosition:
     # TODO add entityRef
     ds: float = 0
     dt: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass()
 class TrajectoryPosition:
     # TODO add trajectoryRef
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
     s: float = 0
     t: float = 0
 
@@ -354,7 +506,7 @@ class GeoPosition:
     height: float = 0
     latitude: float = 0
     longitude: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass()
@@ -363,12 +515,12 @@ class RelativeObjectPosition:
     dx: float = 0
     dy: float = 0
     dz: float = 0
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass()
 class RoutePosition:
-    orientation: Orientation = Orientation()
+    orientation: Orientation = field(default_factory=Orientation)
 
 
 @dataclass()
@@ -392,14 +544,14 @@ class PositionInLaneCoordinates:
 
 @dataclass()
 class InRoutePosition:
-    positionOfCurrentEntity: PositionOfCurrentEntity = PositionOfCurrentEntity()
-    positionInRoadCoordinates: PositionInRoadCoordinates = PositionInRoadCoordinates()
-    positionInLaneCoordinates: PositionInLaneCoordinates = PositionInLaneCoordinates()
+    positionOfCurrentEntity: PositionOfCurrentEntity = field(default_factory=PositionOfCurrentEntity)
+    positionInRoadCoordinates: PositionInRoadCoordinates = field(default_factory=PositionInRoadCoordinates)
+    positionInLaneCoordinates: PositionInLaneCoordinates = field(default_factory=PositionInLaneCoordinates)
 
 
 @dataclass()
 class Position:
-    world_position: WorldPosition = WorldPosition()
+    world_position: WorldPosition = field(default_factory=WorldPosition)
     relative_world_position: Optional[RelativeWorldPosition] = None
     lane_position: Optional[LanePosition] = None
     relative_lane_position: Optional[RelativeLanePosition] = None
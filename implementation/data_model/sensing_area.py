@@ -0,0 +1,265 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Tuple
+from shapely.geometry import Polygon, LineString
+
+from sinadra_configuration_parameters import SENSING_AREA_WAYPOINT_DISTANCE, SENSING_AREA_REBUFFER_DISTANCE, \
+    SENSING_AREA_MAX_LATERAL_DEVIATION
+
+if TYPE_CHECKING:
+    from data_model.map import Map
+    from data_model.positions import Location
+
+
+def create_sensing_area_polygon(points: np.ndarray) -> Polygon:
+    """Creates the sensing area polygon around the given lane points (buffer of 1.5 m around the polyline).
+
+    Parameters
+    ----------
+    points : np.ndarray
+        Lane points (x, y, ...) ordered along the lane, shape (number of points, >= 2). At least two points are needed.
+
+    Returns
+    -------
+    Polygon
+        Sensing area polygon
+    """
+    dilated = LineString(points[:, 0:2]).buffer(1.5)
+    if isinstance(dilated, Polygon) and not dilated.interiors:
+        return dilated
+
+    # The polyline crosses itself, the rings of the buffer are merged into one polygon
+    polygon_dict = dilated.__geo_interface__
+    polygon_coords = []
+    for coord in polygon_dict["coordinates"]:
+        for x in coord:
+            polygon_coords.append(x)
+
+    return Polygon(polygon_coords)
+
+
+class IncrementalSensingArea:
+    """Sensing area along a lane that is kept across ticks. The lane points are cached together with their distance
+    along the walked lanes (arc length, 0 is the start location of the last full rebuild). On each tick, the start
+    location is located on the cached polyline, the points outside the requested window are trimmed and only the
+    missing points are walked on the map. The polygon is buffered around the points interpolated on the cached
+    polyline at the same distances from the start location as the points of a sensing area built from scratch, thus,
+    both polygons match up to the curvature between two cached points. The polygon of the last tick is only reused if
+    the window drifted by less than the rebuffer distance. A full rebuild happens if the start location left the cached
+    lanes (e.g. lane change, another lane at a junction or a jump of the start location).
+    Only the lane walk is saved, thus, the incremental update only pays off if walking the lanes on the map dominates
+    buffering the polygon.
+
+    Attributes
+    ----------
+    full_rebuilds : int
+        Number of updates that walked the lanes from scratch.
+    incremental_updates : int
+        Number of updates that trimmed or extended the cached points and re-buffered the polygon.
+    reuses : int
+        Number of updates that returned the cached polygon.
+    """
+
+    def __init__(self, rebuffer_distance: float = SENSING_AREA_REBUFFER_DISTANCE,
+                 max_lateral_deviation: float = SENSING_AREA_MAX_LATERAL_DEVIATION,
+                 waypoint_distance: float = SENSING_AREA_WAYPOINT_DISTANCE) -> None:
+        """Creates an empty sensing area, the first update is a full rebuild.
+
+        Parameters
+        ----------
+        rebuffer_distance : float
+            Drift of the window start or end in meter [m] up to which the cached polygon is reused, 0 never reuses the
+            polygon. (The default value is SENSING_AREA_REBUFFER_DISTANCE.)
+        max_lateral_deviation : float
+            Distance in meter [m] between the start location and the cached polyline from which on the start location
+            is no longer on the cached lanes. (The default value is SENSING_AREA_MAX_LATERAL_DEVIATION.)
+        waypoint_distance : float
+            Distance between the lane points in meter [m]. (The default value is SENSING_AREA_WAYPOINT_DISTANCE.)
+        """
+        self.full_rebuilds = 0
+        self.incremental_updates = 0
+        self.reuses = 0
+
+        self._rebuffer_distance = rebuffer_distance
+        self._max_lateral_deviation = max_lateral_deviation
+        self._waypoint_distance = waypoint_distance
+
+        self._arc_lengths: Optional[np.ndarray] = None
+        self._points: Optional[np.ndarray] = None
+        self._polygon: Optional[Polygon] = None
+        self._polygon_window: Optional[Tuple[float, float]] = None
+
+    def reset(self) -> None:
+        """Drops the cached lane points and polygon, the next update is a full rebuild."""
+        self._arc_lengths = None
+        self._points = None
+        self._polygon = None
+        self._polygon_window = None
+
+    def update(self, map: "Map", start_location: "Location", window_start: float,
+               window_end: float) -> Optional[Polygon]:
+        """Returns the sensing area polygon around the lane points with the given distances along the lane from the
+        start location.
+
+        Parameters
+        ----------
+        map : Map
+            Map object to walk along the lanes
+        start_location : Location
+            Reference location of the sensing area (e.g. the ego location)
+        window_start : float
+            Distance of the first lane point from the start location along the lane in meter [m] (negative values
+            are behind the start location)
+        window_end : float
+            Distance of the last lane point from the start location along the lane in meter [m]
+
+        Returns
+        -------
+        Optional[Polygon]
+            Sensing area polygon or None if there are less than two lane points in the window
+        """
+        start_arc_length = self._locate(start_location)
+        if start_arc_length is not None and self._polygon_window is not None and \
+                abs(start_arc_length + window_start - self._polygon_window[0]) < self._rebuffer_distance and \
+                abs(start_arc_length + window_end - self._polygon_window[1]) < self._rebuffer_distance:
+            self.reuses += 1
+            return self._polygon
+
+        if start_arc_length is not None and self._extend(map, start_location, start_arc_length,
+                                                         start_arc_length + min(window_start, 0.0),
+                                                         start_arc_length + window_end):
+            self.incremental_updates += 1
+        else:
+            self.reset()
+            self.full_rebuilds += 1
+            start_arc_length = 0.0
+            self._extend(map, start_location, start_arc_length, min(window_start, 0.0), window_end)
+
+        # Points behind the window (and behind the start location) are no longer needed
+        polygon_window = (start_arc_length + window_start, start_arc_length + window_end)
+        tolerance = 1e-6 * self._waypoint_distance
+        keep = self._arc_lengths >= min(polygon_window[0], start_arc_length) - self._waypoint_distance - tolerance
+        self._arc_lengths = self._arc_lengths[keep]
+        self._points = self._points[keep]
+
+        # The lane points at the distances of the window from the start location (on the grid of the waypoint distance
+        # starting at the start location), the points beyond the end of the walked lanes are dropped
+        window_arc_lengths = start_arc_length + self._waypoint_distance * np.arange(
+            int(math.ceil(window_start / self._waypoint_distance - 1e-6)),
+            int(math.floor(window_end / self._waypoint_distance + 1e-6)) + 1)
+        window_arc_lengths = window_arc_lengths[(window_arc_lengths >= self._arc_lengths[0] - tolerance)
+                                                & (window_arc_lengths <= self._arc_lengths[-1] + tolerance)]
+        if len(window_arc_lengths) < 2:
+            self._polygon = None
+        else:
+            window_points = np.column_stack([np.interp(window_arc_lengths, self._arc_lengths, self._points[:, axis])
+                                             for axis in range(self._points.shape[1])])
+            self._polygon = create_sensing_area_polygon(window_points)
+        self._polygon_window = polygon_window
+
+        return self._polygon
+
+    def _locate(self, start_location: "Location") -> Optional[float]:
+        # Arc length of the start location projected onto the cached polyline (None if it is not on the cached lanes)
+        if self._points is None or len(self._points) < 2:
+            return None
+
+        start_point = np.array([float(start_location.x), float(start_location.y)])
+        segment_starts = self._points[:-1, 0:2]
+        segment_vectors = self._points[1:, 0:2] - segment_starts
+        segment_lengths_squared = np.einsum("ij,ij->i", segment_vectors, segment_vectors)
+        segment_lengths_squared[segment_lengths_squared == 0.0] = 1.0
+        ratios = np.clip(np.einsum("ij,ij->i", start_point - segment_starts, segment_vectors)
+                         / segment_lengths_squared, 0.0, 1.0)
+        distances = np.linalg.norm(segment_starts + ratios[:, None] * segment_vectors - start_point, axis=1)
+
+        segment = int(np.argmin(distances))
+        if distances[segment] > self._max_lateral_deviation:
+            return None
+
+        return float(self._arc_lengths[segment]
+                     + ratios[segment] * (self._arc_lengths[segment + 1] - self._arc_lengths[segment]))
+
+    def _extend(self, map: "Map", start_location: "Location", start_arc_length: float, first_arc_length: float,
+                last_arc_length: float) -> bool:
+        # Walks the missing lane points in [first_arc_length, last_arc_length] (on the grid of the waypoint distance).
+        # Returns False if the new points do not continue the cached polyline (the cache must be rebuilt).
+        grid_start = int(math.ceil(first_arc_length / self._waypoint_distance - 1e-6)) - 1
+        grid_end = int(math.ceil(last_arc_length / self._waypoint_distance - 1e-6))
+        required_arc_lengths = self._waypoint_distance * np.arange(grid_start, grid_end + 1)
+        if self._arc_lengths is not None and len(self._arc_lengths):
+            tolerance = 1e-6 * self._waypoint_distance
+            missing = ((required_arc_lengths < self._arc_lengths[0] - tolerance)
+                       | (required_arc_lengths > self._arc_lengths[-1] + tolerance))
+            missing_arc_lengths = required_arc_lengths[missing]
+        else:
+            missing_arc_lengths = required_arc_lengths
+
+        if len(missing_arc_lengths) == 0:
+            return True
+
+        new_points = map.sample_lane_polyline(start_location, missing_arc_lengths - start_arc_length)
+        valid = ~np.isnan(new_points[:, 0])
+        missing_arc_lengths = missing_arc_lengths[valid]
+        new_points = new_points[valid]
+
+        if self._arc_lengths is None or len(self._arc_lengths) == 0:
+            self._arc_lengths = missing_arc_lengths
+            self._points = new_points
+            return True
+
+        # The new points must continue the cached polyline, otherwise the lanes walked from the start location differ
+        # from the cached lanes
+        before = missing_arc_lengths < self._arc_lengths[0]
+        max_gap = 1.5 * self._waypoint_distance
+        if np.any(before) and np.linalg.norm(new_points[before][-1, 0:2] - self._points[0, 0:2]) > max_gap:
+            return False
+        if np.any(~before) and np.linalg.norm(new_points[~before][0, 0:2] - self._points[-1, 0:2]) > max_gap:
+            return False
+
+        self._arc_lengths = np.concatenate([missing_arc_lengths[before], self._arc_lengths,
+                                            missing_arc_lengths[~before]])
+        self._points = np.concatenate([new_points[before], self._points, new_points[~before]])
+        return True
+
+
+@dataclass()
+class EgoSensingAreas:
+    """Incremental sensing areas of the ego vehicle that are kept across ticks (owned by the SINADRA client).
+    (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    front : IncrementalSensingArea
+        Front sensing area on the ego lane.
+    left : IncrementalSensingArea
+        Side sensing area on the lane left of the ego vehicle.
+    right : IncrementalSensingArea
+        Side sensing area on the lane right of the ego vehicle.
+    """
+
+    front: IncrementalSensingArea = field(default_factory=IncrementalSensingArea)
+    left: IncrementalSensingArea = field(default_factory=IncrementalSensingArea)
+    right: IncrementalSensingArea = field(default_factory=IncrementalSensingArea)
+
+    def get_statistics(self) -> Tuple[int, int, int]:
+        """Returns the update statistics of all sensing areas since start.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            Number of full rebuilds, incremental updates and reuses of the cached polygons.
+        """
+        sensing_areas = (self.front, self.left, self.right)
+        return (sum(sensing_area.full_rebuilds for sensing_area in sensing_areas),
+                sum(sensing_area.incremental_updates for sensing_area in sensing_areas),
+                sum(sensing_area.reuses for sensing_area in sensing_areas))
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
     from data_model.vehicle import OtherVehicle, EgoVehicle
     from data_model.environment import Environment
     from data_model.entity import Pedestrian, MiscObject
+    from data_model.actor_snapshot import ActorSnapshot
 
 
 @dataclass()
@@ -22,4 +23,5 @@ class SinadraData():
     environment: Optional["Environment"] = None
     pedestrians: Optional[List["Pedestrian"]] = None
     misc_objects: Optional[List["MiscObject"]] = None
+    actor_snapshot: Optional["ActorSnapshot"] = None
     map = None
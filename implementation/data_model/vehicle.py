@@ -9,10 +9,12 @@
 from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
+import numpy as np
 from shapely_ext.decompose import Decomposer
 from shapely.geometry import Polygon, LineString
 
 from data_model.entity import EntityObject
+from data_model.sensing_area import IncrementalSensingArea, create_sensing_area_polygon
 from sinadra_configuration_parameters import DEBUG_MODE, SIDE_SENSING_AREA_LENGTH, SENSING_AREA_WAYPOINT_DISTANCE, \
     FRONT_SENSING_DISTANCE_TIME_GAP_IN_SECONDS
 from data_model.positions import Vector3D
@@ -66,9 +68,9 @@ class VehicleLightState(object):
 @dataclass
 class KinematicStatus:
     acceleration: float = 0
-    acceleration_vector: Vector3D = Vector3D()
+    acceleration_vector: Vector3D = field(default_factory=Vector3D)
     speed: float = 0
-    velocity: Vector3D = Vector3D()
+    velocity: Vector3D = field(default_factory=Vector3D)
     steering_angle: float = 0
 
 
@@ -95,7 +97,7 @@ class Axle:
 class Axles:
     front_axle: Optional[Axle] = None
     rear_axle: [Axle] = None
-    additionalAxles: Optional[List[Axle]] = field(default_factory=[])
+    additionalAxles: Optional[List[Axle]] = field(default_factory=list)
 
 
 @dataclass()
@@ -120,10 +122,10 @@ class Vehicle(EntityObject):
     id: int = -1
     role_name: str = ""
     length: float = -1
-    kinematics: Optional[KinematicStatus] = KinematicStatus()
+    kinematics: Optional[KinematicStatus] = field(default_factory=KinematicStatus)
     surrounding_vehicles: Optional[SurroundingVehicles] = None
     light_state: VehicleLightState = VehicleLightState.NONE
-    vehicle_control: VehicleControl = VehicleControl()
+    vehicle_control: VehicleControl = field(default_factory=VehicleControl)
     vehicle_category: VehicleCategory = VehicleCategory.CAR
     vehicle_points: Dict[VehiclePointId, "Location"] = None
 
@@ -169,7 +171,8 @@ class Vehicle(EntityObject):
 class EgoVehicle(Vehicle):
     situation_class: "SituationClass" = None
 
-    def get_side_sensing_area(self, map: "Map", side_vehicle_point_id: VehiclePointId
+    def get_side_sensing_area(self, map: "Map", side_vehicle_point_id: VehiclePointId,
+                              incremental_sensing_area: Optional[IncrementalSensingArea] = None
                               ) -> Tuple[Polygon, List[LineString]]:
         """Determines sensing area next to ego vehicle on other lane. On which side the sensing area is created,
         depends on parameter side_vehicle_point_id.
@@ -181,6 +184,9 @@ class EgoVehicle(Vehicle):
         side_vehicle_point_id: VehiclePointId
             Center mid location of the vehicle side the sensing area shall be created on.
             Possible values are CENTER_MID_LEFT and CENTER_MID_RIGHT
+        incremental_sensing_area: Optional[IncrementalSensingArea]
+            Sensing area of the last ticks on the same side that is updated incrementally. If None, the sensing area is
+            built from scratch. (The default value is None.)
 
         Returns
         -------
@@ -191,16 +197,25 @@ class EgoVehicle(Vehicle):
             The line strings are only needed for drawing debug lines of the sensing area on the Carla server. Therefore
             the list is only returned if DEBUG_MODE flag is set to True. Otherwise None is returned instead.
         """
-        point_next_to_vehicle = self.__get_points_next_to_vehicle_by_side(map, self.get_location(),
-                                                                          side_vehicle_point_id)
-        if len(point_next_to_vehicle) < 2:
-            return None, None
-        polygon = self.__create_polygon_from_waypoints(point_next_to_vehicle)
+        if incremental_sensing_area is not None:
+            point_next_to_ego_on_other_lane = self.__get_point_next_to_vehicle_on_other_lane(map, self.get_location(),
+                                                                                           side_vehicle_point_id)
+            distances = self.__get_side_sensing_area_point_distances()
+            polygon = incremental_sensing_area.update(map, point_next_to_ego_on_other_lane, distances[0],
+                                                      distances[-1])
+            if polygon is None:
+                return None, None
+        else:
+            point_next_to_vehicle = self.__get_points_next_to_vehicle_by_side(map, self.get_location(),
+                                                                              side_vehicle_point_id)
+            if len(point_next_to_vehicle) < 2:
+                return None, None
+            polygon = create_sensing_area_polygon(point_next_to_vehicle)
         lines_of_sensing_area = self.__get_lines_of_sensing_area(polygon) if DEBUG_MODE else None
         return polygon, lines_of_sensing_area
 
     def __get_points_next_to_vehicle_by_side(self, map: "Map", location: "Location",
-                                             side_vehicle_point_id: VehiclePointId) -> List["Location"]:
+                                             side_vehicle_point_id: VehiclePointId) -> np.ndarray:
         """
         Returns points on the lane next to the vehicle. The side is determindes by the side_vehicle_point_id.
 
@@ -214,41 +229,34 @@ class EgoVehicle(Vehicle):
 
         Returns
         -------
-        List[Location]
-            list of locations describing the points on the lane next to the vehicle
+        np.ndarray
+            points (x, y, z) on the lane next to the vehicle ordered along the lane, shape (number of points, 3)
         """
-        point_next_to_ego_on_other_lane = None
+        point_next_to_ego_on_other_lane = self.__get_point_next_to_vehicle_on_other_lane(map, location,
+                                                                                       side_vehicle_point_id)
+        distances = self.__get_side_sensing_area_point_distances()
+        points = map.sample_lane_polyline(point_next_to_ego_on_other_lane, distances)
+        return points[~np.isnan(points[:, 0])]
+
+    def __get_point_next_to_vehicle_on_other_lane(self, map: "Map", location: "Location",
+                                                  side_vehicle_point_id: VehiclePointId) -> "Location":
         if side_vehicle_point_id == VehiclePointId.CENTER_MID_RIGHT:
-            point_next_to_ego_on_other_lane = map.get_point_on_lane_right(location)
-        else:
-            point_next_to_ego_on_other_lane = map.get_point_on_lane_left(location)
+            return map.get_point_on_lane_right(location)
+        return map.get_point_on_lane_left(location)
 
+    def __get_side_sensing_area_point_distances(self) -> np.ndarray:
+        # Distances of the side sensing area points to the point next to the vehicle along the other lane
         points_number = int(round(SIDE_SENSING_AREA_LENGTH / SENSING_AREA_WAYPOINT_DISTANCE))
 
         if points_number % 2 != 0:
             points_number += 1
 
         points_number_to_each_direction = int(points_number/2)
-        start_point = point_next_to_ego_on_other_lane
-
-        points: List["Location"] = []
-        offset: float = 0
-        for _ in range(points_number_to_each_direction):
-            possible_point = map.get_next_point_on_lane(start_point, SENSING_AREA_WAYPOINT_DISTANCE + offset)
-            offset += SENSING_AREA_WAYPOINT_DISTANCE
-            if possible_point is not None:
-                points.append(possible_point)
-
-        points.append(start_point)
-        offset = 0
-        for _ in range(points_number_to_each_direction):
-            possible_point = map.get_next_point_on_lane(start_point, -SENSING_AREA_WAYPOINT_DISTANCE- offset)
-            offset -= SENSING_AREA_WAYPOINT_DISTANCE
-            if possible_point is not None:
-                points.append(possible_point)
-        return points
-
-    def get_front_sensing_area(self, map) -> (Polygon, List["LineString"]):
+        return SENSING_AREA_WAYPOINT_DISTANCE * np.arange(-points_number_to_each_direction,
+                                                           points_number_to_each_direction + 1)
+
+    def get_front_sensing_area(self, map, incremental_sensing_area: Optional[IncrementalSensingArea] = None
+                               ) -> (Polygon, List["LineString"]):
         """Determines front sensing area for this vehicle using the configuration parameter
         FRONT_SENSING_DISTANCE_TIME_GAP_IN_SECONDS. Returns front sensing area as shapely.geometry.Polygon object.
         If configuration parameter DEBUG_MODE is set to true, this method additionally returns the lines of the polygon
@@ -258,6 +266,9 @@ class EgoVehicle(Vehicle):
         ----------
         map: Map
             Map object to obtain points for sensing area calculation
+        incremental_sensing_area: Optional[IncrementalSensingArea]
+            Front sensing area of the last ticks that is updated incrementally. If None, the sensing area is built
+            from scratch. (The default value is None.)
 
         Returns
         -------
@@ -275,17 +286,25 @@ class EgoVehicle(Vehicle):
         if distance < 1:
             return polygon, lines_of_sensing_area
 
-        points_in_front = self.__get_points_in_front(self.position.world_position.location, distance, map)
+        if incremental_sensing_area is not None:
+            point_number = int(round(distance / SENSING_AREA_WAYPOINT_DISTANCE))
+            polygon = incremental_sensing_area.update(map, self.position.world_position.location,
+                                                      SENSING_AREA_WAYPOINT_DISTANCE,
+                                                      point_number * SENSING_AREA_WAYPOINT_DISTANCE)
+            if polygon is None:
+                return polygon, lines_of_sensing_area
+        else:
+            points_in_front = self.__get_points_in_front(self.position.world_position.location, distance, map)
 
-        if len(points_in_front) < 2:
-            return polygon, lines_of_sensing_area
+            if len(points_in_front) < 2:
+                return polygon, lines_of_sensing_area
 
-        polygon = self.__create_polygon_from_waypoints(points_in_front)
+            polygon = create_sensing_area_polygon(points_in_front)
         lines_of_sensing_area = self.__get_lines_of_sensing_area(polygon) if DEBUG_MODE else None
 
         return polygon, lines_of_sensing_area
 
-    def __get_points_in_front(self, start_location: "Location", distance: float, map: "Map") -> List["Location"]:
+    def __get_points_in_front(self, start_location: "Location", distance: float, map: "Map") -> np.ndarray:
         """Returns points in front of the given location. Distance between the points is given by the
         SENSING_AREA_WAYPOINT_DISTANCE parameter.
 
@@ -300,31 +319,13 @@ class EgoVehicle(Vehicle):
 
         Returns
         -------
-        List[Location]
-            list containing the location of all points in front of the start location
+        np.ndarray
+            points (x, y, z) in front of the start location ordered along the lane, shape (number of points, 3)
         """
-        point_number = distance / SENSING_AREA_WAYPOINT_DISTANCE
-        points = []
-        offset = 0
-        for _ in range(int(round(point_number))):
-            next_point = None
-            next_point = map.get_next_point_on_lane(start_location, SENSING_AREA_WAYPOINT_DISTANCE + offset)
-            offset = offset + SENSING_AREA_WAYPOINT_DISTANCE
-            if next_point is not None:
-                points.append(next_point)
-        return points
-
-    def __create_polygon_from_waypoints(self, points: List["Location"]) -> Polygon:
-        line = self.__get_line_string_from_waypoints(points)
-        dilated = line.buffer(1.5)
-        polygon_dict = dilated.__geo_interface__
-        polygon_coords = []
-        for coord in polygon_dict["coordinates"]:
-            for x in  coord:
-                polygon_coords.append(x)
-
-        polygon = Polygon(polygon_coords)
-        return polygon
+        point_number = int(round(distance / SENSING_AREA_WAYPOINT_DISTANCE))
+        distances = SENSING_AREA_WAYPOINT_DISTANCE * np.arange(1, point_number + 1)
+        points = map.sample_lane_polyline(start_location, distances)
+        return points[~np.isnan(points[:, 0])]
 
     def __get_lines_of_sensing_area(self, polygon):
         decomposer = Decomposer()
@@ -336,15 +337,6 @@ class EgoVehicle(Vehicle):
             lines_of_sensing_area = None
         return lines_of_sensing_area
 
-    def __get_line_string_from_waypoints(self, waypoints: List["Location"]):
-        line_strings = []
-        if waypoints is None:
-            return line_strings
-        for point in waypoints:
-            line_strings.append((point.x, point.y))
-        line_string_obj = LineString(line_strings)
-        return line_string_obj
-
 
 @dataclass()
 class OtherVehicle(Vehicle):
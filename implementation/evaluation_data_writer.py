@@ -0,0 +1,340 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import multiprocessing
+import os
+import pickle
+import signal
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+import cv2
+import numpy as np
+from matplotlib import pyplot as plt
+
+from cycle_data_store import CycleDataStoreReader, CycleDataStoreWriter
+from position_distance_distribution_plotter import position_distance_distribution_plot_generating_and_saving
+from sinadra_configuration_parameters import EvaluationDataQueuePolicy, EVALUATION_DATA_WRITER_PROCESSES, \
+    EVALUATION_DATA_QUEUE_SIZE, EVALUATION_DATA_QUEUE_POLICY, EVALUATION_DATA_DEFER_PLOTS, \
+    EVALUATION_DATA_CYCLE_STORE, EVALUATION_DATA_CYCLE_STORE_CHUNK_SIZE, EVALUATION_DATA_CYCLE_STORE_FLUSH_INTERVAL
+
+if TYPE_CHECKING:
+    from multiprocessing.pool import AsyncResult
+
+# Directory of the cycle data store in the directory of the evaluation data
+CYCLE_DATA_STORE_DIRECTORY_NAME = "cycle_data"
+
+
+@dataclass()
+class EvaluationData:
+    """Data class holding the evaluation data of a risk computation cycle that is written to disk by the
+    EvaluationDataWriter. (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    path_to_data : str
+        Directory of the evaluation data files (with trailing separator).
+    cycle_counter : int
+        Cycle of the client, prefix of the file names.
+    scenario_image : Optional[np.ndarray]
+        Scene image of the simulator.
+    subject_vehicle_image : Optional[np.ndarray]
+        Hero view image of the simulator.
+    stored_trajectories : Dict[str, Tuple[List[float], List[float], List[float], List[float]]]
+        Trajectory distribution (x mean, x std, y mean, y std) by trajectory key (e.g. "Ego", "FrontIDM").
+    stored_bayesian_output : Dict[str, Dict[str, List[Tuple[str, float]]]]
+        Node outcomes (state, probability) by node and Bayesian network id.
+    """
+
+    path_to_data: str
+    cycle_counter: int
+    scenario_image: Optional[np.ndarray]
+    subject_vehicle_image: Optional[np.ndarray]
+    stored_trajectories: Dict[str, Tuple[List[float], List[float], List[float], List[float]]]
+    stored_bayesian_output: Dict[str, Dict[str, List[Tuple[str, float]]]]
+
+
+def write_evaluation_data(evaluation_data: EvaluationData, save_plots: bool = True, save_raw_data: bool = True) -> None:
+    """Writes the simulator views, (optionally) the trajectories and the Bayesian network outputs and (optionally) the
+    distance distribution plots of a cycle. This function is used as worker function of the EvaluationDataWriter.
+
+    Parameters
+    ----------
+    evaluation_data : EvaluationData
+        Evaluation data of the cycle.
+    save_plots : bool
+        Render the distance distribution plots. (The default value is True.)
+    save_raw_data : bool
+        Write the trajectories and the Bayesian network outputs as text and pickle files of the cycle. (The default
+        value is True, False if they are appended to the cycle data store.)
+    """
+    path_to_data = evaluation_data.path_to_data
+    cycle_counter = evaluation_data.cycle_counter
+
+    # Save simulator views (a simulator may not provide all views)
+    if evaluation_data.scenario_image is not None:
+        cv2.imwrite(f"{path_to_data}{cycle_counter}_scenario.png", evaluation_data.scenario_image)
+    if evaluation_data.subject_vehicle_image is not None:
+        cv2.imwrite(f"{path_to_data}{cycle_counter}_scenario_hero_view.png", evaluation_data.subject_vehicle_image)
+
+    if save_raw_data:
+        save_raw_trajectories(path_to_data, cycle_counter, evaluation_data.stored_trajectories)
+        save_bn_output(path_to_data, cycle_counter, evaluation_data.stored_bayesian_output)
+    if save_plots:
+        save_distance_distribution_plots(path_to_data, cycle_counter, evaluation_data.stored_trajectories)
+
+
+def save_raw_trajectories(path_to_data: str, cycle_counter: int, stored_trajectories: Dict) -> None:
+    with open(f"{path_to_data}{cycle_counter}_trajectories.txt", "w") as output:
+        for vehicle_id, trajectory in stored_trajectories.items():
+            output.write(vehicle_id + "\n")
+            output.write(str(trajectory) + "\n\n")
+    with open(f"{path_to_data}{cycle_counter}_trajectories.pickle", "wb") as output:
+        pickle.dump(stored_trajectories, output)
+
+
+def save_bn_output(path_to_data: str, cycle_counter: int, stored_bayesian_output: Dict) -> None:
+    with open(f"{path_to_data}{cycle_counter}_bn_outputs.txt", "w") as output:
+        for bn_id, nodes in stored_bayesian_output.items():
+            output.write(bn_id + "\n")
+            for node_id, states in nodes.items():
+                output.write(node_id + "\n")
+                output.write(str(states) + "\n")
+    with open(f"{path_to_data}{cycle_counter}_bn_outputs.pickle", "wb") as output:
+        pickle.dump(stored_bayesian_output, output)
+
+
+def load_stored_trajectories(path_to_data: str, cycle_counter: int) -> Dict:
+    """Loads the stored trajectories of a cycle from the evaluation data of a run, i.e. from the cycle data store of
+    the run or, for runs without cycle data store, from the trajectories pickle file of the cycle.
+
+    Parameters
+    ----------
+    path_to_data : str
+        Directory of the evaluation data files of the run (with trailing separator).
+    cycle_counter : int
+        Cycle counter of the cycle.
+
+    Returns
+    -------
+    Dict
+        Stored trajectories of the cycle by trajectory key.
+    """
+    cycle_data_store_path = f"{path_to_data}{CYCLE_DATA_STORE_DIRECTORY_NAME}"
+    if os.path.isdir(cycle_data_store_path):
+        cycle_data = CycleDataStoreReader(cycle_data_store_path).load_cycles(cycle_counter, cycle_counter)
+        return cycle_data.get_stored_trajectories(cycle_counter)
+    with open(f"{path_to_data}{cycle_counter}_trajectories.pickle", "rb") as trajectories_file:
+        return pickle.load(trajectories_file)
+
+
+def save_distance_distribution_plots(path_to_data: str, cycle_counter: int, stored_trajectories: Dict) -> None:
+    # if one Front key is inside the stored trajectories, all Front keys are inside
+    if "Ego" in stored_trajectories and "FrontEmergency" in stored_trajectories:
+        position_distance_distribution_plot_generating_and_saving(
+            stored_trajectories["Ego"], stored_trajectories["FrontEmergency"],
+            f"{path_to_data}{cycle_counter}_emergency_distance_distribution_plot.png", "Emergency Brake"
+        )
+        position_distance_distribution_plot_generating_and_saving(
+            stored_trajectories["Ego"], stored_trajectories["FrontIDM"],
+            f"{path_to_data}{cycle_counter}_idm_distance_distribution_plot.png", "IDM"
+        )
+        position_distance_distribution_plot_generating_and_saving(
+            stored_trajectories["Ego"], stored_trajectories["FrontTargetBrake"],
+            f"{path_to_data}{cycle_counter}_target_brake_distance_distribution_plot.png", "Target Brake"
+        )
+        # Requires a working Tex environment on the system -> currently not generated during runtime
+        # save_and_plot_vehicle_trajectories_with_distribution(
+        #     stored_trajectories["Ego"], stored_trajectories["FrontIDM"],
+        #     stored_trajectories["FrontEmergency"], stored_trajectories["FrontTargetBrake"],
+        #     f"{path_to_data}{cycle_counter}__trajectories_plot.png"
+        # )
+        # Currently not required
+        # save_and_plot_vehicle_trajectories_with_distribution_single(
+        #     stored_trajectories["Ego"], stored_trajectories["FrontIDM"],
+        #     f"{path_to_data}{cycle_counter}__trajectories_plot_front_idm.png", "FrontIDM"
+        # )
+        # save_and_plot_vehicle_trajectories_with_distribution_single(
+        #     stored_trajectories["Ego"], stored_trajectories["FrontEmergency"],
+        #     f"{path_to_data}{cycle_counter}__trajectories_plot_front_emergency.png", "FrontEmergency"
+        # )
+        # save_and_plot_vehicle_trajectories_with_distribution_single(
+        #     stored_trajectories["Ego"], stored_trajectories["FrontTargetBrake"],
+        #     f"{path_to_data}{cycle_counter}__trajectories_plot_front_target_brake.png", "FrontTargetBrake"
+        # )
+    if "Ego" in stored_trajectories and "RightSideVehicleCutIn" in stored_trajectories:
+        position_distance_distribution_plot_generating_and_saving(
+            stored_trajectories["Ego"], stored_trajectories["RightSideVehicleCutIn"],
+            f"{path_to_data}{cycle_counter}_right_side_vehicle_cut_in_distance_distribution_plot.png",
+            "Right Side Vehicle Cut In"
+        )
+    if "Ego" in stored_trajectories and "LeftSideVehicleCutIn" in stored_trajectories:
+        position_distance_distribution_plot_generating_and_saving(
+            stored_trajectories["Ego"], stored_trajectories["LeftSideVehicleCutIn"],
+            f"{path_to_data}{cycle_counter}_left_side_cut_vehicle_in_distance_distribution_plot.png",
+            "Left Side Vehicle Cut In"
+        )
+
+
+def save_deferred_distance_distribution_plots(cycle: Tuple[str, int, Optional[Dict]]) -> None:
+    # Post-run rendering of the distance distribution plots of a cycle from its stored trajectories (read from the
+    # cycle data store by the client or from the trajectories pickle file of the cycle)
+    path_to_data, cycle_counter, stored_trajectories = cycle
+    if stored_trajectories is None:
+        with open(f"{path_to_data}{cycle_counter}_trajectories.pickle", "rb") as trajectories_file:
+            stored_trajectories = pickle.load(trajectories_file)
+    save_distance_distribution_plots(path_to_data, cycle_counter, stored_trajectories)
+
+
+def _writer_init() -> None:
+    # SIGINT (=CTRL+C) is handled by the client only
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The plots are only written to files, the writer processes never open a window
+    plt.switch_backend("Agg")
+
+
+class EvaluationDataWriter:
+    """Writes the evaluation data of the risk computation cycles in a pool of writer processes, thus, the PNG encoding,
+    the pickling and the plot rendering do not delay the client. The queue of the writer is bounded: if the queue is
+    full, the client either waits for a free slot or the evaluation data of the cycle is dropped (queue policy).
+
+    The trajectories and Bayesian network outputs are appended to the cycle data store by the client itself (optional),
+    thus, they are written in cycle order and are never dropped.
+    """
+
+    def __init__(self, num_processes: int = EVALUATION_DATA_WRITER_PROCESSES,
+                 queue_size: int = EVALUATION_DATA_QUEUE_SIZE,
+                 queue_policy: EvaluationDataQueuePolicy = EVALUATION_DATA_QUEUE_POLICY,
+                 defer_plots: bool = EVALUATION_DATA_DEFER_PLOTS,
+                 cycle_store: bool = EVALUATION_DATA_CYCLE_STORE,
+                 cycle_store_chunk_size: int = EVALUATION_DATA_CYCLE_STORE_CHUNK_SIZE,
+                 cycle_store_flush_interval: Optional[float] = EVALUATION_DATA_CYCLE_STORE_FLUSH_INTERVAL) -> None:
+        """Starts the writer processes.
+
+        Parameters
+        ----------
+        num_processes : int
+            Number of writer processes. (The default value is EVALUATION_DATA_WRITER_PROCESSES.)
+        queue_size : int
+            Maximum number of queued cycles. (The default value is EVALUATION_DATA_QUEUE_SIZE.)
+        queue_policy : EvaluationDataQueuePolicy
+            Behavior if the queue is full. (The default value is EVALUATION_DATA_QUEUE_POLICY.)
+        defer_plots : bool
+            Render the distance distribution plots in close() instead of with the other evaluation data. (The default
+            value is EVALUATION_DATA_DEFER_PLOTS.)
+        cycle_store : bool
+            Append the trajectories and Bayesian network outputs to the cycle data store (in the directory
+            CYCLE_DATA_STORE_DIRECTORY_NAME of the evaluation data) instead of writing files per cycle. (The default
+            value is EVALUATION_DATA_CYCLE_STORE.)
+        cycle_store_chunk_size : int
+            Number of cycles per chunk file of the cycle data store. (The default value is
+            EVALUATION_DATA_CYCLE_STORE_CHUNK_SIZE.)
+        cycle_store_flush_interval : Optional[float]
+            Maximum time in seconds until a cycle is written to the cycle data store, None to write full chunks only.
+            (The default value is EVALUATION_DATA_CYCLE_STORE_FLUSH_INTERVAL.)
+        """
+        self._queue_size = queue_size
+        self._queue_policy = queue_policy
+        self._defer_plots = defer_plots
+        self._cycle_store = cycle_store
+        self._cycle_store_chunk_size = cycle_store_chunk_size
+        self._cycle_store_flush_interval = cycle_store_flush_interval
+        # Created with the directory of the first submitted cycle
+        self._cycle_store_writer: Optional[CycleDataStoreWriter] = None
+        self._pool: Optional[multiprocessing.Pool] = multiprocessing.Pool(processes=num_processes,
+                                                                          initializer=_writer_init)
+        self._pending_writes: Deque["AsyncResult"] = deque()
+        # (directory, cycle) of the cycles whose plots are rendered after the run
+        self._deferred_plot_cycles: List[Tuple[str, int]] = []
+        self._num_written = 0
+        self._num_dropped = 0
+
+    def submit(self, evaluation_data: EvaluationData) -> bool:
+        """Queues the evaluation data of a cycle for the writer processes.
+
+        Parameters
+        ----------
+        evaluation_data : EvaluationData
+            Evaluation data of the cycle.
+
+        Returns
+        -------
+        bool
+            True if the evaluation data was queued, False if it was dropped because the queue is full.
+        """
+        if self._cycle_store:
+            if self._cycle_store_writer is None:
+                self._cycle_store_writer = CycleDataStoreWriter(
+                    f"{evaluation_data.path_to_data}{CYCLE_DATA_STORE_DIRECTORY_NAME}", self._cycle_store_chunk_size,
+                    self._cycle_store_flush_interval)
+            self._cycle_store_writer.append(evaluation_data.cycle_counter, evaluation_data.stored_trajectories,
+                                            evaluation_data.stored_bayesian_output)
+
+        self._collect_finished_writes()
+        if len(self._pending_writes) >= self._queue_size:
+            if self._queue_policy == EvaluationDataQueuePolicy.DROP:
+                self._num_dropped += 1
+                return False
+            while len(self._pending_writes) >= self._queue_size:
+                self._pending_writes[0].wait()
+                self._collect_finished_writes()
+
+        self._pending_writes.append(self._pool.apply_async(
+            write_evaluation_data, (evaluation_data, not self._defer_plots, not self._cycle_store)))
+        if self._defer_plots:
+            self._deferred_plot_cycles.append((evaluation_data.path_to_data, evaluation_data.cycle_counter))
+        return True
+
+    def get_statistics(self) -> Tuple[int, int]:
+        """Returns the number of written and dropped cycles.
+
+        Returns
+        -------
+        Tuple[int, int]
+            Number of cycles whose evaluation data was written and number of dropped cycles
+        """
+        return self._num_written, self._num_dropped
+
+    def close(self) -> None:
+        """Waits for all queued evaluation data, writes the last chunk of the cycle data store, renders the deferred
+        plots and stops the writer processes."""
+        if self._pool is None:
+            return
+        while self._pending_writes:
+            self._pending_writes[0].wait()
+            self._collect_finished_writes()
+        if self._cycle_store_writer is not None:
+            self._cycle_store_writer.close()
+        if self._deferred_plot_cycles:
+            print(f"Rendering the distance distribution plots of {len(self._deferred_plot_cycles)} cycles")
+            self._pool.map(save_deferred_distance_distribution_plots, self._get_deferred_plot_tasks())
+            self._deferred_plot_cycles = []
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+    def _get_deferred_plot_tasks(self) -> Iterator[Tuple[str, int, Optional[Dict]]]:
+        # Without cycle data store, the writer processes load the trajectories pickle files. With store, the
+        # trajectories are read chunk by chunk and passed to the writer processes.
+        if self._cycle_store_writer is None:
+            for path_to_data, cycle_counter in self._deferred_plot_cycles:
+                yield path_to_data, cycle_counter, None
+            return
+        deferred_cycles = {cycle_counter for _, cycle_counter in self._deferred_plot_cycles}
+        path_to_data = self._deferred_plot_cycles[0][0]
+        reader = CycleDataStoreReader(f"{path_to_data}{CYCLE_DATA_STORE_DIRECTORY_NAME}")
+        for cycle_data in reader.iterate_chunks():
+            for cycle_counter in cycle_data.cycles.tolist():
+                if cycle_counter in deferred_cycles:
+                    yield path_to_data, cycle_counter, cycle_data.get_stored_trajectories(cycle_counter)
+
+    def _collect_finished_writes(self) -> None:
+        # The writes finish in order of submission in most cases, a write that finished before an older one is
+        # collected with the older one. Errors of the writer processes are raised here.
+        while self._pending_writes and self._pending_writes[0].ready():
+            self._pending_writes.popleft().get()
+            self._num_written += 1
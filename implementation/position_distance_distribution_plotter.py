@@ -11,7 +11,6 @@ from matplotlib import rc
 from scipy import stats
 import numpy as np
 import math
-import pickle
 
 # TODO: Import the parameters as soon as the configuration script does not depend on CARLA anymore
 # from sinadra_configuration_parameters import PREDICTION_TIMESTEP, PREDICTION_HORIZON
@@ -92,9 +91,11 @@ def position_distance_distribution_plot_generating_and_saving(ego_trajectory, ot
 
 
 if __name__ == '__main__':
-    ##########################
-    # Load Trajectories File #
-    ##########################
+    #####################
+    # Load Trajectories #
+    #####################
+    # Imported here, as the evaluation data writer imports this module
+    from evaluation_data_writer import load_stored_trajectories
 
     stored_data_directory = "./stored_data/"
     scenario_data_directory = "LF3_50_trajectories/"
@@ -103,13 +104,8 @@ if __name__ == '__main__':
     file_cycle_counter = 248  # "scenario tick"
     file_cycle_counter += start_cycle_counter  # corresponding file name counter
     plot_postfix = "_distance_distribution_plot.png"
-    file_postfix = "_trajectories.pickle"
 
-    pickle_file_path = f"{stored_data_directory}{scenario_data_directory}{file_cycle_counter}{file_postfix}"
-
-    trajectories_file = open(pickle_file_path, "rb")
-    trajectories = pickle.load(trajectories_file)
-    trajectories_file.close()
+    trajectories = load_stored_trajectories(f"{stored_data_directory}{scenario_data_directory}", file_cycle_counter)
 
     ########################
     # Extract Trajectories #
@@ -8,6 +8,7 @@
 import math
 import numpy as np
 from scipy.integrate import simps
+from scipy.special import erf
 
 from sinadra_configuration_parameters import EGGERT_BETA, EGGERT_RATE_MAX
 
@@ -46,3 +47,82 @@ def risk_indicator(mean_d_t, sig_d_t):
 
 def event_rate(risk_ind):
     return (1 / EGGERT_RATE_MAX) * ((1 - math.exp(-EGGERT_BETA * risk_ind)) / (1 - math.exp(-EGGERT_BETA)))
+
+
+##########################################################################################
+# Vectorized Eggert Risk Model
+##########################################################################################
+
+
+def eggert_risk_vectorized(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std, time_inc):
+    """Vectorized version of eggert_risk. The risk indicator and event rate are computed for all time steps as array
+    operations and the survival integrals of all prefixes are computed in one cumulative Simpson pass (same rule as
+    scipy's simps with even="avg" per prefix), which makes it linear in the number of time steps.
+
+    Parameters
+    ----------
+    ego_pos_mean : np.ndarray
+        Mean of the ego positions with shape (..., T).
+    ego_pos_std : np.ndarray
+        Standard deviation of the ego positions with shape (..., T).
+    fv_pos_mean : np.ndarray
+        Mean of the other vehicle's positions with shape (..., T).
+    fv_pos_std : np.ndarray
+        Standard deviation of the other vehicle's positions with shape (..., T).
+    time_inc : float
+        Time step size in seconds.
+
+    Returns
+    -------
+    np.ndarray
+        Collision probability per time step with the broadcasted shape (..., T) of the inputs, e.g., of many
+        behaviors, vehicles or ego plans at once.
+    """
+    mean_d_t = np.asarray(fv_pos_mean, dtype=float) - np.asarray(ego_pos_mean, dtype=float)
+    ego_pos_std = np.asarray(ego_pos_std, dtype=float)
+    fv_pos_std = np.asarray(fv_pos_std, dtype=float)
+    sig_d_t = np.sqrt((ego_pos_std * ego_pos_std) + (fv_pos_std * fv_pos_std))
+    mean_d_t, sig_d_t = np.broadcast_arrays(mean_d_t, sig_d_t)
+
+    risk_ind = risk_indicator_vectorized(mean_d_t, sig_d_t)
+    event_prob = event_rate_vectorized(risk_ind)
+    cumulative_survival = _cumulative_simpson(event_prob, time_inc)
+    survival_prob = np.exp(-cumulative_survival)
+    return event_prob * survival_prob
+
+
+def risk_indicator_vectorized(mean_d_t, sig_d_t):
+    thresh_crit = 0  # All distances below 0m are deemed critical as this means a collision occured
+    return 0.5 * (erf((thresh_crit - mean_d_t) / np.sqrt(2.0 * sig_d_t ** 2.0)) + 1)
+
+
+def event_rate_vectorized(risk_ind):
+    return (1 / EGGERT_RATE_MAX) * ((1 - np.exp(-EGGERT_BETA * risk_ind)) / (1 - math.exp(-EGGERT_BETA)))
+
+
+def _cumulative_simpson(values, time_inc):
+    # Integral of values[..., :i + 1] for every i along the last axis with Simpson's rule. For an even number of
+    # samples, the average of Simpson's rule on the first N - 1 samples plus the last trapezoid and of Simpson's rule on
+    # the last N - 1 samples plus the first trapezoid is used (= simps(..., even="avg")).
+    num_steps = values.shape[-1]
+    cumulative = np.zeros(values.shape)
+    if num_steps < 2:
+        return cumulative
+
+    leading_zero = np.zeros(values.shape[:-1] + (1,))
+    panels = time_inc / 3.0 * (values[..., 0:-2] + 4 * values[..., 1:-1] + values[..., 2:])
+    trapezoids = 0.5 * time_inc * (values[..., 1:] + values[..., 0:-1])
+    # Sums of the Simpson panels starting at index 0 and at index 1, the m-th entry is the sum of the first m panels
+    panel_sums_from_first = np.concatenate([leading_zero, np.cumsum(panels[..., 0::2], axis=-1)], axis=-1)
+    panel_sums_from_second = np.concatenate([leading_zero, np.cumsum(panels[..., 1::2], axis=-1)], axis=-1)
+
+    # Odd number of samples (even last index 2m)
+    cumulative[..., 2::2] = panel_sums_from_first[..., 1:]
+    # Even number of samples (odd last index 2m + 1)
+    num_odd_indices = num_steps // 2
+    simpson_first = panel_sums_from_first[..., 0:num_odd_indices]
+    simpson_last = panel_sums_from_second[..., 0:num_odd_indices]
+    trapezoid_last = trapezoids[..., 0::2]
+    trapezoid_first = trapezoids[..., 0:1]
+    cumulative[..., 1::2] = (simpson_first + simpson_last) / 2.0 + (trapezoid_last + trapezoid_first) / 2.0
+    return cumulative
@@ -0,0 +1,65 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+
+from typing import Optional, TYPE_CHECKING
+
+from simulators.simulator_controller import SimulatorController
+from simulators.sinadra_data_log import SinadraDataLogReader
+from data_model.map import Map
+
+if TYPE_CHECKING:
+    from data_model.sinadra_data import SinadraData
+    import numpy as np
+
+
+class ReplaySimulatorController(SimulatorController):
+    """Simulator controller that replays the ticks of a SINADRA data log (see SinadraDataRecorder) instead of
+    connecting to a simulator. Each tick of the log is returned once by get_sinadra_data, the replay is finished after
+    the last tick. There are no simulator images, thus, the client runs the replay headless and as fast as possible.
+    The risk computation matches the recorded actors on the map, thus, the replay needs the ad map (ad_map_access) and
+    the OpenDrive file of the recorded town (see Map).
+    """
+
+    def __init__(self, log_path: str) -> None:
+        self._log_path = log_path
+        self._log_reader: Optional[SinadraDataLogReader] = None
+        self._map: Optional[Map] = None
+        self._next_sinadra_data: Optional["SinadraData"] = None
+        self._finished: bool = False
+
+    def connect_simulator(self) -> None:
+        self._log_reader = SinadraDataLogReader(self._log_path)
+
+    def setup_simulator(self) -> None:
+        self._map = Map(self._log_reader.map_name)
+
+    def run_simulator_game_loop_step(self) -> None:
+        # The next tick is read as soon as the previous one is consumed (game loop steps without risk computation do
+        # not skip any recorded tick)
+        if self._next_sinadra_data is None and not self._finished:
+            self._next_sinadra_data = self._log_reader.read_tick()
+            if self._next_sinadra_data is None:
+                self._finished = True
+                self._log_reader.close()
+
+    def get_sinadra_data(self) -> Optional["SinadraData"]:
+        sinadra_data = self._next_sinadra_data
+        self._next_sinadra_data = None
+        return sinadra_data
+
+    def get_map(self) -> Map:
+        return self._map
+
+    def get_scenario_image(self) -> Optional["np.ndarray"]:
+        return None
+
+    def get_subject_vehicle_image(self) -> Optional["np.ndarray"]:
+        return None
+
+    def is_finished(self) -> bool:
+        return self._finished
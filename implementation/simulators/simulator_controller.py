@@ -75,6 +75,17 @@ class SimulatorController:
         """
         raise NotImplementedError
 
+    def is_finished(self) -> bool:
+        """Returns whether the simulator has no further ticks, e.g., at the end of a replayed log. A live simulator
+        never finishes.
+
+        Returns
+        -------
+        bool
+            True if the SINADRA client shall stop its execution loop
+        """
+        return False
+
     def draw_line(self, start: "Vector3D", end: "Vector3D", color: Tuple[int, int, int]) -> None:
         """Draws a line in the simulation if it is supported by the simulator.
         If the simulator does not support drawing lines: Do not implement this method.
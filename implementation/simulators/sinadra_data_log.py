@@ -0,0 +1,207 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+
+import os
+import pickle
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import numpy as np
+
+from data_model.actor_snapshot import ActorSnapshot
+from data_model.sinadra_data import SinadraData
+from data_model.vehicle import EgoVehicle, OtherVehicle
+
+# The log starts with the magic bytes, the log version (uint16) and the map name (uint16 length, UTF-8). Each tick
+# follows as one record: payload length (uint32) and payload. The payload holds the number of actors (uint32), the
+# role names (uint32 length, UTF-8, separated by null characters), the pickled environment (uint32 length) and the
+# raw little endian columns of the actor snapshot in the order of SINADRA_DATA_LOG_COLUMNS.
+SINADRA_DATA_LOG_MAGIC = b"SINADRALOG"
+# Version of the log layout. Increase it whenever the layout changes, logs of other versions are rejected.
+SINADRA_DATA_LOG_VERSION = 1
+
+# Actor snapshot columns: (field name, dtype, values per actor)
+SINADRA_DATA_LOG_COLUMNS: Tuple[Tuple[str, str, int], ...] = (
+    ("ids", "<i8", 1),
+    ("locations", "<f8", 3),
+    ("orientations", "<f8", 3),
+    ("velocities", "<f8", 3),
+    ("accelerations", "<f8", 3),
+    ("bounding_box_centers", "<f8", 3),
+    ("dimensions", "<f8", 3),
+    ("light_states", "<i8", 1),
+    ("controls", "<f8", 6),
+)
+
+_LENGTH = struct.Struct("<I")
+_SHORT_LENGTH = struct.Struct("<H")
+
+
+class SinadraDataRecorder:
+    """Writes the SINADRA data (actor snapshot and environment) of each tick to a binary log file. The log is replayed
+    without a simulator by the ReplaySimulatorController.
+    """
+
+    def __init__(self, path: str, map_name: str) -> None:
+        """Creates the log file (an existing file is replaced) and writes the log header.
+
+        Parameters
+        ----------
+        path : str
+            Path of the log file
+        map_name : str
+            Name of the map (i.e. Town03) the ticks are recorded on
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        encoded_map_name = map_name.encode("utf-8")
+        self._file.write(SINADRA_DATA_LOG_MAGIC + _SHORT_LENGTH.pack(SINADRA_DATA_LOG_VERSION)
+                         + _SHORT_LENGTH.pack(len(encoded_map_name)) + encoded_map_name)
+        self._file.flush()
+        self.num_ticks = 0
+
+    def record(self, data: SinadraData) -> None:
+        """Appends the tick of the given SINADRA data to the log. The record is flushed, thus, the log of a run that
+        is aborted contains all ticks recorded so far.
+
+        Parameters
+        ----------
+        data : SinadraData
+            SINADRA data of the tick (with the actor snapshot, as created by the data handler)
+
+        Raises
+        ------
+        ValueError
+            If the SINADRA data has no actor snapshot
+        """
+        actor_snapshot = data.actor_snapshot
+        if actor_snapshot is None:
+            raise ValueError("Only SINADRA data with an actor snapshot can be recorded")
+
+        num_actors = len(actor_snapshot)
+        role_names = "\0".join(actor_snapshot.role_names).encode("utf-8")
+        environment = pickle.dumps(data.environment, protocol=pickle.HIGHEST_PROTOCOL)
+        chunks: List[bytes] = [_LENGTH.pack(num_actors), _LENGTH.pack(len(role_names)), role_names,
+                               _LENGTH.pack(len(environment)), environment]
+        for field_name, dtype, num_values in SINADRA_DATA_LOG_COLUMNS:
+            column = np.asarray(getattr(actor_snapshot, field_name), dtype=dtype).reshape(num_actors, num_values)
+            chunks.append(column.tobytes())
+        payload = b"".join(chunks)
+
+        self._file.write(_LENGTH.pack(len(payload)) + payload)
+        self._file.flush()
+        self.num_ticks += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "SinadraDataRecorder":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+
+class SinadraDataLogReader:
+    """Reads the ticks of a log written by the SinadraDataRecorder one after another. The SINADRA data of each tick is
+    created like by the data handler of the simulator (hero vehicle and other vehicles are views on the actor
+    snapshot).
+
+    Attributes
+    ----------
+    map_name : str
+        Name of the map the ticks were recorded on
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens the log file and reads the log header.
+
+        Parameters
+        ----------
+        path : str
+            Path of the log file
+
+        Raises
+        ------
+        ValueError
+            If the file is no SINADRA data log or was written with another log version
+        """
+        self._file: Optional[BinaryIO] = open(path, "rb")
+        header = self._file.read(len(SINADRA_DATA_LOG_MAGIC) + 2 * _SHORT_LENGTH.size)
+        if len(header) < len(SINADRA_DATA_LOG_MAGIC) + 2 * _SHORT_LENGTH.size or \
+                not header.startswith(SINADRA_DATA_LOG_MAGIC):
+            self.close()
+            raise ValueError(f"{path} is no SINADRA data log")
+        version, = _SHORT_LENGTH.unpack_from(header, len(SINADRA_DATA_LOG_MAGIC))
+        if version != SINADRA_DATA_LOG_VERSION:
+            self.close()
+            raise ValueError(f"{path} has log version {version}, expected version {SINADRA_DATA_LOG_VERSION}")
+        map_name_length, = _SHORT_LENGTH.unpack_from(header, len(SINADRA_DATA_LOG_MAGIC) + _SHORT_LENGTH.size)
+        self.map_name = self._file.read(map_name_length).decode("utf-8")
+
+    def read_tick(self) -> Optional[SinadraData]:
+        """Reads the next tick of the log.
+
+        Returns
+        -------
+        Optional[SinadraData]
+            SINADRA data of the tick or None at the end of the log (an incomplete last record of an aborted recording
+            is ignored)
+        """
+        if self._file is None:
+            return None
+        payload_length = self._file.read(_LENGTH.size)
+        if len(payload_length) < _LENGTH.size:
+            return None
+        payload_length, = _LENGTH.unpack(payload_length)
+        payload = bytearray(payload_length)
+        if self._file.readinto(payload) < payload_length:
+            print("Ignoring the incomplete last tick of the SINADRA data log")
+            return None
+
+        num_actors, role_names_length = struct.unpack_from("<II", payload, 0)
+        offset = 2 * _LENGTH.size
+        role_names = bytes(payload[offset:offset + role_names_length]).decode("utf-8").split("\0") \
+            if num_actors else []
+        offset += role_names_length
+        environment_length, = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        environment = pickle.loads(bytes(payload[offset:offset + environment_length]))
+        offset += environment_length
+
+        columns = {}
+        for field_name, dtype, num_values in SINADRA_DATA_LOG_COLUMNS:
+            column = np.frombuffer(payload, dtype=dtype, count=num_actors * num_values, offset=offset)
+            columns[field_name] = column.reshape(num_actors, num_values) if num_values > 1 else column
+            offset += column.nbytes
+        actor_snapshot = ActorSnapshot(role_names=role_names, **columns)
+
+        data = SinadraData(actor_snapshot.get_vehicle(0, EgoVehicle))
+        data.other_vehicles = [actor_snapshot.get_vehicle(index, OtherVehicle)
+                               for index in range(1, len(actor_snapshot))]
+        data.actor_snapshot = actor_snapshot
+        data.environment = environment
+        return data
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __iter__(self) -> Iterator[SinadraData]:
+        data = self.read_tick()
+        while data is not None:
+            yield data
+            data = self.read_tick()
+
+    def __enter__(self) -> "SinadraDataLogReader":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
@@ -6,19 +6,28 @@
 #
 #################### END LICENSE BLOCK #################################
 
-from typing import List, Tuple, Union, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+import os
+import threading
 import time
+import zlib
 from bayesian_network.inference.file_extraction import BayesianNetworkFileExtractor
 from bayesian_network.inference.inference import BayesianNetworkInference
 from bayesian_network.inference.interfaces import BayesianNetworkData, BayesianNetworkInputFeatureData
 from bayesian_network.inference.risk_sensor_data_collecting import RiskSensorDataBuilder
-from sinadra_configuration_parameters import NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP
-from risk_models.eggert_risk_model import eggert_risk
-from trajectory_gen.lat_traj_generator import gen_lanechange
-from trajectory_gen.long_traj_generator import gen_emergency_brake, gen_targetbrake, gen_idm
+from sinadra_configuration_parameters import NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP, \
+    EGO_POS_LAT_STD, RISK_COMPUTATION_EXECUTOR, RISK_COMPUTATION_THREADS, RISK_COMPUTATION_SEED, RiskComputationExecutor
+import numpy as np
+from risk_models.eggert_risk_model import eggert_risk_vectorized
+from trajectory_gen.lat_traj_generator import get_lateral_generator
+from trajectory_gen.long_traj_generator import get_longitudinal_generator
+from util.instrumentation import Instrumentation, span
 
 
 if TYPE_CHECKING:
+    from multiprocessing import Pool
     from bayesian_network.inference.interfaces import BayesianNetworkOutput
     from data_model.vehicle import EgoVehicle, OtherVehicle
     from data_model.positions import Location
@@ -34,7 +43,47 @@ if TYPE_CHECKING:
 def evaluate_bayesian_networks(bn_inference_multiprocessing_pool,
                                vehicle_dependent_bn_ids: List["VehicleDependentBNId"],
                                environment: "Environment", map: "Map",
-                               all_vehicles: Union["EgoVehicle", "OtherVehicle"]) -> List["BayesianNetworkOutput"]:
+                               all_vehicles: Union["EgoVehicle", "OtherVehicle"],
+                               bn_file_extractor: Optional[BayesianNetworkFileExtractor] = None,
+                               bayesian_network_inference: Optional[BayesianNetworkInference] = None
+                               ) -> List["BayesianNetworkOutput"]:
+    bayesian_network_data, bayesian_network_inference = _prepare_bayesian_network_evaluation(
+        vehicle_dependent_bn_ids, environment, map, all_vehicles, bn_file_extractor, bayesian_network_inference)
+    pool = bn_inference_multiprocessing_pool
+    bayesian_network_outputs = bayesian_network_inference.bn_inferences_for_vehicles(bayesian_network_data, pool)
+
+    return bayesian_network_outputs
+
+
+def evaluate_bayesian_networks_unordered(bn_inference_multiprocessing_pool,
+                                         vehicle_dependent_bn_ids: List["VehicleDependentBNId"],
+                                         environment: "Environment", map: "Map",
+                                         all_vehicles: Union["EgoVehicle", "OtherVehicle"],
+                                         bn_file_extractor: Optional[BayesianNetworkFileExtractor] = None,
+                                         bayesian_network_inference: Optional[BayesianNetworkInference] = None
+                                         ) -> Iterator[Tuple[int, "BayesianNetworkOutput"]]:
+    # Same as evaluate_bayesian_networks, but yields each BN output as soon as its posteriors are available, together
+    # with its index in the output order of evaluate_bayesian_networks (the outputs arrive in completion order)
+    bayesian_network_data, bayesian_network_inference = _prepare_bayesian_network_evaluation(
+        vehicle_dependent_bn_ids, environment, map, all_vehicles, bn_file_extractor, bayesian_network_inference)
+    pool = bn_inference_multiprocessing_pool
+    bayesian_network_outputs = bayesian_network_inference.iterate_bn_inferences_for_vehicles(bayesian_network_data,
+                                                                                             pool)
+    # The inference span only covers the waiting for the next output, not its processing by the caller
+    while True:
+        with span("inference"):
+            indexed_output = next(bayesian_network_outputs, None)
+        if indexed_output is None:
+            return
+        yield indexed_output
+
+
+def _prepare_bayesian_network_evaluation(vehicle_dependent_bn_ids: List["VehicleDependentBNId"],
+                                         environment: "Environment", map: "Map",
+                                         all_vehicles: Union["EgoVehicle", "OtherVehicle"],
+                                         bn_file_extractor: Optional[BayesianNetworkFileExtractor],
+                                         bayesian_network_inference: Optional[BayesianNetworkInference]
+                                         ) -> Tuple[List[BayesianNetworkData], BayesianNetworkInference]:
     bayesian_network_data: List[BayesianNetworkData] = []
     carla_input_feature_data: List[BayesianNetworkInputFeatureData] = []
 
@@ -54,20 +103,24 @@ def evaluate_bayesian_networks(bn_inference_multiprocessing_pool,
     carla_input_feature_data[0].set_map(map)
     print(carla_input_feature_data[0].map)
 
-    risk_sensor_data_builder = RiskSensorDataBuilder()
-    bayesian_network_data = (risk_sensor_data_builder
-                             .collect_carla_data_and_build_risk_sensor_data(bayesian_network_data,
-                                                                            carla_input_feature_data,
-                                                                            all_vehicles))
+    with span("feature_extraction"):
+        risk_sensor_data_builder = RiskSensorDataBuilder()
+        bayesian_network_data = (risk_sensor_data_builder
+                                 .collect_carla_data_and_build_risk_sensor_data(bayesian_network_data,
+                                                                                carla_input_feature_data,
+                                                                                all_vehicles))
 
-    bn_file_extractor = BayesianNetworkFileExtractor()
-    bayesian_network_data = bn_file_extractor.get_all_network_instances_for_situation(bayesian_network_data)
+    # the extractor only hands out the models of the process-wide registry, no files are loaded per cycle
+    if bn_file_extractor is None:
+        bn_file_extractor = BayesianNetworkFileExtractor()
+    with span("file_extraction"):
+        bayesian_network_data = bn_file_extractor.get_all_network_instances_for_situation(bayesian_network_data)
 
-    bayesian_network_inference = BayesianNetworkInference()
-    pool = bn_inference_multiprocessing_pool
-    bayesian_network_outputs = bayesian_network_inference.bn_inferences_for_vehicles(bayesian_network_data, pool)
+    # a long-lived inference object keeps its posterior cache across cycles
+    if bayesian_network_inference is None:
+        bayesian_network_inference = BayesianNetworkInference.get_instance()
 
-    return bayesian_network_outputs
+    return bayesian_network_data, bayesian_network_inference
 
 
 ##########################################################################################
@@ -76,39 +129,34 @@ def evaluate_bayesian_networks(bn_inference_multiprocessing_pool,
 
 
 def emergency_brake_risk(ego_pos_mean, ego_pos_std, fv_init):
-    start = time.time()
-
-    fv_pos_mean, fv_pos_std = gen_emergency_brake(fv_init, NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP)
-    collision_prob = eggert_risk(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std, PREDICTION_TIMESTEP)
-
-    end = time.time()
-    # print("Emergency Brake Risk Time: " + str(end - start))
+    with span("risk.emergency_brake"):
+        gen_emergency_brake = get_longitudinal_generator("emergency_brake")
+        fv_pos_mean, fv_pos_std = gen_emergency_brake(fv_init, NUM_TRAJECTORIES, PREDICTION_HORIZON,
+                                                      PREDICTION_TIMESTEP)
+        collision_prob = eggert_risk_vectorized(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std,
+                                                PREDICTION_TIMESTEP)
 
     return collision_prob, fv_pos_mean, fv_pos_std
 
 
 def target_brake_risk(ego_pos_mean, ego_pos_std, fv_init, target_distance, target_safe_distance):
-    start = time.time()
-
-    fv_pos_mean, fv_pos_std = gen_targetbrake(fv_init, target_distance, target_safe_distance, NUM_TRAJECTORIES,
-                                              PREDICTION_HORIZON, PREDICTION_TIMESTEP)
-    collision_prob = eggert_risk(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std, PREDICTION_TIMESTEP)
-
-    end = time.time()
-    # print("Target Brake Risk Time: " + str(end - start))
+    with span("risk.targetbrake"):
+        gen_targetbrake = get_longitudinal_generator("targetbrake")
+        fv_pos_mean, fv_pos_std = gen_targetbrake(fv_init, target_distance, target_safe_distance, NUM_TRAJECTORIES,
+                                                  PREDICTION_HORIZON, PREDICTION_TIMESTEP)
+        collision_prob = eggert_risk_vectorized(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std,
+                                                PREDICTION_TIMESTEP)
 
     return collision_prob, fv_pos_mean, fv_pos_std
 
 
 def idm_risk(ego_pos_mean, ego_pos_std, fv_init, fv_length, fv_front_init):
-    start = time.time()
-
-    fv_pos_mean, fv_pos_std = gen_idm(fv_init, fv_length, fv_front_init, NUM_TRAJECTORIES, PREDICTION_HORIZON,
-                                      PREDICTION_TIMESTEP)
-    collision_prob = eggert_risk(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std, PREDICTION_TIMESTEP)
-
-    end = time.time()
-    # print("IDM Risk Time:  " + str(end - start))
+    with span("risk.idm"):
+        gen_idm = get_longitudinal_generator("idm")
+        fv_pos_mean, fv_pos_std = gen_idm(fv_init, fv_length, fv_front_init, NUM_TRAJECTORIES, PREDICTION_HORIZON,
+                                          PREDICTION_TIMESTEP)
+        collision_prob = eggert_risk_vectorized(ego_pos_mean, ego_pos_std, fv_pos_mean, fv_pos_std,
+                                                PREDICTION_TIMESTEP)
 
     return collision_prob, fv_pos_mean, fv_pos_std
 
@@ -122,39 +170,444 @@ def lc_left_risk(ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std, s
 
 
 def lc_risk(ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std, sv_init, lc_target):
-    # start = time.time()
+    with span("risk.lanechange"):
+        gen_lanechange = get_lateral_generator("lanechange")
 
-    sv_pos_x_mean, sv_pos_x_std, sv_pos_y_mean, sv_pos_y_std = \
-        gen_lanechange(sv_init, lc_target, sv_init[2], NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP)
+        sv_pos_x_mean, sv_pos_x_std, sv_pos_y_mean, sv_pos_y_std = \
+            gen_lanechange(sv_init, lc_target, sv_init[2], NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP)
 
-    collision_prob_x = eggert_risk(ego_pos_x_mean, ego_pos_x_std, sv_pos_x_mean, sv_pos_x_std, PREDICTION_TIMESTEP)
-    collision_prob_y = eggert_risk(ego_pos_y_mean, ego_pos_y_std, sv_pos_y_mean, sv_pos_y_std, PREDICTION_TIMESTEP)
-    # end = time.time()
-    # print("Lane Change Risk Time:  " + str(end - start))
+        # x and y risk in one batched kernel call
+        collision_prob_x, collision_prob_y = eggert_risk_vectorized(np.stack([ego_pos_x_mean, ego_pos_y_mean]),
+                                                                    np.stack([ego_pos_x_std, ego_pos_y_std]),
+                                                                    np.stack([sv_pos_x_mean, sv_pos_y_mean]),
+                                                                    np.stack([sv_pos_x_std, sv_pos_y_std]),
+                                                                    PREDICTION_TIMESTEP)
 
     return collision_prob_x, collision_prob_y, sv_pos_x_mean, sv_pos_x_std, sv_pos_y_mean, sv_pos_y_std
 
 
-def long_risk_parallel(parameter_dict):
-    ego_pos_mean = parameter_dict['ego_pos_mean']
-    ego_pos_std = parameter_dict['ego_pos_std']
-    behavior = parameter_dict['behavior']
-    if behavior == "idm":
-        fv_np_vec = parameter_dict['fv_np_vec']
-        fv_front_np_vec = parameter_dict['fv_front_np_vec']
-
-        return idm_risk(ego_pos_mean, ego_pos_std, fv_np_vec, fv_front_np_vec)
-
-    if behavior == "emergency":
-        fv_np_vec = parameter_dict['fv_np_vec']
-        return emergency_brake_risk(ego_pos_mean, ego_pos_std, fv_np_vec)
-
-    if behavior == "targetbrake":
-        fv_np_vec = parameter_dict['fv_np_vec']
-        target_distance = parameter_dict['target_distance']
-        target_safe_distance = parameter_dict['target_safe_distance']
+##########################################################################################
+# Batched Trajectory Generation and Eggert Risk Computation for all actor behaviors of a tick
+##########################################################################################
 
-        return target_brake_risk(ego_pos_mean, ego_pos_std, fv_np_vec, target_distance, target_safe_distance)
+# Behaviors with a lateral trajectory distribution (and, thus, a lateral risk), all others are longitudinal behaviors
+LATERAL_BEHAVIORS = ("lanechange",)
+
+
+@dataclass
+class BehaviorRiskRequest:
+    """Trajectory prediction and risk computation request for one behavior of one actor.
+
+    Attributes
+    ----------
+    actor_key : str
+        Key of the actor role and its predicted behavior type (e.g. "Front"). The risks of all behaviors with the same
+        key and vehicle ID are weighted with their likelihoods to one total risk.
+    vehicle_id : str
+        ID of the vehicle whose behavior is predicted.
+    behavior : str
+        Predicted behavior: "emergency_brake", "targetbrake", "idm" or "lanechange".
+    likelihood : float
+        Likelihood of the behavior inferred by the Bayesian network.
+    generator_arguments : Tuple
+        Arguments of the gen_<behavior> function before num_traj, e.g. (fv_init,) for the emergency brake or
+        (sv_init, lc_target, avg_curve_speed) for the lane change (positions in the ego frame).
+    """
+    actor_key: str
+    vehicle_id: str
+    behavior: str
+    likelihood: float
+    generator_arguments: Tuple
+
+
+@dataclass
+class BehaviorRiskEvaluation:
+    """Trajectory distributions and collision risks of all actor behaviors of a tick. The per behavior arrays have the
+    shape (actors x behaviors x T), the behaviors of an actor are padded up to the maximum number of behaviors per actor
+    (see behavior_mask). Longitudinal behaviors have a zero lateral position distribution and risk.
+
+    Attributes
+    ----------
+    actor_keys : List[str]
+        Actor key of each actor (first axis). If several vehicles have the same actor key, the accessor methods return
+        the values of the last one.
+    vehicle_ids : List[str]
+        Vehicle ID of each actor.
+    behaviors : List[List[str]]
+        Behaviors of each actor (second axis).
+    likelihoods : np.ndarray
+        Behavior likelihoods (actors x behaviors), 0 for padded entries.
+    behavior_mask : np.ndarray
+        True for the entries that belong to a behavior (actors x behaviors).
+    ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std : np.ndarray
+        Predicted ego position distribution of the ego's front end (T).
+    pos_x_mean, pos_x_std, pos_y_mean, pos_y_std : np.ndarray
+        Predicted position distributions of the actor behaviors (actors x behaviors x T), NaN for padded entries.
+    collision_prob_x, collision_prob_y : np.ndarray
+        Longitudinal and lateral collision probabilities of the actor behaviors (actors x behaviors x T).
+    total_risk_x, total_risk_y : np.ndarray
+        Likelihood weighted longitudinal and lateral risk of each actor (actors x T).
+    """
+    actor_keys: List[str]
+    vehicle_ids: List[str]
+    behaviors: List[List[str]]
+    likelihoods: np.ndarray
+    behavior_mask: np.ndarray
+    ego_pos_x_mean: np.ndarray
+    ego_pos_x_std: np.ndarray
+    ego_pos_y_mean: np.ndarray
+    ego_pos_y_std: np.ndarray
+    pos_x_mean: np.ndarray
+    pos_x_std: np.ndarray
+    pos_y_mean: np.ndarray
+    pos_y_std: np.ndarray
+    collision_prob_x: np.ndarray
+    collision_prob_y: np.ndarray
+    total_risk_x: np.ndarray
+    total_risk_y: np.ndarray
+
+    def has_behavior(self, actor_key: str, behavior: str) -> bool:
+        return actor_key in self.actor_keys and behavior in self.behaviors[self._get_actor_index(actor_key)]
+
+    def get_behavior_collision_probs(self, actor_key: str, behavior: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the longitudinal and lateral collision probabilities over time of the given actor behavior."""
+        actor_index, behavior_index = self._get_indices(actor_key, behavior)
+        return (self.collision_prob_x[actor_index, behavior_index],
+                self.collision_prob_y[actor_index, behavior_index])
+
+    def get_behavior_trajectory(self, actor_key: str, behavior: str
+                                ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the predicted (x mean, x std, y mean, y std) position distribution of the given actor behavior."""
+        actor_index, behavior_index = self._get_indices(actor_key, behavior)
+        return (self.pos_x_mean[actor_index, behavior_index], self.pos_x_std[actor_index, behavior_index],
+                self.pos_y_mean[actor_index, behavior_index], self.pos_y_std[actor_index, behavior_index])
+
+    def get_total_risk(self, actor_key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the likelihood weighted longitudinal and lateral risk over time of the given actor."""
+        actor_index = self._get_actor_index(actor_key)
+        return self.total_risk_x[actor_index], self.total_risk_y[actor_index]
+
+    def _get_actor_index(self, actor_key: str) -> int:
+        return len(self.actor_keys) - 1 - self.actor_keys[::-1].index(actor_key)
+
+    def _get_indices(self, actor_key: str, behavior: str) -> Tuple[int, int]:
+        actor_index = self._get_actor_index(actor_key)
+        return actor_index, self.behaviors[actor_index].index(behavior)
+
+
+def generate_ego_trajectory(ego_init, random_state=np.random):
+    # Constant acceleration along the lane, straight drive with a static lateral position uncertainty
+    gen_constant_accel = get_longitudinal_generator("constant_accel")
+    ego_pos_x_mean, ego_pos_x_std = gen_constant_accel(ego_init, NUM_TRAJECTORIES, PREDICTION_HORIZON,
+                                                       PREDICTION_TIMESTEP, random_state)
+    ego_pos_y_mean = np.zeros(len(ego_pos_x_mean))
+    ego_pos_y_std = np.full(len(ego_pos_x_mean), EGO_POS_LAT_STD)
+    return ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std
+
+
+def generate_behavior_trajectory(behavior_risk_request: BehaviorRiskRequest, random_state=np.random):
+    # Returns the (x mean, x std, y mean, y std) position distribution of the requested behavior
+    if behavior_risk_request.behavior in LATERAL_BEHAVIORS:
+        generator = get_lateral_generator(behavior_risk_request.behavior)
+        return generator(*behavior_risk_request.generator_arguments, NUM_TRAJECTORIES, PREDICTION_HORIZON,
+                         PREDICTION_TIMESTEP, random_state)
+
+    generator = get_longitudinal_generator(behavior_risk_request.behavior)
+    pos_x_mean, pos_x_std = generator(*behavior_risk_request.generator_arguments, NUM_TRAJECTORIES, PREDICTION_HORIZON,
+                                      PREDICTION_TIMESTEP, random_state)
+    return pos_x_mean, pos_x_std, np.zeros(len(pos_x_mean)), np.zeros(len(pos_x_mean))
+
+
+def get_trajectory_task_seed(task_key: str, seed_offset: int = 0) -> Optional[int]:
+    """Returns the seed of the random number generator for a trajectory generation task. The seed only depends on the
+    configured RISK_COMPUTATION_SEED, the seed offset (e.g. the risk cycle) and the task key (e.g. actor, vehicle and
+    behavior), thus, not on the executor or on the order in which the tasks are executed.
+
+    Parameters
+    ----------
+    task_key : str
+        Unique key of the task within a risk cycle.
+    seed_offset : int
+        Offset of the seed, e.g. the risk cycle. (The default value is 0.)
+
+    Returns
+    -------
+    Optional[int]
+        Seed of the task or None if no seeding is configured.
+    """
+    if RISK_COMPUTATION_SEED is None:
+        return None
+    return (RISK_COMPUTATION_SEED + seed_offset + zlib.crc32(task_key.encode())) % 2 ** 32
+
+
+def get_behavior_task_key(behavior_risk_request: BehaviorRiskRequest) -> str:
+    return f"{behavior_risk_request.actor_key}:{behavior_risk_request.vehicle_id}:{behavior_risk_request.behavior}"
+
+
+def get_behavior_span_name(behavior_risk_request: BehaviorRiskRequest) -> str:
+    # Name of the instrumentation span of the trajectory generator of the behavior
+    return f"trajectory_generation.{behavior_risk_request.behavior}"
+
+
+def generate_behavior_trajectory_task(task: Tuple[Optional[int], BehaviorRiskRequest]) -> np.ndarray:
+    """Generates the trajectory distribution of the requested behavior with a random state of its own (seeded with the
+    seed of the task). This function is used as worker function of the parallel trajectory generation, the tasks do
+    not share NumPy's global random state and, thus, can run concurrently in threads.
+
+    Parameters
+    ----------
+    task : Tuple[Optional[int], BehaviorRiskRequest]
+        Seed of the task (seeded from the operating system if None) and the behavior request.
+
+    Returns
+    -------
+    np.ndarray
+        Position distribution (x mean, x std, y mean, y std) x T of the behavior.
+    """
+    seed, behavior_risk_request = task
+    return np.array(generate_behavior_trajectory(behavior_risk_request, np.random.RandomState(seed)))
+
+
+def _generate_behavior_trajectory_task_in_span(task: Tuple[Optional[int], BehaviorRiskRequest]) -> np.ndarray:
+    with span(get_behavior_span_name(task[1])):
+        return generate_behavior_trajectory_task(task)
+
+
+def _generate_behavior_trajectory_task_timed(task: Tuple[Optional[int], BehaviorRiskRequest]
+                                             ) -> Tuple[np.ndarray, float, float, int, int]:
+    # Worker function of the instrumented process pool: the spans of the worker processes are not collected, thus, the
+    # generation is measured in the worker and recorded by the stage
+    start = time.perf_counter()
+    trajectory = generate_behavior_trajectory_task(task)
+    return trajectory, start, time.perf_counter(), os.getpid(), threading.get_ident()
+
+
+class BehaviorRiskStage:
+    """Trajectory generation and risk computation stage of a tick. The trajectory generation of the submitted actor
+    behaviors runs on the configured executor (serial, thread pool or the process pool of the BN inference) while
+    further behaviors can be submitted, e.g. while the BN inference of the other vehicles is still running. At the end
+    of the tick, all ego-behavior pairs are scored in one vectorized Eggert risk call in the order of their order
+    indices, i.e. independent of the submission order (which follows the completion of the BN inference).
+    """
+
+    def __init__(self, executor: RiskComputationExecutor = RISK_COMPUTATION_EXECUTOR,
+                 process_pool: Optional["Pool"] = None, num_threads: int = RISK_COMPUTATION_THREADS) -> None:
+        """Creates the stage with the given executor.
+
+        Parameters
+        ----------
+        executor : RiskComputationExecutor
+            Executor of the trajectory generation tasks. (The default value is RISK_COMPUTATION_EXECUTOR.)
+        process_pool : Optional[multiprocessing.Pool]
+            Process pool for the PROCESS_POOL executor, typically the one of the BN inference. (The default value is
+            None.)
+        num_threads : int
+            Number of threads of the THREAD_POOL executor. (The default value is RISK_COMPUTATION_THREADS.)
+        """
+        if executor == RiskComputationExecutor.PROCESS_POOL and process_pool is None:
+            raise ValueError("The PROCESS_POOL risk computation executor requires a process pool")
+
+        self._executor = executor
+        self._process_pool = process_pool
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        if executor == RiskComputationExecutor.THREAD_POOL:
+            self._thread_pool = ThreadPoolExecutor(max_workers=num_threads)
+
+        self._seed_offset = 0
+        self._ego_trajectory: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        self._behavior_risk_requests: List[BehaviorRiskRequest] = []
+        self._order_indices: List[int] = []
+        self._pending_trajectories: List = []
+        # The process pool tasks of an instrumented tick return the span of the generation with the trajectory
+        self._timed_pending_trajectories = False
+
+    def start_tick(self, ego_init, seed_offset: int = 0) -> None:
+        """Discards the tasks of the previous tick and generates the ego trajectory of the new tick.
+
+        Parameters
+        ----------
+        ego_init : np.ndarray
+            Ego kinematic vector np.array([p_x, p_y, v_x, v_y, a_x, a_y]) of the ego's front end in the ego frame.
+        seed_offset : int
+            Offset of the task seeds, e.g. the risk cycle. (The default value is 0.)
+        """
+        self._seed_offset = seed_offset
+        self._behavior_risk_requests = []
+        self._order_indices = []
+        self._pending_trajectories = []
+        self._timed_pending_trajectories = Instrumentation.get_instance().enabled
+
+        with span("trajectory_generation.ego"):
+            self._ego_trajectory = generate_ego_trajectory(
+                ego_init, np.random.RandomState(get_trajectory_task_seed("Ego", seed_offset)))
+
+    def submit(self, behavior_risk_requests: List[BehaviorRiskRequest], order_index: Optional[int] = None) -> None:
+        """Starts the trajectory generation of the given actor behaviors on the executor.
+
+        Parameters
+        ----------
+        behavior_risk_requests : List[BehaviorRiskRequest]
+            Behaviors for which the risk shall be computed.
+        order_index : Optional[int]
+            Position of the behaviors in the risk evaluation of the tick, e.g. the index of the vehicle's BN output.
+            Behaviors with the same order index keep their submission order. (The default value is None, i.e. the
+            number of submitted behaviors of the tick, which keeps the submission order.)
+        """
+        if order_index is None:
+            order_index = len(self._behavior_risk_requests)
+        for behavior_risk_request in behavior_risk_requests:
+            task = (get_trajectory_task_seed(get_behavior_task_key(behavior_risk_request), self._seed_offset),
+                    behavior_risk_request)
+            self._behavior_risk_requests.append(behavior_risk_request)
+            self._order_indices.append(order_index)
+
+            if self._executor == RiskComputationExecutor.PROCESS_POOL:
+                task_function = _generate_behavior_trajectory_task_timed if self._timed_pending_trajectories \
+                    else generate_behavior_trajectory_task
+                self._pending_trajectories.append(self._process_pool.apply_async(task_function, (task,)))
+            elif self._executor == RiskComputationExecutor.THREAD_POOL:
+                self._pending_trajectories.append(self._thread_pool.submit(_generate_behavior_trajectory_task_in_span,
+                                                                           task))
+            else:
+                with span(get_behavior_span_name(behavior_risk_request)):
+                    self._pending_trajectories.append(generate_behavior_trajectory_task(task))
+
+    def finish_tick(self) -> BehaviorRiskEvaluation:
+        """Waits for the trajectories of all submitted behaviors and computes their risks.
+
+        Returns
+        -------
+        BehaviorRiskEvaluation
+            Trajectory distributions, behavior risks and total risks of all actors of the tick.
+        """
+        if self._executor == RiskComputationExecutor.PROCESS_POOL:
+            trajectories = [pending.get() for pending in self._pending_trajectories]
+            if self._timed_pending_trajectories:
+                instrumentation = Instrumentation.get_instance()
+                for behavior_risk_request, (_, start, end, process_id, thread_id) in zip(self._behavior_risk_requests,
+                                                                                         trajectories):
+                    instrumentation.add_span(get_behavior_span_name(behavior_risk_request), start, end, process_id,
+                                             thread_id)
+                trajectories = [trajectory for trajectory, _, _, _, _ in trajectories]
+        elif self._executor == RiskComputationExecutor.THREAD_POOL:
+            trajectories = [pending.result() for pending in self._pending_trajectories]
+        else:
+            trajectories = self._pending_trajectories
+
+        # stable sort, the behaviors of a vehicle keep their order
+        order = sorted(range(len(self._behavior_risk_requests)), key=self._order_indices.__getitem__)
+        with span("risk.behaviors"):
+            return score_behavior_risks(self._ego_trajectory, [self._behavior_risk_requests[i] for i in order],
+                                        [trajectories[i] for i in order])
+
+    def close(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown()
+
+
+def evaluate_behavior_risks(ego_init, behavior_risk_requests: List[BehaviorRiskRequest],
+                            seed_offset: int = 0) -> BehaviorRiskEvaluation:
+    """Generates the ego trajectory once and the trajectories of all requested actor behaviors of a tick serially (see
+    BehaviorRiskStage) and computes their risks.
+
+    Parameters
+    ----------
+    ego_init : np.ndarray
+        Ego kinematic vector np.array([p_x, p_y, v_x, v_y, a_x, a_y]) of the ego's front end in the ego frame.
+    behavior_risk_requests : List[BehaviorRiskRequest]
+        Behaviors of all actors for which the risk shall be computed.
+    seed_offset : int
+        Offset of the task seeds, e.g. the risk cycle. (The default value is 0.)
+
+    Returns
+    -------
+    BehaviorRiskEvaluation
+        Trajectory distributions, behavior risks and total risks of all actors.
+    """
+    behavior_risk_stage = BehaviorRiskStage(RiskComputationExecutor.SERIAL)
+    behavior_risk_stage.start_tick(ego_init, seed_offset)
+    behavior_risk_stage.submit(behavior_risk_requests)
+    return behavior_risk_stage.finish_tick()
+
+
+def score_behavior_risks(ego_trajectory: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+                         behavior_risk_requests: List[BehaviorRiskRequest],
+                         behavior_trajectories: List[np.ndarray]) -> BehaviorRiskEvaluation:
+    """Scores all ego-behavior pairs in one vectorized Eggert risk call and weights the behavior risks of each actor
+    with the behavior likelihoods.
+
+    Parameters
+    ----------
+    ego_trajectory : Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Predicted ego position distribution (x mean, x std, y mean, y std).
+    behavior_risk_requests : List[BehaviorRiskRequest]
+        Behaviors of all actors for which the risk shall be computed.
+    behavior_trajectories : List[np.ndarray]
+        Predicted position distribution (x mean, x std, y mean, y std) x T of each requested behavior.
+
+    Returns
+    -------
+    BehaviorRiskEvaluation
+        Trajectory distributions, behavior risks and total risks of all actors.
+    """
+    ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std = ego_trajectory
+    num_timesteps = len(ego_pos_x_mean)
+
+    # Group the behaviors by actor key and vehicle (in the order of the requests)
+    actors: List[Tuple[str, str]] = []
+    requests_by_actor: List[List[BehaviorRiskRequest]] = []
+    trajectories_by_actor: List[List[np.ndarray]] = []
+    for behavior_risk_request, behavior_trajectory in zip(behavior_risk_requests, behavior_trajectories):
+        actor = (behavior_risk_request.actor_key, behavior_risk_request.vehicle_id)
+        if actor not in actors:
+            actors.append(actor)
+            requests_by_actor.append([])
+            trajectories_by_actor.append([])
+        requests_by_actor[actors.index(actor)].append(behavior_risk_request)
+        trajectories_by_actor[actors.index(actor)].append(behavior_trajectory)
+    actor_keys = [actor_key for actor_key, _ in actors]
+    vehicle_ids = [vehicle_id for _, vehicle_id in actors]
+
+    num_actors = len(actor_keys)
+    num_behaviors = max([len(requests) for requests in requests_by_actor], default=0)
+    likelihoods = np.zeros((num_actors, num_behaviors))
+    behavior_mask = np.zeros((num_actors, num_behaviors), dtype=bool)
+    lateral_mask = np.zeros((num_actors, num_behaviors), dtype=bool)
+    trajectories = np.full((4, num_actors, num_behaviors, num_timesteps), np.nan)
+
+    for actor_index, requests in enumerate(requests_by_actor):
+        for behavior_index, behavior_risk_request in enumerate(requests):
+            trajectories[:, actor_index, behavior_index] = trajectories_by_actor[actor_index][behavior_index]
+            likelihoods[actor_index, behavior_index] = behavior_risk_request.likelihood
+            behavior_mask[actor_index, behavior_index] = True
+            lateral_mask[actor_index, behavior_index] = behavior_risk_request.behavior in LATERAL_BEHAVIORS
+    pos_x_mean, pos_x_std, pos_y_mean, pos_y_std = trajectories
+
+    # Longitudinal risk of all behaviors and lateral risk of the lateral behaviors in one batched kernel call
+    num_longitudinal_rows = int(np.sum(behavior_mask))
+    num_lateral_rows = int(np.sum(lateral_mask))
+    ego_pos_mean = np.concatenate([np.tile(ego_pos_x_mean, (num_longitudinal_rows, 1)),
+                                   np.tile(ego_pos_y_mean, (num_lateral_rows, 1))])
+    ego_pos_std = np.concatenate([np.tile(ego_pos_x_std, (num_longitudinal_rows, 1)),
+                                  np.tile(ego_pos_y_std, (num_lateral_rows, 1))])
+    pos_mean = np.concatenate([pos_x_mean[behavior_mask], pos_y_mean[lateral_mask]])
+    pos_std = np.concatenate([pos_x_std[behavior_mask], pos_y_std[lateral_mask]])
+    collision_probs = eggert_risk_vectorized(ego_pos_mean, ego_pos_std, pos_mean, pos_std, PREDICTION_TIMESTEP)
+
+    collision_prob_x = np.zeros((num_actors, num_behaviors, num_timesteps))
+    collision_prob_y = np.zeros((num_actors, num_behaviors, num_timesteps))
+    collision_prob_x[behavior_mask] = collision_probs[:num_longitudinal_rows]
+    collision_prob_y[lateral_mask] = collision_probs[num_longitudinal_rows:]
+
+    # Weight the individual behavior risks based on the BN output likelihoods (see compute_total_risk)
+    total_risk_x = np.einsum("ab,abt->at", likelihoods, collision_prob_x)
+    total_risk_y = np.einsum("ab,abt->at", likelihoods, collision_prob_y)
+
+    return BehaviorRiskEvaluation(actor_keys, vehicle_ids,
+                                  [[request.behavior for request in requests] for requests in requests_by_actor],
+                                  likelihoods, behavior_mask, ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean,
+                                  ego_pos_y_std, pos_x_mean, pos_x_std, pos_y_mean, pos_y_std, collision_prob_x,
+                                  collision_prob_y, total_risk_x, total_risk_y)
 
 
 ##########################################################################################
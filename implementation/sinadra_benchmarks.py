@@ -0,0 +1,1308 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+
+# Micro benchmarks for the SINADRA risk pipeline stages that can be run without a CARLA server.
+# Usage: python sinadra_benchmarks.py [benchmark name ...] (runs all benchmarks if no name is given)
+
+import gc
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, fields
+import cv2
+import numpy as np
+from pgmpy.inference.ExactInference import VariableElimination
+from shapely.geometry import LineString, Point
+
+from actor_situation_class_detection.situation_class import RoadSegmentEnd, UnsignalizedFourWayJunction
+from actor_situation_class_detection.situation_class_state_machine import SituationClassStateMachine
+from actor_situation_class_detection.town_data.town03_sinadra_data import SituationClassStateMachineTown03
+from bayesian_network.inference.model_registry import BayesianNetworkModelRegistry
+from bayesian_network.inference.inference import infer_posteriors, preload_bayesian_networks_in_worker
+from bayesian_network.inference.compiled_inference import ZeroProbabilityEvidenceException
+from bayesian_network.inference.interfaces import BayesianNetworkData
+from evaluation_data_writer import EvaluationData, EvaluationDataWriter, write_evaluation_data, \
+    save_raw_trajectories, save_bn_output, load_stored_trajectories, CYCLE_DATA_STORE_DIRECTORY_NAME
+from cycle_data_store import CycleDataStoreReader, CycleDataStoreWriter
+from data_model.actor_snapshot import ActorSnapshot, LIGHT_STATE_BITS
+from data_model.compiled_map import CompiledMap
+from data_model.entity import BoundingBox, Dimension
+from data_model.environment import Environment, Precipitation, Weather
+from data_model.sensing_area import IncrementalSensingArea, create_sensing_area_polygon
+from data_model.sinadra_data import SinadraData
+from data_model.positions import Location, Orientation, Position, WorldPosition
+from data_model.vehicle import EgoVehicle, KinematicStatus, OtherVehicle, SurroundingVehicles, VehicleControl, \
+    VehicleLightState, VehiclePointId
+from data_model.positions import Vector3D
+from simulators.sinadra_data_log import SinadraDataLogReader, SinadraDataRecorder
+from trajectory_gen.long_traj_generator import LONGITUDINAL_GENERATORS
+from trajectory_gen.lat_traj_generator import LATERAL_GENERATORS
+from util.geometry import points_in_polygon
+from util.instrumentation import Instrumentation, span
+from util.risk_plot import RiskPlot, FRONT_VEHICLE_CUMULATIVE_RISK, FRONT_VEHICLE_EMERGENCY_RISK, \
+    FRONT_VEHICLE_TARGET_BRAKE_RISK, FRONT_VEHICLE_IDM_RISK, LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK, \
+    LEFT_SIDE_VEHICLE_LATERAL_RISK, RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK, RIGHT_SIDE_VEHICLE_LATERAL_RISK
+from util.risk_plot_renderer import RiskPlotRenderer
+from util.kinematic_transform import transform_actor_kinematics_to_ego_frame, \
+    transform_vehicle_kinematics_to_ego_frame
+from risk_models.eggert_risk_model import eggert_risk, eggert_risk_vectorized
+from sinadra import BehaviorRiskRequest, BehaviorRiskStage, evaluate_behavior_risks, generate_ego_trajectory, \
+    emergency_brake_risk, target_brake_risk, idm_risk, lc_risk
+from sinadra_configuration_parameters import TrajectoryGenerationMode, RiskComputationExecutor, \
+    EvaluationDataQueuePolicy, PREDICTION_HORIZON, PREDICTION_TIMESTEP, BRAKE_TARGET_SAFE_DISTANCE_MARGIN, \
+    NUM_TRAJECTORIES, FRAMERATE, FRONT_SENSING_DISTANCE_TIME_GAP_IN_SECONDS, SENSING_AREA_WAYPOINT_DISTANCE
+
+
+def _root_node_evidence_and_leaf_nodes(bn_model):
+    # Evidence: first state of every root node, inferred nodes: all leaves
+    evidence_query = {}
+    for node_id in bn_model.get_roots():
+        evidence_query[node_id] = bn_model.get_cpds(node_id).state_names[node_id][0]
+    output_nodes = tuple(node_id for node_id in bn_model.get_leaves() if node_id not in evidence_query)
+    return evidence_query, output_nodes
+
+
+def _legacy_worker_inference(legacy_task):
+    # Inference as done before the models were resident in the workers: the model is part of the task
+    bn_data, evidence_query, output_nodes = legacy_task
+    inference_algorithm = VariableElimination(bn_data.bayesian_network_model)
+    factors = inference_algorithm.query(variables=list(output_nodes), evidence=evidence_query, joint=False,
+                                        show_progress=False)
+    return {node_id: factor for node_id, factor in factors.items()}
+
+
+def benchmark_inference_ipc_payload(num_vehicles=6, num_ticks=50, num_processes=2):
+    registry = BayesianNetworkModelRegistry.get_instance()
+    registry.load_all_networks()
+    network_ids = registry.get_loaded_network_ids()
+
+    legacy_tasks = []
+    tasks = []
+    for i in range(num_vehicles):
+        bn_id = network_ids[i % len(network_ids)]
+        bn_model = registry.get_model(bn_id)
+        evidence_query, output_nodes = _root_node_evidence_and_leaf_nodes(bn_model)
+        bn_data = BayesianNetworkData(str(i), None, Location(), bn_id, None, registry.get_config_class(bn_id)(),
+                                      bn_model.copy())
+        legacy_tasks.append((bn_data, evidence_query, output_nodes))
+        tasks.append((bn_id, evidence_query, output_nodes))
+
+    legacy_payload = sum(len(pickle.dumps(task)) for task in legacy_tasks)
+    payload = sum(len(pickle.dumps(task)) for task in tasks)
+
+    with multiprocessing.Pool(processes=num_processes, initializer=preload_bayesian_networks_in_worker) as pool:
+        pool.map(infer_posteriors, tasks)  # warm up
+
+        start = time.perf_counter()
+        for _ in range(num_ticks):
+            legacy_results = pool.map(_legacy_worker_inference, legacy_tasks)
+        legacy_latency = (time.perf_counter() - start) / num_ticks
+
+        start = time.perf_counter()
+        for _ in range(num_ticks):
+            results = pool.map(infer_posteriors, tasks)
+        latency = (time.perf_counter() - start) / num_ticks
+
+    legacy_result_payload = sum(len(pickle.dumps(result)) for result in legacy_results)
+    result_payload = sum(len(pickle.dumps(result)) for result in results)
+
+    print(f"BN inference IPC ({num_vehicles} vehicles per tick, {num_processes} processes)")
+    print(f"  task payload per tick:   model in task = {legacy_payload} B, resident model = {payload} B")
+    print(f"  result payload per tick: factors = {legacy_result_payload} B, posterior arrays = {result_payload} B")
+    print(f"  latency per tick:        model in task = {legacy_latency * 1000:.2f} ms, "
+          f"resident model = {latency * 1000:.2f} ms")
+
+
+def benchmark_compiled_inference(num_queries=50, tolerance=1e-9):
+    # Compares the compiled inference backend to pgmpy for random evidence sets (parity and query time)
+    registry = BayesianNetworkModelRegistry.get_instance()
+    registry.load_all_networks()
+    random_generator = random.Random(0)
+
+    for bn_id in registry.get_loaded_network_ids():
+        bn_model = registry.get_model(bn_id)
+        compiled_network = registry.get_compiled_network(bn_id)
+        node_ids = list(bn_model.nodes)
+        queries = []
+        pgmpy_time = 0.0
+        num_zero_probability_queries = 0
+
+        for _ in range(num_queries):
+            evidence_nodes = random_generator.sample(node_ids, random_generator.randint(0, len(node_ids) // 2))
+            evidence_query = {node_id: random_generator.choice(bn_model.get_cpds(node_id).state_names[node_id])
+                              for node_id in evidence_nodes}
+            variables = [node_id for node_id in node_ids if node_id not in evidence_query]
+
+            start = time.perf_counter()
+            factors = VariableElimination(bn_model).query(variables=variables, evidence=evidence_query,
+                                                          joint=False, show_progress=False)
+            pgmpy_time += time.perf_counter() - start
+            if any(np.isnan(factors[node_id].values).any() for node_id in variables):
+                # evidence with zero probability: pgmpy returns NaN posteriors, the compiled backend raises
+                try:
+                    compiled_network.query(variables, evidence_query)
+                except ZeroProbabilityEvidenceException:
+                    num_zero_probability_queries += 1
+                    continue
+                raise AssertionError(f"Compiled inference returned posteriors for zero probability evidence "
+                                     f"{evidence_query}")
+            queries.append((variables, evidence_query, factors))
+
+        # first pass compiles the elimination plans, the second pass only uses the cached plans
+        start = time.perf_counter()
+        for variables, evidence_query, _ in queries:
+            compiled_network.query(variables, evidence_query)
+        compile_time = time.perf_counter() - start
+
+        max_deviation = 0.0
+        start = time.perf_counter()
+        for variables, evidence_query, factors in queries:
+            posteriors = compiled_network.query(variables, evidence_query)
+            for node_id, posterior in zip(variables, posteriors):
+                deviation = float(np.max(np.abs(factors[node_id].values - posterior)))
+                assert not math.isnan(deviation)
+                max_deviation = max(max_deviation, deviation)
+        compiled_time = time.perf_counter() - start
+
+        print(f"Compiled inference {bn_id} (all nodes per query): max deviation to pgmpy = {max_deviation:.2e}, "
+              f"pgmpy = {pgmpy_time / len(queries) * 1000:.2f} ms/query, "
+              f"compiled = {compiled_time / len(queries) * 1000:.2f} ms/query "
+              f"(first query per evidence set = {compile_time / len(queries) * 1000:.2f} ms), "
+              f"{num_zero_probability_queries} zero probability evidence sets raised")
+        assert max_deviation < tolerance
+
+
+def _longitudinal_generator_arguments(behavior, num_traj):
+    # Front vehicle 20m ahead with 12m/s (stops within the prediction horizon when braking)
+    fv_init = np.array([20.0, 0.0, 12.0, 0.0, -0.5, 0.0])
+    if behavior == "targetbrake":
+        return fv_init, 35.0, BRAKE_TARGET_SAFE_DISTANCE_MARGIN, num_traj, PREDICTION_HORIZON, PREDICTION_TIMESTEP
+    if behavior == "idm":
+        fv_front_init = np.array([35.0, 0.0, 8.0, 0.0, 0.0, 0.0])
+        return fv_init, 4.5, fv_front_init, num_traj, PREDICTION_HORIZON, PREDICTION_TIMESTEP
+    return fv_init, num_traj, PREDICTION_HORIZON, PREDICTION_TIMESTEP
+
+
+def benchmark_longitudinal_generators(num_seeds=20, trajectory_counts=(20, 2000), num_runs=20, tolerance=1e-9):
+    # Equivalence of reference and vectorized samplers under fixed seeds and their runtime per call
+    for behavior, generators in LONGITUDINAL_GENERATORS.items():
+        reference_generator = generators[TrajectoryGenerationMode.REFERENCE_SAMPLING]
+        vectorized_generator = generators[TrajectoryGenerationMode.VECTORIZED_SAMPLING]
+
+        max_deviation = 0.0
+        for seed in range(num_seeds):
+            np.random.seed(seed)
+            reference_mean, reference_std = reference_generator(*_longitudinal_generator_arguments(behavior, 20))
+            np.random.seed(seed)
+            mean, std = vectorized_generator(*_longitudinal_generator_arguments(behavior, 20))
+            max_deviation = max(max_deviation, float(np.max(np.abs(reference_mean - mean))),
+                                float(np.max(np.abs(reference_std - std))))
+        assert max_deviation < tolerance
+
+        runtimes = []
+        for num_traj in trajectory_counts:
+            arguments = _longitudinal_generator_arguments(behavior, num_traj)
+            for generator in (reference_generator, vectorized_generator):
+                start = time.perf_counter()
+                for _ in range(num_runs):
+                    generator(*arguments)
+                runtimes.append(f"{(time.perf_counter() - start) / num_runs * 1000:.2f}")
+
+        print(f"Longitudinal generator {behavior}: max deviation (same seed) = {max_deviation:.2e}, "
+              f"ms per call (reference/vectorized) for {trajectory_counts} trajectories = "
+              f"{'/'.join(runtimes[0:2])}, {'/'.join(runtimes[2:4])}")
+
+
+def benchmark_analytic_longitudinal_generators(num_traj=200000, num_runs=20):
+    # Deviation of the analytic moment propagation from a large Monte Carlo sample (in units of the Monte Carlo standard
+    # error of the mean) for moving and stopping vehicles, and the runtime per call compared to sampling
+    kinematic_inits = [np.array([20.0, 0.0, 12.0, 0.0, -0.5, 0.0]), np.array([20.0, 0.0, 1.0, 0.0, -0.5, 0.0]),
+                       np.array([20.0, 0.0, 0.0, 0.0, 0.0, 0.0])]
+
+    for behavior, generators in LONGITUDINAL_GENERATORS.items():
+        analytic_generator = generators.get(TrajectoryGenerationMode.ANALYTIC_PROPAGATION)
+        if analytic_generator is None:
+            continue
+        sampling_generator = generators[TrajectoryGenerationMode.VECTORIZED_SAMPLING]
+
+        max_mean_error = 0.0
+        max_std_deviation = 0.0
+        for kinematic_init in kinematic_inits:
+            np.random.seed(0)
+            sampled_mean, sampled_std = sampling_generator(kinematic_init, num_traj, PREDICTION_HORIZON,
+                                                           PREDICTION_TIMESTEP)
+            mean, std = analytic_generator(kinematic_init, num_traj, PREDICTION_HORIZON, PREDICTION_TIMESTEP)
+            max_mean_error = max(max_mean_error, float(np.max(np.abs(sampled_mean - mean) * np.sqrt(num_traj) / std)))
+            max_std_deviation = max(max_std_deviation, float(np.max(np.abs(sampled_std - std) / std)))
+        assert max_mean_error < 5.0 and max_std_deviation < 0.01
+
+        runtimes = []
+        for generator in (sampling_generator, analytic_generator):
+            start = time.perf_counter()
+            for _ in range(num_runs):
+                generator(kinematic_inits[0], NUM_TRAJECTORIES, PREDICTION_HORIZON, PREDICTION_TIMESTEP)
+            runtimes.append(f"{(time.perf_counter() - start) / num_runs * 1000:.2f}")
+
+        print(f"Analytic longitudinal generator {behavior}: max mean deviation to {num_traj} samples = "
+              f"{max_mean_error:.2f} standard errors, max relative std deviation = {max_std_deviation:.2e}, "
+              f"ms per call (sampling with {NUM_TRAJECTORIES} trajectories/analytic) = {'/'.join(runtimes)}")
+
+
+def _lateral_generator_arguments(num_traj, sv_init=None):
+    # Side vehicle on the left lane changing into the ego lane
+    sv_init = np.array([5.0, 3.5, 10.0, 0.0, 0.0, 0.0]) if sv_init is None else sv_init
+    return sv_init, [sv_init[0] + 15.0, 0.0], sv_init[2], num_traj, PREDICTION_HORIZON, PREDICTION_TIMESTEP
+
+
+def benchmark_lateral_generators(num_seeds=20, trajectory_counts=(20, 2000), num_runs=20, tolerance=1e-9):
+    # Equivalence of reference and vectorized lane change generators under fixed seeds (including nearly standing side
+    # vehicles, whose curves are downsampled) and their runtime per call
+    side_vehicle_states = [np.array([5.0, 3.5, 10.0, 0.0, 0.0, 0.0]), np.array([-8.0, -3.5, 25.0, 0.3, 0.0, 0.0]),
+                           np.array([2.0, 3.5, 0.0005, 0.0, 0.0, 0.0])]
+
+    for behavior, generators in LATERAL_GENERATORS.items():
+        reference_generator = generators[TrajectoryGenerationMode.REFERENCE_SAMPLING]
+        vectorized_generator = generators[TrajectoryGenerationMode.VECTORIZED_SAMPLING]
+
+        max_deviation = 0.0
+        for seed in range(num_seeds):
+            for sv_init in side_vehicle_states:
+                np.random.seed(seed)
+                reference_result = reference_generator(*_lateral_generator_arguments(20, sv_init))
+                np.random.seed(seed)
+                result = vectorized_generator(*_lateral_generator_arguments(20, sv_init))
+                max_deviation = max([max_deviation] + [float(np.max(np.abs(reference_values - values)))
+                                                       for reference_values, values in zip(reference_result, result)])
+        assert max_deviation < tolerance
+
+        runtimes = []
+        for num_traj in trajectory_counts:
+            arguments = _lateral_generator_arguments(num_traj)
+            for generator in (reference_generator, vectorized_generator):
+                start = time.perf_counter()
+                for _ in range(num_runs):
+                    generator(*arguments)
+                runtimes.append(f"{(time.perf_counter() - start) / num_runs * 1000:.2f}")
+
+        print(f"Lateral generator {behavior}: max deviation (same seed) = {max_deviation:.2e}, "
+              f"ms per call (reference/vectorized) for {trajectory_counts} trajectories = "
+              f"{'/'.join(runtimes[0:2])}, {'/'.join(runtimes[2:4])}")
+
+
+def benchmark_eggert_risk(max_num_timesteps=45, batch_size=1000, tolerance=1e-12):
+    # Equivalence of the reference and the vectorized Eggert risk for all prefix lengths and the runtime for a batch of
+    # distance distributions
+    random_generator = np.random.RandomState(0)
+
+    def random_distributions(shape):
+        return (random_generator.normal(0.0, 5.0, shape), random_generator.uniform(0.1, 2.0, shape),
+                random_generator.normal(5.0, 5.0, shape), random_generator.uniform(0.1, 2.0, shape))
+
+    max_deviation = 0.0
+    for num_timesteps in range(1, max_num_timesteps + 1):
+        distributions = random_distributions((4, num_timesteps))
+        collision_probs = eggert_risk_vectorized(*distributions, PREDICTION_TIMESTEP)
+        for i in range(4):
+            reference_collision_prob = eggert_risk(*[values[i] for values in distributions], PREDICTION_TIMESTEP)
+            max_deviation = max(max_deviation, float(np.max(np.abs(reference_collision_prob - collision_probs[i]))))
+    assert max_deviation < tolerance
+
+    num_timesteps = int(PREDICTION_HORIZON / PREDICTION_TIMESTEP + 1)
+    distributions = random_distributions((batch_size, num_timesteps))
+    start = time.perf_counter()
+    for i in range(batch_size):
+        eggert_risk(*[values[i] for values in distributions], PREDICTION_TIMESTEP)
+    reference_time = time.perf_counter() - start
+    start = time.perf_counter()
+    eggert_risk_vectorized(*distributions, PREDICTION_TIMESTEP)
+    vectorized_time = time.perf_counter() - start
+
+    print(f"Eggert risk: max deviation = {max_deviation:.2e}, {batch_size} x {num_timesteps} time steps: "
+          f"reference = {reference_time * 1000:.2f} ms, "
+          f"vectorized (one batched call) = {vectorized_time * 1000:.2f} ms")
+
+
+def _behavior_risk_requests(num_vehicles):
+    # One front vehicle with all braking behaviors and side vehicles changing into the ego lane
+    fv_init = np.array([15.0, 0.0, 9.0, 0.0, 0.0, 0.0])
+    fv_front_init = np.array([30.0, 0.0, 9.0, 0.0, 0.0, 0.0])
+    behavior_risk_requests = [BehaviorRiskRequest("Front", "0", "emergency_brake", 0.3, (fv_init,)),
+                              BehaviorRiskRequest("Front", "0", "targetbrake", 0.2, (fv_init, 25.0, 1.5)),
+                              BehaviorRiskRequest("Front", "0", "idm", 0.5, (fv_init, 4.5, fv_front_init))]
+    for i in range(1, num_vehicles):
+        sv_init = np.array([-2.0 * i, 3.5, 11.0, 0.0, 0.0, 0.0])
+        behavior_risk_requests.append(BehaviorRiskRequest("SideVehicleCutIn", str(i), "lanechange", 0.7,
+                                                          (sv_init, [12.0, 0.0], sv_init[2])))
+    return behavior_risk_requests
+
+
+def _per_behavior_risks(ego_init, behavior_risk_requests):
+    # Risk computation as done before the batched evaluation: one ego trajectory and one risk call per behavior
+    risk_functions = {"emergency_brake": emergency_brake_risk, "targetbrake": target_brake_risk, "idm": idm_risk}
+    for behavior_risk_request in behavior_risk_requests:
+        ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std = generate_ego_trajectory(ego_init)
+        if behavior_risk_request.behavior == "lanechange":
+            lc_risk(ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std,
+                    *behavior_risk_request.generator_arguments[0:2])
+        else:
+            risk_functions[behavior_risk_request.behavior](ego_pos_x_mean, ego_pos_x_std,
+                                                           *behavior_risk_request.generator_arguments)
+
+
+def benchmark_behavior_risk_evaluation(vehicle_counts=(2, 8, 32), num_runs=20):
+    # Runtime per tick of the batched risk evaluation compared to one risk computation per behavior
+    ego_init = np.array([2.3, 0.0, 10.0, 0.0, 0.0, 0.0])
+    for num_vehicles in vehicle_counts:
+        behavior_risk_requests = _behavior_risk_requests(num_vehicles)
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            _per_behavior_risks(ego_init, behavior_risk_requests)
+        per_behavior_time = (time.perf_counter() - start) / num_runs
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            risk_evaluation = evaluate_behavior_risks(ego_init, behavior_risk_requests)
+        batched_time = (time.perf_counter() - start) / num_runs
+
+        print(f"Behavior risk evaluation ({num_vehicles} vehicles, {len(behavior_risk_requests)} behaviors, "
+              f"tensor shape {risk_evaluation.collision_prob_x.shape}): per behavior = {per_behavior_time * 1000:.2f} "
+              f"ms/tick, batched = {batched_time * 1000:.2f} ms/tick")
+
+
+def benchmark_risk_stage_executors(vehicle_counts=(8, 32), num_runs=10, num_processes=2):
+    # Runtime per tick of the risk stage for each executor, the seeded trajectory tasks give identical risks. The
+    # vehicles are submitted in reverse order (like BN outputs that complete out of order) with their order index, the
+    # risk evaluation has the same actor order as the serial in-order reference.
+    ego_init = np.array([2.3, 0.0, 10.0, 0.0, 0.0, 0.0])
+    with multiprocessing.Pool(processes=num_processes) as pool:
+        for num_vehicles in vehicle_counts:
+            behavior_risk_requests = _behavior_risk_requests(num_vehicles)
+            requests_by_vehicle = {}
+            for behavior_risk_request in behavior_risk_requests:
+                requests_by_vehicle.setdefault(behavior_risk_request.vehicle_id, []).append(behavior_risk_request)
+            reference_evaluation = None
+            for executor in RiskComputationExecutor:
+                risk_stage = BehaviorRiskStage(executor, pool)
+                start = time.perf_counter()
+                for run in range(num_runs):
+                    risk_stage.start_tick(ego_init, run)
+                    for order_index, vehicle_requests in reversed(list(enumerate(requests_by_vehicle.values()))):
+                        risk_stage.submit(vehicle_requests, order_index)
+                    risk_evaluation = risk_stage.finish_tick()
+                stage_time = (time.perf_counter() - start) / num_runs
+                risk_stage.close()
+
+                if reference_evaluation is None:
+                    risk_stage = BehaviorRiskStage(RiskComputationExecutor.SERIAL)
+                    risk_stage.start_tick(ego_init, num_runs - 1)
+                    risk_stage.submit(behavior_risk_requests)
+                    reference_evaluation = risk_stage.finish_tick()
+                assert risk_evaluation.vehicle_ids == reference_evaluation.vehicle_ids
+                assert np.array_equal(risk_evaluation.total_risk_x, reference_evaluation.total_risk_x) and \
+                    np.array_equal(risk_evaluation.total_risk_y, reference_evaluation.total_risk_y), \
+                    f"{executor.name} risks differ from the {RiskComputationExecutor.SERIAL.name} risks"
+                print(f"Risk stage ({num_vehicles} vehicles, {executor.name}): {stage_time * 1000:.2f} ms/tick")
+
+
+def _ad_lane_center_match(map_matching, point):
+    # Nearest lane center point and heading as determined by the ad map matching (see Map.get_waypoint)
+    import ad_map_access as ad
+    enu_point = ad.map.point.ENUPoint()
+    enu_point.x = ad.map.point.ENUCoordinate(point[0])
+    enu_point.y = ad.map.point.ENUCoordinate(point[1])
+    enu_point.z = ad.map.point.ENUCoordinate(0)
+    map_matched_position = map_matching.getMapMatchedPositions(enu_point, ad.physics.Distance(1),
+                                                               ad.physics.Probability(0.05))[0]
+    lane = ad.map.lane.getLane(map_matched_position.lanePoint.paraPoint.laneId)
+    center_point = ad.map.point.toENU(ad.map.lane.getParametricPoint(
+        lane, map_matched_position.lanePoint.paraPoint.parametricOffset, 0.5))
+    return (float(center_point.x), float(center_point.y)), float(ad.map.lane.getLaneENUHeading(map_matched_position))
+
+
+def benchmark_lane_centerline_index(map_name="Town03", num_points=2000, center_tolerance=0.05, heading_tolerance=2.0,
+                                    min_agreement=0.95):
+    # Agreement of the lane centerline index of the map with the ad map matching for random points on the lanes (points
+    # in junctions may be matched to a different one of the overlapping lanes) and the runtime of both lookups, as
+    # well as the agreement of the lane resolution of the map (centerline index with ad map matching at overlapping
+    # lanes, see Map.get_waypoint) with the ad map matching
+    import ad_map_access as ad
+    from data_model.map import Map
+
+    start = time.perf_counter()
+    carla_map = Map(map_name)
+    load_time = time.perf_counter() - start
+
+    random.seed(0)
+    lane_ids = list(ad.map.lane.getLanes())
+    points = np.empty((num_points, 2))
+    for i in range(num_points):
+        lane = ad.map.lane.getLane(random.choice(lane_ids))
+        enu_point = ad.map.point.toENU(ad.map.lane.getParametricPoint(lane, random.random(),
+                                                                      random.uniform(0.2, 0.8)))
+        points[i] = float(enu_point.x), float(enu_point.y)
+
+    start = time.perf_counter()
+    ad_matches = [_ad_lane_center_match(carla_map.map_matching, point) for point in points]
+    ad_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lane_center_matches = carla_map.get_lane_center_matches(points)
+    index_time = time.perf_counter() - start
+
+    ad_center_points = np.array([center_point for center_point, _ in ad_matches])
+    ad_headings = np.array([heading for _, heading in ad_matches])
+    center_deviations = np.linalg.norm(ad_center_points - lane_center_matches.center_points, axis=1)
+    heading_deviations = np.abs(np.degrees(np.angle(np.exp(1j * (ad_headings - lane_center_matches.headings)))))
+    agreement = np.mean((center_deviations < center_tolerance) & (heading_deviations < heading_tolerance))
+    assert agreement >= min_agreement
+
+    start = time.perf_counter()
+    waypoints = [carla_map.get_waypoint(Location(x=point[0], y=point[1], z=0.0)) for point in points]
+    waypoint_time = time.perf_counter() - start
+    waypoint_center_points = np.array([[float(waypoint.get_location().x), float(waypoint.get_location().y)]
+                                       for waypoint in waypoints])
+    waypoint_headings = np.radians([waypoint.get_orientation().heading for waypoint in waypoints])
+    waypoint_center_deviations = np.linalg.norm(ad_center_points - waypoint_center_points, axis=1)
+    waypoint_heading_deviations = np.abs(np.degrees(np.angle(np.exp(1j * (ad_headings - waypoint_headings)))))
+    waypoint_agreement = np.mean((waypoint_center_deviations < center_tolerance) &
+                                 (waypoint_heading_deviations < heading_tolerance))
+    overlapping = np.mean(carla_map._lane_centerline_index.count_containing_lanes(points) > 1)
+    assert waypoint_agreement >= agreement
+
+    # Batched lookup with the points on overlapping lanes resolved by the ad map matching (BN id selection)
+    start = time.perf_counter()
+    resolved_matches = carla_map.get_lane_center_matches(points, resolve_overlapping_lanes=True)
+    resolved_time = time.perf_counter() - start
+    resolved_center_deviations = np.linalg.norm(ad_center_points - resolved_matches.center_points, axis=1)
+    resolved_heading_deviations = np.abs(np.degrees(np.angle(np.exp(1j * (ad_headings
+                                                                           - resolved_matches.headings)))))
+    resolved_agreement = np.mean((resolved_center_deviations < center_tolerance) &
+                                 (resolved_heading_deviations < heading_tolerance))
+    assert resolved_agreement >= agreement
+
+    print(f"Lane centerline index ({map_name}, built in {load_time:.2f} s): agreement with ad map matching = "
+          f"{agreement:.1%} (median center deviation = {np.median(center_deviations) * 100:.2f} cm), {num_points} "
+          f"points: ad map matching = {ad_time * 1000:.2f} ms, index = {index_time * 1000:.2f} ms")
+    print(f"Map lane resolution ({map_name}, {overlapping:.1%} of the points on overlapping lanes resolved by ad map "
+          f"matching): agreement with ad map matching = {waypoint_agreement:.1%}, {num_points} waypoints = "
+          f"{waypoint_time * 1000:.2f} ms")
+    print(f"Lane centerline index with resolved overlapping lanes ({map_name}): agreement with ad map matching = "
+          f"{resolved_agreement:.1%}, {num_points} points = {resolved_time * 1000:.2f} ms")
+
+
+def benchmark_compiled_map_cache(map_name="Town03"):
+    # Equivalence of the compiled map derived from the ad map and the compiled map loaded from the map cache and the
+    # load time of the map without (cold start) and with the compiled map file
+    import data_model.map
+    from data_model.map import Map
+
+    cache_directory = data_model.map.MAP_CACHE_DIRECTORY
+    with tempfile.TemporaryDirectory() as temporary_cache_directory:
+        data_model.map.MAP_CACHE_DIRECTORY = temporary_cache_directory
+        try:
+            start = time.perf_counter()
+            cold_map = Map(map_name)
+            cold_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            warm_map = Map(map_name)
+            warm_time = time.perf_counter() - start
+        finally:
+            data_model.map.MAP_CACHE_DIRECTORY = cache_directory
+
+    for field in fields(CompiledMap):
+        assert np.array_equal(getattr(cold_map._compiled_map, field.name), getattr(warm_map._compiled_map, field.name))
+
+    points = cold_map._compiled_map.centerline_points + np.random.RandomState(0).normal(0.0, 1.0, (1, 2))
+    cold_matches = cold_map.get_lane_center_matches(points)
+    warm_matches = warm_map.get_lane_center_matches(points)
+    assert np.array_equal(cold_matches.lane_indices, warm_matches.lane_indices)
+    assert np.array_equal(cold_matches.center_points, warm_matches.center_points)
+
+    print(f"Compiled map cache ({map_name}, {len(cold_map._compiled_map.lane_ids)} lanes, "
+          f"{len(cold_map._compiled_map.centerline_points)} centerline samples): cold start = {cold_time:.2f} s, "
+          f"with compiled map = {warm_time:.2f} s")
+
+
+def benchmark_sensing_area_classification(vehicle_counts=(10, 100, 1000), num_reference_points=8, num_runs=20):
+    # Equivalence of the per point Polygon.contains classification and the vectorized classification of the vehicle
+    # reference points against a curved front sensing area and the runtime per sensing area
+    lane_angles = np.linspace(0.0, 0.5, 60)
+    sensing_area = LineString(np.stack([60.0 * np.sin(lane_angles), 60.0 * (1 - np.cos(lane_angles))], axis=1)
+                              ).buffer(1.5)
+    np.random.seed(0)
+    for num_vehicles in vehicle_counts:
+        reference_points = np.random.uniform([-5.0, -5.0], [35.0, 10.0], (num_vehicles, num_reference_points, 2))
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            per_point_result = np.array([[sensing_area.contains(Point(x, y)) for x, y in vehicle_reference_points]
+                                         for vehicle_reference_points in reference_points])
+        per_point_time = (time.perf_counter() - start) / num_runs
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            vectorized_result = points_in_polygon(sensing_area, reference_points)
+        vectorized_time = (time.perf_counter() - start) / num_runs
+
+        assert np.array_equal(per_point_result, vectorized_result)
+        print(f"Sensing area classification ({num_vehicles} vehicles, {vectorized_result.sum()} points inside): "
+              f"per point = {per_point_time * 1000:.2f} ms, vectorized = {vectorized_time * 1000:.2f} ms")
+
+
+class _CircularLaneMap:
+    # Stand-in for the map with one circular lane, the lane walk costs one sample per point (no ad map needed)
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.num_samples = 0
+
+    def sample_lane_polyline(self, start_point, distances):
+        self.num_samples += len(distances)
+        angles = np.arctan2(start_point.y, start_point.x) + np.asarray(distances) / self.radius
+        return np.stack([self.radius * np.cos(angles), self.radius * np.sin(angles), np.zeros(len(angles))], axis=1)
+
+
+def benchmark_incremental_sensing_area(speed=15.0, num_ticks=400, radius=200.0, rebuffer_distances=(0.0, 1.0),
+                                      max_area_tolerance=1e-3):
+    # Runtime and lane points walked of the front sensing area built from scratch and updated incrementally for an ego
+    # vehicle driving along a curved lane and the area deviation of the incremental polygons (without polygon reuse,
+    # the polygons match up to the curvature between two cached lane points). The lane walk of the synthetic lane is
+    # cheap, the saving on a real map depends on the cost of Map.sample_lane_polyline.
+    lane_map = _CircularLaneMap(radius)
+    time_step = 1 / FRAMERATE
+    distances = SENSING_AREA_WAYPOINT_DISTANCE * np.arange(
+        1, int(round(speed * FRONT_SENSING_DISTANCE_TIME_GAP_IN_SECONDS / SENSING_AREA_WAYPOINT_DISTANCE)) + 1)
+    ego_locations = [Location(radius * math.cos(speed * tick * time_step / radius),
+                              radius * math.sin(speed * tick * time_step / radius), 0.0) for tick in range(num_ticks)]
+
+    start = time.perf_counter()
+    polygons = [create_sensing_area_polygon(lane_map.sample_lane_polyline(ego_location, distances))
+                for ego_location in ego_locations]
+    full_time = (time.perf_counter() - start) / num_ticks
+    full_samples = lane_map.num_samples
+
+    for rebuffer_distance in rebuffer_distances:
+        incremental_sensing_area = IncrementalSensingArea(rebuffer_distance=rebuffer_distance)
+        lane_map.num_samples = 0
+        start = time.perf_counter()
+        incremental_polygons = [incremental_sensing_area.update(lane_map, ego_location, distances[0], distances[-1])
+                                for ego_location in ego_locations]
+        incremental_time = (time.perf_counter() - start) / num_ticks
+
+        max_area_deviation = max(polygon.symmetric_difference(incremental_polygon).area / polygon.area
+                                 for polygon, incremental_polygon in zip(polygons, incremental_polygons))
+        if rebuffer_distance == 0.0:
+            assert max_area_deviation < max_area_tolerance
+
+        print(f"Incremental sensing area ({num_ticks} ticks at {speed} m/s, rebuffer distance = {rebuffer_distance} "
+              f"m): from scratch = {full_time * 1000:.3f} ms/tick ({full_samples} lane points), incremental = "
+              f"{incremental_time * 1000:.3f} ms/tick ({lane_map.num_samples} lane points, "
+              f"{incremental_sensing_area.full_rebuilds} full rebuilds, {incremental_sensing_area.incremental_updates} "
+              f"incremental updates, {incremental_sensing_area.reuses} reuses), max area deviation = "
+              f"{max_area_deviation:.2%}")
+
+
+def _random_actor_arrays(num_actors, random_state):
+    # Raw actor data of one tick in the OpenDrive coordinate system (as collected from the simulator)
+    return dict(
+        ids=np.arange(num_actors, dtype=np.int64),
+        role_names=[f"vehicle_{i}" for i in range(num_actors)],
+        locations=random_state.uniform(-200.0, 200.0, (num_actors, 3)),
+        orientations=random_state.uniform(-180.0, 180.0, (num_actors, 3)) * np.array([1.0, 0.05, 0.05]),
+        velocities=random_state.normal(0.0, 10.0, (num_actors, 3)),
+        accelerations=random_state.normal(0.0, 2.0, (num_actors, 3)),
+        bounding_box_centers=random_state.uniform(-0.2, 0.2, (num_actors, 3)),
+        dimensions=random_state.uniform([3.5, 1.6, 1.3], [5.5, 2.1, 2.0], (num_actors, 3)),
+        light_states=random_state.randint(0, 2048, num_actors),
+        controls=np.column_stack([random_state.uniform(0.0, 1.0, (num_actors, 3)),
+                                  random_state.randint(0, 2, (num_actors, 2)), random_state.randint(1, 6, num_actors)])
+    )
+
+
+def _legacy_vehicles(actor_arrays):
+    # Per vehicle dataclass trees and reference points (as created by the data handler before the actor snapshot)
+    vehicles = []
+    for i in range(len(actor_arrays["ids"])):
+        vehicle = OtherVehicle()
+        vehicle.id = int(actor_arrays["ids"][i])
+        vehicle.role_name = actor_arrays["role_names"][i]
+        vehicle.length = float(actor_arrays["dimensions"][i, 0])
+        vehicle.surrounding_vehicles = SurroundingVehicles()
+        vehicle.kinematics = KinematicStatus()
+        vehicle.kinematics.velocity = Vector3D(*actor_arrays["velocities"][i].tolist())
+        vehicle.kinematics.speed = math.sqrt(sum(value ** 2 for value in actor_arrays["velocities"][i].tolist()))
+        vehicle.kinematics.acceleration_vector = Vector3D(*actor_arrays["accelerations"][i].tolist())
+        vehicle.kinematics.acceleration = math.sqrt(sum(value ** 2
+                                                        for value in actor_arrays["accelerations"][i].tolist()))
+        vehicle.bounding_box = BoundingBox(Location(*actor_arrays["bounding_box_centers"][i].tolist()),
+                                           Dimension(*actor_arrays["dimensions"][i].tolist()))
+        vehicle.light_state = VehicleLightState(**{name: bool(int(actor_arrays["light_states"][i]) & bit)
+                                                   for name, bit in LIGHT_STATE_BITS.items()})
+        throttle, steer, brake, hand_brake, reverse, gear = actor_arrays["controls"][i].tolist()
+        vehicle.vehicle_control = VehicleControl(throttle, steer, brake, bool(hand_brake), bool(reverse), int(gear))
+        location = Location(*actor_arrays["locations"][i].tolist())
+        orientation = Orientation(*actor_arrays["orientations"][i].tolist())
+        vehicle.position = Position(world_position=WorldPosition(location, orientation))
+        vehicle.vehicle_points = vehicle.get_middle_points_dict(vehicle.position.world_position)
+        vehicles.append(vehicle)
+    return vehicles
+
+
+def benchmark_actor_snapshot(actor_counts=(10, 100, 1000), num_runs=10, tolerance=1e-9):
+    # Equivalence of the per vehicle dataclass trees and the lazy vehicle views on the actor snapshot and the runtime
+    # of creating the data model of one tick and reading the front bumper points of all actors
+    random_state = np.random.RandomState(0)
+    for num_actors in actor_counts:
+        actor_arrays = _random_actor_arrays(num_actors, random_state)
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            legacy_vehicles = _legacy_vehicles(actor_arrays)
+            legacy_points = np.array([[vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER].x,
+                                       vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER].y]
+                                      for vehicle in legacy_vehicles])
+        legacy_time = (time.perf_counter() - start) / num_runs
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            actor_snapshot = ActorSnapshot(**actor_arrays)
+            vehicles = [actor_snapshot.get_vehicle(i, OtherVehicle) for i in range(num_actors)]
+            snapshot_points = ActorSnapshot.get_vehicle_reference_points(vehicles, VehiclePointId.FRONT_MID_CENTER)
+        snapshot_time = (time.perf_counter() - start) / num_runs
+
+        assert np.allclose(legacy_points, snapshot_points[:, 0:2], rtol=0.0, atol=tolerance)
+        for legacy_vehicle, vehicle in zip(legacy_vehicles, vehicles):
+            for vehicle_point_id in VehiclePointId:
+                legacy_point = legacy_vehicle.vehicle_points[vehicle_point_id]
+                point = vehicle.vehicle_points[vehicle_point_id]
+                assert np.allclose([legacy_point.x, legacy_point.y, legacy_point.z], [point.x, point.y, point.z],
+                                   rtol=0.0, atol=tolerance)
+            assert isinstance(vehicle, OtherVehicle)
+            assert all(getattr(legacy_vehicle, field.name) == getattr(vehicle, field.name)
+                       for field in fields(OtherVehicle) if field.name != "vehicle_points")
+            assert pickle.loads(pickle.dumps(vehicle)).position == legacy_vehicle.position
+
+        print(f"Actor snapshot ({num_actors} actors): dataclass trees = {legacy_time * 1000:.2f} ms, "
+              f"snapshot with lazy views = {snapshot_time * 1000:.2f} ms")
+
+
+def _legacy_actor_kinematics_in_ego_frame(ego, other):
+    # Transformation of one actor into the ego frame (ego matrix and three homogeneous products per actor)
+    global_to_ego_matrix = np.array(ego.get_world_position().get_inverse_matrix())
+    location = other.get_world_position().location
+    location_e = global_to_ego_matrix.dot(np.array([location.x, location.y, location.z, 1]))
+    global_to_ego_matrix[:, 3] = np.array([0, 0, 0, 1])
+    velocity = other.get_velocity()
+    velocity_e = global_to_ego_matrix.dot(np.array([velocity.x, velocity.y, velocity.z, 1]))
+    acceleration = other.get_acceleration_vector()
+    acceleration_e = global_to_ego_matrix.dot(np.array([acceleration.x, acceleration.y, acceleration.z, 1]))
+    return np.array([location_e[0], location_e[1], velocity_e[0], velocity_e[1], acceleration_e[0],
+                     acceleration_e[1]])
+
+
+def benchmark_ego_frame_transforms(actor_counts=(10, 100, 1000), num_runs=10, tolerance=1e-9):
+    # Equivalence of the per actor transformation into the ego frame and the batched transformation of all actors
+    # (dataclass vehicles and views on the actor snapshot) and the runtime per tick
+    random_state = np.random.RandomState(0)
+    for num_actors in actor_counts:
+        actor_arrays = _random_actor_arrays(num_actors + 1, random_state)
+        legacy_vehicles = _legacy_vehicles(actor_arrays)
+        actor_snapshot = ActorSnapshot(**actor_arrays)
+        snapshot_vehicles = [actor_snapshot.get_vehicle(i, OtherVehicle) for i in range(num_actors + 1)]
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            legacy_np_vecs = np.array([_legacy_actor_kinematics_in_ego_frame(legacy_vehicles[0], vehicle)
+                                       for vehicle in legacy_vehicles[1:]])
+        legacy_time = (time.perf_counter() - start) / num_runs
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            np_vecs = transform_vehicle_kinematics_to_ego_frame(legacy_vehicles[0], legacy_vehicles[1:])
+        batched_time = (time.perf_counter() - start) / num_runs
+
+        start = time.perf_counter()
+        for _ in range(num_runs):
+            snapshot_np_vecs = transform_vehicle_kinematics_to_ego_frame(snapshot_vehicles[0], snapshot_vehicles[1:])
+        snapshot_time = (time.perf_counter() - start) / num_runs
+
+        assert np_vecs.shape == (num_actors, 6)
+        assert np.allclose(legacy_np_vecs, np_vecs, rtol=0.0, atol=tolerance)
+        assert np.allclose(legacy_np_vecs, snapshot_np_vecs, rtol=0.0, atol=tolerance)
+        _, _, _, np_vec = transform_actor_kinematics_to_ego_frame(legacy_vehicles[0], legacy_vehicles[1])
+        assert np.allclose(legacy_np_vecs[0], np_vec, rtol=0.0, atol=tolerance)
+
+        print(f"Ego frame transforms ({num_actors} actors): per actor = {legacy_time * 1000:.2f} ms, "
+              f"batched = {batched_time * 1000:.2f} ms, batched on snapshot = {snapshot_time * 1000:.2f} ms")
+
+
+@dataclass()
+class _LegacyLocation:
+    # Location as dataclass with instance dictionary (before the slotted geometry primitives)
+    x: float = 0
+    y: float = 0
+    z: float = 0
+
+    def __add__(self, other):
+        return _LegacyLocation(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return _LegacyLocation(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, other):
+        self.x *= other
+        self.y *= other
+        self.z *= other
+        return self
+
+
+def _legacy_middle_points(center, dimension, location, orientation):
+    # Bounding box middle points with a rotation (six trigonometric calls) and two temporary vectors per vertex
+    half_length, half_width, half_height = dimension.length / 2, dimension.width / 2, dimension.height / 2
+    local_vertices = [_LegacyLocation(center.x + sign_x * half_length, center.y + sign_y * half_width,
+                                      center.z + sign_z * half_height)
+                      for sign_x in (-1, 1) for sign_y in (1, -1) for sign_z in (-1, 1)]
+    world_vertices = []
+    for vertex in local_vertices:
+        ch, sh = math.cos(math.radians(orientation.heading)), math.sin(math.radians(orientation.heading))
+        cr, sr = math.cos(math.radians(orientation.roll)), math.sin(math.radians(orientation.roll))
+        cp, sp = math.cos(math.radians(orientation.pitch)), math.sin(math.radians(orientation.pitch))
+        rotated_vertex = _LegacyLocation(
+            vertex.x * (cp * ch) + vertex.y * (ch * sp * sr - sh * cr) + vertex.z * (-ch * sp * cr - sh * sr),
+            vertex.x * (cp * sh) + vertex.y * (sh * sp * sr + ch * cr) + vertex.z * (-sh * sp * cr + ch * sr),
+            vertex.x * sp + vertex.y * (-cp * sr) + vertex.z * (cp * cr))
+        world_vertices.append(rotated_vertex + _LegacyLocation(location.x, location.y, location.z))
+
+    def middle_point(start, end):
+        return (end - start) * 0.5 + start
+
+    front_mid_left = middle_point(world_vertices[5], world_vertices[4])
+    front_mid_right = middle_point(world_vertices[7], world_vertices[6])
+    rear_mid_left = middle_point(world_vertices[1], world_vertices[0])
+    rear_mid_right = middle_point(world_vertices[3], world_vertices[2])
+    return [rear_mid_left, middle_point(rear_mid_left, rear_mid_right), rear_mid_right,
+            middle_point(rear_mid_right, front_mid_right), front_mid_left,
+            middle_point(front_mid_left, front_mid_right), front_mid_right, middle_point(rear_mid_left, front_mid_left)]
+
+
+def _measure_allocation(function, num_runs):
+    # Result of the function, its mean runtime and the memory held by the result (traced in a separate run, as
+    # tracing slows down the allocations)
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(num_runs):
+        function()
+    runtime = (time.perf_counter() - start) / num_runs
+    tracemalloc.start()
+    result = function()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, runtime, memory
+
+
+def benchmark_position_primitives(actor_counts=(100, 1000, 5000), num_runs=5):
+    # Equivalence of the bounding box middle points of the dataclass and the slotted geometry primitives, runtime and
+    # memory of the middle points of all actors of one tick (and of the batched reference points of an actor snapshot)
+    random_state = np.random.RandomState(0)
+    for num_actors in actor_counts:
+        actor_arrays = _random_actor_arrays(num_actors, random_state)
+        bounding_boxes = [BoundingBox(Location(*center), Dimension(*dimension)) for center, dimension
+                          in zip(actor_arrays["bounding_box_centers"].tolist(), actor_arrays["dimensions"].tolist())]
+        world_positions = [WorldPosition(Location(*location), Orientation(*orientation)) for location, orientation
+                           in zip(actor_arrays["locations"].tolist(), actor_arrays["orientations"].tolist())]
+
+        legacy_points, legacy_time, legacy_memory = _measure_allocation(
+            lambda: [_legacy_middle_points(bounding_box.center, bounding_box.dimension, world_position.location,
+                                           world_position.orientation)
+                     for bounding_box, world_position in zip(bounding_boxes, world_positions)], num_runs)
+        slotted_points, slotted_time, slotted_memory = _measure_allocation(
+            lambda: [bounding_box.get_middle_points(world_position)
+                     for bounding_box, world_position in zip(bounding_boxes, world_positions)], num_runs)
+        snapshot, snapshot_time, snapshot_memory = _measure_allocation(lambda: ActorSnapshot(**actor_arrays), num_runs)
+
+        for legacy_actor_points, actor_points in zip(legacy_points, slotted_points):
+            assert [(point.x, point.y, point.z) for point in legacy_actor_points] == \
+                   [(point.x, point.y, point.z) for point in actor_points]
+
+        print(f"Position primitives ({num_actors} actors, 8 middle points each): dataclasses = "
+              f"{legacy_time * 1000:.2f} ms / {legacy_memory / 1024:.0f} KiB, slotted = {slotted_time * 1000:.2f} ms / "
+              f"{slotted_memory / 1024:.0f} KiB, actor snapshot arrays = {snapshot_time * 1000:.2f} ms / "
+              f"{snapshot_memory / 1024:.0f} KiB")
+
+
+def benchmark_sinadra_data_log(actor_counts=(10, 100, 1000), num_ticks=50):
+    # Equivalence of the recorded and the replayed SINADRA data, log size per tick and recording and replay throughput
+    random_state = np.random.RandomState(0)
+    environment = Environment(weather=Weather(precipitation=Precipitation(intensity=30.0)))
+    with tempfile.TemporaryDirectory() as log_directory:
+        for num_actors in actor_counts:
+            actor_snapshots = [ActorSnapshot(**_random_actor_arrays(num_actors, random_state))
+                               for _ in range(num_ticks)]
+            ticks = []
+            for actor_snapshot in actor_snapshots:
+                data = SinadraData(actor_snapshot.get_vehicle(0, EgoVehicle))
+                data.other_vehicles = [actor_snapshot.get_vehicle(i, OtherVehicle) for i in range(1, num_actors)]
+                data.actor_snapshot = actor_snapshot
+                data.environment = environment
+                ticks.append(data)
+            log_path = os.path.join(log_directory, f"sinadra_data_{num_actors}.log")
+
+            start = time.perf_counter()
+            with SinadraDataRecorder(log_path, "Town03") as recorder:
+                for data in ticks:
+                    recorder.record(data)
+            record_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with SinadraDataLogReader(log_path) as reader:
+                map_name = reader.map_name
+                replayed_ticks = list(reader)
+            replay_time = time.perf_counter() - start
+
+            assert map_name == "Town03" and len(replayed_ticks) == num_ticks
+            for data, replayed_data in zip(ticks, replayed_ticks):
+                for field in fields(ActorSnapshot):
+                    assert np.array_equal(getattr(data.actor_snapshot, field.name),
+                                          getattr(replayed_data.actor_snapshot, field.name))
+                assert replayed_data.environment == environment
+                assert replayed_data.hero_vehicle.position == data.hero_vehicle.position
+                assert [vehicle.id for vehicle in replayed_data.other_vehicles] == \
+                       [vehicle.id for vehicle in data.other_vehicles]
+
+            print(f"SINADRA data log ({num_actors} actors): {os.path.getsize(log_path) / num_ticks / 1024:.1f} "
+                  f"KiB/tick, recording = {num_ticks / record_time:.0f} ticks/s, "
+                  f"replay = {num_ticks / replay_time:.0f} ticks/s")
+
+
+class _SituationClassVehicle:
+    # Stand-in for a vehicle with the attributes read by the situation class lookup
+
+    def __init__(self, id, x, y, heading):
+        self.id = id
+        self.vehicle_points = {VehiclePointId.FRONT_MID_CENTER: Location(x, y, 0.0)}
+        self.position = Position(world_position=WorldPosition(Location(x, y, 0.0), Orientation(heading)))
+
+
+def _legacy_situation_class(situation_classes, vehicle):
+    # Situation class lookup of one vehicle against every situation class (front bumper, then one meter ahead)
+    actor_location = vehicle.vehicle_points[VehiclePointId.FRONT_MID_CENTER]
+    next_location = np.add(vehicle.position.world_position.orientation.get_forward_vector(), actor_location)
+    for location in (actor_location, next_location):
+        possible_situation_classes = [situation_class for situation_class in situation_classes
+                                      if situation_class.contains_location(location)]
+        if len(possible_situation_classes) == 1:
+            return possible_situation_classes[0]
+    return None
+
+
+def _situation_class_grid(num_rows, num_columns, size=40.0):
+    # Abutting square situation classes, each one linked to its east neighbor as possible next situation class
+    situation_classes = [[UnsignalizedFourWayJunction(f"SC{row}_{column}",
+                                                      [(column * size, row * size), ((column + 1) * size, row * size),
+                                                       ((column + 1) * size, (row + 1) * size),
+                                                       (column * size, (row + 1) * size)])
+                          for column in range(num_columns)] for row in range(num_rows)]
+    for row in situation_classes:
+        for situation_class, next_situation_class in zip(row[:-1], row[1:]):
+            situation_class.set_possible_next_situation_classes_by_road_segment_end(
+                {RoadSegmentEnd.B: [next_situation_class]})
+    return SituationClassStateMachine([situation_class for row in situation_classes for situation_class in row])
+
+
+def benchmark_situation_class_lookup(grid_sizes=(2, 10, 30), num_vehicles=50, num_ticks=50, speed=15.0, size=40.0):
+    # Equivalence of the per vehicle lookup against every situation class and the batched lookup of all vehicles with
+    # the spatial index (vehicles drive east, across the borders of the situation classes) and the runtime per tick
+    random.seed(0)
+    time_step = 1 / FRAMERATE
+    for grid_size in grid_sizes:
+        state_machine = _situation_class_grid(grid_size, grid_size, size)
+        initial_states = [(random.uniform(0.0, grid_size * size), random.uniform(-1.0, grid_size * size + 1.0),
+                           random.gauss(0.0, 5.0)) for _ in range(num_vehicles)]
+        ticks = [[_SituationClassVehicle(vehicle_id, x + speed * tick * time_step, y, heading)
+                  for vehicle_id, (x, y, heading) in enumerate(initial_states)] for tick in range(num_ticks)]
+
+        start = time.perf_counter()
+        legacy_results = [[_legacy_situation_class(state_machine.situation_classes, vehicle) for vehicle in vehicles]
+                          for vehicles in ticks]
+        legacy_time = (time.perf_counter() - start) / num_ticks
+
+        start = time.perf_counter()
+        batched_results = [state_machine.classify(vehicles) for vehicles in ticks]
+        batched_time = (time.perf_counter() - start) / num_ticks
+
+        assert batched_results == legacy_results
+        num_classified = sum(situation_class is not None
+                             for vehicles in batched_results for situation_class in vehicles)
+        print(f"Situation class lookup ({len(state_machine.situation_classes)} situation classes, {num_vehicles} "
+              f"vehicles, {num_classified / num_ticks:.1f} classified per tick): per vehicle = "
+              f"{legacy_time * 1000:.2f} ms/tick, batched = {batched_time * 1000:.2f} ms/tick")
+
+    # Town03 situation classes (overlapping borders), vehicles spread around the classes
+    state_machine = SituationClassStateMachineTown03()
+    vehicles = [_SituationClassVehicle(vehicle_id, random.uniform(-110.0, -10.0), random.uniform(0.0, 160.0),
+                                       random.uniform(-180.0, 180.0)) for vehicle_id in range(1000)]
+    assert state_machine.classify(vehicles) == [_legacy_situation_class(state_machine.situation_classes, vehicle)
+                                                for vehicle in vehicles]
+    assert state_machine.classify(vehicles) == [_legacy_situation_class(state_machine.situation_classes, vehicle)
+                                                for vehicle in vehicles]
+
+
+def _span_loop(num_spans):
+    start = time.perf_counter()
+    for _ in range(num_spans):
+        with span("benchmark"):
+            pass
+    return (time.perf_counter() - start) / num_spans
+
+
+def benchmark_instrumentation_overhead(vehicle_counts=(8, 32), num_runs=20, num_spans=100000, window_size=1000,
+                                       num_processes=2):
+    # Cost of a span with disabled and enabled instrumentation, rolling percentiles, Chrome trace and risk stage ticks
+    # with and without instrumentation (identical risks, a trajectory generation span for each behavior)
+    default_instrumentation = Instrumentation._instance
+    try:
+        start = time.perf_counter()
+        for _ in range(num_spans):
+            pass
+        loop_time = (time.perf_counter() - start) / num_spans
+        Instrumentation._instance = Instrumentation(enabled=False)
+        disabled_time = _span_loop(num_spans)
+        Instrumentation._instance = Instrumentation(enabled=True, window_size=window_size)
+        enabled_time = _span_loop(num_spans)
+        print(f"Span overhead: disabled = {(disabled_time - loop_time) * 1e9:.0f} ns/span, "
+              f"enabled = {(enabled_time - loop_time) * 1e9:.0f} ns/span")
+
+        durations = np.random.RandomState(0).exponential(0.01, 3 * window_size)
+        instrumentation = Instrumentation(enabled=True, window_size=window_size, trace_path="")
+        for i, duration in enumerate(durations):
+            instrumentation.add_span("benchmark", float(i), float(i) + duration)
+        statistics, = instrumentation.get_span_statistics()
+        expected_percentiles = np.percentile(durations[-window_size:], (50, 95, 99))
+        assert statistics.count == len(durations) and np.isclose(statistics.total_time, np.sum(durations))
+        assert np.allclose(instrumentation.get_span_percentiles("benchmark"), expected_percentiles, rtol=0, atol=1e-9)
+        with tempfile.TemporaryDirectory() as trace_directory:
+            trace_path = os.path.join(trace_directory, "trace.json")
+            instrumentation.write_chrome_trace(trace_path)
+            with open(trace_path) as trace_file:
+                trace_events = json.load(trace_file)["traceEvents"]
+        assert len(trace_events) == len(durations)
+        assert np.allclose([event["dur"] for event in trace_events], durations * 1e6)
+
+        # The trace keeps only the most recent spans if more than trace_max_events spans are recorded
+        instrumentation = Instrumentation(enabled=True, window_size=window_size, trace_path="",
+                                          trace_max_events=window_size)
+        for i, duration in enumerate(durations):
+            instrumentation.add_span("benchmark", float(i), float(i) + duration)
+        with tempfile.TemporaryDirectory() as trace_directory:
+            trace_path = os.path.join(trace_directory, "trace.json")
+            instrumentation.write_chrome_trace(trace_path)
+            with open(trace_path) as trace_file:
+                trace_events = json.load(trace_file)["traceEvents"]
+        assert len(trace_events) == window_size
+        assert np.allclose([event["dur"] for event in trace_events], durations[-window_size:] * 1e6)
+
+        ego_init = np.array([2.3, 0.0, 10.0, 0.0, 0.0, 0.0])
+        with multiprocessing.Pool(processes=num_processes) as pool:
+            for num_vehicles in vehicle_counts:
+                behavior_risk_requests = _behavior_risk_requests(num_vehicles)
+                for executor in RiskComputationExecutor:
+                    stage_times = []
+                    total_risks = []
+                    for enabled in (False, True):
+                        Instrumentation._instance = Instrumentation(enabled=enabled, window_size=window_size)
+                        risk_stage = BehaviorRiskStage(executor, pool)
+                        start = time.perf_counter()
+                        for run in range(num_runs):
+                            risk_stage.start_tick(ego_init, run)
+                            risk_stage.submit(behavior_risk_requests)
+                            risk_evaluation = risk_stage.finish_tick()
+                        stage_times.append((time.perf_counter() - start) / num_runs)
+                        risk_stage.close()
+                        total_risks.append(risk_evaluation.total_risk_x + risk_evaluation.total_risk_y)
+
+                    span_counts = {statistics.name: statistics.count
+                                   for statistics in Instrumentation.get_instance().get_span_statistics()}
+                    for behavior in {request.behavior for request in behavior_risk_requests}:
+                        assert span_counts[f"trajectory_generation.{behavior}"] == num_runs * sum(
+                            request.behavior == behavior for request in behavior_risk_requests)
+                    assert span_counts["trajectory_generation.ego"] == span_counts["risk.behaviors"] == num_runs
+                    assert np.array_equal(total_risks[0], total_risks[1])
+                    print(f"Risk stage ({num_vehicles} vehicles, {executor.name}): instrumentation disabled = "
+                          f"{stage_times[0] * 1000:.2f} ms/tick, enabled = {stage_times[1] * 1000:.2f} ms/tick")
+    finally:
+        Instrumentation._instance = default_instrumentation
+
+
+def _random_risk_plot_values(random_state, num_values, frame):
+    risk_values = {FRONT_VEHICLE_CUMULATIVE_RISK: np.cumsum(random_state.rand(num_values)) / num_values,
+                   LEFT_SIDE_VEHICLE_LATERAL_RISK: random_state.rand(num_values)}
+    if frame % 3:
+        risk_values[FRONT_VEHICLE_IDM_RISK] = random_state.rand(num_values)
+        risk_values[RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK] = random_state.rand(num_values)
+    return risk_values
+
+
+# Risk series in the order of the risk lines of the plot
+_RISK_PLOT_SERIES = (FRONT_VEHICLE_CUMULATIVE_RISK, FRONT_VEHICLE_EMERGENCY_RISK, FRONT_VEHICLE_TARGET_BRAKE_RISK,
+                     FRONT_VEHICLE_IDM_RISK, LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK, LEFT_SIDE_VEHICLE_LATERAL_RISK,
+                     RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK, RIGHT_SIDE_VEHICLE_LATERAL_RISK)
+
+
+def _legacy_window_image(risk_plot, risk_values, scene_image):
+    # Full redraw of the risk plot and composition of the window image as done on the risk thread before
+    for line, series_name in zip(risk_plot._ax_risk.get_lines(), _RISK_PLOT_SERIES):
+        line.set_ydata(risk_values.get(series_name, np.zeros(len(risk_plot._x))))
+    risk_plot._fig_risk.canvas.draw()
+    img_risk = np.frombuffer(risk_plot.get_rgb_image(), dtype=np.uint8)
+    img_risk = img_risk.reshape(risk_plot.get_width_height()[::-1] + (3,))
+    img_risk = cv2.resize(img_risk, (800, 600), interpolation=cv2.INTER_AREA)
+    return cv2.vconcat([cv2.resize(scene_image, (800, 600), interpolation=cv2.INTER_AREA), img_risk])
+
+
+def benchmark_risk_plot_rendering(num_frames=30):
+    # Equivalence of the blitted and the fully redrawn risk plot, draw time of both and the time the risk thread spends
+    # on a frame with the render thread (submit) and without it (full redraw and composition)
+    random_state = np.random.RandomState(0)
+    scene_image = random_state.randint(0, 256, (600, 800, 3), dtype=np.uint8)
+    blitted_risk_plot = RiskPlot()
+    redrawn_risk_plot = RiskPlot()
+    for artist in redrawn_risk_plot._animated_artists:
+        artist.set_animated(False)
+    num_values = len(blitted_risk_plot._x)
+
+    blit_time = redraw_time = 0.0
+    for frame in range(num_frames):
+        risk_values = _random_risk_plot_values(random_state, num_values, frame)
+        blitted_risk_plot.set_risk_values(risk_values)
+        start = time.perf_counter()
+        blitted_risk_plot.update_and_draw_risk_plot()
+        blit_time += time.perf_counter() - start
+        start = time.perf_counter()
+        _legacy_window_image(redrawn_risk_plot, risk_values, scene_image)
+        redraw_time += time.perf_counter() - start
+        assert np.array_equal(blitted_risk_plot.get_rgb_array(), redrawn_risk_plot.get_rgb_array()), \
+            f"Blitted risk plot differs from the redrawn risk plot in frame {frame}"
+
+    risk_plot_renderer = RiskPlotRenderer()
+    submit_time = 0.0
+    for frame in range(num_frames):
+        risk_values = _random_risk_plot_values(random_state, num_values, frame)
+        start = time.perf_counter()
+        risk_plot_renderer.submit(scene_image, risk_values)
+        submit_time += time.perf_counter() - start
+        # Frames without a risk computation keep the risk values of a replaced request
+        risk_plot_renderer.submit(scene_image)
+    risk_plot_renderer.close()
+    num_rendered, num_dropped = risk_plot_renderer.get_statistics()
+    assert np.array_equal(risk_plot_renderer.get_window_image(),
+                          _legacy_window_image(redrawn_risk_plot, risk_values, scene_image))
+
+    print(f"Risk plot: blitted draw = {blit_time / num_frames * 1000:.2f} ms/frame, full redraw and composition = "
+          f"{redraw_time / num_frames * 1000:.2f} ms/frame, risk thread with render thread = "
+          f"{submit_time / num_frames * 1000:.3f} ms/frame ({num_rendered} rendered, {num_dropped} dropped requests)")
+
+
+def _evaluation_data(path_to_data, cycle_counter, random_state, num_positions=21):
+    # Evaluation data of a cycle with a front vehicle (all braking behaviors) and a right side vehicle cutting in
+    def trajectory(start, speed, lateral=False):
+        x_mean = list(start + speed * np.linspace(0.0, 4.0, num_positions))
+        x_std = list(np.linspace(0.1, 2.0, num_positions) + random_state.rand())
+        return x_mean, x_std, list(np.linspace(3.5, 0.0, num_positions)) if lateral else [0] * num_positions, \
+            list(np.full(num_positions, 0.3)) if lateral else [0] * num_positions
+
+    stored_trajectories = {"Ego": trajectory(0.0, 10.0), "FrontEmergency": trajectory(15.0, 4.0),
+                           "FrontTargetBrake": trajectory(15.0, 6.0), "FrontIDM": trajectory(15.0, 9.0),
+                           "RightSideVehicleCutIn": trajectory(-3.0, 11.0, lateral=True)}
+    stored_bayesian_output = {"1LaneFollow_Simple": {"Behavior": [("emergency_brake", 0.2), ("targetbrake", 0.3),
+                                                                  ("idm", 0.5)]},
+                              "CutInFromRight": {"CutIn": [("yes", 0.7), ("no", 0.3)]}}
+    return EvaluationData(path_to_data, cycle_counter, random_state.randint(0, 256, (600, 800, 3), dtype=np.uint8),
+                          None, stored_trajectories, stored_bayesian_output)
+
+
+def _directory_contents(directory):
+    contents = {}
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name), "rb") as file:
+            contents[file_name] = file.read()
+    return contents
+
+
+def benchmark_evaluation_data_writer(num_cycles=6, num_processes=2, queue_size=2):
+    # Time the client spends on the evaluation data of a cycle when it is written synchronously and with the writer
+    # processes (block, drop and deferred plot policies), the files of all policies are identical
+    with tempfile.TemporaryDirectory() as data_directory:
+        def evaluation_data_of_cycles(name):
+            path_to_data = os.path.join(data_directory, name) + os.sep
+            os.makedirs(path_to_data)
+            random_state = np.random.RandomState(0)
+            return path_to_data, [_evaluation_data(path_to_data, cycle, random_state) for cycle in range(num_cycles)]
+
+        path_to_sync_data, cycles = evaluation_data_of_cycles("sync")
+        start = time.perf_counter()
+        for evaluation_data in cycles:
+            write_evaluation_data(evaluation_data)
+        sync_time = (time.perf_counter() - start) / num_cycles
+        sync_contents = _directory_contents(path_to_sync_data)
+
+        for name, queue_policy, defer_plots in (("block", EvaluationDataQueuePolicy.BLOCK, False),
+                                                ("deferred_plots", EvaluationDataQueuePolicy.BLOCK, True),
+                                                ("drop", EvaluationDataQueuePolicy.DROP, False)):
+            path_to_data, cycles = evaluation_data_of_cycles(name)
+            evaluation_data_writer = EvaluationDataWriter(num_processes, queue_size, queue_policy, defer_plots,
+                                                          cycle_store=False)
+            start = time.perf_counter()
+            for evaluation_data in cycles:
+                evaluation_data_writer.submit(evaluation_data)
+            submit_time = (time.perf_counter() - start) / num_cycles
+            start = time.perf_counter()
+            evaluation_data_writer.close()
+            close_time = time.perf_counter() - start
+            num_written, num_dropped = evaluation_data_writer.get_statistics()
+
+            assert num_written + num_dropped == num_cycles
+            contents = _directory_contents(path_to_data)
+            if queue_policy == EvaluationDataQueuePolicy.BLOCK:
+                assert num_dropped == 0 and contents == sync_contents
+            else:
+                assert all(sync_contents[file_name] == content for file_name, content in contents.items())
+            print(f"Evaluation data writer ({name}): {submit_time * 1000:.1f} ms/cycle in the client "
+                  f"(synchronous = {sync_time * 1000:.1f} ms/cycle), {close_time:.2f} s to finish after the run, "
+                  f"{num_written} cycles written, {num_dropped} dropped")
+
+
+def benchmark_evaluation_data_store(num_cycles=2000, chunk_size=256, range_size=100):
+    # Writing and scanning the trajectories and Bayesian network outputs of a run as files per cycle and as cycle data
+    # store. The store returns the same data as the pickle files (cycles without right side vehicle and a first chunk
+    # of cycles without any vehicle around, i.e. without trajectories, included).
+    random_state = np.random.RandomState(0)
+    cycles = []
+    for cycle_counter in range(num_cycles):
+        evaluation_data = _evaluation_data("", cycle_counter, random_state)
+        if cycle_counter < chunk_size:
+            evaluation_data.stored_trajectories = {}
+            evaluation_data.stored_bayesian_output = {}
+        elif cycle_counter % 3 == 0:
+            del evaluation_data.stored_trajectories["RightSideVehicleCutIn"]
+            del evaluation_data.stored_bayesian_output["CutInFromRight"]
+        cycles.append(evaluation_data)
+
+    with tempfile.TemporaryDirectory() as data_directory:
+        path_to_data = data_directory + os.sep
+        start = time.perf_counter()
+        for evaluation_data in cycles:
+            save_raw_trajectories(path_to_data, evaluation_data.cycle_counter, evaluation_data.stored_trajectories)
+            save_bn_output(path_to_data, evaluation_data.cycle_counter, evaluation_data.stored_bayesian_output)
+        files_write_time = time.perf_counter() - start
+
+        store_path = os.path.join(data_directory, CYCLE_DATA_STORE_DIRECTORY_NAME)
+        start = time.perf_counter()
+        with CycleDataStoreWriter(store_path, chunk_size) as cycle_data_store_writer:
+            for evaluation_data in cycles:
+                cycle_data_store_writer.append(evaluation_data.cycle_counter, evaluation_data.stored_trajectories,
+                                               evaluation_data.stored_bayesian_output)
+        store_write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pickled_cycles = []
+        for cycle_counter in range(num_cycles):
+            with open(f"{path_to_data}{cycle_counter}_trajectories.pickle", "rb") as file:
+                stored_trajectories = pickle.load(file)
+            with open(f"{path_to_data}{cycle_counter}_bn_outputs.pickle", "rb") as file:
+                pickled_cycles.append((stored_trajectories, pickle.load(file)))
+        files_scan_time = time.perf_counter() - start
+
+        reader = CycleDataStoreReader(store_path)
+        start = time.perf_counter()
+        cycle_data = reader.load_cycles()
+        store_scan_time = time.perf_counter() - start
+        assert reader.get_cycle_range() == (0, num_cycles - 1)
+        assert np.array_equal(reader.get_cycles(), np.arange(num_cycles))
+        for cycle_counter, (stored_trajectories, stored_bayesian_output) in enumerate(pickled_cycles):
+            assert cycle_data.get_stored_trajectories(cycle_counter) == stored_trajectories
+            assert cycle_data.get_stored_bayesian_output(cycle_counter) == stored_bayesian_output
+
+        first_cycle = num_cycles // 2
+        start = time.perf_counter()
+        cycle_range = reader.load_cycles(first_cycle, first_cycle + range_size - 1)
+        range_time = time.perf_counter() - start
+        assert np.array_equal(cycle_range.cycles, np.arange(first_cycle, first_cycle + range_size))
+        states, posteriors = cycle_range.get_node_posteriors("1LaneFollow_Simple", "Behavior")
+        assert states == ["emergency_brake", "targetbrake", "idm"] and posteriors.shape == (range_size, 3)
+
+        # Range across the end of the chunk without trajectories
+        first_cycle = chunk_size - range_size // 2
+        cycle_range = reader.load_cycles(first_cycle, first_cycle + range_size - 1)
+        for cycle_counter in cycle_range.cycles:
+            assert cycle_range.get_stored_trajectories(cycle_counter) == pickled_cycles[cycle_counter][0]
+            assert cycle_range.get_stored_bayesian_output(cycle_counter) == pickled_cycles[cycle_counter][1]
+
+        # Loading of single cycles by the post-processing scripts (from the store, which exists in this directory)
+        for cycle_counter in (0, chunk_size, num_cycles - 1):
+            assert load_stored_trajectories(path_to_data, cycle_counter) == pickled_cycles[cycle_counter][0]
+
+        num_store_files = len(os.listdir(store_path))
+        num_files = len(os.listdir(data_directory)) - 1
+
+        # A run that is stopped without close(): with flush interval, the flushed cycles of the chunk that is not
+        # full are readable (one file per chunk)
+        num_stopped_cycles = chunk_size + range_size
+        cycle_data_store_writer = CycleDataStoreWriter(store_path, chunk_size, flush_interval=0.0)
+        for evaluation_data in cycles[:num_stopped_cycles]:
+            cycle_data_store_writer.append(evaluation_data.cycle_counter, evaluation_data.stored_trajectories,
+                                           evaluation_data.stored_bayesian_output)
+        assert len(os.listdir(store_path)) == 2
+        cycle_data = CycleDataStoreReader(store_path).load_cycles()
+        assert np.array_equal(cycle_data.cycles, np.arange(num_stopped_cycles))
+        for cycle_counter in range(chunk_size - 1, num_stopped_cycles):
+            assert cycle_data.get_stored_trajectories(cycle_counter) == pickled_cycles[cycle_counter][0]
+            assert cycle_data.get_stored_bayesian_output(cycle_counter) == pickled_cycles[cycle_counter][1]
+    print(f"Evaluation data store ({num_cycles} cycles): files per cycle = write {files_write_time:.2f} s, scan "
+          f"{files_scan_time:.2f} s ({num_files} files), store = write {store_write_time:.2f} s, scan "
+          f"{store_scan_time:.3f} s, {range_size} cycle range {range_time * 1000:.1f} ms "
+          f"({num_store_files} chunk files)")
+
+
+BENCHMARKS = {
+    "inference_ipc_payload": benchmark_inference_ipc_payload,
+    "compiled_inference": benchmark_compiled_inference,
+    "longitudinal_generators": benchmark_longitudinal_generators,
+    "analytic_longitudinal_generators": benchmark_analytic_longitudinal_generators,
+    "lateral_generators": benchmark_lateral_generators,
+    "eggert_risk": benchmark_eggert_risk,
+    "behavior_risk_evaluation": benchmark_behavior_risk_evaluation,
+    "risk_stage_executors": benchmark_risk_stage_executors,
+    "lane_centerline_index": benchmark_lane_centerline_index,
+    "compiled_map_cache": benchmark_compiled_map_cache,
+    "sensing_area_classification": benchmark_sensing_area_classification,
+    "incremental_sensing_area": benchmark_incremental_sensing_area,
+    "situation_class_lookup": benchmark_situation_class_lookup,
+    "actor_snapshot": benchmark_actor_snapshot,
+    "ego_frame_transforms": benchmark_ego_frame_transforms,
+    "position_primitives": benchmark_position_primitives,
+    "sinadra_data_log": benchmark_sinadra_data_log,
+    "instrumentation_overhead": benchmark_instrumentation_overhead,
+    "risk_plot_rendering": benchmark_risk_plot_rendering,
+    "evaluation_data_writer": benchmark_evaluation_data_writer,
+    "evaluation_data_store": benchmark_evaluation_data_store,
+}
+
+
+if __name__ == "__main__":
+    benchmark_names = sys.argv[1:] if len(sys.argv) > 1 else list(BENCHMARKS.keys())
+    for benchmark_name in benchmark_names:
+        BENCHMARKS[benchmark_name]()
@@ -23,6 +23,62 @@ from typing import Dict, Tuple, Optional
 FRAMERATE: int = 20
 SAVE_EVALUATION_DATA = False
 
+
+class EvaluationDataQueuePolicy(Enum):
+    BLOCK = 1  # the client waits for a free queue slot, no evaluation data is lost
+    DROP = 2  # the evaluation data of the cycle is dropped, the client is never delayed
+
+
+# The evaluation data (SAVE_EVALUATION_DATA) is written by a pool of writer processes. At most
+# EVALUATION_DATA_QUEUE_SIZE cycles are queued, the policy decides what happens if the queue is full.
+EVALUATION_DATA_WRITER_PROCESSES: int = 2
+EVALUATION_DATA_QUEUE_SIZE: int = 8
+EVALUATION_DATA_QUEUE_POLICY: EvaluationDataQueuePolicy = EvaluationDataQueuePolicy.BLOCK
+
+# Render the distance distribution plots of the evaluation data from the stored trajectories after the run instead of
+# during the run (the plots are the most expensive part of the evaluation data). If the plots are rendered during the
+# run, the writer processes fall behind the risk cycles, thus, with the BLOCK policy the client is slowed down to the
+# writer throughput as soon as the queue is full. Deferred plots are rendered when the run ends (i.e. when a live
+# client is stopped with CTRL+C), they are only available after the run and prolong its end.
+EVALUATION_DATA_DEFER_PLOTS: bool = True
+
+# Append the trajectories and Bayesian network outputs of all cycles to one chunked columnar store per run
+# (stored_data/cycle_data/, see cycle_data_store.py) instead of writing a text and a pickle file per cycle and kind.
+# A chunk file holds EVALUATION_DATA_CYCLE_STORE_CHUNK_SIZE cycles. The cycles of a chunk that is not full yet are
+# written at least every EVALUATION_DATA_CYCLE_STORE_FLUSH_INTERVAL seconds (the chunk file is rewritten), thus, a
+# client that is not shut down properly loses at most the cycles of the last interval.
+EVALUATION_DATA_CYCLE_STORE: bool = True
+EVALUATION_DATA_CYCLE_STORE_CHUNK_SIZE: int = 256
+EVALUATION_DATA_CYCLE_STORE_FLUSH_INTERVAL: float = 10.0
+
+# Run the client without window and without frame rate synchronization, i.e. as fast as possible (there is no render
+# thread, the risk plot is not rendered at all). Replays are always run headless.
+HEADLESS_MODE: bool = False
+
+# Path of a binary log to which the SINADRA data (actors and environment) of each risk computation tick is recorded
+# (None disables the recording).
+SINADRA_DATA_RECORDING_PATH: Optional[str] = None
+
+# Path of a recorded SINADRA data log that is replayed instead of connecting to CARLA (None connects to CARLA). The
+# client stops at the end of the log and reports the throughput.
+SINADRA_DATA_REPLAY_PATH: Optional[str] = None
+
+# Measure the execution times of the stages of the risk computation loop as named spans (see util/instrumentation.py).
+# The rolling percentiles of each span are reported at the end of a run. Disabled spans measure nothing.
+INSTRUMENTATION_ENABLED: bool = False
+
+# Number of most recent durations of each span (and of the risk computation ticks in the throughput report) from which
+# the rolling percentiles are computed
+INSTRUMENTATION_WINDOW_SIZE: int = 1000
+
+# Path of a Chrome trace JSON file (chrome://tracing, Perfetto) to which all spans of a run are written at the end of
+# the run (None disables the trace). Only used if INSTRUMENTATION_ENABLED is set.
+INSTRUMENTATION_TRACE_PATH: Optional[str] = None
+
+# Maximal number of spans kept for the Chrome trace. If a run records more spans, only the most recent ones are kept,
+# thus, the memory of long live runs stays bounded (roughly 200 bytes per span).
+INSTRUMENTATION_TRACE_MAX_EVENTS: int = 500000
+
 ####################################
 # Simulator client configuration
 ####################################
@@ -47,6 +103,40 @@ DEBUG_COLOR_SENSING_AREA: Color = (51, 255, 204)  # green
 DEBUG_COLOR_SENSING_AREA_WITH_SENSED_OBJECT: Color = (255, 119, 0)  # orange
 DEBUG_COLOR_DEBUG_LINE_VEHICLE_REAR_END: Color = (255, 0, 0)  # red
 
+####################################
+# Map
+####################################
+
+# Maximum number of map matching results kept in the LRU cache of the map. The road network is static and the same
+# locations are matched several times per tick (sensing areas, BN input features). (0 disables the cache.)
+MAP_MATCHING_CACHE_SIZE: int = 4096
+
+# Grid size in meters to which the map matching query points are rounded, all points in the same grid cell share one
+# map matching result.
+MAP_MATCHING_CACHE_RESOLUTION: float = 0.01
+
+# If enabled, the map matching cache is cleared at the start of each tick, otherwise it is only cleared explicitly.
+MAP_MATCHING_CACHE_CLEAR_EACH_TICK: bool = False
+
+# Maximal distance in meters between two samples of a lane centerline in the KD-tree of the map that answers the
+# nearest lane center (waypoint) queries. The query points are projected between the samples.
+MAP_LANE_CENTERLINE_SAMPLE_DISTANCE: float = 1.0
+
+# The lane topology and the lane centerline samples derived from the ad map are stored in a compiled map file (.npz,
+# keyed by the hash of the OpenDrive file) and loaded by later runs instead of deriving them again.
+MAP_CACHE_ENABLED: bool = True
+
+# Directory of the compiled map files ("~" is expanded to the home directory).
+MAP_CACHE_DIRECTORY: str = "~/.cache/sinadra/maps"
+
+####################################
+# Situation class detection
+####################################
+
+# Edge length in meters of the grid cells of the spatial index over the situation class areas. A vehicle location is
+# only tested against the situation classes whose bounding box overlaps the grid cell of the location.
+SITUATION_CLASS_INDEX_CELL_SIZE: float = 50.0
+
 ####################################
 # Two lane following situation class
 ####################################
@@ -66,6 +156,19 @@ SIDE_SENSING_AREA_LENGTH: float = 15.0
 
 ACCEPTABLE_DISTANCE_FROM_LANE_CENTER_FOR_FRONT_VEHICLE: float = 1.75  # distance from lane center in meters
 
+# The sensing areas are kept across ticks and only the lane points that left or entered the sensing area are updated.
+# If disabled, the sensing areas are built from scratch in every tick. Only pays off if walking the lanes on the map
+# dominates the sensing area computation (see the incremental_sensing_area benchmark).
+SENSING_AREA_INCREMENTAL_UPDATE: bool = False
+
+# Drift in meters of the start or end of a sensing area up to which the polygon of the last tick is reused (no new
+# buffer of the lane points). The reused polygon deviates from the current sensing area, 0 never reuses it.
+SENSING_AREA_REBUFFER_DISTANCE: float = 0.0
+
+# Distance in meters between the ego vehicle (or the reference point on the other lane) and the cached lane points
+# from which on the lane points are walked from scratch (e.g. after a lane change).
+SENSING_AREA_MAX_LATERAL_DEVIATION: float = 1.5
+
 ####################################
 # BN Inference parameters
 ####################################
@@ -91,6 +194,24 @@ NUMBER_OF_PROCESSES_FOR_THE_BN_INFERENCE: Optional[int] = None
 # (In case of the value "None" all classified vehicles will be considered.)
 NUM_INTERACTION_HOPS: Optional[int] = 1
 
+
+class BayesianNetworkInferenceBackend(Enum):
+    PGMPY = 1  # pgmpy's VariableElimination, the elimination order is determined for every query
+    COMPILED = 2  # networks compiled to NumPy CPTs with cached elimination orders per set of evidence variables
+
+
+# Inference implementation used by the inference workers. Both backends compute the same posteriors.
+BN_INFERENCE_BACKEND: BayesianNetworkInferenceBackend = BayesianNetworkInferenceBackend.COMPILED
+
+# Maximum number of posteriors kept in the LRU cache of the Bayesian network inference. The evidences are hard, thus,
+# the same evidence combinations repeat from tick to tick and their inference can be skipped. (0 disables the cache.)
+BN_POSTERIOR_CACHE_SIZE: int = 1024
+
+# The Bayesian networks are loaded once on startup and shared by all risk cycles. If enabled, a network is reloaded as
+# soon as its .xmlbif file or its configuration script is modified on disk (e.g. while tuning a network). Checks the
+# modification times on each model access, thus, only enable it while tuning networks.
+BN_MODEL_HOT_RELOAD: bool = False
+
 ####################################
 # BN & Risk Computation parameters
 ####################################
@@ -113,6 +234,41 @@ PREDICTION_HORIZON = 4  # [seconds]: Future time, until which the risk computati
 PREDICTION_TIMESTEP = 0.2  # [seconds]
 NUM_TRAJECTORIES = 20  # Number of trajectories being sampled for each behavior in every time step
 
+
+class TrajectoryGenerationMode(Enum):
+    REFERENCE_SAMPLING = 1  # every trajectory sample is advanced by its own time step function
+    VECTORIZED_SAMPLING = 2  # all trajectory samples of a time step are advanced as one array operation
+    ANALYTIC_PROPAGATION = 3  # closed-form position mean/std without sampling (emergency brake, constant acceleration)
+
+
+# Implementation of the trajectory distribution generators. Both sampling modes draw the same random samples in the same
+# order, thus, they generate the same trajectory distributions for the same seed. Behaviors without an analytic
+# generator (target brake, IDM, lane change) fall back to VECTORIZED_SAMPLING in ANALYTIC_PROPAGATION mode.
+TRAJECTORY_GENERATION_MODE: TrajectoryGenerationMode = TrajectoryGenerationMode.VECTORIZED_SAMPLING
+# Per behavior override of TRAJECTORY_GENERATION_MODE ("emergency_brake", "constant_accel", "targetbrake", "idm",
+# "lanechange"). ANALYTIC_PROPAGATION is opt-in: its closed-form distributions differ from the sampled ones by the
+# sampling error, thus, enabling it changes the predicted trajectories and risk values,
+# e.g. {"emergency_brake": TrajectoryGenerationMode.ANALYTIC_PROPAGATION}.
+TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR: Dict[str, TrajectoryGenerationMode] = {}
+
+
+class RiskComputationExecutor(Enum):
+    SERIAL = 1  # in the client process
+    THREAD_POOL = 2  # in a thread pool of the client process (overlaps with waiting for the BN inference)
+    PROCESS_POOL = 3  # in the process pool of the BN inference
+
+
+# Executor of the behavior trajectory generation. The trajectories of a vehicle's behaviors are generated as soon as
+# its BN output is available, i.e. pipelined with the BN inference of the other vehicles. With NUM_TRAJECTORIES = 20, a
+# generation task takes a fraction of a millisecond, thus, the dispatching overhead of the pools exceeds their gain
+# (see the risk_stage_executors benchmark) and SERIAL is the default.
+RISK_COMPUTATION_EXECUTOR: RiskComputationExecutor = RiskComputationExecutor.SERIAL
+RISK_COMPUTATION_THREADS: int = 4  # Number of threads of the THREAD_POOL executor
+# Base seed of the random number generator per trajectory generation task. Each task is seeded with a seed derived
+# from this value, the risk cycle and the actor, vehicle and behavior, thus, the trajectories do not depend on the
+# executor or on the order in which the tasks are executed. No seeding if set to "None".
+RISK_COMPUTATION_SEED: Optional[int] = 0
+
 # Eggert Params
 EGGERT_BETA = 1
 EGGERT_RATE_MAX = 1
@@ -9,33 +9,41 @@ import multiprocessing
 import signal
 import cv2
 import math
-import pickle
 import os
 import time
+from collections import deque
 import numpy as np
-from pygame.time import Clock
-from typing import Optional, List, Union, TYPE_CHECKING
+from typing import Deque, Dict, Optional, List, Sequence, Union, TYPE_CHECKING
 
-from sinadra import evaluate_bayesian_networks, emergency_brake_risk, target_brake_risk, idm_risk, lc_right_risk, \
-    lc_left_risk, compute_total_risk
+from bayesian_network.inference.file_extraction import BayesianNetworkFileExtractor
+from bayesian_network.inference.model_registry import BayesianNetworkModelRegistry
+from bayesian_network.inference.inference import BayesianNetworkInference, preload_bayesian_networks_in_worker
+from sinadra import evaluate_bayesian_networks_unordered, BehaviorRiskStage, BehaviorRiskRequest, \
+    BehaviorRiskEvaluation
 from actor_situation_class_detection.town_data.town03_sinadra_data import SituationClassStateMachineTown03
 from actor_situation_class_detection.bayesian_network_id_selection.bayesian_network_id_selector import \
     BayesianNetworkIdSelector
 from actor_situation_class_detection.bayesian_network_id_selection.bayesian_network_id import BayesianNetId
 from sinadra_configuration_parameters import FRAMERATE, SAVE_EVALUATION_DATA, \
     NUMBER_OF_PROCESSES_FOR_THE_BN_INFERENCE, BehaviorType, BEHAVIOR_TYPE_MAPPING, SKIP_CYCLE_COUNT, \
-    PREDICTION_HORIZON, PREDICTION_TIMESTEP, NUM_TRAJECTORIES, BRAKE_TARGET_SAFE_DISTANCE_MARGIN, \
-    IDM_TIME_GAP_FRONT_VEHICLE, EGO_POS_LAT_STD, LC_CUTIN_DISTANCE_FROM_EGO
-from trajectory_gen.long_traj_generator import gen_constant_accel
-from util.kinematic_transform import Pose, transform_actor_kinematics_to_ego_frame, \
-    transform_ego_kinematics_to_ego_frame, transform_global_pos_to_ego_frame
-from util.risk_plot import RiskPlot
-from position_distance_distribution_plotter import position_distance_distribution_plot_generating_and_saving
-from simulators.carla_simulator_controller import CarlaSimulatorController
+    RISK_COMPUTATION_EXECUTOR, MAP_MATCHING_CACHE_CLEAR_EACH_TICK, SENSING_AREA_INCREMENTAL_UPDATE, \
+    BRAKE_TARGET_SAFE_DISTANCE_MARGIN, IDM_TIME_GAP_FRONT_VEHICLE, LC_CUTIN_DISTANCE_FROM_EGO, HEADLESS_MODE, \
+    SINADRA_DATA_RECORDING_PATH, SINADRA_DATA_REPLAY_PATH, INSTRUMENTATION_WINDOW_SIZE
+from util.kinematic_transform import Pose, get_kinematics_from_vector, transform_ego_kinematics_to_ego_frame, \
+    transform_global_pos_to_ego_frame, transform_vehicle_kinematics_to_ego_frame
+from util.instrumentation import Instrumentation, span
+from util.risk_plot import FRONT_VEHICLE_CUMULATIVE_RISK, FRONT_VEHICLE_EMERGENCY_RISK, \
+    FRONT_VEHICLE_TARGET_BRAKE_RISK, FRONT_VEHICLE_IDM_RISK, LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK, \
+    LEFT_SIDE_VEHICLE_LATERAL_RISK, RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK, RIGHT_SIDE_VEHICLE_LATERAL_RISK
+from util.risk_plot_renderer import RiskPlotRenderer
+from data_model.sensing_area import EgoSensingAreas
+from evaluation_data_writer import EvaluationData, EvaluationDataWriter
+from simulators.sinadra_data_log import SinadraDataRecorder
 from data_model.positions import Location
 # data creation
 
 if TYPE_CHECKING:
+    from pygame.time import Clock
     from bayesian_network.inference.interfaces import BayesianNetworkOutput
     from data_model.vehicle import EgoVehicle, OtherVehicle
     from data_model.sinadra_data import SinadraData
@@ -44,11 +52,34 @@ if TYPE_CHECKING:
     from actor_situation_class_detection.situation_class_state_machine import SituationClassStateMachine
 
 
+# Actor keys of the risk evaluation, which are also the keys of the stored trajectories of the side vehicles
+FRONT_VEHICLE = "Front"
+RIGHT_SIDE_VEHICLE_CUT_IN = "RightSideVehicleCutIn"
+LEFT_SIDE_VEHICLE_CUT_IN = "LeftSideVehicleCutIn"
+# Keys of the stored trajectories of the front vehicle behaviors
+FRONT_VEHICLE_STORED_TRAJECTORY_KEYS = {
+    "emergency_brake": "FrontEmergency",
+    "targetbrake": "FrontTargetBrake",
+    "idm": "FrontIDM",
+}
+
+
 class SinadraClient:
 
-    def __init__(self, simulator_controller: "SimulatorController"):
+    def __init__(self, simulator_controller: "SimulatorController", headless: bool = HEADLESS_MODE):
         self._cycle_counter: int = 0
-        self._synchronization_clock: Optional[Clock] = Clock()
+        # A headless client has no window and no frame rate synchronization, it runs as fast as possible
+        self._headless: bool = headless
+        self._synchronization_clock: Optional["Clock"] = None
+        if not headless:
+            # pygame is only needed for the frame rate synchronization (headless replays run without it)
+            from pygame.time import Clock
+            self._synchronization_clock = Clock()
+        # Number and total execution time of all risk computation ticks and the execution times of the most recent
+        # ticks for the percentiles of the throughput report (bounded, as a live run never ends on its own)
+        self._num_ticks: int = 0
+        self._total_tick_execution_time: float = 0.0
+        self._tick_execution_times: Deque[float] = deque(maxlen=INSTRUMENTATION_WINDOW_SIZE)
 
         # Initialize Simulator
         self._simulator_controller: "SimulatorController" = simulator_controller
@@ -56,13 +87,23 @@ class SinadraClient:
         self._simulator_controller.setup_simulator()
         self._map: "Map" = self._simulator_controller.get_map()
 
+        # Load and validate all Bayesian networks once, they are shared by all risk cycles
+        self._bn_model_registry: BayesianNetworkModelRegistry = BayesianNetworkModelRegistry.get_instance()
+        self._bn_model_registry.load_all_networks()
+        self._bn_file_extractor: BayesianNetworkFileExtractor = BayesianNetworkFileExtractor(self._bn_model_registry)
+        self._bn_inference: BayesianNetworkInference = BayesianNetworkInference(self._bn_model_registry)
+
         # Initialize Situation Class
         self._situation_class_state_machine: "SituationClassStateMachine" = SituationClassStateMachineTown03()
+        # The sensing areas of the ego vehicle are kept across ticks and updated incrementally
+        self._ego_sensing_areas: Optional[EgoSensingAreas] = EgoSensingAreas() if SENSING_AREA_INCREMENTAL_UPDATE \
+            else None
 
         # Initialize SINADRA Client Window
         self._cv_window_name = "SINADRA Risk Sensor"
-        cv2.namedWindow(self._cv_window_name, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(self._cv_window_name, (800, 1200))
+        if not headless:
+            cv2.namedWindow(self._cv_window_name, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(self._cv_window_name, (800, 1200))
         self._simulator_cv_image: Optional["np.ndarray"] = None
         self._subject_vehicle_cv_image: Optional["np.ndarray"] = None
 
@@ -73,15 +114,56 @@ class SinadraClient:
         self.stored_trajectories = {}
         # string BN ID -> {nodeID: list (stateID, stateProbability)}
         self.stored_bayesian_output = {}
+        # vehicle ID -> kinematic vector [p_x, p_y, v_x, v_y, a_x, a_y] in the ego frame (of the current tick)
+        self.other_vehicle_kinematic_vectors = {}
 
-        self._risk_plot: RiskPlot = RiskPlot()
+        # Risk series name -> risk values of the latest risk computation tick (see RiskPlot.set_risk_values)
+        self._risk_plot_values: Dict[str, Sequence[float]] = {}
 
         processes_number_bn_inference = NUMBER_OF_PROCESSES_FOR_THE_BN_INFERENCE
         processes_number_bn_inference = processes_number_bn_inference if processes_number_bn_inference else 2
         self.bn_inference_multiprocessing_pool = multiprocessing.Pool(processes=processes_number_bn_inference,
                                                                       initializer=self._worker_init)
-
-        self._sinadra_execution_loop()
+        # Trajectory generation of the actor behaviors runs on the BN inference pool (or the configured executor)
+        self._behavior_risk_stage = BehaviorRiskStage(RISK_COMPUTATION_EXECUTOR, self.bn_inference_multiprocessing_pool)
+
+        # The evaluation data is written in the background (only a window client saves evaluation data)
+        self._evaluation_data_writer: Optional[EvaluationDataWriter] = \
+            EvaluationDataWriter() if SAVE_EVALUATION_DATA and not headless else None
+
+        # The SINADRA data of each risk computation tick is recorded for offline replays
+        self._sinadra_data_recorder: Optional[SinadraDataRecorder] = None
+        if SINADRA_DATA_RECORDING_PATH:
+            self._sinadra_data_recorder = SinadraDataRecorder(SINADRA_DATA_RECORDING_PATH, self._map.map_name)
+
+        # The risk plot is rendered and composed with the scene image by a render thread, a headless client does not
+        # render at all. (The thread is started after all process pools are forked.)
+        self._risk_plot_renderer: Optional[RiskPlotRenderer] = None if headless else RiskPlotRenderer()
+
+    def run(self):
+        # Runs the execution loop until the simulator is finished (a live simulator runs until the client is stopped
+        # with CTRL+C). The evaluation data, the recording and the trace are completed in either case.
+        start = time.perf_counter()
+        try:
+            self._sinadra_execution_loop()
+        except KeyboardInterrupt:
+            print("SINADRA client stopped")
+        finally:
+            self._finish_run(time.perf_counter() - start)
+
+    def _finish_run(self, run_execution_time: float) -> None:
+        self.log_throughput_info(run_execution_time)
+        self.log_instrumentation_info()
+        if self._evaluation_data_writer is not None:
+            # Waits for the queued cycles, writes the last chunk of the cycle data store and renders deferred plots
+            self._evaluation_data_writer.close()
+            self.log_evaluation_data_info()
+        instrumentation = Instrumentation.get_instance()
+        if instrumentation.enabled and instrumentation.trace_path:
+            instrumentation.write_chrome_trace()
+            print(f"Chrome trace of the run written to {instrumentation.trace_path}")
+        if self._sinadra_data_recorder is not None:
+            self._sinadra_data_recorder.close()
 
     def _sinadra_execution_loop(self):
         # This while loop is the execution loop of the SINADRA client (!= the execution loop of the simulator)
@@ -89,129 +171,84 @@ class SinadraClient:
         # Simulator-related work is triggered over the game loop.
         while True:
             self._simulator_controller.run_simulator_game_loop_step()
+            if self._simulator_controller.is_finished():
+                break
             self._simulator_cv_image = self._simulator_controller.get_scenario_image()
 
-            if self._cycle_counter % SKIP_CYCLE_COUNT == 0:
+            is_risk_cycle = self._cycle_counter % SKIP_CYCLE_COUNT == 0
+            if is_risk_cycle:
                 self._run_data_and_risk_update_step()
-                self._risk_plot.update_and_draw_risk_plot()
             self._cycle_counter += 1
 
-            if self._simulator_cv_image is not None:
-                img_risk = np.fromstring(self._risk_plot.get_rgb_image(), dtype=np.uint8, sep='')
-                img_risk = img_risk.reshape(self._risk_plot.get_width_height()[::-1] + (3,))
-                img_risk = cv2.resize(img_risk, (800, 600), interpolation=cv2.INTER_AREA)
-                scene_image = cv2.resize(self._simulator_cv_image, (800, 600), interpolation=cv2.INTER_AREA)
-                merged_cv_image = cv2.vconcat([scene_image, img_risk])
+            if self._headless:
+                continue
 
-                if SAVE_EVALUATION_DATA and self._cycle_counter % SKIP_CYCLE_COUNT == 1:
-                    self.generate_and_save_data(img_risk)
+            # The render thread draws the risk plot and composes the window image, only its latest image is shown here
+            self._risk_plot_renderer.submit(self._simulator_cv_image,
+                                            self._risk_plot_values if is_risk_cycle else None)
+            if self._simulator_cv_image is not None and SAVE_EVALUATION_DATA and \
+                    self._cycle_counter % SKIP_CYCLE_COUNT == 1:
+                self.generate_and_save_data()
 
-                cv2.imshow(self._cv_window_name, merged_cv_image)
+            window_image = self._risk_plot_renderer.get_window_image()
+            if window_image is not None:
+                cv2.imshow(self._cv_window_name, window_image)
 
             cv2.waitKey(1)
             self._synchronization_clock.tick(FRAMERATE)
 
     def _run_data_and_risk_update_step(self):
+        # The risk series that are not set by the tick are drawn as zero risk
+        self._risk_plot_values = {}
         sinadra_data = self._simulator_controller.get_sinadra_data()
         if sinadra_data:
-            self.risk_computation_loop_step(sinadra_data)
+            if self._sinadra_data_recorder is not None:
+                self._sinadra_data_recorder.record(sinadra_data)
+            start = time.perf_counter()
+            with span("tick"):
+                self.risk_computation_loop_step(sinadra_data)
+            tick_execution_time = time.perf_counter() - start
+            self._num_ticks += 1
+            self._total_tick_execution_time += tick_execution_time
+            self._tick_execution_times.append(tick_execution_time)
         else:
             print("No hero vehicle detected")
 
-    def generate_and_save_data(self, img_risk):
+    def generate_and_save_data(self):
         # Create directory if it does not exist
         path_to_data = "stored_data/"
         if not os.path.exists(path_to_data):
             os.makedirs(path_to_data)
 
-        # Save simulator views
-        cv2.imwrite(f"{path_to_data}{self._cycle_counter}_scenario.png", self._simulator_cv_image)
-        cv2.imwrite(f"{path_to_data}{self._cycle_counter}_scenario_hero_view.png", self._subject_vehicle_cv_image)
-
-        # Save risk plot
-        # cv2.imwrite(f"{path_to_data}{self.cycle_counter}_risk_plot.png", img_risk)
-        self._risk_plot.save_risk_plot_on_disk(path_to_data, f"{self._cycle_counter}_risk_plot.png")
-
-        self.save_raw_trajectories(path_to_data)
-        self.generate_and_save_bn_output(path_to_data)
-        self.generate_and_save_distance_distribution_and_trajectory_plots(path_to_data)
-
-    def save_raw_trajectories(self, path_to_data):
-        with open(f"{path_to_data}{self._cycle_counter}_trajectories.txt", "w") as output:
-            for vehicle_id, trajectory in self.stored_trajectories.items():
-                output.write(vehicle_id + "\n")
-                output.write(str(trajectory) + "\n\n")
-        with open(f"{path_to_data}{self._cycle_counter}_trajectories.pickle", "wb") as output:
-            pickle.dump(self.stored_trajectories, output)
-
-    def generate_and_save_bn_output(self, path_to_data):
-        with open(f"{path_to_data}{self._cycle_counter}_bn_outputs.txt", "w") as output:
-            for bn_id, nodes in self.stored_bayesian_output.items():
-                output.write(bn_id + "\n")
-                for node_id, states in nodes.items():
-                    output.write(node_id + "\n")
-                    output.write(str(states) + "\n")
-        with open(f"{path_to_data}{self._cycle_counter}_bn_outputs.pickle", "wb") as output:
-            pickle.dump(self.stored_bayesian_output, output)
-
-    def generate_and_save_distance_distribution_and_trajectory_plots(self, path_to_data):
-        # if one Front key is inside the stored trajectories, all Front keys are inside
-        if "Ego" in self.stored_trajectories and "FrontEmergency" in self.stored_trajectories:
-            position_distance_distribution_plot_generating_and_saving(
-                self.stored_trajectories["Ego"], self.stored_trajectories["FrontEmergency"],
-                f"{path_to_data}{self._cycle_counter}_emergency_distance_distribution_plot.png", "Emergency Brake"
-            )
-            position_distance_distribution_plot_generating_and_saving(
-                self.stored_trajectories["Ego"], self.stored_trajectories["FrontIDM"],
-                f"{path_to_data}{self._cycle_counter}_idm_distance_distribution_plot.png", "IDM"
-            )
-            position_distance_distribution_plot_generating_and_saving(
-                self.stored_trajectories["Ego"], self.stored_trajectories["FrontTargetBrake"],
-                f"{path_to_data}{self._cycle_counter}_target_brake_distance_distribution_plot.png", "Target Brake"
-            )
-            # Requires a working Tex environment on the system -> currently not generated during runtime
-            # save_and_plot_vehicle_trajectories_with_distribution(
-            #     self.stored_trajectories["Ego"], self.stored_trajectories["FrontIDM"],
-            #     self.stored_trajectories["FrontEmergency"], self.stored_trajectories["FrontTargetBrake"],
-            #     f"{path_to_data}{self.cycle_counter}__trajectories_plot.png"
-            # )
-            # Currently not required
-            # save_and_plot_vehicle_trajectories_with_distribution_single(
-            #     self.stored_trajectories["Ego"], self.stored_trajectories["FrontIDM"],
-            #     f"{path_to_data}{self.cycle_counter}__trajectories_plot_front_idm.png", "FrontIDM"
-            # )
-            # save_and_plot_vehicle_trajectories_with_distribution_single(
-            #     self.stored_trajectories["Ego"], self.stored_trajectories["FrontEmergency"],
-            #     f"{path_to_data}{self.cycle_counter}__trajectories_plot_front_emergency.png", "FrontEmergency"
-            # )
-            # save_and_plot_vehicle_trajectories_with_distribution_single(
-            #     self.stored_trajectories["Ego"], self.stored_trajectories["FrontTargetBrake"],
-            #     f"{path_to_data}{self.cycle_counter}__trajectories_plot_front_target_brake.png", "FrontTargetBrake"
-            # )
-        if "Ego" in self.stored_trajectories and "RightSideVehicleCutIn" in self.stored_trajectories:
-            position_distance_distribution_plot_generating_and_saving(
-                self.stored_trajectories["Ego"], self.stored_trajectories["RightSideVehicleCutIn"],
-                f"{path_to_data}{self._cycle_counter}_right_side_vehicle_cut_in_distance_distribution_plot.png",
-                "Right Side Vehicle Cut In"
-            )
-        if "Ego" in self.stored_trajectories and "LeftSideVehicleCutIn" in self.stored_trajectories:
-            position_distance_distribution_plot_generating_and_saving(
-                self.stored_trajectories["Ego"], self.stored_trajectories["LeftSideVehicleCutIn"],
-                f"{path_to_data}{self._cycle_counter}_left_side_cut_vehicle_in_distance_distribution_plot.png",
-                "Left Side Vehicle Cut In"
-            )
+        # Save risk plot (on the render thread)
+        self._risk_plot_renderer.save_risk_plot_on_disk(path_to_data, f"{self._cycle_counter}_risk_plot.png")
+
+        # Simulator views, trajectories, BN outputs and distance distribution plots are saved by the writer processes
+        self._evaluation_data_writer.submit(EvaluationData(path_to_data, self._cycle_counter, self._simulator_cv_image,
+                                                           self._subject_vehicle_cv_image, self.stored_trajectories,
+                                                           self.stored_bayesian_output))
 
     def __del__(self):
+        if self._sinadra_data_recorder is not None:
+            self._sinadra_data_recorder.close()
+        if self._evaluation_data_writer is not None:
+            self._evaluation_data_writer.close()
+        if self._risk_plot_renderer is not None:
+            self._risk_plot_renderer.close()
         # Release multiprocessing resources
+        self._behavior_risk_stage.close()
         self.bn_inference_multiprocessing_pool.close()
         del self.bn_inference_multiprocessing_pool
 
-        cv2.destroyAllWindows()
+        if not self._headless:
+            cv2.destroyAllWindows()
 
     def _worker_init(self):
         # This method is needed for parallel processing based on pools
         # SIGINT (=CTRL+C) will be handled by SIG_IGN (=Handler that ignores the signal)
         signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # The Bayesian networks are kept resident in each worker, the inference tasks only carry the evidences
+        preload_bayesian_networks_in_worker()
 
     # =============  Game Loop
     
@@ -219,11 +256,15 @@ class SinadraClient:
         # reset stored trajectories & BN outputs
         self.stored_trajectories = {}
         self.stored_bayesian_output = {}
+        self.other_vehicle_kinematic_vectors = {}
 
         print("====================================================\nStart Tick\n\n")
         print(f"Cycle: {self._cycle_counter}")
         start = time.time()
 
+        if MAP_MATCHING_CACHE_CLEAR_EACH_TICK:
+            self._map.invalidate_map_matching_cache()
+
         all_vehicles: List[Union["EgoVehicle", "OtherVehicle"]] = []
         all_vehicles.append(data.hero_vehicle)
         all_vehicles.extend(data.other_vehicles)
@@ -232,14 +273,15 @@ class SinadraClient:
         # Classify actors in situation class
         ####################################
 
-        # remove all actors from situation classes
-        self._situation_class_state_machine.clear_actor_associations_from_situation_classes()
+        with span("situation_classification"):
+            # remove all actors from situation classes
+            self._situation_class_state_machine.clear_actor_associations_from_situation_classes()
 
-        # update situation classes with given vehicles
-        self._situation_class_state_machine.update_situation_classes(all_vehicles)
+            # update situation classes with given vehicles
+            self._situation_class_state_machine.update_situation_classes(all_vehicles)
 
-        # retrieve situation class the hero vehicle is currently in
-        hero_situation_class = self._situation_class_state_machine.get_hero_situation_class()
+            # retrieve situation class the hero vehicle is currently in
+            hero_situation_class = self._situation_class_state_machine.get_hero_situation_class()
         self.log_hero_sit_class_info(data.hero_vehicle, hero_situation_class)
 
         #########################################################
@@ -247,35 +289,61 @@ class SinadraClient:
         #########################################################
 
         # based on situation class and other vehicles, determine, which BN shall be evaluated
-        bn_selector = BayesianNetworkIdSelector(data.hero_vehicle, hero_situation_class,
-                                                data.other_vehicles, self._map, self._simulator_controller)
-        vehicle_dependent_bn_ids = bn_selector.get_vehicle_dependent_bn_ids()
+        with span("bn_id_selection"):
+            bn_selector = BayesianNetworkIdSelector(data.hero_vehicle, hero_situation_class,
+                                                    data.other_vehicles, self._map, self._simulator_controller,
+                                                    self._ego_sensing_areas)
+            vehicle_dependent_bn_ids = bn_selector.get_vehicle_dependent_bn_ids()
         self.log_active_bn_info(vehicle_dependent_bn_ids)
+        self.log_sensing_area_update_info()
 
         if not any(vehicle_dependent_bn_ids):
             print("no relevant vehicles, for which risk can be computed")
             return
 
-        # Infer behavior likelihoods in Bayesian Networks
-        infered_bn_outputs = evaluate_bayesian_networks(self.bn_inference_multiprocessing_pool,
-                                                        vehicle_dependent_bn_ids, data.environment, self._map,
-                                                        all_vehicles)
-        self.log_bayesian_network_inference_outputs(infered_bn_outputs)
-
         ##########################################################################################
-        # Trajectory sampling for relevant behaviors of other actors and pair-wise risk assessment
+        # BN inference, trajectory sampling for relevant behaviors of other actors and pair-wise risk assessment
         ##########################################################################################
 
-        for network_output in infered_bn_outputs:
-            vehicle_exists = self.generate_trajectory_and_compute_risk_for_vehicle_and_bn(data, network_output)
-            if not vehicle_exists:
-                return
+        # The ego trajectory is predicted once. The trajectories of an actor's behaviors are generated as soon as the
+        # behavior likelihoods of its BN are inferred. All actor behaviors of the tick are scored in one batched call.
+        ego_half_length, ego_np_vec_front = self.get_ego_vehicle_front_kinematics(data)
+        # The kinematics of all other actors are transformed into the ego frame at once with the ego matrix of the tick
+        other_vehicle_np_vecs = transform_vehicle_kinematics_to_ego_frame(data.hero_vehicle, data.other_vehicles)
+        self.other_vehicle_kinematic_vectors = {vehicle.id: np_vec for vehicle, np_vec
+                                                in zip(data.other_vehicles, other_vehicle_np_vecs)}
+        self._behavior_risk_stage.start_tick(ego_np_vec_front, self._cycle_counter)
+
+        infered_bn_outputs = []
+        for output_index, network_output in evaluate_bayesian_networks_unordered(
+                self.bn_inference_multiprocessing_pool, vehicle_dependent_bn_ids, data.environment, self._map,
+                all_vehicles, self._bn_file_extractor, self._bn_inference):
+            infered_bn_outputs.append(network_output)
+            vehicle_behavior_risk_requests = self.build_behavior_risk_requests_for_vehicle_and_bn(
+                data, network_output, ego_half_length, ego_np_vec_front)
+            if vehicle_behavior_risk_requests is None:
+                print(f"Vehicle {network_output.vehicle_id} does not exist anymore, its risk is not computed")
+                continue
+            # the risk evaluation keeps the vehicle order of the BN outputs, not their completion order
+            self._behavior_risk_stage.submit(vehicle_behavior_risk_requests, output_index)
+
+        self.log_bayesian_network_inference_outputs(infered_bn_outputs)
+        self.log_bayesian_network_posterior_cache_info()
+        self.log_map_matching_cache_info()
+
+        risk_evaluation = self._behavior_risk_stage.finish_tick()
+        if risk_evaluation.actor_keys:
+            with span("plot_update"):
+                self.store_trajectories_and_update_risk_plot(risk_evaluation)
 
         end = time.time()
         print("\n\nEnd Tick (Exec Time="+str(end-start)+"\n====================================================")
 
-    def generate_trajectory_and_compute_risk_for_vehicle_and_bn(self, data, network_output):
+    def build_behavior_risk_requests_for_vehicle_and_bn(self, data, network_output, ego_half_length, ego_np_vec_front
+                                                        ) -> Optional[List[BehaviorRiskRequest]]:
+        # Returns None if the vehicle of the network output does not exist anymore
         bn_node_dict = {}
+        behavior_risk_requests = []
         for node in network_output.output_nodes:
             node_output_list = []
             for outcome in node.outcomes:
@@ -287,51 +355,40 @@ class SinadraClient:
 
             behavior_type = BEHAVIOR_TYPE_MAPPING[node.title]
 
-            #############################
-            # Ego Trajectory Generation
-            #############################
-
-            ego_half_length, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std = (
-                self.generate_ego_vehicle_trajectory(data)
-            )
-
             #############################################
             # Front Vehicle Brake Behavior Prediction
             #############################################
             if behavior_type == BehaviorType.Braking:
-                front_vehicle_exists = self.compute_risk_front_vehicle_braking(
-                    data, ego_half_length, ego_pos_x_mean, ego_pos_x_std, network_output, node
+                node_behavior_risk_requests = self.build_front_vehicle_braking_requests(
+                    data, ego_half_length, network_output, node
                 )
-                if not front_vehicle_exists:
-                    return False
 
             #############################################
             # Side Vehicle Cutin From Right Behavior Prediction
             #############################################
             elif behavior_type == BehaviorType.LaneChangeToLeft:
-                right_side_vehicle_exists = self.compute_risk_side_vehicle_cut_in_from_right(
-                    data, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std, network_output, node
+                node_behavior_risk_requests = self.build_side_vehicle_cut_in_requests(
+                    data, ego_np_vec_front, network_output, node, RIGHT_SIDE_VEHICLE_CUT_IN
                 )
-                if not right_side_vehicle_exists:
-                    return False
 
             #############################################
             # Side Vehicle Cutin From Left Behavior Prediction
             #############################################
             elif behavior_type == BehaviorType.LaneChangeToRight:
-                left_side_vehicle_exists = self.compute_risk_side_vehicle_cut_in_from_left(
-                    data, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std, network_output, node
+                node_behavior_risk_requests = self.build_side_vehicle_cut_in_requests(
+                    data, ego_np_vec_front, network_output, node, LEFT_SIDE_VEHICLE_CUT_IN
                 )
-                if not left_side_vehicle_exists:
-                    return False
             else:
-                pass
+                continue
+
+            if node_behavior_risk_requests is None:
+                return None
+            behavior_risk_requests.extend(node_behavior_risk_requests)
         self.stored_bayesian_output[network_output.bayesian_network_id] = bn_node_dict
 
-        return True
+        return behavior_risk_requests
 
-    def generate_ego_vehicle_trajectory(self, data):
-        # Generate ego trajectory prediction (Constant Acceleration)
+    def get_ego_vehicle_front_kinematics(self, data):
         # Positions of the following are relative to the ego vehicle center point, i.e. pos = (0,0)
         ego_pos_center, ego_speed, ego_accel, ego_np_vec_center = transform_ego_kinematics_to_ego_frame(
             data.hero_vehicle)
@@ -340,16 +397,17 @@ class SinadraClient:
         ego_np_vec_front = ego_np_vec_center
         ego_half_length = data.hero_vehicle.length / 2
         ego_np_vec_front[0] += ego_half_length
-        ego_pos_front = ego_pos_center
-        ego_pos_front.x += ego_half_length
-        ego_pos_x_mean, ego_pos_x_std = gen_constant_accel(ego_np_vec_front, NUM_TRAJECTORIES,
-                                                           PREDICTION_HORIZON, PREDICTION_TIMESTEP)
-        self.stored_trajectories["Ego"] = (list(ego_pos_x_mean), list(ego_pos_x_std),
-                                           [0] * len(ego_pos_x_mean), [0] * len(ego_pos_x_std))
-        return ego_half_length, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std
-
-    def compute_risk_front_vehicle_braking(self, data, ego_half_length, ego_pos_x_mean, ego_pos_x_std, network_output,
-                                           node):
+        return ego_half_length, ego_np_vec_front
+
+    def get_other_vehicle_kinematics(self, other_vehicle: "OtherVehicle"):
+        # Kinematics of the other vehicle in the ego frame, taken from the transformation of all actors of the tick.
+        # The kinematic vector is copied as the behavior risk requests adapt it in place.
+        np_vec = self.other_vehicle_kinematic_vectors[other_vehicle.id].copy()
+        pos, speed, acceleration = get_kinematics_from_vector(np_vec)
+        return pos, speed, acceleration, np_vec
+
+    def build_front_vehicle_braking_requests(self, data, ego_half_length, network_output, node
+                                             ) -> Optional[List[BehaviorRiskRequest]]:
         # Relative braking behavior likelihoods
         emergency_prob = node.outcomes[0].value
         targetbrake_prob = node.outcomes[1].value
@@ -360,12 +418,11 @@ class SinadraClient:
         front_vehicle: "OtherVehicle" = filter(lambda v: v.id == vehicle_id, data.other_vehicles)
         front_vehicle = next(front_vehicle, None)
         if not front_vehicle:
-            return False
-        brake_behavior_risks = list()
+            return None
+        behavior_risk_requests = list()
         # Position of the following call is the position of the front vehicle's center point
         # relative to the ego vehicle's center point
-        fv_pos_center, fv_speed, fv_accel, fv_np_vec_center = transform_actor_kinematics_to_ego_frame(data.hero_vehicle,
-                                                                                                      front_vehicle)
+        fv_pos_center, fv_speed, fv_accel, fv_np_vec_center = self.get_other_vehicle_kinematics(front_vehicle)
         # We want to get the x location of the front vehicle's rear end relative to the ego
         # vehicle's front end to get the correct distance. Subtract half of the lengths of
         # both vehicles.
@@ -386,14 +443,8 @@ class SinadraClient:
         # Emergency Brake Behavior Risk
         ###########################
         if emergency_prob > 0:
-            emergency_brake_eggert_prob, fv_x_mean, fv_x_std = emergency_brake_risk(ego_pos_x_mean,
-                                                                                    ego_pos_x_std,
-                                                                                    fv_np_vec_rear)
-            self.stored_trajectories["FrontEmergency"] = (list(fv_x_mean), list(fv_x_std),
-                                                          [0] * len(fv_x_mean), [0] * len(fv_x_std))
-            brake_behavior_risks.append((emergency_brake_eggert_prob, emergency_prob))
-            # Update the dynamic risk plot
-            self._risk_plot.set_front_vehicle_emergency_risk(emergency_brake_eggert_prob)
+            behavior_risk_requests.append(BehaviorRiskRequest(FRONT_VEHICLE, vehicle_id, "emergency_brake",
+                                                              emergency_prob, (fv_np_vec_rear,)))
         ###########################
         # Target Brake Behavior Risk
         ###########################
@@ -409,16 +460,10 @@ class SinadraClient:
             fv_frontend_x = fv_np_vec_center[0] + fv_half_length
             target_distance = stop_line_pos_e.x - fv_frontend_x
 
-            target_brake_eggert_prob, fv_x_mean, fv_x_std = target_brake_risk(
-                ego_pos_x_mean, ego_pos_x_std, fv_np_vec_rear, target_distance,
-                BRAKE_TARGET_SAFE_DISTANCE_MARGIN
-            )
-            self.stored_trajectories["FrontTargetBrake"] = (
-                list(fv_x_mean), list(fv_x_std), [0] * len(fv_x_mean), [0] * len(fv_x_std)
-            )
-            brake_behavior_risks.append((target_brake_eggert_prob, targetbrake_prob))
-            # Update the dynamic risk plot
-            self._risk_plot.set_front_vehicle_target_brake_risk(target_brake_eggert_prob)
+            behavior_risk_requests.append(BehaviorRiskRequest(
+                FRONT_VEHICLE, vehicle_id, "targetbrake", targetbrake_prob,
+                (fv_np_vec_rear, target_distance, BRAKE_TARGET_SAFE_DISTANCE_MARGIN)
+            ))
         ###############################################################
         # Intelligent Driver Model Behavior Risk (Follow Vehicle and Follow Road)
         ###############################################################
@@ -471,8 +516,8 @@ class SinadraClient:
             else:
                 # Position of the front front vehicle's center point relative to the ego
                 # vehicle's center point
-                fv_front_pos_center, fv_front_speed, _, fv_front_np_vec_center = transform_actor_kinematics_to_ego_frame(
-                    data.hero_vehicle, front_front_vehicle)
+                fv_front_pos_center, fv_front_speed, _, fv_front_np_vec_center = self.get_other_vehicle_kinematics(
+                    front_front_vehicle)
 
                 # What we need for the IDM is the position of front front vehicle's rear end
                 # relative to the ego vehicle's front end
@@ -485,135 +530,67 @@ class SinadraClient:
 
             # self.log_kinematic_info(ego_pos, ego_speed, fv_front_pos, fv_front_speed, fv_pos, fv_speed)
 
-            idm_eggert_prob, fv_x_mean, fv_x_std = idm_risk(ego_pos_x_mean, ego_pos_x_std,
-                                                            fv_np_vec_rear, 2 * fv_half_length,
-                                                            fv_front_np_vec_rear)
-            self.stored_trajectories["FrontIDM"] = (
-                list(fv_x_mean), list(fv_x_std), [0] * len(fv_x_mean), [0] * len(fv_x_std)
-            )
-            brake_behavior_risks.append((idm_eggert_prob, followvehicle_prob + nobrake_prob))
-            # Update the dynamic risk plot
-            self._risk_plot.set_front_vehicle_idm_risk(idm_eggert_prob)
-        # Weight the individual behavior risk scores based on BN output likelihoods
-        weighted_total_risk = compute_total_risk(brake_behavior_risks)
-        # Update the dynamic risk plot
-        self._risk_plot.set_front_vehicle_cumulative_risk(weighted_total_risk)
-
-        return True
-
-    def compute_risk_side_vehicle_cut_in_from_right(self, data, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std,
-                                                    network_output, node):
-        # Relative cutin behavior likelihoods
-        cutin_prob = node.outcomes[0].value
-        nocutin_prob = 1.0 - cutin_prob
-        # Get actor reference of side vehicle
-        vehicle_id = network_output.vehicle_id
-        side_vehicle: "OtherVehicle" = filter(lambda v: v.id == vehicle_id, data.other_vehicles)
-        side_vehicle = next(side_vehicle, None)
-        if not side_vehicle:
-            return False
-        # Note that all computations are performed in the local ego coordinate frame
-        # TODO Think about whether to use rear end of side vehicle
-        sv_pos, sv_speed, sv_accel, sv_np_vec = transform_actor_kinematics_to_ego_frame(data.hero_vehicle, side_vehicle)
-        # End Point of lane change behavior [x,y]
-        lc_target = [ego_np_vec_front[0] + LC_CUTIN_DISTANCE_FROM_EGO, ego_np_vec_front[1]]
-        # print("Side Vehicle")
-        # print(sv_np_vec)
-        # print("Ego Vehicle")
-        # print(ego_np_vec_front)
-        # print("LC Target")
-        # print(lc_target)
-        # Generate ego lateral positions for a straight drive
-        num_positions = int((PREDICTION_HORIZON / PREDICTION_TIMESTEP + 1))
-        ego_pos_y_mean = np.zeros(num_positions)
-        ego_pos_y_std = np.full(num_positions, EGO_POS_LAT_STD)  # Assumed standard dev of ego lat pos = 0.2
-        collision_prob_x, collision_prob_y, sv_x_mean, sv_x_std, sv_y_mean, sv_y_std = (
-            lc_left_risk(ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std, sv_np_vec,
-                         lc_target)
-        )
-        self.stored_trajectories["RightSideVehicleCutIn"] = (
-            list(sv_x_mean), list(sv_x_std), list(sv_y_mean), list(sv_y_std)
-        )
-        # print("Collision Probability X")
-        # print(collision_prob_x)
-        # print(collision_prob_y)
-        lc_behavior_long_risk = list()
-        lc_behavior_lat_risk = list()
-        # Assuming that only cut-in of side vehicle into ego lane is critical --> Zero Risk
-        # This is important for computing the weighted total risk
-        length_sampled_time_horizon = len(np.arange(0, PREDICTION_HORIZON + PREDICTION_TIMESTEP, PREDICTION_TIMESTEP))
-        lc_behavior_long_risk.append((list(np.zeros(length_sampled_time_horizon)), nocutin_prob))
-        lc_behavior_long_risk.append((collision_prob_x, cutin_prob))
-        # Weight the individual behavior risk scores based on BN output likelihoods
-        weighted_total_long_risk = compute_total_risk(lc_behavior_long_risk)
-        # Assuming that only cut-in of side vehicle into ego lane is critical --> Zero Risk
-        # This is important for computing the weighted total risk
-        lc_behavior_lat_risk.append((list(np.zeros(length_sampled_time_horizon)), nocutin_prob))
-        lc_behavior_lat_risk.append((collision_prob_y, cutin_prob))
-        # Weight the individual behavior risk scores based on BN output likelihoods
-        weighted_total_lat_risk = compute_total_risk(lc_behavior_lat_risk)
-        # Update the dynamic risk plot
-        self._risk_plot.set_right_side_vehicle_longitudinal_risk(weighted_total_long_risk)
-        self._risk_plot.set_right_side_vehicle_lateral_risk(weighted_total_lat_risk)
-
-        return True
-
-    def compute_risk_side_vehicle_cut_in_from_left(self, data, ego_np_vec_front, ego_pos_x_mean, ego_pos_x_std,
-                                                   network_output, node):
-        # Relative cutin behavior likelihoods
+            behavior_risk_requests.append(BehaviorRiskRequest(
+                FRONT_VEHICLE, vehicle_id, "idm", followvehicle_prob + nobrake_prob,
+                (fv_np_vec_rear, 2 * fv_half_length, fv_front_np_vec_rear)
+            ))
+
+        return behavior_risk_requests
+
+    def build_side_vehicle_cut_in_requests(self, data, ego_np_vec_front, network_output, node, actor_key
+                                           ) -> Optional[List[BehaviorRiskRequest]]:
+        # Relative cutin behavior likelihood, only the cut-in of the side vehicle into the ego lane is critical, i.e.
+        # the no cut-in behavior contributes zero risk to the weighted total risk
         cutin_prob = node.outcomes[0].value
-        nocutin_prob = 1.0 - cutin_prob
         # Get actor reference of side vehicle
         vehicle_id = network_output.vehicle_id
         side_vehicle: "OtherVehicle" = filter(lambda v: v.id == vehicle_id, data.other_vehicles)
         side_vehicle = next(side_vehicle, None)
         if not side_vehicle:
-            return False
+            return None
         # Note that all computations are performed in the local ego coordinate frame
         # TODO Think about whether to use rear end of side vehicle
-        sv_pos, sv_speed, sv_accel, sv_np_vec = transform_actor_kinematics_to_ego_frame(data.hero_vehicle, side_vehicle)
+        sv_pos, sv_speed, sv_accel, sv_np_vec = self.get_other_vehicle_kinematics(side_vehicle)
         # End Point of lane change behavior [x,y]
         lc_target = [ego_np_vec_front[0] + LC_CUTIN_DISTANCE_FROM_EGO, ego_np_vec_front[1]]
-        # print("Side Vehicle")
-        # print(sv_np_vec)
-        # print("Ego Vehicle")
-        # print(ego_np_vec_front)
-        # print("LC Target")
-        # print(lc_target)
-        # Generate ego lateral positions for a straight drive
-        num_positions = int((PREDICTION_HORIZON / PREDICTION_TIMESTEP + 1))
-        ego_pos_y_mean = np.zeros(num_positions)
-        ego_pos_y_std = np.full(num_positions, EGO_POS_LAT_STD)  # Assumed standard dev of ego lat pos = 0.2
-        collision_prob_x, collision_prob_y, sv_x_mean, sv_x_std, sv_y_mean, sv_y_std = (
-            lc_right_risk(ego_pos_x_mean, ego_pos_x_std, ego_pos_y_mean, ego_pos_y_std, sv_np_vec,
-                          lc_target)
-        )
-        self.stored_trajectories["LeftSideVehicleCutIn"] = (
-            list(sv_x_mean), list(sv_x_std), list(sv_y_mean), list(sv_y_std)
-        )
-        # print("Collision Probability X")
-        # print(collision_prob_x)
-        # print(collision_prob_y)
-        lc_behavior_long_risk = list()
-        lc_behavior_lat_risk = list()
-        # Assuming that only cut-in of side vehicle into ego lane is critical --> Zero Risk
-        # This is important for computing the weighted total risk
-        length_sampled_time_horizon = len(np.arange(0, PREDICTION_HORIZON + PREDICTION_TIMESTEP, PREDICTION_TIMESTEP))
-        lc_behavior_long_risk.append((list(np.zeros(length_sampled_time_horizon)), nocutin_prob))
-        lc_behavior_long_risk.append((collision_prob_x, cutin_prob))
-        # Weight the individual behavior risk scores based on BN output likelihoods
-        weighted_total_long_risk = compute_total_risk(lc_behavior_long_risk)
-        # Assuming that only cut-in of side vehicle into ego lane is critical --> Zero Risk
-        # This is important for computing the weighted total risk
-        lc_behavior_lat_risk.append((list(np.zeros(length_sampled_time_horizon)), nocutin_prob))
-        lc_behavior_lat_risk.append((collision_prob_y, cutin_prob))
-        # Weight the individual behavior risk scores based on BN output likelihoods
-        weighted_total_lat_risk = compute_total_risk(lc_behavior_lat_risk)
-        # Update the dynamic risk plot
-        self._risk_plot.set_left_side_vehicle_longitudinal_risk(weighted_total_long_risk)
-        self._risk_plot.set_left_side_vehicle_lateral_risk(weighted_total_lat_risk)
-
-        return True
+
+        return [BehaviorRiskRequest(actor_key, vehicle_id, "lanechange", cutin_prob,
+                                    (sv_np_vec, lc_target, sv_np_vec[2]))]
+
+    def store_trajectories_and_update_risk_plot(self, risk_evaluation: BehaviorRiskEvaluation) -> None:
+        num_positions = len(risk_evaluation.ego_pos_x_mean)
+        self.stored_trajectories["Ego"] = (list(risk_evaluation.ego_pos_x_mean), list(risk_evaluation.ego_pos_x_std),
+                                           [0] * num_positions, [0] * num_positions)
+
+        if FRONT_VEHICLE in risk_evaluation.actor_keys:
+            front_vehicle_risk_series = {
+                "emergency_brake": FRONT_VEHICLE_EMERGENCY_RISK,
+                "targetbrake": FRONT_VEHICLE_TARGET_BRAKE_RISK,
+                "idm": FRONT_VEHICLE_IDM_RISK,
+            }
+            for behavior, stored_trajectory_key in FRONT_VEHICLE_STORED_TRAJECTORY_KEYS.items():
+                if not risk_evaluation.has_behavior(FRONT_VEHICLE, behavior):
+                    continue
+                fv_x_mean, fv_x_std, _, _ = risk_evaluation.get_behavior_trajectory(FRONT_VEHICLE, behavior)
+                self.stored_trajectories[stored_trajectory_key] = (list(fv_x_mean), list(fv_x_std),
+                                                                   [0] * num_positions, [0] * num_positions)
+                collision_prob_x, _ = risk_evaluation.get_behavior_collision_probs(FRONT_VEHICLE, behavior)
+                self._risk_plot_values[front_vehicle_risk_series[behavior]] = collision_prob_x
+            weighted_total_risk, _ = risk_evaluation.get_total_risk(FRONT_VEHICLE)
+            self._risk_plot_values[FRONT_VEHICLE_CUMULATIVE_RISK] = list(weighted_total_risk)
+
+        side_vehicle_risk_series = {
+            RIGHT_SIDE_VEHICLE_CUT_IN: (RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK, RIGHT_SIDE_VEHICLE_LATERAL_RISK),
+            LEFT_SIDE_VEHICLE_CUT_IN: (LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK, LEFT_SIDE_VEHICLE_LATERAL_RISK),
+        }
+        for actor_key, (longitudinal_risk_series, lateral_risk_series) in side_vehicle_risk_series.items():
+            if actor_key not in risk_evaluation.actor_keys:
+                continue
+            sv_x_mean, sv_x_std, sv_y_mean, sv_y_std = risk_evaluation.get_behavior_trajectory(actor_key, "lanechange")
+            self.stored_trajectories[actor_key] = (list(sv_x_mean), list(sv_x_std), list(sv_y_mean), list(sv_y_std))
+            weighted_total_long_risk, weighted_total_lat_risk = risk_evaluation.get_total_risk(actor_key)
+            self._risk_plot_values[longitudinal_risk_series] = list(weighted_total_long_risk)
+            self._risk_plot_values[lateral_risk_series] = list(weighted_total_lat_risk)
 
     ###########
     # Logging
@@ -639,6 +616,47 @@ class SinadraClient:
             print(f"Vehicle (ID: {bn_output.vehicle_id}):\n{bn_output}\n")
             print("---------------\n")
 
+    def log_bayesian_network_posterior_cache_info(self) -> None:
+        hits, misses, hit_rate = self._bn_inference.get_posterior_cache_statistics()
+        print(f"BN posterior cache: {hits} hits, {misses} misses (hit rate = {hit_rate:.1%})\n")
+
+    def log_sensing_area_update_info(self) -> None:
+        if self._ego_sensing_areas is None:
+            return
+        full_rebuilds, incremental_updates, reuses = self._ego_sensing_areas.get_statistics()
+        print(f"Sensing areas: {full_rebuilds} full rebuilds, {incremental_updates} incremental updates, {reuses} "
+              f"reuses\n")
+
+    def log_map_matching_cache_info(self) -> None:
+        hits, misses, hit_rate = self._map.get_map_matching_cache_statistics()
+        print(f"Map matching cache: {hits} hits, {misses} misses (hit rate = {hit_rate:.1%})\n")
+
+    def log_throughput_info(self, run_time: float) -> None:
+        num_ticks = self._num_ticks
+        if num_ticks == 0:
+            print("No risk computation tick was executed")
+            return
+        tick_times_ms = np.array(self._tick_execution_times) * 1000
+        print(f"Executed {num_ticks} risk computation ticks in {run_time:.2f} s ({num_ticks / run_time:.2f} ticks/s), "
+              f"tick execution time: mean = {self._total_tick_execution_time / num_ticks * 1000:.2f} ms, "
+              f"last {len(tick_times_ms)} ticks: p50 = {np.percentile(tick_times_ms, 50):.2f} ms, "
+              f"p95 = {np.percentile(tick_times_ms, 95):.2f} ms, max = {np.max(tick_times_ms):.2f} ms\n")
+
+    def log_evaluation_data_info(self) -> None:
+        num_written, num_dropped = self._evaluation_data_writer.get_statistics()
+        print(f"Evaluation data: {num_written} cycles written, {num_dropped} cycles dropped (writer queue full)\n")
+
+    def log_instrumentation_info(self) -> None:
+        instrumentation = Instrumentation.get_instance()
+        if not instrumentation.enabled:
+            return
+        print("Span execution times (rolling window):")
+        for statistics in instrumentation.get_span_statistics():
+            print(f"{statistics.name:<45} count = {statistics.count:>7}, total = {statistics.total_time:9.2f} s, "
+                  f"p50 = {statistics.p50 * 1000:8.3f} ms, p95 = {statistics.p95 * 1000:8.3f} ms, "
+                  f"p99 = {statistics.p99 * 1000:8.3f} ms, max = {statistics.max * 1000:8.3f} ms")
+        print()
+
     def log_kinematic_info(self, ego_pos, ego_speed, fv_front_pos, fv_front_speed, fv_pos, fv_speed):
         print("Ego Vehicle")
         print(ego_pos)
@@ -652,5 +670,10 @@ class SinadraClient:
 
 
 if __name__ == "__main__":
-    simulator_controller = CarlaSimulatorController()
-    SinadraClient(simulator_controller)
+    if SINADRA_DATA_REPLAY_PATH:
+        from simulators.replay_simulator_controller import ReplaySimulatorController
+        SinadraClient(ReplaySimulatorController(SINADRA_DATA_REPLAY_PATH), headless=True).run()
+    else:
+        # CARLA is only imported if the client connects to it (replays run without the CARLA Python API)
+        from simulators.carla_simulator_controller import CarlaSimulatorController
+        SinadraClient(CarlaSimulatorController()).run()
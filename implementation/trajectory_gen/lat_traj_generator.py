@@ -7,14 +7,21 @@
 #################### END LICENSE BLOCK #################################
 import numpy as np
 import math
-from sinadra_configuration_parameters import LC_ENDPOINT_VARIATION_STD
+from typing import Callable
+from sinadra_configuration_parameters import LC_ENDPOINT_VARIATION_STD, TRAJECTORY_GENERATION_MODE, \
+    TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR, TrajectoryGenerationMode
+
+# Nodes of the Legendre-Gauss quadrature for n = 2 on [0, 1] (see https://pomax.github.io/bezierinfo/#arclength)
+LEGENDRE_GAUSS_NODES = np.array([-0.5 * 0.577 + 0.5, 0.5 * 0.577 + 0.5])
 
 ##########################################################################################
 # Trajectory Distribution Generators (Lateral Behaviors)
 ##########################################################################################
+# The generators draw their samples from the given random_state (np.random.RandomState), by default from NumPy's global
+# random state.
 
 
-def gen_lanechange(vehicle_init, lc_target, avg_curve_speed, num_traj, time_horizon, time_inc):
+def gen_lanechange(vehicle_init, lc_target, avg_curve_speed, num_traj, time_horizon, time_inc, random_state=np.random):
     '''
 
     :param vehicle_init: Side Vehicle kinematic vector, Pos is center of vehicle in ego frame
@@ -28,7 +35,7 @@ def gen_lanechange(vehicle_init, lc_target, avg_curve_speed, num_traj, time_hori
     # print(f"Time Horizon: {time_horizon}, Time Increment: {time_inc}, Num Traj: {num_traj}")
     # This is the distance accounting for the variation of cut-in distance from in front of other vehicle
     # [1,...,num_traj]
-    endpoint_x_variation_samples = np.random.normal(lc_target[0], LC_ENDPOINT_VARIATION_STD, num_traj)
+    endpoint_x_variation_samples = random_state.normal(lc_target[0], LC_ENDPOINT_VARIATION_STD, num_traj)
     # print(f'Endpoint variation:{endpoint_x_variation_samples}')
 
     all_timesteps = int(time_horizon / time_inc + 1)
@@ -60,7 +67,7 @@ def gen_lanechange(vehicle_init, lc_target, avg_curve_speed, num_traj, time_hori
         # Use Legendre-Gauss approximation for n = 2, z = 1
         # see https://pomax.github.io/bezierinfo/#arclength
         legendre_gauss = lambda vel_func, params: 0.5 * np.sum([np.linalg.norm(vel_func(x)) for x in params])
-        curve_length = legendre_gauss(vel_func, np.array([-0.5 * 0.577 + 0.5, 0.5 * 0.577 + 0.5]))
+        curve_length = legendre_gauss(vel_func, LEGENDRE_GAUSS_NODES)
         # print(f"Curve Length: {curve_length}")
 
         # Get time, when vehicle reaches endpoint given the initial speed of vehicle
@@ -132,6 +139,115 @@ def gen_lanechange(vehicle_init, lc_target, avg_curve_speed, num_traj, time_hori
     return pos_mean_x, pos_std_x, pos_mean_y, pos_std_y
 
 
+def gen_lanechange_vectorized(vehicle_init, lc_target, avg_curve_speed, num_traj, time_horizon, time_inc,
+                              random_state=np.random):
+    """Batched version of gen_lanechange that evaluates the cubic Bezier curves of all endpoint samples as one
+    (num_traj, T, 2) tensor computation instead of one Python loop iteration per sample. The random samples are drawn
+    as in gen_lanechange, thus, both implementations produce the same trajectories for the same seed.
+
+    Parameters
+    ----------
+    vehicle_init : np.ndarray
+        Side vehicle kinematic vector np.array([p_x, p_y, v_x, v_y, a_x, a_y]), position is the center of the vehicle
+        in the ego frame.
+    lc_target : List[float]
+        Mean end point [x, y] of the lane change.
+    avg_curve_speed : float
+        Average speed along the Bezier curve.
+    num_traj : int
+        Number of trajectory samples.
+    time_horizon : float
+        Prediction horizon in seconds.
+    time_inc : float
+        Time step size in seconds.
+    random_state : np.random.RandomState
+        Random state of the samples. (The default value is np.random, i.e. NumPy's global random state.)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Mean and standard deviation of the x positions and mean and standard deviation of the y positions per time step.
+    """
+    endpoint_x_variation_samples = random_state.normal(lc_target[0], LC_ENDPOINT_VARIATION_STD, num_traj)
+
+    all_timesteps = int(time_horizon / time_inc + 1)
+    avg_curve_speed = 0.001 if avg_curve_speed < 0.001 else avg_curve_speed
+
+    # Control points of all samples: (num_traj, 4, 2)
+    mid_x = vehicle_init[0] + (endpoint_x_variation_samples - vehicle_init[0]) * 0.5
+    control_points = np.empty((num_traj, 4, 2))
+    control_points[:, 0] = [vehicle_init[0], vehicle_init[1]]
+    control_points[:, 1, 0] = mid_x
+    control_points[:, 1, 1] = vehicle_init[1]
+    control_points[:, 2, 0] = mid_x
+    control_points[:, 2, 1] = lc_target[1]
+    control_points[:, 3, 0] = endpoint_x_variation_samples
+    control_points[:, 3, 1] = lc_target[1]
+    forward_differences = control_points[:, 1:4] - control_points[:, 0:3]
+
+    # Curve lengths with the Legendre-Gauss approximation for n = 2, z = 1
+    node_velocities = np.einsum("ntk,nkd->ntd", _bezier_derivative_basis(np.tile(LEGENDRE_GAUSS_NODES, (num_traj, 1))),
+                                forward_differences)
+    curve_lengths = 0.5 * np.sum(np.linalg.norm(node_velocities, axis=2), axis=1)
+    time_at_endpoint = curve_lengths / avg_curve_speed
+
+    # Number of sample times on the Bezier curve (= len(np.arange(0, time_at_endpoint, time_inc))) and the downsampling
+    # step in case of very slow longitudinal speeds (near 0)
+    num_curve_times = np.ceil(time_at_endpoint / time_inc).astype(int)
+    downsampling_step = np.where(num_curve_times > (all_timesteps - 1),
+                                 np.ceil(num_curve_times / (all_timesteps - 1)), 1).astype(int)
+    num_curve_points = -(-num_curve_times // downsampling_step)
+
+    # Parametric points for all time steps, the parametric space is [0,1] for Bezier
+    timestep_indices = np.arange(all_timesteps)
+    on_curve = timestep_indices[np.newaxis, :] < num_curve_points[:, np.newaxis]
+    curve_times = timestep_indices[np.newaxis, :] * downsampling_step[:, np.newaxis] * time_inc
+    parametric_space = np.where(on_curve, curve_times / time_at_endpoint[:, np.newaxis], 1.0)
+    positions = np.einsum("ntk,nkd->ntd", _bezier_basis(parametric_space), control_points)
+
+    # Velocity at the Bezier end normalized to match the initial speed
+    velocity_start = 3 * forward_differences[:, 0]
+    velocity_end = 3 * forward_differences[:, 2]
+    v_at_bezier_end_x = velocity_end[:, 0] / (velocity_start[:, 0] / vehicle_init[2])
+
+    # Next point after the Bezier end and constant velocity continuation until the prediction horizon
+    next_t_after_end = (num_curve_times - 1) * time_inc + time_inc
+    delta_t = next_t_after_end - time_at_endpoint
+    pos_at_bezier_end = control_points[:, 3]
+    tail_increments = np.where(timestep_indices[np.newaxis, :] > num_curve_points[:, np.newaxis],
+                               v_at_bezier_end_x[:, np.newaxis] * time_inc, 0.0)
+    tail_increments[np.arange(num_traj), np.minimum(num_curve_points, all_timesteps - 1)] = \
+        pos_at_bezier_end[:, 0] + v_at_bezier_end_x * delta_t
+    pos_x_list = np.where(on_curve, positions[:, :, 0], np.cumsum(tail_increments, axis=1))
+    pos_y_list = np.where(on_curve, positions[:, :, 1], pos_at_bezier_end[:, 1:2])
+
+    pos_x_list = np.ascontiguousarray(pos_x_list.T)
+    pos_y_list = np.ascontiguousarray(pos_y_list.T)
+    pos_mean_x = np.mean(pos_x_list, axis=1)
+    pos_mean_y = np.mean(pos_y_list, axis=1)
+    pos_std_x = np.std(pos_x_list, axis=1)
+    pos_std_y = np.std(pos_y_list, axis=1)
+    return pos_mean_x, pos_std_x, pos_mean_y, pos_std_y
+
+
+def _bezier_basis(t: np.ndarray) -> np.ndarray:
+    # Cubic Bernstein polynomials for parameter values of any shape: (..., 4)
+    mt = 1 - t
+    mt2 = mt * mt
+    mt3 = mt2 * mt
+    t2 = t * t
+    t3 = t2 * t
+    return np.stack([mt3, 3 * mt2 * t, 3 * mt * t2, t3], axis=-1)
+
+
+def _bezier_derivative_basis(t: np.ndarray) -> np.ndarray:
+    # Coefficients of the forward differences in the first derivative for parameter values of any shape: (..., 3)
+    mt = 1 - t
+    mt2 = mt * mt
+    t2 = t * t
+    return np.stack([3 * mt2, 6 * mt * t, 3 * t2], axis=-1)
+
+
 def generate_bezier(control_points: np.array, derivative: int = 0):
     # B(3, t) = (1-t)**3 * P0 + 3 * (1-t)**2*t * P1 + 3 * (1-t)*t**2 * P2 + t**3 * P3
     def internal_bezier(t: float):
@@ -165,3 +281,35 @@ def generate_bezier(control_points: np.array, derivative: int = 0):
         2: internal_bezier_second_derivative}
 
     return switch_derivative[derivative]
+
+
+##########################################################################################
+# Generator Selection
+##########################################################################################
+
+LATERAL_GENERATORS = {
+    "lanechange": {
+        TrajectoryGenerationMode.REFERENCE_SAMPLING: gen_lanechange,
+        TrajectoryGenerationMode.VECTORIZED_SAMPLING: gen_lanechange_vectorized,
+    },
+}
+
+
+def get_lateral_generator(behavior: str) -> Callable:
+    """Returns the trajectory distribution generator for the given lateral behavior according to the configured
+    TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR or TRAJECTORY_GENERATION_MODE. There is no analytic generator for the lane
+    change, thus, it falls back to vectorized sampling.
+
+    Parameters
+    ----------
+    behavior : str
+        Lateral behavior: "lanechange".
+
+    Returns
+    -------
+    Callable
+        Generator function with the signature of the corresponding gen_<behavior> function.
+    """
+    generators = LATERAL_GENERATORS[behavior]
+    mode = TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR.get(behavior, TRAJECTORY_GENERATION_MODE)
+    return generators.get(mode, generators[TrajectoryGenerationMode.VECTORIZED_SAMPLING])
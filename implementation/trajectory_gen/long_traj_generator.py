@@ -7,20 +7,25 @@
 #################### END LICENSE BLOCK #################################
 import math
 import numpy as np
+from scipy.special import ndtr
+from typing import Callable
 from sinadra_configuration_parameters import EMERGENCY_ACC_MEAN, EMERGENCY_ACC_STD, EMERGENCY_POS_STD, \
     CONST_ACCEL_MEAN, CONST_ACCEL_STD, CONST_ACCEL_POS_STD, TB_POS_STD, TB_MAX_DECELERATION, IDM_POS_STD, \
-    IDM_TIMEGAP_STD, IDM_TIME_GAP_FRONT_VEHICLE, S_0, V_DESIRED, DELTA, A_MAX, B_COMFORT
+    IDM_TIMEGAP_STD, IDM_TIME_GAP_FRONT_VEHICLE, S_0, V_DESIRED, DELTA, A_MAX, B_COMFORT, TRAJECTORY_GENERATION_MODE, \
+    TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR, TrajectoryGenerationMode
 
 ##########################################################################################
 # Trajectory Distribution Generators (Longitudinal Behaviors)
 ##########################################################################################
+# All generators draw their samples from the given random_state (np.random.RandomState), by default from NumPy's global
+# random state. A RandomState seeded with s draws the same samples as the global random state after np.random.seed(s).
 
 
-def gen_emergency_brake(kinematic_init, num_traj, time_horizon, time_inc):
+def gen_emergency_brake(kinematic_init, num_traj, time_horizon, time_inc, random_state=np.random):
     # Generate emergency deceleration and position uncertainty samples
-    d_samples = np.random.normal(EMERGENCY_ACC_MEAN, EMERGENCY_ACC_STD, num_traj)  # [1,...,num_traj]
+    d_samples = random_state.normal(EMERGENCY_ACC_MEAN, EMERGENCY_ACC_STD, num_traj)  # [1,...,num_traj]
     pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
-    pos_samples = np.random.normal(0.0, EMERGENCY_POS_STD, pos_sample_size)
+    pos_samples = random_state.normal(0.0, EMERGENCY_POS_STD, pos_sample_size)
 
     init = kinematic_init # = np.array([p_x, p_y, v_x, v_y, a_x, a_y])
     # Duplicate initial position for all trajectories to be generated
@@ -63,11 +68,11 @@ def emergency_decel_timestep(time_inc, last, decel, pos_uncertainty):
                      last[5]])
 
 
-def gen_constant_accel(vehicle_init, num_traj, time_horizon, time_inc):
+def gen_constant_accel(vehicle_init, num_traj, time_horizon, time_inc, random_state=np.random):
     # Generate constant deceleration and position uncertainty samples
-    d_samples = np.random.normal(CONST_ACCEL_MEAN, CONST_ACCEL_STD, num_traj)  # [1,...,num_traj]
+    d_samples = random_state.normal(CONST_ACCEL_MEAN, CONST_ACCEL_STD, num_traj)  # [1,...,num_traj]
     pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
-    pos_samples = np.random.normal(0.0, CONST_ACCEL_POS_STD, pos_sample_size)
+    pos_samples = random_state.normal(0.0, CONST_ACCEL_POS_STD, pos_sample_size)
 
     init = vehicle_init # = np.array([p_x, p_y, v_x, v_y, a_x, a_y])
     # Duplicate initial position for all trajectories to be generated
@@ -116,10 +121,11 @@ def constant_accel_timestep(time_inc, last, decel, pos_uncertainty):
                      last[5]])
 
 
-def gen_targetbrake(vehicle_init, target_distance, target_safe_distance, num_traj, time_horizon, time_inc):
+def gen_targetbrake(vehicle_init, target_distance, target_safe_distance, num_traj, time_horizon, time_inc,
+                    random_state=np.random):
     # Generate position uncertainty samples
     pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
-    pos_samples = np.random.normal(0.0, TB_POS_STD, pos_sample_size)
+    pos_samples = random_state.normal(0.0, TB_POS_STD, pos_sample_size)
 
     init = vehicle_init  # = np.array([p_x, p_y, v_x, v_y, a_x, a_y])
     # Duplicate initial position for all trajectories to be generated
@@ -137,7 +143,7 @@ def gen_targetbrake(vehicle_init, target_distance, target_safe_distance, num_tra
 
     # Standard deviation chosen according to Schreier paper
     # [1,...,num_traj]
-    safe_distance_variation_samples = np.random.normal(0.0, (target_safe_distance / 3.0) ** 2, num_traj)
+    safe_distance_variation_samples = random_state.normal(0.0, (target_safe_distance / 3.0) ** 2, num_traj)
 
     for i in range(0, num_traj):
         # This is the safe distance accounting for the variation of distance from target among different drivers
@@ -192,7 +198,8 @@ def targetbrake_timestep(time_inc, last, decel, pos_uncertainty):
                      last[5]])
 
 
-def gen_idm(vehicle_init_rear, vehicle_length, vehicle_front_init_rear, num_traj, time_horizon, time_inc):
+def gen_idm(vehicle_init_rear, vehicle_length, vehicle_front_init_rear, num_traj, time_horizon, time_inc,
+            random_state=np.random):
     """
 
     Parameters
@@ -213,8 +220,8 @@ def gen_idm(vehicle_init_rear, vehicle_length, vehicle_front_init_rear, num_traj
 
     # Generate constant deceleration and position uncertainty samples
     pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
-    pos_samples = np.random.normal(0.0, IDM_POS_STD, pos_sample_size)
-    timegap_samples = np.random.normal(0.0, IDM_TIMEGAP_STD, pos_sample_size)
+    pos_samples = random_state.normal(0.0, IDM_POS_STD, pos_sample_size)
+    timegap_samples = random_state.normal(0.0, IDM_TIMEGAP_STD, pos_sample_size)
 
     init = vehicle_init_rear  # init = np.array([p_x, p_y, v_x, v_y, a_x, a_y])
     # Duplicate initial position for all trajectories to be generated
@@ -292,3 +299,296 @@ def idm_timestep(time_inc, last, length_self, vehicle_front_init, timegap_sample
                      last[3],
                      chosen_acceleration,
                      last[5]])
+
+
+##########################################################################################
+# Vectorized Trajectory Distribution Generators (Longitudinal Behaviors)
+##########################################################################################
+# Drop-in replacements of the generators above that advance all trajectory samples of a time step as one
+# (num_traj, 6) array operation. The random samples are drawn in the same order as by the generators above, thus, both
+# implementations produce the same trajectories for the same seed.
+
+
+def _init_sample_states(kinematic_init, num_traj, pos_samples):
+    # Duplicate initial kinematics (np.array([p_x, p_y, v_x, v_y, a_x, a_y])) for all trajectories and apply the
+    # initial position uncertainty
+    states = np.tile(np.asarray(kinematic_init, dtype=float), (num_traj, 1))
+    states[:, 0] = kinematic_init[0] + pos_samples[:num_traj]
+    return states
+
+
+def _sample_index_for_time_steps(time_horizon, time_inc):
+    # Index of the position uncertainty samples used in each time step (same indexing as in the generators above)
+    time_steps = np.arange(time_inc, time_horizon + time_inc, time_inc)
+    return [int(1 / time_inc * time_idx) for time_idx in time_steps]
+
+
+def _propagate_samples(states, decel, pos_uncertainty, time_inc):
+    # p_t+1 = p_t + v_t * dt + a * dt * dt
+    # v_t+1 = v_t + a * dt
+    # Stopped vehicles (v_t <= 0) keep their position with zero velocity and acceleration
+    moving = states[:, 2] > 0
+    new_pos = states[:, 0] + states[:, 2] * time_inc + decel * time_inc * time_inc + pos_uncertainty
+    new_v = states[:, 2] + decel * time_inc
+    states[:, 0] = np.where(moving, new_pos, states[:, 0])
+    states[:, 2] = np.where(moving, new_v, 0.0)
+    states[:, 4] = np.where(moving, decel, 0.0)
+
+
+def gen_emergency_brake_vectorized(kinematic_init, num_traj, time_horizon, time_inc, random_state=np.random):
+    # Generate emergency deceleration and position uncertainty samples
+    d_samples = random_state.normal(EMERGENCY_ACC_MEAN, EMERGENCY_ACC_STD, num_traj)  # [1,...,num_traj]
+    pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
+    pos_samples = random_state.normal(0.0, EMERGENCY_POS_STD, pos_sample_size)
+
+    states = _init_sample_states(kinematic_init, num_traj, pos_samples)
+    pos_list = np.empty((int(time_horizon / time_inc) + 1, num_traj))
+    pos_list[0] = states[:, 0]
+    for step, sample_idx in enumerate(_sample_index_for_time_steps(time_horizon, time_inc), start=1):
+        pos_uncertainty = pos_samples[sample_idx * num_traj:(sample_idx + 1) * num_traj]
+        _propagate_samples(states, d_samples, pos_uncertainty, time_inc)
+        pos_list[step] = states[:, 0]
+
+    return np.mean(pos_list, axis=1), np.std(pos_list, axis=1)
+
+
+def gen_constant_accel_vectorized(vehicle_init, num_traj, time_horizon, time_inc, random_state=np.random):
+    # Generate constant deceleration and position uncertainty samples
+    d_samples = random_state.normal(CONST_ACCEL_MEAN, CONST_ACCEL_STD, num_traj)  # [1,...,num_traj]
+    pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
+    pos_samples = random_state.normal(0.0, CONST_ACCEL_POS_STD, pos_sample_size)
+
+    states = _init_sample_states(vehicle_init, num_traj, pos_samples)
+    pos_list = np.empty((int(time_horizon / time_inc) + 1, num_traj))
+    pos_list[0] = states[:, 0]
+    for step, sample_idx in enumerate(_sample_index_for_time_steps(time_horizon, time_inc), start=1):
+        pos_uncertainty = pos_samples[sample_idx * num_traj:(sample_idx + 1) * num_traj]
+        # the sampled acceleration change accumulates in every time step (see constant_accel_timestep)
+        _propagate_samples(states, states[:, 4] + d_samples, pos_uncertainty, time_inc)
+        pos_list[step] = states[:, 0]
+
+    return np.mean(pos_list, axis=1), np.std(pos_list, axis=1)
+
+
+def gen_targetbrake_vectorized(vehicle_init, target_distance, target_safe_distance, num_traj, time_horizon,
+                               time_inc, random_state=np.random):
+    # Generate position uncertainty samples
+    pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
+    pos_samples = random_state.normal(0.0, TB_POS_STD, pos_sample_size)
+
+    states = _init_sample_states(vehicle_init, num_traj, pos_samples)
+
+    # Constant deceleration samples based on target distance variation (see gen_targetbrake)
+    safe_distance_variation_samples = random_state.normal(0.0, (target_safe_distance / 3.0) ** 2, num_traj)
+    intended_stop_point_samples = target_distance - target_safe_distance + safe_distance_variation_samples
+    dist_from_intended_stop_samples = intended_stop_point_samples - states[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        req_decelerations = - (states[:, 2] ** 2) / (2 * dist_from_intended_stop_samples)
+    d_samples = np.where(dist_from_intended_stop_samples > 0,
+                         np.maximum(req_decelerations, TB_MAX_DECELERATION), 0.0)
+
+    pos_list = np.empty((int(time_horizon / time_inc) + 1, num_traj))
+    pos_list[0] = states[:, 0]
+    for step, sample_idx in enumerate(_sample_index_for_time_steps(time_horizon, time_inc), start=1):
+        pos_uncertainty = pos_samples[sample_idx * num_traj:(sample_idx + 1) * num_traj]
+        _propagate_samples(states, d_samples, pos_uncertainty, time_inc)
+        pos_list[step] = states[:, 0]
+
+    return np.mean(pos_list, axis=1), np.std(pos_list, axis=1)
+
+
+def gen_idm_vectorized(vehicle_init_rear, vehicle_length, vehicle_front_init_rear, num_traj, time_horizon, time_inc,
+                       random_state=np.random):
+    # Generate position and time gap uncertainty samples
+    pos_sample_size = int((time_horizon / time_inc + 1) * num_traj)
+    pos_samples = random_state.normal(0.0, IDM_POS_STD, pos_sample_size)
+    timegap_samples = random_state.normal(0.0, IDM_TIMEGAP_STD, pos_sample_size)
+
+    states = _init_sample_states(vehicle_init_rear, num_traj, pos_samples)
+
+    # Constant speed assumption regarding front front vehicle (see idm_timestep)
+    v_other = vehicle_front_init_rear[2]
+    pos_other = vehicle_front_init_rear[0] + v_other * time_inc
+
+    pos_list = np.empty((int(time_horizon / time_inc) + 1, num_traj))
+    pos_list[0] = states[:, 0]
+    for step, sample_idx in enumerate(_sample_index_for_time_steps(time_horizon, time_inc), start=1):
+        sample_slice = slice(sample_idx * num_traj, (sample_idx + 1) * num_traj)
+        pos_uncertainty = pos_samples[sample_slice]
+        desired_time_gap = IDM_TIME_GAP_FRONT_VEHICLE + timegap_samples[sample_slice]  # [s]
+
+        # IDM Equations
+        v_self = states[:, 2]
+        distance = pos_other - (states[:, 0] + vehicle_length)
+        a_free_flow = 1 - (v_self / V_DESIRED) ** DELTA
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a_interaction = -((S_0 + v_self * desired_time_gap + (v_self * (v_self - v_other))
+                               / (2 * math.sqrt(A_MAX * B_COMFORT))) / distance) ** 2
+        chosen_acceleration = A_MAX * (a_free_flow + a_interaction)
+
+        # Assuring that the position does not get smaller (driving backwards) and that the velocity does not get
+        # negative, stopped vehicles keep their position with zero velocity and acceleration
+        moving = v_self > 0
+        new_v = np.maximum(v_self + chosen_acceleration * time_inc, 0.0)
+        new_pos = states[:, 0] + v_self * time_inc + chosen_acceleration * time_inc * time_inc + pos_uncertainty
+        new_pos = np.maximum(new_pos, states[:, 0])
+        states[:, 0] = np.where(moving, new_pos, states[:, 0])
+        states[:, 2] = np.where(moving, new_v, 0.0)
+        states[:, 4] = np.where(moving, chosen_acceleration, 0.0)
+        pos_list[step] = states[:, 0]
+
+    return np.mean(pos_list, axis=1), np.std(pos_list, axis=1)
+
+
+##########################################################################################
+# Analytic Trajectory Distribution Generators (Longitudinal Behaviors)
+##########################################################################################
+# Closed-form moment propagation for the behaviors with a Gaussian acceleration sample d ~ N(acc_mean, acc_std²) per
+# trajectory and Gaussian position noise per time step. Given d, the acceleration in step j is A_j = g_j + h_j * d,
+# thus, velocity and position are linear in d until the vehicle stops (v <= 0). The step in which a trajectory stops
+# only depends on d and is constant on intervals of d, so that the position mean and standard deviation follow from the
+# partial moments of the normal distribution on these intervals. No samples are drawn, the num_traj and random_state
+# parameters are only kept for a signature compatible with the sampling generators.
+
+
+def _standard_normal_partial_moments(lower, upper):
+    # P(l < z <= u), E[z * 1{l < z <= u}] and E[z² * 1{l < z <= u}] for z ~ N(0, 1), the bounds may be infinite
+    finite_lower = np.where(np.isfinite(lower), lower, 0.0)
+    finite_upper = np.where(np.isfinite(upper), upper, 0.0)
+    pdf_lower = np.exp(-0.5 * finite_lower ** 2) * np.isfinite(lower) / math.sqrt(2 * math.pi)
+    pdf_upper = np.exp(-0.5 * finite_upper ** 2) * np.isfinite(upper) / math.sqrt(2 * math.pi)
+    prob = np.maximum(ndtr(upper) - ndtr(lower), 0.0)
+    first_moment = pdf_lower - pdf_upper
+    second_moment = prob + finite_lower * pdf_lower - finite_upper * pdf_upper
+    return prob, first_moment, second_moment
+
+
+def _propagate_linear_acceleration_moments(kinematic_init, acc_mean, acc_std, pos_std, acc_offsets, acc_factors,
+                                           time_inc):
+    """Computes the position mean and standard deviation per time step of trajectories that are propagated as in
+    _propagate_samples with the acceleration A_j = acc_offsets[j - 1] + acc_factors[j - 1] * d in step j, where
+    d ~ N(acc_mean, acc_std²), including the stop at zero velocity.
+
+    Parameters
+    ----------
+    kinematic_init : np.ndarray
+        Initial kinematic vector np.array([p_x, p_y, v_x, v_y, a_x, a_y]).
+    acc_mean : float
+        Mean of the acceleration sample d.
+    acc_std : float
+        Standard deviation of the acceleration sample d.
+    pos_std : float
+        Standard deviation of the position noise added initially and in every time step.
+    acc_offsets : np.ndarray
+        Constant part of the acceleration in each of the N time steps.
+    acc_factors : np.ndarray
+        Factor of the acceleration sample d in the acceleration of each of the N time steps.
+    time_inc : float
+        Time step size in seconds.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Position mean and standard deviation of the N + 1 time steps.
+    """
+    num_steps = len(acc_offsets)
+
+    # Velocity after step j: v_j = v_alpha[j] + v_beta[j] * d
+    v_alpha = kinematic_init[2] + time_inc * np.concatenate([[0.0], np.cumsum(acc_offsets)])
+    v_beta = time_inc * np.concatenate([[0.0], np.cumsum(acc_factors)])
+    # Position change after m executed steps (without noise): pos_offsets[m] + pos_factors[m] * d
+    pos_offsets = np.concatenate([[0.0], np.cumsum(v_alpha[:-1] * time_inc + acc_offsets * time_inc * time_inc)])
+    pos_factors = np.concatenate([[0.0], np.cumsum(v_beta[:-1] * time_inc + acc_factors * time_inc * time_inc)])
+    # ... and with the standardized sample z = (d - acc_mean) / acc_std
+    pos_offsets = pos_offsets + pos_factors * acc_mean
+    pos_factors = pos_factors * acc_std
+
+    # The vehicle is stopped after step j (v_j <= 0) for z <= stop_thresholds[j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if acc_std > 0:
+            stop_thresholds = np.where(v_beta > 0, (-v_alpha / v_beta - acc_mean) / acc_std,
+                                       np.where(v_alpha <= 0, np.inf, -np.inf))
+        else:
+            stop_thresholds = np.where(v_alpha + v_beta * acc_mean <= 0, np.inf, -np.inf)
+    # The first stop is at step s or earlier for z <= running maximum of the thresholds up to s
+    stop_bounds = np.maximum.accumulate(stop_thresholds)
+
+    # Number of executed steps at time step k: m = min(k, s), event intervals of z with shape (k, m)
+    time_steps = np.arange(num_steps + 1)
+    executed_steps = time_steps[np.newaxis, :]
+    lower = np.concatenate([[-np.inf], stop_bounds[:-1]])[np.newaxis, :].repeat(num_steps + 1, axis=0)
+    upper = np.where(executed_steps < time_steps[:, np.newaxis], stop_bounds[np.newaxis, :], np.inf)
+    upper = np.maximum(upper, lower)
+    prob, first_moment, second_moment = _standard_normal_partial_moments(lower, upper)
+    valid = executed_steps <= time_steps[:, np.newaxis]
+    prob, first_moment, second_moment = prob * valid, first_moment * valid, second_moment * valid
+
+    pos_mean = np.sum(pos_offsets * prob + pos_factors * first_moment, axis=1)
+    centered_offsets = pos_offsets[np.newaxis, :] - pos_mean[:, np.newaxis]
+    pos_var = np.sum(centered_offsets ** 2 * prob + 2 * centered_offsets * pos_factors * first_moment
+                     + pos_factors ** 2 * second_moment, axis=1)
+    # One position noise sample initially and one per executed step
+    pos_var = pos_var + pos_std ** 2 * np.sum((executed_steps + 1) * prob, axis=1)
+
+    return kinematic_init[0] + pos_mean, np.sqrt(np.maximum(pos_var, 0.0))
+
+
+def gen_emergency_brake_analytic(kinematic_init, num_traj, time_horizon, time_inc, random_state=np.random):
+    # Constant sampled deceleration: A_j = d
+    num_steps = int(time_horizon / time_inc)
+    return _propagate_linear_acceleration_moments(kinematic_init, EMERGENCY_ACC_MEAN, EMERGENCY_ACC_STD,
+                                                  EMERGENCY_POS_STD, np.zeros(num_steps), np.ones(num_steps), time_inc)
+
+
+def gen_constant_accel_analytic(vehicle_init, num_traj, time_horizon, time_inc, random_state=np.random):
+    # The sampled acceleration change accumulates in every time step (see constant_accel_timestep): A_j = a_0 + j * d
+    num_steps = int(time_horizon / time_inc)
+    return _propagate_linear_acceleration_moments(vehicle_init, CONST_ACCEL_MEAN, CONST_ACCEL_STD, CONST_ACCEL_POS_STD,
+                                                  np.full(num_steps, float(vehicle_init[4])),
+                                                  np.arange(1, num_steps + 1, dtype=float), time_inc)
+
+
+##########################################################################################
+# Generator Selection
+##########################################################################################
+
+LONGITUDINAL_GENERATORS = {
+    "emergency_brake": {
+        TrajectoryGenerationMode.REFERENCE_SAMPLING: gen_emergency_brake,
+        TrajectoryGenerationMode.VECTORIZED_SAMPLING: gen_emergency_brake_vectorized,
+        TrajectoryGenerationMode.ANALYTIC_PROPAGATION: gen_emergency_brake_analytic,
+    },
+    "constant_accel": {
+        TrajectoryGenerationMode.REFERENCE_SAMPLING: gen_constant_accel,
+        TrajectoryGenerationMode.VECTORIZED_SAMPLING: gen_constant_accel_vectorized,
+        TrajectoryGenerationMode.ANALYTIC_PROPAGATION: gen_constant_accel_analytic,
+    },
+    "targetbrake": {
+        TrajectoryGenerationMode.REFERENCE_SAMPLING: gen_targetbrake,
+        TrajectoryGenerationMode.VECTORIZED_SAMPLING: gen_targetbrake_vectorized,
+    },
+    "idm": {
+        TrajectoryGenerationMode.REFERENCE_SAMPLING: gen_idm,
+        TrajectoryGenerationMode.VECTORIZED_SAMPLING: gen_idm_vectorized,
+    },
+}
+
+
+def get_longitudinal_generator(behavior: str) -> Callable:
+    """Returns the trajectory distribution generator for the given longitudinal behavior according to the configured
+    TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR or TRAJECTORY_GENERATION_MODE. Behaviors without an analytic generator
+    (target brake, IDM) fall back to vectorized sampling.
+
+    Parameters
+    ----------
+    behavior : str
+        Longitudinal behavior: "emergency_brake", "constant_accel", "targetbrake" or "idm".
+
+    Returns
+    -------
+    Callable
+        Generator function with the signature of the corresponding gen_<behavior> function.
+    """
+    generators = LONGITUDINAL_GENERATORS[behavior]
+    mode = TRAJECTORY_GENERATION_MODE_BY_BEHAVIOR.get(behavior, TRAJECTORY_GENERATION_MODE)
+    return generators.get(mode, generators[TrajectoryGenerationMode.VECTORIZED_SAMPLING])
@@ -9,7 +9,6 @@
 import matplotlib.pyplot as plt
 from matplotlib.transforms import Affine2D
 from matplotlib import rc
-import pickle
 
 # TODO: Import the parameters as soon as the configuration script does not depend on CARLA anymore
 # Difficult because carla is imported in the configuration script
@@ -188,9 +187,11 @@ def save_and_plot_vehicle_trajectories_with_distribution_single(ego_trajectory,
 
 
 if __name__ == '__main__':
-    ##########################
-    # Load Trajectories File #
-    ##########################
+    #####################
+    # Load Trajectories #
+    #####################
+    # Imported here, as the plot function itself does not need the evaluation data writer
+    from evaluation_data_writer import load_stored_trajectories
 
     stored_data_directory = "./stored_data/"
     scenario_data_directory = "LF3_50_trajectories/"
@@ -198,15 +199,11 @@ if __name__ == '__main__':
     file_cycle_counter = 160  # "scenario tick"
     # file_cycle_counter = 248  # "scenario tick"
     file_cycle_counter += start_cycle_counter  # corresponding file name counter
-    file_postfix = "_trajectories.pickle"
     plot_postfix = "_trajectories_plot.png"
 
-    pickle_file_path = f"{stored_data_directory}{scenario_data_directory}{file_cycle_counter}{file_postfix}"
     plot_file_path = f"{stored_data_directory}{scenario_data_directory}{file_cycle_counter}{plot_postfix}"
 
-    trajectories_file = open(pickle_file_path, "rb")
-    trajectories = pickle.load(trajectories_file)
-    trajectories_file.close()
+    trajectories = load_stored_trajectories(f"{stored_data_directory}{scenario_data_directory}", file_cycle_counter)
 
     ########################
     # Extract Trajectories #
@@ -0,0 +1,43 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+
+import numpy as np
+from typing import TYPE_CHECKING
+
+try:
+    # Shapely >= 2.0
+    from shapely import contains_xy, prepare
+except ImportError:
+    # Shapely 1.x, the vectorized predicate prepares the geometry itself
+    from shapely.vectorized import contains as contains_xy
+    prepare = None
+
+if TYPE_CHECKING:
+    from shapely.geometry import Polygon
+
+
+def points_in_polygon(polygon: "Polygon", points: np.ndarray) -> np.ndarray:
+    """Returns for each point whether it lies in the interior of the polygon (same as Polygon.contains for each point)
+    in one vectorized call against the prepared polygon.
+
+    Parameters
+    ----------
+    polygon : Polygon
+        Shapely polygon (e.g. a sensing area).
+    points : np.ndarray
+        Points (x, y), shape (..., 2). NaN points are never contained.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean array of shape (...) that is True for the points inside the polygon.
+    """
+    points = np.asarray(points, dtype=float)
+    if prepare is not None:
+        prepare(polygon)
+    return np.asarray(contains_xy(polygon, points[..., 0], points[..., 1]), dtype=bool)
@@ -0,0 +1,299 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+
+from sinadra_configuration_parameters import INSTRUMENTATION_ENABLED, INSTRUMENTATION_WINDOW_SIZE, \
+    INSTRUMENTATION_TRACE_PATH, INSTRUMENTATION_TRACE_MAX_EVENTS
+
+# Spans of the risk computation loop:
+# tick, situation_classification, bn_id_selection, feature_extraction, file_extraction, inference (waiting for the
+# next BN output), trajectory_generation.<behavior> (including the ego trajectory), risk.<behavior> (risk calls of
+# single behaviors), risk.behaviors (batched risk call of all behaviors of a tick), plot_update, plot_draw and
+# plot_compose (on the render thread)
+
+
+@dataclass()
+class SpanStatistics:
+    """Data class holding the execution time statistics of a span. The percentiles are computed over the rolling
+    window of the most recent durations. (Python dataclasses.dataclass object.)
+
+    Attributes
+    ----------
+    name : str
+        Name of the span.
+    count : int
+        Number of recorded durations since the last reset.
+    total_time : float
+        Sum of all recorded durations since the last reset in seconds [s].
+    p50 : float
+        Median duration of the rolling window in seconds [s].
+    p95 : float
+        95th percentile duration of the rolling window in seconds [s].
+    p99 : float
+        99th percentile duration of the rolling window in seconds [s].
+    max : float
+        Maximal duration of the rolling window in seconds [s].
+    """
+
+    name: str
+    count: int
+    total_time: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class _SpanHistogram:
+    # Ring buffer of the most recent durations of a span
+
+    __slots__ = ("durations", "num_durations", "next_index", "count", "total_time")
+
+    def __init__(self, window_size: int) -> None:
+        self.durations: List[float] = [0.0] * window_size
+        self.num_durations = 0
+        self.next_index = 0
+        self.count = 0
+        self.total_time = 0.0
+
+    def add(self, duration: float) -> None:
+        self.durations[self.next_index] = duration
+        self.next_index += 1
+        if self.next_index == len(self.durations):
+            self.next_index = 0
+        if self.num_durations < len(self.durations):
+            self.num_durations += 1
+        self.count += 1
+        self.total_time += duration
+
+    def get_statistics(self, name: str) -> SpanStatistics:
+        durations = self.durations[:self.num_durations]
+        p50, p95, p99 = np.percentile(durations, (50, 95, 99))
+        return SpanStatistics(name, self.count, self.total_time, float(p50), float(p95), float(p99),
+                              float(np.max(durations)))
+
+
+class _NullSpan:
+    # Span of a disabled instrumentation, a single shared instance that measures nothing
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+
+    __slots__ = ("_instrumentation", "_name", "_start")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str) -> None:
+        self._instrumentation = instrumentation
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self._instrumentation.add_span(self._name, self._start, time.perf_counter())
+
+
+class Instrumentation:
+    """Execution time measurement of named spans (e.g. the stages of the risk computation loop). For each span name,
+    the rolling p50, p95 and p99 percentiles of the most recent durations are kept. Optionally, the most recent spans
+    of a run (up to trace_max_events) are kept as Chrome trace events (chrome://tracing, Perfetto). A disabled
+    instrumentation hands out a shared span object that measures nothing, thus, the instrumented code runs at (almost)
+    full speed.
+
+    Attributes
+    ----------
+    enabled : bool
+        Measure the spans. Spans that are entered while disabled are not recorded.
+    window_size : int
+        Number of most recent durations per span from which the percentiles are computed.
+    trace_path : Optional[str]
+        Path of the Chrome trace JSON file (see write_chrome_trace). The trace events are only kept if a path is set.
+    trace_max_events : int
+        Maximal number of kept trace events, the oldest events are dropped if more spans are recorded.
+    """
+
+    _instance: Optional["Instrumentation"] = None
+
+    def __init__(self, enabled: bool = INSTRUMENTATION_ENABLED, window_size: int = INSTRUMENTATION_WINDOW_SIZE,
+                 trace_path: Optional[str] = INSTRUMENTATION_TRACE_PATH,
+                 trace_max_events: int = INSTRUMENTATION_TRACE_MAX_EVENTS) -> None:
+        self.enabled = enabled
+        self.window_size = window_size
+        self.trace_path = trace_path
+        self.trace_max_events = trace_max_events
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, _SpanHistogram] = {}
+        # (name, start, end, process id, thread id) of the most recent spans for the Chrome trace
+        self._trace_events: Deque[Tuple[str, float, float, int, int]] = deque(maxlen=trace_max_events)
+        self._num_dropped_trace_events = 0
+        self._trace_origin = time.perf_counter()
+
+    @classmethod
+    def get_instance(cls) -> "Instrumentation":
+        """Returns the instrumentation of the current process and creates it on first access.
+
+        Returns
+        -------
+        Instrumentation
+            Process-wide instrumentation instance.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def span(self, name: str):
+        """Returns a context manager that measures the execution time of its block as span with the given name.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span, e.g. "inference".
+
+        Returns
+        -------
+        ContextManager
+            Span of the block (a shared no-op span if the instrumentation is disabled).
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def add_span(self, name: str, start: float, end: float, process_id: Optional[int] = None,
+                 thread_id: Optional[int] = None) -> None:
+        """Records a span that was measured with time.perf_counter(), e.g. in a worker process (the performance
+        counter is system-wide on Linux, thus, the spans of the worker processes line up in the trace).
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+        start : float
+            Performance counter at the start of the span in seconds [s].
+        end : float
+            Performance counter at the end of the span in seconds [s].
+        process_id : Optional[int]
+            Id of the process that executed the span. (The default value is None, i.e. the current process.)
+        thread_id : Optional[int]
+            Id of the thread that executed the span. (The default value is None, i.e. the current thread.)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _SpanHistogram(self.window_size)
+            histogram.add(end - start)
+            if self.trace_path is not None:
+                if len(self._trace_events) == self.trace_max_events:
+                    self._num_dropped_trace_events += 1
+                self._trace_events.append((name, start, end,
+                                           os.getpid() if process_id is None else process_id,
+                                           threading.get_ident() if thread_id is None else thread_id))
+
+    def get_span_statistics(self) -> List[SpanStatistics]:
+        """Returns the statistics of all recorded spans.
+
+        Returns
+        -------
+        List[SpanStatistics]
+            Statistics of each span name (in the order of their first occurrence).
+        """
+        with self._lock:
+            return [histogram.get_statistics(name) for name, histogram in self._histograms.items()]
+
+    def get_span_percentiles(self, name: str) -> Optional[Tuple[float, float, float]]:
+        """Returns the rolling percentiles of the given span.
+
+        Parameters
+        ----------
+        name : str
+            Name of the span.
+
+        Returns
+        -------
+        Optional[Tuple[float, float, float]]
+            p50, p95 and p99 duration in seconds [s] or None if the span was not recorded yet.
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                return None
+            statistics = histogram.get_statistics(name)
+        return statistics.p50, statistics.p95, statistics.p99
+
+    def write_chrome_trace(self, path: Optional[str] = None) -> None:
+        """Writes the kept spans (the most recent trace_max_events spans since the last reset) as complete events of
+        the Chrome trace event format.
+
+        Parameters
+        ----------
+        path : Optional[str]
+            Path of the JSON file. (The default value is None, i.e. the trace_path of the instrumentation.)
+        """
+        path = self.trace_path if path is None else path
+        with self._lock:
+            trace_events = [{"name": name, "cat": "sinadra", "ph": "X", "pid": process_id, "tid": thread_id,
+                             "ts": (start - self._trace_origin) * 1e6, "dur": (end - start) * 1e6}
+                            for name, start, end, process_id, thread_id in self._trace_events]
+            num_dropped_trace_events = self._num_dropped_trace_events
+
+        if num_dropped_trace_events:
+            print(f"Chrome trace: the {num_dropped_trace_events} oldest spans were dropped (trace_max_events = "
+                  f"{self.trace_max_events})")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+
+    def reset(self) -> None:
+        """Discards all recorded spans."""
+        with self._lock:
+            self._histograms = {}
+            self._trace_events = deque(maxlen=self.trace_max_events)
+            self._num_dropped_trace_events = 0
+            self._trace_origin = time.perf_counter()
+
+
+def span(name: str):
+    """Returns a span of the process-wide instrumentation (see Instrumentation.span).
+
+    Parameters
+    ----------
+    name : str
+        Name of the span, e.g. "inference".
+
+    Returns
+    -------
+    ContextManager
+        Span of the block (a shared no-op span if the instrumentation is disabled).
+    """
+    # Same as Instrumentation.get_instance().span(name) without the method calls, as spans are entered in hot loops
+    instrumentation = Instrumentation._instance
+    if instrumentation is None:
+        instrumentation = Instrumentation.get_instance()
+    if not instrumentation.enabled:
+        return _NULL_SPAN
+    return _Span(instrumentation, name)
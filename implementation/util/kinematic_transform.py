@@ -8,11 +8,14 @@
 
 import numpy as np
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import Sequence, Tuple, TYPE_CHECKING
+
+from data_model.actor_snapshot import ActorSnapshot
+from data_model.positions import locations_to_array
 
 if TYPE_CHECKING:
-    from data_model.vehicle import EgoVehicle, OtherVehicle
-    from data_model.positions import Location, Vector3D
+    from data_model.vehicle import EgoVehicle, OtherVehicle, Vehicle
+    from data_model.positions import Location
 
 
 @dataclass
@@ -34,60 +37,110 @@ class Acceleration:
     lat: float = 0.0
 
 
-def transform_actor_kinematics_to_ego_frame(ego: "EgoVehicle", other: "OtherVehicle"):
-    global_to_ego_matrix = np.array(ego.get_world_position().get_inverse_matrix())
-    other_loc_g: "Location" = other.get_world_position().location
-    other_loc_g_homog = np.array([other_loc_g.x, other_loc_g.y, other_loc_g.z, 1])
-    other_loc_e_homog = global_to_ego_matrix.dot(other_loc_g_homog)
-
-    global_to_ego_matrix_rot_only = global_to_ego_matrix
-    # Cancel out translation as only rotation shall be applied to consider different directions, but similar abs value
-    global_to_ego_matrix_rot_only[:, 3] = np.array([0, 0, 0, 1])
+def get_global_to_ego_matrix(ego: "EgoVehicle") -> np.ndarray:
+    """Returns the 4x4 transformation matrix from global coordinates into the ego frame. The matrix only depends on
+    the ego pose, thus, it is computed once per tick and shared by all transformations of the tick.
+
+    Parameters
+    ----------
+    ego : EgoVehicle
+        Ego vehicle
+
+    Returns
+    -------
+    np.ndarray
+        4x4 inverse transformation matrix of the ego vehicle
+    """
+    return np.array(ego.get_world_position().get_inverse_matrix(), dtype=float)
+
+
+def transform_kinematics_to_ego_frame(global_to_ego_matrix: np.ndarray, locations: np.ndarray,
+                                      velocities: np.ndarray, accelerations: np.ndarray) -> np.ndarray:
+    """Transforms the global locations, velocities and accelerations of N actors into the ego frame in one matrix
+    multiplication. Locations are transformed with rotation and translation, velocities and accelerations only with the
+    rotation (homogeneous coordinate 0) to consider different directions, but similar abs value.
+
+    Parameters
+    ----------
+    global_to_ego_matrix : np.ndarray
+        4x4 transformation matrix into the ego frame (see get_global_to_ego_matrix)
+    locations : np.ndarray
+        Global locations (x, y, z), shape (N, 3)
+    velocities : np.ndarray
+        Global velocity vectors (x, y, z), shape (N, 3)
+    accelerations : np.ndarray
+        Global acceleration vectors (x, y, z), shape (N, 3)
+
+    Returns
+    -------
+    np.ndarray
+        Kinematic vectors [p_x, p_y, v_x, v_y, a_x, a_y] in the ego frame, shape (N, 6), one row per actor as used as
+        kinematic_init by the trajectory generators
+    """
+    locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+    num_actors = len(locations)
+    homogeneous = np.zeros((3, num_actors, 4))
+    homogeneous[0, :, :3] = locations
+    homogeneous[0, :, 3] = 1.0
+    homogeneous[1, :, :3] = np.asarray(velocities, dtype=float).reshape(-1, 3)
+    homogeneous[2, :, :3] = np.asarray(accelerations, dtype=float).reshape(-1, 3)
+
+    transformed = homogeneous.reshape(-1, 4) @ global_to_ego_matrix[:2].T
+    # (location, velocity, acceleration) x actor x (x, y) -> actor x (location, velocity, acceleration) x (x, y)
+    return transformed.reshape(3, num_actors, 2).transpose(1, 0, 2).reshape(num_actors, 6)
+
+
+def transform_vehicle_kinematics_to_ego_frame(ego: "EgoVehicle", vehicles: Sequence["Vehicle"]) -> np.ndarray:
+    """Transforms the kinematics of the given vehicles into the ego frame. The arrays of vehicle views on one actor
+    snapshot are read from the snapshot directly.
+
+    Parameters
+    ----------
+    ego : EgoVehicle
+        Ego vehicle
+    vehicles : Sequence[Vehicle]
+        Vehicles (views on a snapshot or regular vehicle objects)
+
+    Returns
+    -------
+    np.ndarray
+        Kinematic vectors [p_x, p_y, v_x, v_y, a_x, a_y] in the ego frame, shape (number of vehicles, 6)
+    """
+    snapshot = ActorSnapshot.get_common_snapshot(vehicles)
+    if snapshot is not None:
+        indices = [vehicle._snapshot_index for vehicle in vehicles]
+        locations = snapshot.locations[indices]
+        velocities = snapshot.velocities[indices]
+        accelerations = snapshot.accelerations[indices]
+    else:
+        locations = locations_to_array([vehicle.get_world_position().location for vehicle in vehicles])
+        velocities = locations_to_array([vehicle.get_velocity() for vehicle in vehicles])
+        accelerations = locations_to_array([vehicle.get_acceleration_vector() for vehicle in vehicles])
+    return transform_kinematics_to_ego_frame(get_global_to_ego_matrix(ego), locations, velocities, accelerations)
+
+
+def get_kinematics_from_vector(np_vec: np.ndarray) -> Tuple[Pose, Velocity, Acceleration]:
+    """Returns the pose, velocity and acceleration of a kinematic vector [p_x, p_y, v_x, v_y, a_x, a_y]."""
+    return (Pose(np_vec[0], np_vec[1]), Velocity(np_vec[2], np_vec[3]), Acceleration(np_vec[4], np_vec[5]))
 
-    other_speed_o: "Vector3D" = other.get_velocity()
-    other_speed_o_homog = np.array([other_speed_o.x, other_speed_o.y, other_speed_o.z, 1])
-    other_speed_e_homog = global_to_ego_matrix_rot_only.dot(other_speed_o_homog)
 
-    other_accel_o: "Vector3D" = other.get_acceleration_vector()
-    other_accel_o_homog = np.array([other_accel_o.x, other_accel_o.y, other_accel_o.z, 1])
-    other_accel_e_homog = global_to_ego_matrix_rot_only.dot(other_accel_o_homog)
-
-    pos = Pose(other_loc_e_homog[0], other_loc_e_homog[1])
-    speed = Velocity(other_speed_e_homog[0], other_speed_e_homog[1])
-    acceleration = Acceleration(other_accel_e_homog[0], other_accel_e_homog[1])
-
-    np_vec = np.array([other_loc_e_homog[0],
-                       other_loc_e_homog[1],
-                       other_speed_e_homog[0],
-                       other_speed_e_homog[1],
-                       other_accel_e_homog[0],
-                       other_accel_e_homog[1]])
+def transform_actor_kinematics_to_ego_frame(ego: "EgoVehicle", other: "OtherVehicle"):
+    np_vec = transform_vehicle_kinematics_to_ego_frame(ego, [other])[0]
+    pos, speed, acceleration = get_kinematics_from_vector(np_vec)
 
     return pos, speed, acceleration, np_vec
 
 
 def transform_ego_kinematics_to_ego_frame(ego_actor: "EgoVehicle"):
-    global_to_ego_matrix = np.array(ego_actor.get_world_position().get_inverse_matrix())
-    global_to_ego_matrix_rot_only = global_to_ego_matrix
-    # Cancel out translation as only rotation shall be applied to consider different directions, but similar abs value
-    global_to_ego_matrix_rot_only[:, 3] = np.array([0, 0, 0, 1])
-    ego_speed_g: carla.Vector3D = ego_actor.get_velocity()
-    ego_speed_g_homog = np.array([ego_speed_g.x, ego_speed_g.y, ego_speed_g.z, 1])
-    ego_speed_e_homog = global_to_ego_matrix_rot_only.dot(ego_speed_g_homog)
-    ego_accel_g: carla.Vector3D = ego_actor.get_acceleration_vector()
-    ego_accel_g_homog = np.array([ego_accel_g.x, ego_accel_g.y, ego_accel_g.z, 1])
-    ego_accel_e_homog = global_to_ego_matrix_rot_only.dot(ego_accel_g_homog)
-    np_vec = np.array([0, 0, ego_speed_e_homog[0], ego_speed_e_homog[1], ego_accel_e_homog[0], ego_accel_e_homog[1]])
-
-    pos = Pose(0,0)  # coordinate frame is set to ego center
-    speed = Velocity(ego_speed_e_homog[0], ego_speed_e_homog[1])
-    acceleration = Acceleration(ego_accel_e_homog[0], ego_accel_e_homog[1])
+    np_vec = transform_vehicle_kinematics_to_ego_frame(ego_actor, [ego_actor])[0]
+    np_vec[:2] = 0.0  # coordinate frame is set to ego center
+    pos, speed, acceleration = get_kinematics_from_vector(np_vec)
 
     return pos, speed, acceleration, np_vec
 
 
 def transform_global_pos_to_ego_frame(ego: "EgoVehicle", pos: "Location") -> Pose:
-    global_to_ego_matrix = np.array(ego.get_world_position().get_inverse_matrix())
+    global_to_ego_matrix = get_global_to_ego_matrix(ego)
 
     other_loc_g_homog = np.array([pos.x, pos.y, pos.z, 1])
     other_loc_e_homog = global_to_ego_matrix.dot(other_loc_g_homog)
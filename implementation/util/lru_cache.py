@@ -0,0 +1,104 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded key-value cache with least-recently-used eviction and hit/miss statistics.
+
+    Attributes
+    ----------
+    max_size : int
+        Maximum number of entries. The least recently used entry is evicted when the cache is full. A size of 0 disables
+        the cache (nothing is stored).
+    hits : int
+        Number of lookups that found an entry since the last statistics reset.
+    misses : int
+        Number of lookups that did not find an entry since the last statistics reset.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for the given key and marks it as most recently used.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+
+        Returns
+        -------
+        Optional[Any]
+            Cached value or None in case of a cache miss.
+        """
+        value = self._entries.get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores the given value (must not be None) and evicts the least recently used entry if the cache is full.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the entry.
+        value : Any
+            Value to cache.
+        """
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key_filter: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Removes all entries whose key matches the given filter, or all entries if no filter is given.
+
+        Parameters
+        ----------
+        key_filter : Optional[Callable[[Hashable], bool]]
+            Predicate on the keys of the entries that shall be removed. (The default value is None.)
+        """
+        if key_filter is None:
+            self._entries.clear()
+        else:
+            for key in [key for key in self._entries if key_filter(key)]:
+                del self._entries[key]
+
+    def get_hit_rate(self) -> float:
+        """Returns the share of lookups that were cache hits since the last statistics reset (0.0 without lookups).
+
+        Returns
+        -------
+        float
+            Hit rate in [0.0, 1.0].
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset_statistics(self) -> None:
+        """Resets the hit and miss counters."""
+        self.hits = 0
+        self.misses = 0
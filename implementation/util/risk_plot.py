@@ -6,20 +6,36 @@
 #
 #################### END LICENSE BLOCK #################################
 
-from typing import Optional, Tuple, TYPE_CHECKING
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 from matplotlib import rc
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 
 from sinadra_configuration_parameters import PREDICTION_HORIZON, PREDICTION_TIMESTEP
 
 if TYPE_CHECKING:
-    from matplotlib.figure import Figure
+    from matplotlib.artist import Artist
     from matplotlib.axes import Axes
     from matplotlib.lines import Line2D
 
+# Names of the risk series of the plot (see RiskPlot.set_risk_values)
+FRONT_VEHICLE_CUMULATIVE_RISK = "front_vehicle_cumulative_risk"
+FRONT_VEHICLE_EMERGENCY_RISK = "front_vehicle_emergency_risk"
+FRONT_VEHICLE_TARGET_BRAKE_RISK = "front_vehicle_target_brake_risk"
+FRONT_VEHICLE_IDM_RISK = "front_vehicle_idm_risk"
+LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK = "left_side_vehicle_longitudinal_risk"
+LEFT_SIDE_VEHICLE_LATERAL_RISK = "left_side_vehicle_lateral_risk"
+RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK = "right_side_vehicle_longitudinal_risk"
+RIGHT_SIDE_VEHICLE_LATERAL_RISK = "right_side_vehicle_lateral_risk"
+
 
 class RiskPlot:
+    """Off-screen risk plot of the SINADRA client. The figure is rendered by the Agg canvas (there is no pyplot figure
+    manager), thus, it can be drawn by a render thread. The static parts of the figure are rendered once into a cached
+    background, an update only restores the background and draws the risk lines (blitting).
+    """
+
     def __init__(self) -> None:
         # Configuration
         font_size = 14
@@ -63,7 +79,33 @@ class RiskPlot:
         self._initialize_left_side_vehicle_plots()
         self._initialize_right_side_vehicle_plots()
 
-        self._ax_risk.legend(loc="best")
+        legend = self._ax_risk.legend(loc="best")
+
+        # Risk series name -> setter of its y values
+        self._risk_value_setters = {
+            FRONT_VEHICLE_CUMULATIVE_RISK: self.set_front_vehicle_cumulative_risk,
+            FRONT_VEHICLE_EMERGENCY_RISK: self.set_front_vehicle_emergency_risk,
+            FRONT_VEHICLE_TARGET_BRAKE_RISK: self.set_front_vehicle_target_brake_risk,
+            FRONT_VEHICLE_IDM_RISK: self.set_front_vehicle_idm_risk,
+            LEFT_SIDE_VEHICLE_LONGITUDINAL_RISK: self.set_left_side_vehicle_longitudinal_risk,
+            LEFT_SIDE_VEHICLE_LATERAL_RISK: self.set_left_side_vehicle_lateral_risk,
+            RIGHT_SIDE_VEHICLE_LONGITUDINAL_RISK: self.set_right_side_vehicle_longitudinal_risk,
+            RIGHT_SIDE_VEHICLE_LATERAL_RISK: self.set_right_side_vehicle_lateral_risk,
+        }
+
+        # Blitting: the risk lines and everything that is drawn above them (spines and the legend, whose best location
+        # depends on the lines) are excluded from the cached background and drawn in z-order on each update. The legend
+        # handles are copied from the lines on creation, thus, the lines are only animated after the legend exists.
+        self._animated_artists: List["Artist"] = [self._fv_risk_line, self._fv_risk_line_emergency,
+                                                  self._fv_risk_line_target_brake, self._fv_risk_line_idm,
+                                                  self._left_sv_risk_x_line, self._left_sv_risk_y_line,
+                                                  self._right_sv_risk_x_line, self._right_sv_risk_y_line]
+        self._animated_artists.extend(self._ax_risk.spines.values())
+        self._animated_artists.append(legend)
+        for artist in self._animated_artists:
+            artist.set_animated(True)
+        self._animated_artists.sort(key=lambda artist: artist.get_zorder())
+        self._background = None
 
     def _initialize_front_vehicle_plots(self):
         # Y Values
@@ -104,7 +146,9 @@ class RiskPlot:
                                                          label="Right SV Cut-In Lat Risk")
 
     def _initialize_risk_plot_figure(self) -> None:
-        self._fig_risk, self._ax_risk = plt.subplots(dpi=300)
+        self._fig_risk = Figure(dpi=300)
+        FigureCanvasAgg(self._fig_risk)
+        self._ax_risk = self._fig_risk.subplots()
         self._ax_risk.axis([0, PREDICTION_HORIZON, 0, 1])
         self._fig_risk.suptitle('Integral Collision Risk')
         self._ax_risk.set_xlabel("Time Horizon [s]")
@@ -114,7 +158,6 @@ class RiskPlot:
     def update_and_draw_risk_plot(self) -> None:
         # Update dynamic risk plot with currently stored total risk
         # array
-        self._fig_risk.canvas.flush_events()
 
         # Prediction horizon and timestep are constant over scenario
         # -> not necessary to reset x axis
@@ -129,7 +172,16 @@ class RiskPlot:
         self._right_sv_risk_x_line.set_ydata(self._right_sv_risk_x_value)
         self._right_sv_risk_y_line.set_ydata(self._right_sv_risk_y_value)
 
-        self._fig_risk.canvas.draw()
+        canvas = self._fig_risk.canvas
+        if self._background is None:
+            # The first update renders the static parts of the figure (the animated artists are skipped)
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self._fig_risk.bbox)
+        else:
+            canvas.restore_region(self._background)
+        for artist in self._animated_artists:
+            self._fig_risk.draw_artist(artist)
+        canvas.blit(self._fig_risk.bbox)
 
         # Assures that the plots are back to [0, ...] arrays after
         # updating the next time in case that a vehicle is not of
@@ -137,11 +189,21 @@ class RiskPlot:
         self._reset_plot_values()
 
     def get_rgb_image(self) -> bytes:
-        return self._fig_risk.canvas.tostring_rgb()
+        return self.get_rgb_array().tobytes()
+
+    def get_rgb_array(self) -> np.ndarray:
+        # RGB view (height x width x 3) of the rendered figure, it is overwritten by the next update
+        return np.asarray(self._fig_risk.canvas.buffer_rgba())[:, :, :3]
 
     def get_width_height(self) -> Tuple[int]:
         return self._fig_risk.canvas.get_width_height()
 
+    def set_risk_values(self, risk_values: Dict[str, Sequence[float]]) -> None:
+        # Sets the y values of all risk series at once, the series that are not given are set to zero
+        self._reset_plot_values()
+        for series_name, values in risk_values.items():
+            self._risk_value_setters[series_name](values)
+
     def set_front_vehicle_cumulative_risk(self, fv_risk_x_value: np.ndarray) -> None:
         self._fv_risk_x_value = fv_risk_x_value
 
@@ -167,7 +229,14 @@ class RiskPlot:
         self._right_sv_risk_y_value = right_sv_risk_y_value
 
     def save_risk_plot_on_disk(self, directory_path: str, file_name: str) -> None:
+        # The animated artists are skipped by a regular draw, thus, they are drawn like static artists for the file
+        for artist in self._animated_artists:
+            artist.set_animated(False)
         self._fig_risk.savefig(f"{directory_path}{file_name}", dpi=300)
+        for artist in self._animated_artists:
+            artist.set_animated(True)
+        # Saving renders the canvas again, the background is captured anew on the next update
+        self._background = None
 
     def _reset_plot_values(self) -> None:
         self._reset_front_vehicle_values()
@@ -0,0 +1,154 @@
+#################### BEGIN LICENSE BLOCK ###############################
+#
+# Copyright (C) 2021 Fraunhofer IESE
+#
+# SPDX-License-Identifier: LGPL-2.1-only
+#
+#################### END LICENSE BLOCK #################################
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+
+from util.instrumentation import span
+from util.risk_plot import RiskPlot
+
+
+class _RenderRequest:
+
+    __slots__ = ("scene_image", "risk_values")
+
+    def __init__(self, scene_image: Optional[np.ndarray], risk_values: Optional[Dict[str, Sequence[float]]]) -> None:
+        self.scene_image = scene_image
+        self.risk_values = risk_values
+
+
+class RiskPlotRenderer:
+    """Render worker of the SINADRA client window. A render thread owns the risk plot, draws the latest risk values and
+    composes the window image (scene image above the risk plot). The requests are passed through a single slot: a
+    request that is not rendered yet is replaced by the next one, thus, a slow rendering skips frames instead of
+    delaying the risk computation.
+    """
+
+    def __init__(self, image_size: Tuple[int, int] = (800, 600)) -> None:
+        """Starts the render thread.
+
+        Parameters
+        ----------
+        image_size : Tuple[int, int]
+            Width and height of the scene image and of the risk plot in the window image. (The default value is
+            (800, 600).)
+        """
+        self._image_size = image_size
+        self._condition = threading.Condition()
+        self._pending_request: Optional[_RenderRequest] = None
+        # Risk plot files are saved after the pending request is rendered, no save request is dropped
+        self._pending_saves: List[Tuple[str, str]] = []
+        self._window_image: Optional[np.ndarray] = None
+        self._num_rendered_requests = 0
+        self._num_dropped_requests = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._render_loop, name="RiskPlotRenderer", daemon=True)
+        self._thread.start()
+
+    def submit(self, scene_image: Optional[np.ndarray],
+               risk_values: Optional[Dict[str, Sequence[float]]] = None) -> None:
+        """Requests the rendering of a window image. Replaces the pending request if it is not rendered yet (its risk
+        values are kept if the new request has none).
+
+        Parameters
+        ----------
+        scene_image : Optional[np.ndarray]
+            Scene image of the simulator (BGR). No window image is composed without a scene image.
+        risk_values : Optional[Dict[str, Sequence[float]]]
+            New y values of the risk series (see RiskPlot.set_risk_values) or None to keep the drawn risk plot. (The
+            default value is None.)
+        """
+        with self._condition:
+            if self._pending_request is not None:
+                self._num_dropped_requests += 1
+                if risk_values is None:
+                    risk_values = self._pending_request.risk_values
+            self._pending_request = _RenderRequest(scene_image, risk_values)
+            self._condition.notify()
+
+    def save_risk_plot_on_disk(self, directory_path: str, file_name: str) -> None:
+        """Saves the risk plot of the latest submitted risk values to a file (on the render thread).
+
+        Parameters
+        ----------
+        directory_path : str
+            Directory of the file (with trailing separator)
+        file_name : str
+            Name of the image file
+        """
+        with self._condition:
+            self._pending_saves.append((directory_path, file_name))
+            self._condition.notify()
+
+    def get_window_image(self) -> Optional[np.ndarray]:
+        """Returns the latest composed window image.
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Window image (BGR) or None if no window image was composed yet
+        """
+        with self._condition:
+            return self._window_image
+
+    def get_statistics(self) -> Tuple[int, int]:
+        """Returns the number of rendered requests and the number of requests that were replaced before rendering.
+
+        Returns
+        -------
+        Tuple[int, int]
+            Number of rendered and dropped requests
+        """
+        with self._condition:
+            return self._num_rendered_requests, self._num_dropped_requests
+
+    def close(self) -> None:
+        """Renders the pending request and pending saves and stops the render thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _render_loop(self) -> None:
+        # The risk plot is created by the render thread, it is never touched by another thread. It is drawn once with
+        # zero risks, thus, a window image can be composed before the first risk values arrive.
+        risk_plot = RiskPlot()
+        risk_plot.update_and_draw_risk_plot()
+        while True:
+            with self._condition:
+                while self._pending_request is None and not self._pending_saves and not self._closed:
+                    self._condition.wait()
+                request = self._pending_request
+                saves = self._pending_saves
+                self._pending_request = None
+                self._pending_saves = []
+                if request is None and not saves:
+                    return
+
+            if request is not None:
+                window_image = self._render(risk_plot, request)
+                with self._condition:
+                    if window_image is not None:
+                        self._window_image = window_image
+                    self._num_rendered_requests += 1
+            for directory_path, file_name in saves:
+                risk_plot.save_risk_plot_on_disk(directory_path, file_name)
+
+    def _render(self, risk_plot: RiskPlot, request: _RenderRequest) -> Optional[np.ndarray]:
+        if request.risk_values is not None:
+            risk_plot.set_risk_values(request.risk_values)
+            with span("plot_draw"):
+                risk_plot.update_and_draw_risk_plot()
+
+        if request.scene_image is None:
+            return None
+        with span("plot_compose"):
+            risk_image = cv2.resize(risk_plot.get_rgb_array(), self._image_size, interpolation=cv2.INTER_AREA)
+            scene_image = cv2.resize(request.scene_image, self._image_size, interpolation=cv2.INTER_AREA)
+            return cv2.vconcat([scene_image, risk_image])